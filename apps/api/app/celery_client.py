@@ -1,4 +1,7 @@
-"""Minimal Celery client to enqueue worker tasks. Same broker (REDIS_URL) as worker."""
+"""Minimal Celery client to enqueue worker tasks. Same broker (REDIS_URL) as worker.
+
+Queues and priorities come from the task routes in app.celery_routing.
+"""
 
 from __future__ import annotations
 
@@ -6,6 +9,7 @@ import logging
 import os
 from typing import Any
 
+from app.celery_routing import QUEUE_GPU, configure_routing
 from app.core.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -23,6 +27,7 @@ def _get_celery_app() -> Any:
             )
         from celery import Celery
         _celery_app = Celery(broker=settings.redis_url)
+        configure_routing(_celery_app)
     return _celery_app
 
 
@@ -62,6 +67,18 @@ def enqueue_create_notification(user_id: str, notification_type: str, payload: d
     )
 
 
+def enqueue_run_broadcast(job_id: str) -> None:
+    """Enqueue an admin broadcast job (notifications.broadcast). Resumable on worker side."""
+    app = _get_celery_app()
+    app.send_task("notify.run_broadcast", args=[job_id])  # type: ignore[attr-defined]
+
+
+def enqueue_process_payment_events() -> None:
+    """Wake the worker to apply stored payment webhooks (billing inbox)."""
+    app = _get_celery_app()
+    app.send_task("billing.process_payment_events")  # type: ignore[attr-defined]
+
+
 def enqueue_publish_due_posts() -> None:
     """Enqueue scheduled-post publication sweep."""
     app = _get_celery_app()
@@ -77,6 +94,16 @@ def enqueue_ai_safety_scan(asset_id: str, object_key: str, content_type: str) ->
     )
 
 
+def enqueue_embed_query(query_text: str, reply_to: str) -> None:
+    """Enqueue search-query embedding; the worker RPUSHes the vector (JSON) to reply_to."""
+    app = _get_celery_app()
+    app.send_task(  # type: ignore[attr-defined]
+        "ai_safety.embed_query",
+        args=[query_text],
+        kwargs={"reply_to": reply_to},
+    )
+
+
 def enqueue_remove_background(job_id: str) -> None:
     """Enqueue AI tool remove-background task. Idempotent on worker side."""
     app = _get_celery_app()
@@ -122,11 +149,11 @@ def enqueue_admin_kyc_reminder_email() -> None:
 def enqueue_motion_transfer(job_id: str) -> None:
     """Enqueue AI tool motion transfer task.
 
-    Routes to GPU queue when a GPU worker is available, otherwise falls back
-    to the default queue (CPU worker with Replicate backend).
+    Routes to GPU queue when a GPU worker is available, otherwise to the
+    ml-heavy queue (CPU worker with Replicate backend).
     """
     app = _get_celery_app()
-    queue = "gpu" if os.environ.get("MOTION_TRANSFER_USE_GPU") == "1" else None
+    queue = QUEUE_GPU if os.environ.get("MOTION_TRANSFER_USE_GPU") == "1" else None
     app.send_task("ai_tools.motion_transfer", args=[job_id], queue=queue)  # type: ignore[attr-defined]
 
 
@@ -0,0 +1,122 @@
+"""Celery queue topology shared by the API client (app.celery_client) and the worker.
+
+Every task is routed to a queue by name, so a slow job only ever waits behind jobs
+of its own class:
+
+    realtime  user-facing and time-critical: query embeddings, notifications,
+              scheduled publishing (also drains the legacy default "celery" queue)
+    media     derived image variants, thumbnails, video posters
+    ml-light  AI safety scans, captions, tags, translation, quick AI tools
+    ml-heavy  virtual try-on, animate, motion transfer (CPU), AI image generation
+    email     broadcasts, admin and onboarding email sweeps
+    billing   payment inbox and subscription renewals
+    gpu       motion transfer on the GPU worker (MOTION_TRANSFER_USE_GPU=1)
+
+Within a queue, messages carry a priority. On the Redis transport each queue is
+split into one list per priority step and the lower number is consumed first:
+PRIORITY_HIGH (0) before PRIORITY_NORMAL (3, the default) before PRIORITY_LOW (6).
+Producer and consumer must use the same BROKER_TRANSPORT_OPTIONS.
+
+Acks: tasks on QUEUES_ACKS_LATE queues are acknowledged after they run (redelivered
+if the worker dies mid-task; they are idempotent on the worker side); other queues
+ack on receipt. Prefetch, pool and concurrency are per worker process: see the
+worker profiles in worker.profiles.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+QUEUE_DEFAULT = "celery"
+QUEUE_REALTIME = "realtime"
+QUEUE_MEDIA = "media"
+QUEUE_ML_LIGHT = "ml-light"
+QUEUE_ML_HEAVY = "ml-heavy"
+QUEUE_EMAIL = "email"
+QUEUE_BILLING = "billing"
+QUEUE_GPU = "gpu"
+
+QUEUES = (
+    QUEUE_DEFAULT,
+    QUEUE_REALTIME,
+    QUEUE_MEDIA,
+    QUEUE_ML_LIGHT,
+    QUEUE_ML_HEAVY,
+    QUEUE_EMAIL,
+    QUEUE_BILLING,
+    QUEUE_GPU,
+)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 6
+
+BROKER_TRANSPORT_OPTIONS: dict[str, Any] = {
+    "priority_steps": [PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW, 9],
+    "sep": ":",
+    "queue_order_strategy": "priority",
+    # Unacked acks_late messages are redelivered after this; must exceed the longest
+    # task (motion transfer: 30 min hard limit).
+    "visibility_timeout": 7200,
+}
+
+QUEUES_ACKS_LATE = frozenset({QUEUE_MEDIA, QUEUE_ML_LIGHT, QUEUE_ML_HEAVY, QUEUE_BILLING, QUEUE_GPU})
+
+
+def _route(queue: str, priority: int = PRIORITY_NORMAL) -> dict[str, Any]:
+    return {"queue": queue, "priority": priority}
+
+
+TASK_ROUTES: dict[str, dict[str, Any]] = {
+    # realtime
+    "ai_safety.embed_query": _route(QUEUE_REALTIME, PRIORITY_HIGH),  # a search request is waiting
+    "notify.create_notification": _route(QUEUE_REALTIME),
+    "posts.publish_due_scheduled": _route(QUEUE_REALTIME),
+    "posts.refresh_feed_pull_creators": _route(QUEUE_REALTIME, PRIORITY_LOW),
+    # media
+    "media.generate_derived_variants": _route(QUEUE_MEDIA, PRIORITY_HIGH),
+    "media.generate_thumbnail": _route(QUEUE_MEDIA, PRIORITY_HIGH),
+    "media.generate_video_poster": _route(QUEUE_MEDIA),
+    # ml-light
+    "ai_safety.scan_image": _route(QUEUE_ML_LIGHT, PRIORITY_HIGH),  # gates publication
+    "ai_tools.remove_background": _route(QUEUE_ML_LIGHT),
+    "ai_tools.cartoonize": _route(QUEUE_ML_LIGHT),
+    "ai_tools.auto_caption": _route(QUEUE_ML_LIGHT),
+    "translation.translate_caption": _route(QUEUE_ML_LIGHT),
+    "ai_safety.generate_caption": _route(QUEUE_ML_LIGHT, PRIORITY_LOW),
+    "ai_safety.generate_tags": _route(QUEUE_ML_LIGHT, PRIORITY_LOW),
+    # ml-heavy
+    "ai.generate_images": _route(QUEUE_ML_HEAVY),
+    "ai_tools.animate_image": _route(QUEUE_ML_HEAVY),
+    "ai_tools.virtual_tryon": _route(QUEUE_ML_HEAVY),
+    "ai_tools.motion_transfer": _route(QUEUE_ML_HEAVY),
+    # email
+    "notify.run_broadcast": _route(QUEUE_EMAIL),
+    "notify.resume_broadcasts": _route(QUEUE_EMAIL),
+    "admin.send_verification_help_email": _route(QUEUE_EMAIL, PRIORITY_LOW),
+    "admin.send_kyc_reminder_email": _route(QUEUE_EMAIL, PRIORITY_LOW),
+    "onboarding.send_sequence_emails": _route(QUEUE_EMAIL, PRIORITY_LOW),
+    # billing
+    "billing.process_payment_events": _route(QUEUE_BILLING, PRIORITY_HIGH),
+    "billing.renew_worldline_subscriptions": _route(QUEUE_BILLING),
+}
+
+
+def task_annotations() -> dict[str, dict[str, Any]]:
+    """acks_late for every task routed to a QUEUES_ACKS_LATE queue."""
+    return {
+        name: {"acks_late": True}
+        for name, route in TASK_ROUTES.items()
+        if route["queue"] in QUEUES_ACKS_LATE
+    }
+
+
+def configure_routing(app: Any) -> None:
+    """Apply the queue topology to a Celery app (producer or worker)."""
+    app.conf.update(
+        task_routes=TASK_ROUTES,
+        task_default_queue=QUEUE_DEFAULT,
+        task_default_priority=PRIORITY_NORMAL,
+        broker_transport_options=BROKER_TRANSPORT_OPTIONS,
+        task_annotations=task_annotations(),
+    )
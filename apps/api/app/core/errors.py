@@ -47,6 +47,8 @@ ERROR_MESSAGES: dict[str, str] = {
     "profile_incomplete": "Complete your profile (handle, avatar) before posting.",
     "kyc_required": "Identity verification required. Complete KYC to unlock posting.",
     "internal_server_error": "Something went wrong. Please try again or contact support.",
+    "realtime_unavailable": "Live updates are unavailable right now. Messages will still arrive on refresh.",
+    "auth_busy": "We're handling a lot of sign-ins right now. Please try again in a moment.",
 }
 
 
@@ -59,6 +61,7 @@ class AppError(HTTPException):
         detail: str | dict[str, Any],
         *,
         field_errors: dict[str, list[str]] | None = None,
+        headers: dict[str, str] | None = None,
     ) -> None:
         # Build standardized error body
         if isinstance(detail, str):
@@ -71,9 +74,9 @@ class AppError(HTTPException):
             }
             if field_errors:
                 body["field_errors"] = field_errors
-            super().__init__(status_code=status_code, detail=body)
+            super().__init__(status_code=status_code, detail=body, headers=headers)
         else:
             # Fallback for dict-based detail (backwards compat)
             if "request_id" not in detail:
                 detail["request_id"] = get_request_id()
-            super().__init__(status_code=status_code, detail=detail)
+            super().__init__(status_code=status_code, detail=detail, headers=headers)
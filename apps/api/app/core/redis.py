@@ -0,0 +1,87 @@
+"""Shared async Redis clients for the API process (one connection pool per event loop).
+
+get_redis() is the pool for ordinary commands. Blocking reads (BLPOP) hold their
+connection for the whole wait, so they go through get_blocking_redis(), a separate
+bounded pool: waiters queue for one of its connections instead of draining the shared
+pool that rate limiting, the principal cache and realtime depend on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core.settings import get_settings
+
+_SHARED = "shared"
+_BLOCKING = "blocking"
+
+_clients: dict[tuple[int, str], tuple[asyncio.AbstractEventLoop, Redis]] = {}
+
+
+def _client_for_loop(kind: str, build: Callable[[], Redis]) -> Redis:
+    """redis.asyncio connections belong to the loop that opened them, so pools are
+    keyed by loop: one in the server, a fresh one per test loop."""
+    loop = asyncio.get_running_loop()
+    entry = _clients.get((id(loop), kind))
+    if entry is None or entry[0] is not loop:
+        for key, (other, _) in list(_clients.items()):
+            if other.is_closed():
+                del _clients[key]
+        client = build()
+        _clients[(id(loop), kind)] = (loop, client)
+        return client
+    return entry[1]
+
+
+def get_redis() -> Redis | None:
+    """Pooled client for the running loop, or None when REDIS_URL is unset."""
+    settings = get_settings()
+    if not (settings.redis_url or "").strip():
+        return None
+    return _client_for_loop(
+        _SHARED,
+        lambda: Redis.from_url(
+            str(settings.redis_url),
+            max_connections=settings.redis_max_connections,
+            socket_connect_timeout=settings.redis_socket_timeout_seconds,
+            socket_timeout=settings.redis_socket_timeout_seconds,
+            health_check_interval=30,
+        ),
+    )
+
+
+def get_blocking_redis() -> Redis | None:
+    """Client for blocking reads on its own pool of AI_SEARCH_EMBED_MAX_WAITERS connections.
+
+    A call finding every connection busy waits for one, up to
+    AI_SEARCH_EMBED_TIMEOUT_SECONDS, then raises ConnectionError.
+    """
+    settings = get_settings()
+    if not (settings.redis_url or "").strip():
+        return None
+    return _client_for_loop(
+        _BLOCKING,
+        lambda: Redis(
+            connection_pool=BlockingConnectionPool.from_url(
+                str(settings.redis_url),
+                max_connections=settings.ai_search_embed_max_waiters,
+                timeout=settings.ai_search_embed_timeout_seconds,
+                socket_connect_timeout=settings.redis_socket_timeout_seconds,
+                socket_timeout=settings.redis_socket_timeout_seconds,
+                health_check_interval=30,
+            )
+        ),
+    )
+
+
+async def close_redis() -> None:
+    """Close the pools owned by the running loop (app shutdown)."""
+    loop_id = id(asyncio.get_running_loop())
+    for kind in (_SHARED, _BLOCKING):
+        entry = _clients.pop((loop_id, kind), None)
+        if entry is not None:
+            await entry[1].aclose()  # type: ignore[attr-defined]
+            await entry[1].connection_pool.disconnect()  # not owned by a Redis(connection_pool=...)
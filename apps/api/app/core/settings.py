@@ -17,7 +17,12 @@ class Settings(BaseSettings):
     environment: Literal["local", "staging", "production", "prod"] = "local"
 
     database_url: str = Field(alias="DATABASE_URL")
+    # Celery worker: one engine per worker process (worker.runtime), which runs one task at a time.
+    worker_db_pool_size: int = Field(default=2, alias="WORKER_DB_POOL_SIZE", ge=1)
+    worker_db_max_overflow: int = Field(default=3, alias="WORKER_DB_MAX_OVERFLOW", ge=0)
     redis_url: str = Field(default="", alias="REDIS_URL")
+    redis_max_connections: int = Field(default=50, alias="REDIS_MAX_CONNECTIONS", ge=1)
+    redis_socket_timeout_seconds: float = Field(default=1.0, alias="REDIS_SOCKET_TIMEOUT_SECONDS")
 
     # Storage: minio (local) or s3 (AWS ECS). When s3, use S3_BUCKET + IAM role.
     storage: Literal["minio", "s3"] = Field(default="minio", alias="STORAGE")
@@ -30,6 +35,8 @@ class Settings(BaseSettings):
     minio_secret_key: str = Field(default="", alias="MINIO_SECRET_KEY")
     minio_bucket: str = Field(default="", alias="MINIO_BUCKET")
     minio_secure: bool = Field(default=False, alias="MINIO_SECURE")
+    # Per-process HTTP connection pool size shared by all S3/MinIO calls (API and worker).
+    storage_max_pool_connections: int = Field(default=50, alias="STORAGE_MAX_POOL_CONNECTIONS")
 
     # CloudFront signed URL delivery (optional; falls back to S3 presigned if not set)
     cloudfront_domain: str | None = Field(default=None, alias="CLOUDFRONT_DOMAIN")
@@ -65,6 +72,14 @@ class Settings(BaseSettings):
     ccbill_test_mode: bool = Field(default=True, alias="CCBILL_TEST_MODE")
     # Webhook test bypass for automated tests (must be off in production)
     ccbill_webhook_test_bypass: bool = Field(default=False, alias="CCBILL_WEBHOOK_TEST_BYPASS")
+    # Payment webhook inbox: when async, webhooks only persist the event and the
+    # worker applies it (billing.process_payment_events); otherwise it is applied inline.
+    payment_webhooks_async: bool = Field(default=False, alias="PAYMENT_WEBHOOKS_ASYNC")
+    payment_events_batch_size: int = Field(default=50, alias="PAYMENT_EVENTS_BATCH_SIZE", ge=1, le=1000)
+    payment_event_max_attempts: int = Field(default=8, alias="PAYMENT_EVENT_MAX_ATTEMPTS", ge=1)
+    payment_event_retry_base_seconds: float = Field(
+        default=30.0, alias="PAYMENT_EVENT_RETRY_BASE_SECONDS", gt=0
+    )
     checkout_success_url: str = Field(
         default="http://localhost:3000/billing/success",
         alias="CHECKOUT_SUCCESS_URL",
@@ -74,6 +89,23 @@ class Settings(BaseSettings):
         alias="CHECKOUT_CANCEL_URL",
     )
     platform_fee_percent: float = Field(default=20, alias="PLATFORM_FEE_PERCENT", ge=20, le=100)
+    # Rows each ledger balance is spread over (see ledger.service.apply_balance_delta)
+    ledger_balance_shards: int = Field(default=16, alias="LEDGER_BALANCE_SHARDS", ge=1, le=256)
+    # Ledger events moved pending -> available per transaction by reconcile_availability
+    payout_reconcile_chunk_size: int = Field(
+        default=5000, alias="PAYOUT_RECONCILE_CHUNK_SIZE", ge=1, le=100_000
+    )
+    # Creators per statement (and commit) in payouts.service.generate_weekly_payouts
+    payout_generate_batch_size: int = Field(
+        default=1000, alias="PAYOUT_GENERATE_BATCH_SIZE", ge=1, le=50_000
+    )
+    # Rows fetched and decrypted per chunk by payouts.service.stream_payout_export
+    payout_export_chunk_size: int = Field(
+        default=1000, alias="PAYOUT_EXPORT_CHUNK_SIZE", ge=1, le=50_000
+    )
+    payout_export_decrypt_in_thread: bool = Field(
+        default=True, alias="PAYOUT_EXPORT_DECRYPT_IN_THREAD"
+    )
     tip_min_cents: int = Field(default=100, alias="TIP_MIN_CENTS", ge=1)
     tip_max_cents: int = Field(default=10_000_00, alias="TIP_MAX_CENTS", ge=100)  # $10k
     rate_limit_messages_per_min: int = Field(
@@ -89,9 +121,44 @@ class Settings(BaseSettings):
         default=30, alias="RATE_LIMIT_COMMENTS_PER_MIN", ge=1
     )
     message_max_length: int = Field(default=2000, alias="MESSAGE_MAX_LENGTH", ge=1)
+    # DM event streams (messaging.realtime): per-connection queue before a slow client is
+    # told to resync, idle heartbeat, and how many messages a reconnect may replay.
+    dm_stream_queue_size: int = Field(default=256, alias="DM_STREAM_QUEUE_SIZE", ge=1)
+    dm_stream_heartbeat_seconds: float = Field(
+        default=15.0, alias="DM_STREAM_HEARTBEAT_SECONDS", gt=0
+    )
+    dm_stream_replay_limit: int = Field(default=200, alias="DM_STREAM_REPLAY_LIMIT", ge=1)
+    # Home feed timelines (posts.timeline): creators above this many followers are read at
+    # feed time instead of fanned out; posts copied into a timeline on follow; total cache.
+    feed_fanout_max_followers: int = Field(default=10000, alias="FEED_FANOUT_MAX_FOLLOWERS", ge=0)
+    feed_follow_backfill_posts: int = Field(default=200, alias="FEED_FOLLOW_BACKFILL_POSTS", ge=0)
+    feed_total_cache_seconds: float = Field(default=60.0, alias="FEED_TOTAL_CACHE_SECONDS", ge=0)
     media_url_ttl_seconds: int = Field(default=900, alias="MEDIA_URL_TTL_SECONDS")
+    # Signed download URL reuse (media.url_cache): entries per process, and how long before
+    # expiry a cached URL stops being handed out.
+    signed_url_cache_size: int = Field(default=10000, alias="SIGNED_URL_CACHE_SIZE")
+    signed_url_cache_margin_seconds: int = Field(default=120, alias="SIGNED_URL_CACHE_MARGIN_SECONDS")
     rate_limit_max: int = Field(default=10, alias="RATE_LIMIT_MAX")
     rate_limit_window_seconds: int = Field(default=60, alias="RATE_LIMIT_WINDOW_SECONDS")
+    # Per-IP ceiling across all emails for login / password reset / resend (same window).
+    rate_limit_ip_max: int = Field(default=120, alias="RATE_LIMIT_IP_MAX")
+    # In-process fallback when Redis is absent/unreachable: max tracked keys (LRU-evicted).
+    rate_limit_local_max_keys: int = Field(default=10000, alias="RATE_LIMIT_LOCAL_MAX_KEYS")
+    # Authenticated principal cache (auth.principal_cache): Redis TTL (0 disables the cache),
+    # per-process TTL (bounds staleness across processes) and per-process entries.
+    principal_cache_ttl_seconds: int = Field(default=60, alias="PRINCIPAL_CACHE_TTL_SECONDS", ge=0)
+    principal_cache_local_ttl_seconds: float = Field(
+        default=5.0, alias="PRINCIPAL_CACHE_LOCAL_TTL_SECONDS", ge=0
+    )
+    principal_cache_size: int = Field(default=10000, alias="PRINCIPAL_CACHE_SIZE", ge=1)
+    # Argon2 runs off the event loop (auth.security): worker threads, and how many hash/verify
+    # calls may be running or queued before new ones are shed with 503 auth_busy.
+    password_hash_workers: int = Field(default=4, alias="PASSWORD_HASH_WORKERS", ge=1)
+    password_hash_max_pending: int = Field(default=64, alias="PASSWORD_HASH_MAX_PENDING", ge=1)
+    # last_activity_at writes are buffered per process and flushed in one UPDATE this often.
+    activity_flush_interval_seconds: float = Field(
+        default=15.0, alias="ACTIVITY_FLUSH_INTERVAL_SECONDS", gt=0
+    )
 
     # Image upload max size (bytes). Video has separate media_max_video_bytes.
     media_max_image_bytes: int = Field(
@@ -121,6 +188,19 @@ class Settings(BaseSettings):
     mail_dry_run: bool = Field(alias="MAIL_DRY_RUN", default=False)
     resend_api_key: str = Field(alias="RESEND_API_KEY", default="")
     resend_webhook_secret: str = Field(alias="RESEND_WEBHOOK_SECRET", default="")
+    # Broadcast jobs (notifications.broadcast): recipients per chunk (and commit),
+    # emails per provider request (Resend batch max 100), provider request rate and
+    # concurrency, and how long a running job's lease lasts before another worker resumes it.
+    broadcast_chunk_size: int = Field(default=500, alias="BROADCAST_CHUNK_SIZE", ge=1, le=10_000)
+    broadcast_email_batch_size: int = Field(
+        default=100, alias="BROADCAST_EMAIL_BATCH_SIZE", ge=1, le=100
+    )
+    broadcast_email_requests_per_second: float = Field(
+        default=4.0, alias="BROADCAST_EMAIL_REQUESTS_PER_SECOND", gt=0
+    )
+    broadcast_email_concurrency: int = Field(default=2, alias="BROADCAST_EMAIL_CONCURRENCY", ge=1)
+    broadcast_lease_seconds: int = Field(default=300, alias="BROADCAST_LEASE_SECONDS", ge=10)
+    broadcast_max_attempts: int = Field(default=5, alias="BROADCAST_MAX_ATTEMPTS", ge=1)
 
     # Watermark for derived image variants (footer only; originals unchanged)
     media_watermark_text: str = Field(
@@ -251,6 +331,41 @@ class Settings(BaseSettings):
     ai_safety_minor_med_threshold: float = Field(
         default=0.3, ge=0.0, le=1.0, alias="AI_SAFETY_MINOR_MED_THRESHOLD"
     )
+    # Worker safety scans (worker.ml.safety_batch): images per batched forward pass,
+    # how long the first image waits for others, and torch intra-op threads (0 = torch default).
+    ai_safety_batch_max_size: int = Field(default=8, ge=1, le=64, alias="AI_SAFETY_BATCH_MAX_SIZE")
+    ai_safety_batch_max_wait_ms: float = Field(
+        default=25.0, ge=0, le=5000, alias="AI_SAFETY_BATCH_MAX_WAIT_MS"
+    )
+    ai_safety_torch_threads: int = Field(default=0, ge=0, alias="AI_SAFETY_TORCH_THREADS")
+    # Worker model backend (worker.ml.model_loader): "onnx" serves the encoder models
+    # (NSFW, age, clothing segmentation, sentence embeddings) through onnxruntime from
+    # exported, quantised, memory-mapped files cached in ML_ONNX_CACHE_DIR ($HF_HOME/onnx).
+    ml_backend: Literal["torch", "onnx"] = Field(default="torch", alias="ML_BACKEND")
+    ml_onnx_quantization: Literal["int8", "fp16", "none"] = Field(
+        default="int8", alias="ML_ONNX_QUANTIZATION"
+    )
+    ml_onnx_cache_dir: str = Field(default="", alias="ML_ONNX_CACHE_DIR")
+    ml_onnx_intra_op_threads: int = Field(default=0, ge=0, alias="ML_ONNX_INTRA_OP_THREADS")
+    # Models the Celery parent loads before forking its pool (worker.ml.warmup), per queue:
+    # "queue=nsfw,age;other=segformer", or a bare "nsfw,age,sentence" for any queue. Empty
+    # = lazy loading in each child. The worker writes WORKER_READY_FILE once warm.
+    worker_warmup_models: str = Field(default="", alias="WORKER_WARMUP_MODELS")
+    worker_ready_file: str = Field(default="/tmp/worker-ready", alias="WORKER_READY_FILE")
+    # Semantic media search (ai_safety.query_embedding): wait for the worker's query
+    # embedding, how many searches may wait at once (each holds a connection of its own
+    # Redis pool, app.core.redis.get_blocking_redis), and how long / how many embeddings
+    # are cached.
+    ai_search_embed_timeout_seconds: float = Field(
+        default=3.0, gt=0, le=30, alias="AI_SEARCH_EMBED_TIMEOUT_SECONDS"
+    )
+    ai_search_embed_max_waiters: int = Field(default=20, ge=1, alias="AI_SEARCH_EMBED_MAX_WAITERS")
+    ai_search_embedding_cache_ttl_seconds: int = Field(
+        default=86400, ge=0, alias="AI_SEARCH_EMBEDDING_CACHE_TTL_SECONDS"
+    )
+    ai_search_embedding_cache_size: int = Field(
+        default=2048, ge=1, alias="AI_SEARCH_EMBEDDING_CACHE_SIZE"
+    )
     enable_ai_tools: bool = Field(default=True, alias="ENABLE_AI_TOOLS")
     enable_cartoon_avatar: bool = Field(default=True, alias="ENABLE_CARTOON_AVATAR")
     enable_animate_image: bool = Field(default=False, alias="ENABLE_ANIMATE_IMAGE")
@@ -265,6 +380,19 @@ class Settings(BaseSettings):
     ai_tool_motion_transfer_monthly_limit: int = Field(
         default=2, alias="AI_TOOL_MOTION_TRANSFER_MONTHLY_LIMIT", ge=1
     )
+    # Background removal (worker.ml.background_removal): rembg model, onnxruntime intra-op
+    # threads (0 = onnxruntime default), long side of the copy the mask is predicted on
+    # (0 = full size), how many pending remove_bg jobs one task claims and runs, and after
+    # how long a job left processing by a dead worker may be claimed again.
+    ai_tool_rmbg_model: Literal["u2net", "isnet-general-use", "u2netp"] = Field(
+        default="u2net", alias="AI_TOOL_RMBG_MODEL"
+    )
+    ai_tool_rmbg_intra_op_threads: int = Field(default=0, ge=0, alias="AI_TOOL_RMBG_INTRA_OP_THREADS")
+    ai_tool_rmbg_max_side: int = Field(default=1024, ge=0, alias="AI_TOOL_RMBG_MAX_SIDE")
+    ai_tool_rmbg_batch_size: int = Field(default=4, ge=1, le=32, alias="AI_TOOL_RMBG_BATCH_SIZE")
+    ai_tool_rmbg_claim_timeout_seconds: int = Field(
+        default=600, ge=60, alias="AI_TOOL_RMBG_CLAIM_TIMEOUT_SECONDS"
+    )
     # Wan2.2-Animate backend config (set on GPU workers only)
     motion_transfer_backend: str = Field(
         default="wan_animate_14b", alias="MOTION_TRANSFER_BACKEND"
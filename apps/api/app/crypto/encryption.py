@@ -8,35 +8,51 @@ from __future__ import annotations
 
 import base64
 import os
+from collections.abc import Iterable
+from functools import lru_cache
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 
 
-def _get_key() -> bytes:
-    """Load 32-byte AES key from env (base64-encoded)."""
-    raw = os.environ.get("PAYOUTS_ENCRYPTION_KEY_B64", "")
-    if not raw:
-        raise RuntimeError("PAYOUTS_ENCRYPTION_KEY_B64 not set")
+def _decode_key(raw: str) -> bytes:
+    """32-byte AES key from the base64 env value."""
     key = base64.b64decode(raw)
     if len(key) != 32:
         raise RuntimeError("PAYOUTS_ENCRYPTION_KEY_B64 must decode to exactly 32 bytes")
     return key
 
 
+@lru_cache(maxsize=4)
+def _cipher_for(raw: str) -> AESGCM:
+    return AESGCM(_decode_key(raw))
+
+
+def _cipher() -> AESGCM:
+    """AESGCM for the current env key; built once per key value, not per call."""
+    raw = os.environ.get("PAYOUTS_ENCRYPTION_KEY_B64", "")
+    if not raw:
+        raise RuntimeError("PAYOUTS_ENCRYPTION_KEY_B64 not set")
+    return _cipher_for(raw)
+
+
+def _decrypt_with(aesgcm: AESGCM, token: str) -> str:
+    raw = base64.b64decode(token)
+    return aesgcm.decrypt(raw[:12], raw[12:], None).decode()
+
+
 def encrypt(plaintext: str) -> str:
     """Encrypt a UTF-8 string → base64 blob (iv + ciphertext + tag)."""
-    key = _get_key()
     iv = os.urandom(12)  # 96-bit IV for GCM
-    aesgcm = AESGCM(key)
-    ct = aesgcm.encrypt(iv, plaintext.encode(), None)  # ct includes 16-byte tag
+    ct = _cipher().encrypt(iv, plaintext.encode(), None)  # ct includes 16-byte tag
     return base64.b64encode(iv + ct).decode()
 
 
 def decrypt(token: str) -> str:
     """Decrypt a base64 blob back to UTF-8 string."""
-    key = _get_key()
-    raw = base64.b64decode(token)
-    iv = raw[:12]
-    ct = raw[12:]
-    aesgcm = AESGCM(key)
-    return aesgcm.decrypt(iv, ct, None).decode()
+    return _decrypt_with(_cipher(), token)
+
+
+def decrypt_many(tokens: Iterable[str | None]) -> list[str | None]:
+    """decrypt() over a batch with one key lookup; None stays None."""
+    aesgcm = _cipher()
+    return [None if token is None else _decrypt_with(aesgcm, token) for token in tokens]
@@ -0,0 +1,57 @@
+"""Materialised home feed timelines (feed_entries).
+
+One row per (reader, post) for posts from followed creators plus the reader's
+own posts, written on publish and follow instead of recomputed per request.
+Backfilled here from existing follows and published posts.
+
+Revision ID: 0039
+Revises: 0038
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0039_feed_entries"
+down_revision = "0038_motion_transfer"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed_entries",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("post_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("creator_user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["post_id"], ["posts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["creator_user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "post_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO feed_entries (user_id, post_id, creator_user_id, created_at)
+        SELECT f.fan_user_id, p.id, p.creator_user_id, p.created_at
+        FROM posts p JOIN follows f ON f.creator_user_id = p.creator_user_id
+        WHERE p.status = 'PUBLISHED'
+        UNION
+        SELECT p.creator_user_id, p.id, p.creator_user_id, p.created_at
+        FROM posts p
+        WHERE p.status = 'PUBLISHED'
+        """
+    )
+    op.create_index(
+        "ix_feed_entries_user_created", "feed_entries", ["user_id", "created_at", "post_id"]
+    )
+    op.create_index(
+        "ix_feed_entries_user_creator", "feed_entries", ["user_id", "creator_user_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_feed_entries_user_creator", table_name="feed_entries")
+    op.drop_index("ix_feed_entries_user_created", table_name="feed_entries")
+    op.drop_table("feed_entries")
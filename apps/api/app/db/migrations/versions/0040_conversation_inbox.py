@@ -0,0 +1,71 @@
+"""Denormalised inbox columns on conversations.
+
+Last-message preview/time and per-side unread counters and read marks, maintained by
+create_message and mark_conversation_read. The per-user (updated_at, id) indexes
+replace the single-column participant indexes for keyset inbox pages, and
+profiles.user_id gets the index the other-party join needs.
+
+Previews are backfilled from messages; unread counters start at zero because reads
+were not tracked before.
+
+Revision ID: 0040
+Revises: 0039
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0040_conversation_inbox"
+down_revision = "0039_feed_entries"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("conversations", sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("conversations", sa.Column("last_message_preview", sa.String(100), nullable=True))
+    op.add_column(
+        "conversations",
+        sa.Column("creator_unread_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "conversations",
+        sa.Column("fan_unread_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column("conversations", sa.Column("creator_last_read_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("conversations", sa.Column("fan_last_read_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        """
+        UPDATE conversations c
+        SET last_message_at = m.created_at,
+            last_message_preview = COALESCE(LEFT(m.text, 100), '[Media]')
+        FROM (
+            SELECT DISTINCT ON (conversation_id) conversation_id, text, created_at
+            FROM messages
+            ORDER BY conversation_id, created_at DESC, id DESC
+        ) m
+        WHERE m.conversation_id = c.id
+        """
+    )
+    op.create_index(
+        "ix_conversations_creator_inbox", "conversations", ["creator_user_id", "updated_at", "id"]
+    )
+    op.create_index("ix_conversations_fan_inbox", "conversations", ["fan_user_id", "updated_at", "id"])
+    op.drop_index("ix_conversations_creator", table_name="conversations")
+    op.drop_index("ix_conversations_fan", table_name="conversations")
+    op.create_index("ix_profiles_user_id", "profiles", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_profiles_user_id", table_name="profiles")
+    op.create_index("ix_conversations_fan", "conversations", ["fan_user_id"])
+    op.create_index("ix_conversations_creator", "conversations", ["creator_user_id"])
+    op.drop_index("ix_conversations_fan_inbox", table_name="conversations")
+    op.drop_index("ix_conversations_creator_inbox", table_name="conversations")
+    op.drop_column("conversations", "fan_last_read_at")
+    op.drop_column("conversations", "creator_last_read_at")
+    op.drop_column("conversations", "fan_unread_count")
+    op.drop_column("conversations", "creator_unread_count")
+    op.drop_column("conversations", "last_message_preview")
+    op.drop_column("conversations", "last_message_at")
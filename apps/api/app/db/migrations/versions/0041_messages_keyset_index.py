@@ -0,0 +1,29 @@
+"""(conversation_id, created_at, id) index on messages.
+
+Message history pages on a composite (created_at, id) keyset; with id in the index
+both directions are a single index range scan with no sort. Replaces the
+(conversation_id, created_at) index from 0010.
+
+Revision ID: 0041
+Revises: 0040
+"""
+
+from alembic import op
+
+
+revision = "0041_messages_keyset_index"
+down_revision = "0040_conversation_inbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_conversation_created_id", "messages", ["conversation_id", "created_at", "id"]
+    )
+    op.drop_index("ix_messages_conversation_created", table_name="messages")
+
+
+def downgrade() -> None:
+    op.create_index("ix_messages_conversation_created", "messages", ["conversation_id", "created_at"])
+    op.drop_index("ix_messages_conversation_created_id", table_name="messages")
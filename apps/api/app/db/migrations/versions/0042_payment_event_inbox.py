@@ -0,0 +1,58 @@
+"""Webhook inbox columns on payment_events.
+
+Provider webhooks are stored first and applied by the worker: provider marks inbox
+rows (checkout intents stay NULL), ordering_key serialises events of one
+subscription/checkout/creator, and attempts/next_attempt_at/last_error/dead_at carry
+retry and dead-letter state. Partial indexes cover the pending set and the
+dead-letter view.
+
+Existing rows were applied inline in the same transaction that stored them, so they
+are left without a provider.
+
+Revision ID: 0042
+Revises: 0041
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0042_payment_event_inbox"
+down_revision = "0041_messages_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("payment_events", sa.Column("provider", sa.String(16), nullable=True))
+    op.add_column("payment_events", sa.Column("ordering_key", sa.String(255), nullable=True))
+    op.add_column(
+        "payment_events",
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column("payment_events", sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("payment_events", sa.Column("last_error", sa.Text(), nullable=True))
+    op.add_column("payment_events", sa.Column("dead_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        "ix_payment_events_pending",
+        "payment_events",
+        ["ordering_key", "received_at", "id"],
+        postgresql_where=sa.text("provider IS NOT NULL AND processed_at IS NULL AND dead_at IS NULL"),
+    )
+    op.create_index(
+        "ix_payment_events_dead",
+        "payment_events",
+        ["dead_at"],
+        postgresql_where=sa.text("dead_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_payment_events_dead", table_name="payment_events")
+    op.drop_index("ix_payment_events_pending", table_name="payment_events")
+    op.drop_column("payment_events", "dead_at")
+    op.drop_column("payment_events", "last_error")
+    op.drop_column("payment_events", "next_attempt_at")
+    op.drop_column("payment_events", "attempts")
+    op.drop_column("payment_events", "ordering_key")
+    op.drop_column("payment_events", "provider")
@@ -0,0 +1,62 @@
+"""Sharded ledger balances.
+
+An account balance becomes the sum of up to LEDGER_BALANCE_SHARDS rows keyed by
+(account_id, currency, shard), each updated with a single upsert. Existing rows
+(duplicates are possible: the old payout path upserted without a lock) are merged
+into shard 0 before the unique constraint is added; it also replaces the
+account_id index.
+
+Revision ID: 0043
+Revises: 0042
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0043_ledger_balance_shards"
+down_revision = "0042_payment_event_inbox"
+branch_labels = None
+depends_on = None
+
+
+_MERGE_SHARDS = """
+    WITH totals AS (
+        SELECT account_id, currency,
+               (array_agg(id ORDER BY created_at, id))[1] AS keep_id,
+               sum(balance) AS total
+        FROM ledger_balances
+        GROUP BY account_id, currency
+        HAVING count(*) > 1
+    ), dropped AS (
+        DELETE FROM ledger_balances b
+        USING totals t
+        WHERE b.account_id = t.account_id AND b.currency = t.currency AND b.id <> t.keep_id
+    )
+    UPDATE ledger_balances b SET balance = t.total, shard = 0
+    FROM totals t
+    WHERE b.id = t.keep_id
+"""
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ledger_balances",
+        sa.Column("shard", sa.SmallInteger(), server_default="0", nullable=False),
+    )
+    op.execute(_MERGE_SHARDS)
+    op.create_unique_constraint(
+        "uq_ledger_balance_account_currency_shard",
+        "ledger_balances",
+        ["account_id", "currency", "shard"],
+    )
+    op.drop_index("ix_ledger_balances_account_id", table_name="ledger_balances")
+
+
+def downgrade() -> None:
+    op.create_index("ix_ledger_balances_account_id", "ledger_balances", ["account_id"])
+    op.drop_constraint(
+        "uq_ledger_balance_account_currency_shard", "ledger_balances", type_="unique"
+    )
+    op.execute(_MERGE_SHARDS)
+    op.drop_column("ledger_balances", "shard")
@@ -0,0 +1,43 @@
+"""Explicit reconciliation marker on ledger events.
+
+available_at records when reconcile_availability moved an event's net amount from
+creator_pending to creator_available; the partial index covers exactly the events
+still waiting, so finding the next chunk no longer scans ledger_entries. Events
+already moved (an 'avail:<id>' entry exists) are backfilled from that entry.
+
+Revision ID: 0044
+Revises: 0043
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0044_ledger_event_available_at"
+down_revision = "0043_ledger_balance_shards"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ledger_events", sa.Column("available_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        """
+        UPDATE ledger_events e
+        SET available_at = le.created_at
+        FROM ledger_entries le
+        WHERE le.account_id = 'creator_available:' || e.creator_id::text
+          AND le.reference = 'avail:' || e.id::text
+        """
+    )
+    op.create_index(
+        "ix_ledger_events_unreconciled",
+        "ledger_events",
+        ["created_at", "id"],
+        postgresql_where=sa.text("available_at IS NULL AND net_cents > 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ledger_events_unreconciled", table_name="ledger_events")
+    op.drop_column("ledger_events", "available_at")
@@ -0,0 +1,25 @@
+"""One payout per ledger event.
+
+generate_weekly_payouts inserts payout items set-based; a unique ledger_event_id
+makes paying an event twice (overlapping periods, concurrent runs) fail instead of
+relying on the anti-join alone, and gives that anti-join its index.
+
+Revision ID: 0045
+Revises: 0044
+"""
+
+from alembic import op
+
+
+revision = "0045_payout_item_event_unique"
+down_revision = "0044_ledger_event_available_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint("uq_payout_items_ledger_event", "payout_items", ["ledger_event_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_payout_items_ledger_event", "payout_items", type_="unique")
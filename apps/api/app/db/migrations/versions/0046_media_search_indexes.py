@@ -0,0 +1,40 @@
+"""Indexes for media search.
+
+media_assets.owner_user_id had no index, so both search paths (and every other
+per-owner media query) scanned the table. The keyword path now matches tags in SQL
+on lower(tags::text); a trigram GIN index serves its substring LIKEs when pg_trgm can
+be installed (same savepoint guard as 0017: without it the search still works).
+
+Revision ID: 0046
+Revises: 0045
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0046_media_search_indexes"
+down_revision = "0045_payout_item_event_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_media_assets_owner_user_id", "media_assets", ["owner_user_id"])
+
+    conn = op.get_bind()
+    conn.execute(sa.text("SAVEPOINT trgm_ext"))
+    try:
+        conn.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(sa.text(
+            "CREATE INDEX IF NOT EXISTS ix_image_tags_tags_trgm "
+            "ON image_tags USING gin ((lower(tags::text)) gin_trgm_ops)"
+        ))
+        conn.execute(sa.text("RELEASE SAVEPOINT trgm_ext"))
+    except Exception:
+        conn.execute(sa.text("ROLLBACK TO SAVEPOINT trgm_ext"))
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_image_tags_tags_trgm")
+    op.drop_index("ix_media_assets_owner_user_id", table_name="media_assets")
@@ -0,0 +1,56 @@
+"""Broadcast jobs.
+
+Admin broadcasts are stored as jobs and run by the worker in chunks over users.id;
+cursor_user_id and the counters record progress so a job resumes after a restart.
+
+Revision ID: 0047
+Revises: 0046
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0047_broadcast_jobs"
+down_revision = "0046_media_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "broadcast_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="queued"),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("send_email", sa.Boolean(), nullable=False),
+        sa.Column("target_role", sa.String(length=16), nullable=True),
+        sa.Column("target_user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("total_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("cursor_user_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("sent_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("email_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("email_failed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("lease_token", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_broadcast_jobs_pending",
+        "broadcast_jobs",
+        ["created_at"],
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_jobs_pending", table_name="broadcast_jobs")
+    op.drop_table("broadcast_jobs")
@@ -0,0 +1,26 @@
+"""AI tool job timings.
+
+The worker records per-stage wall-clock timings (download, inference, upload, ...)
+on each AI tool job it finishes.
+
+Revision ID: 0048
+Revises: 0047
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+revision = "0048_ai_tool_job_timings"
+down_revision = "0047_broadcast_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("ai_tool_jobs", sa.Column("timings", JSONB, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("ai_tool_jobs", "timings")
@@ -0,0 +1,48 @@
+"""Feed pull creators.
+
+Creators whose posts are read at feed time instead of fanned out into
+feed_entries (posts.timeline). The set used to be derived from follower counts on
+the fly; persisting it lets fan-out and readers agree, and lets a creator who drops
+back under FEED_FANOUT_MAX_FOLLOWERS have the posts of their pull period backfilled.
+Seeded from the current follower counts; pulled_since is unknown for those rows, so
+the backfill on a later switch covers all of their posts.
+
+Revision ID: 0049
+Revises: 0048
+"""
+
+import os
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0049_feed_pull_creators"
+down_revision = "0048_ai_tool_job_timings"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed_pull_creators",
+        sa.Column("creator_user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("pulled_since", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["creator_user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("creator_user_id"),
+    )
+    threshold = int(os.environ.get("FEED_FANOUT_MAX_FOLLOWERS", "10000"))
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO feed_pull_creators (creator_user_id, pulled_since)
+            SELECT creator_user_id, to_timestamp(0) FROM follows
+            GROUP BY creator_user_id HAVING count(*) > :threshold
+            """
+        ).bindparams(threshold=threshold)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("feed_pull_creators")
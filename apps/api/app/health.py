@@ -1,9 +1,8 @@
 from __future__ import annotations
 
 from sqlalchemy import text
-from redis.asyncio import Redis
 
-from app.core.settings import get_settings
+from app.core.redis import get_redis
 from app.db.session import engine
 
 
@@ -17,15 +16,12 @@ async def check_db() -> bool:
 
 
 async def check_redis() -> bool:
-    settings = get_settings()
-    if not (settings.redis_url or "").strip():
+    client = get_redis()
+    if client is None:
         # Redis is optional in no-worker deployments.
         return True
-    client = Redis.from_url(str(settings.redis_url))
     try:
         result = await client.ping()
         return bool(result)
     except Exception:
         return False
-    finally:
-        await client.aclose()  # type: ignore[attr-defined]
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.core.logging import configure_logging
+from app.core.redis import close_redis
 from app.core.request_id import get_request_id, set_request_id
 from app.core.settings import get_settings
 
@@ -32,7 +36,9 @@ if _settings.sentry_dsn:
 from app.health import check_db, check_redis
 from app.modules.ai.brand_router import router as brand_router
 from app.modules.ai.router import router as ai_router
+from app.modules.auth.activity import flush_activity, run_activity_flusher
 from app.modules.auth.router import router as auth_router
+from app.modules.auth.security import shutdown_password_hash_pool
 from app.modules.billing.router import router as billing_router
 from app.modules.billing.webhook_alias_router import router as billing_webhook_alias_router
 from app.modules.creator_earnings.router import router as creator_earnings_router
@@ -40,6 +46,8 @@ from app.modules.creators.router import router as creators_router
 from app.modules.future.router import router as future_router
 from app.modules.ledger.router import router as ledger_router
 from app.modules.media.router import router as media_router
+from app.modules.media.storage import close_storage_clients
+from app.modules.messaging.realtime import close_dm_hub
 from app.modules.messaging.router import router as messaging_router
 from app.modules.notifications.router import router as notifications_router
 from app.modules.onboarding.kyc_router import router as kyc_router
@@ -62,8 +70,23 @@ from app.modules.posts.router import feed_router, router as posts_router
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:  # noqa: ARG001
+    activity_flusher = asyncio.create_task(run_activity_flusher())
+    yield
+    activity_flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await activity_flusher
+    await flush_activity()
+    await close_dm_hub()
+    await close_redis()
+    close_storage_clients()
+    shutdown_password_hash_pool()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Zinovia Fans API")
+    app = FastAPI(title="Zinovia Fans API", lifespan=lifespan)
 
     settings = get_settings()
     cors_origins = settings.cors_origins_list()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import logging
 from datetime import UTC, datetime
 from urllib.parse import quote
 from uuid import UUID
@@ -10,6 +11,7 @@ from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.errors import AppError
+from app.celery_client import enqueue_process_payment_events, enqueue_run_broadcast
 from app.core.settings import get_settings
 from app.db.session import get_async_session
 from app.modules.auth.deps import require_admin, require_admin_writer
@@ -19,6 +21,8 @@ from app.modules.admin.schemas import (
     AdminCreatorAction,
     AdminCreatorPage,
     AdminCreatorOut,
+    AdminPaymentEventOut,
+    AdminPaymentEventPage,
     AdminPostAction,
     AdminPostOut,
     AdminPostPage,
@@ -41,13 +45,22 @@ from app.modules.admin.service import (
     admin_action_user,
     get_user_detail_admin,
     list_creators_admin,
+    list_dead_payment_events_admin,
     list_posts_admin,
     list_transactions_admin,
     list_user_posts_admin,
     list_user_subscribers_admin,
     list_users_admin,
-    send_broadcast_notification,
 )
+from app.modules.billing.inbox import requeue_payment_event
+from app.modules.notifications.broadcast import (
+    BROADCAST_STATUS_QUEUED,
+    create_broadcast_job,
+    get_broadcast_job,
+)
+from app.modules.notifications.models import BroadcastJob
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -140,6 +153,44 @@ async def list_transactions(
     )
 
 
+@router.get(
+    "/payment-events/dead",
+    response_model=AdminPaymentEventPage,
+    operation_id="admin_list_dead_payment_events",
+)
+async def list_dead_payment_events(
+    session: AsyncSession = Depends(get_async_session),
+    _admin: User = Depends(require_admin),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+) -> AdminPaymentEventPage:
+    items, total = await list_dead_payment_events_admin(session, page=page, page_size=page_size)
+    return AdminPaymentEventPage(
+        items=[AdminPaymentEventOut(**item) for item in items],
+        total=total,
+        page=page,
+        page_size=page_size,
+    )
+
+
+@router.post(
+    "/payment-events/{payment_event_id}/retry",
+    operation_id="admin_retry_payment_event",
+)
+async def retry_payment_event(
+    payment_event_id: UUID,
+    session: AsyncSession = Depends(get_async_session),
+    admin: User = Depends(require_admin_writer),
+) -> dict:
+    event = await requeue_payment_event(session, payment_event_id)
+    logger.info("admin_requeue_payment_event event_id=%s admin=%s", event.event_id, admin.id)
+    try:
+        enqueue_process_payment_events()
+    except Exception as e:
+        logger.warning("Failed to enqueue payment event processing: %s", e)
+    return {"status": "ok", "event_id": event.event_id}
+
+
 # ---------------------------------------------------------------------------
 # Users (all roles) — list, detail, actions, posts, subscribers
 # ---------------------------------------------------------------------------
@@ -247,31 +298,67 @@ async def list_user_subscribers(
 # ---------------------------------------------------------------------------
 
 
+def _broadcast_out(job: BroadcastJob) -> AdminSendNotificationResponse:
+    return AdminSendNotificationResponse(
+        job_id=job.id,
+        status=job.status,
+        total_count=job.total_count,
+        sent_count=job.sent_count,
+        email_count=job.email_count,
+        email_failed_count=job.email_failed_count,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
 @router.post(
     "/notifications/send",
     response_model=AdminSendNotificationResponse,
     operation_id="admin_send_notification",
     summary="Send broadcast notification (+ optional email) to users",
     description=(
-        "Create in-app notifications for targeted users and optionally send "
-        "personalised emails. Use {display_name} in the title or message to "
-        "insert each creator's display name."
+        "Queue a broadcast job that creates in-app notifications for targeted users "
+        "and optionally sends personalised emails. Use {display_name} in the title or "
+        "message to insert each creator's display name. Poll "
+        "/admin/notifications/broadcasts/{job_id} for progress."
     ),
 )
 async def send_notification(
     payload: AdminSendNotificationRequest,
     session: AsyncSession = Depends(get_async_session),
-    _admin: User = Depends(require_admin_writer),
+    admin: User = Depends(require_admin_writer),
 ) -> AdminSendNotificationResponse:
-    result = await send_broadcast_notification(
+    job = await create_broadcast_job(
         session,
         title=payload.title,
         message=payload.message,
         send_email=payload.send_email,
         target_role=payload.target_role,
         target_user_id=payload.target_user_id,
+        created_by=admin.id,
     )
-    return AdminSendNotificationResponse(**result)
+    if job.status == BROADCAST_STATUS_QUEUED:
+        try:
+            enqueue_run_broadcast(str(job.id))
+        except Exception as e:
+            # Stored already; the broadcast sweep picks it up.
+            logger.warning("Failed to enqueue broadcast job_id=%s: %s", job.id, e)
+    return _broadcast_out(job)
+
+
+@router.get(
+    "/notifications/broadcasts/{job_id}",
+    response_model=AdminSendNotificationResponse,
+    operation_id="admin_get_broadcast",
+    summary="Broadcast job progress",
+)
+async def get_broadcast(
+    job_id: UUID,
+    session: AsyncSession = Depends(get_async_session),
+    _admin: User = Depends(require_admin),
+) -> AdminSendNotificationResponse:
+    return _broadcast_out(await get_broadcast_job(session, job_id))
 
 
 # ---------------------------------------------------------------------------
@@ -815,7 +902,7 @@ async def list_user_media(
             "object_key": m.object_key,
             "content_type": m.content_type,
             "size_bytes": m.size_bytes,
-            "download_url": generate_signed_download(storage, m.object_key),
+            "download_url": await generate_signed_download(storage, m.object_key),
             "created_at": m.created_at.isoformat() if m.created_at else None,
         }
         for m in rows
@@ -823,6 +910,26 @@ async def list_user_media(
     return {"items": items, "total": total}
 
 
+@router.get("/media/url-cache-stats", operation_id="admin_media_url_cache_stats")
+async def media_url_cache_stats(
+    _admin: User = Depends(require_admin),
+) -> dict:
+    """Signed download URL cache counters for this API process."""
+    from app.modules.media.url_cache import get_signed_url_cache
+
+    return get_signed_url_cache().stats()
+
+
+@router.get("/auth/password-hash-stats", operation_id="admin_auth_password_hash_stats")
+async def auth_password_hash_stats(
+    _admin: User = Depends(require_admin),
+) -> dict:
+    """Argon2 pool counters for this API process (queue wait, hash time, 503 sheds)."""
+    from app.modules.auth.security import get_password_hash_pool
+
+    return get_password_hash_pool().stats()
+
+
 @router.delete("/media/{media_id}", operation_id="admin_delete_media")
 async def delete_media(
     media_id: UUID,
@@ -91,6 +91,25 @@ class AdminTransactionPage(BaseModel):
     page_size: int
 
 
+class AdminPaymentEventOut(BaseModel):
+    id: UUID
+    provider: str
+    event_id: str
+    event_type: str
+    ordering_key: str | None = None
+    attempts: int
+    last_error: str | None = None
+    received_at: datetime
+    dead_at: datetime | None = None
+
+
+class AdminPaymentEventPage(BaseModel):
+    items: list[AdminPaymentEventOut]
+    total: int
+    page: int
+    page_size: int
+
+
 # ---------------------------------------------------------------------------
 # Users (all roles)
 # ---------------------------------------------------------------------------
@@ -194,5 +213,14 @@ class AdminSendNotificationRequest(BaseModel):
 
 
 class AdminSendNotificationResponse(BaseModel):
+    """A broadcast job: queued by the send endpoint, then run by the worker in chunks."""
+
+    job_id: UUID
+    status: str
+    total_count: int
     sent_count: int
     email_count: int
+    email_failed_count: int = 0
+    last_error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
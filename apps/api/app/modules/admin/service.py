@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 from uuid import UUID
 
@@ -10,11 +9,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.errors import AppError
 from app.modules.auth.constants import ADMIN_ROLE, CREATOR_ROLE, FAN_ROLE
 from app.modules.auth.models import Profile, User
-from app.modules.billing.models import Subscription
+from app.modules.billing.models import PaymentEvent, Subscription
 from app.modules.ledger.models import LedgerEvent
 from app.modules.media.models import MediaObject
-from app.modules.notifications.models import Notification
+from app.modules.posts.constants import POST_STATUS_PUBLISHED
 from app.modules.posts.models import Post, PostMedia
+from app.modules.posts.timeline import fan_out_posts
 from app.shared.pagination import normalize_pagination
 
 logger = logging.getLogger(__name__)
@@ -184,7 +184,7 @@ async def list_posts_admin(
             media_map[pid].append({
                 "media_id": str(mo_id),
                 "content_type": ctype,
-                "download_url": generate_signed_download(storage, obj_key),
+                "download_url": await generate_signed_download(storage, obj_key),
             })
 
     items = []
@@ -221,7 +221,12 @@ async def admin_action_post(
         post.status = "REMOVED"
         logger.info("admin_remove_post post_id=%s reason=%s", post_id, reason)
     elif action == "restore":
-        post.status = "PUBLISHED"
+        was_published = post.status == POST_STATUS_PUBLISHED
+        post.status = POST_STATUS_PUBLISHED
+        if not was_published:
+            # Follows made while it was removed never copied it into a timeline.
+            await session.flush()
+            await fan_out_posts(session, [post.id])
         logger.info("admin_restore_post post_id=%s", post_id)
     else:
         raise AppError(status_code=400, detail="invalid_action")
@@ -283,6 +288,46 @@ async def list_transactions_admin(
     return items, total
 
 
+async def list_dead_payment_events_admin(
+    session: AsyncSession,
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> tuple[list[dict], int]:
+    """Admin: payment webhooks the inbox gave up on (dead-lettered), newest first."""
+    page, page_size, offset, limit = normalize_pagination(
+        page, page_size,
+        default_size=DEFAULT_PAGE_SIZE,
+        max_size=MAX_PAGE_SIZE,
+        invalid_page_size_use_default=True,
+    )
+    dead = PaymentEvent.dead_at.is_not(None)
+    total = (await session.execute(select(func.count(PaymentEvent.id)).where(dead))).scalar_one() or 0
+    rows = (
+        await session.execute(
+            select(PaymentEvent)
+            .where(dead)
+            .order_by(PaymentEvent.dead_at.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+    ).scalars().all()
+    items = [
+        {
+            "id": event.id,
+            "provider": event.provider,
+            "event_id": event.event_id,
+            "event_type": event.event_type,
+            "ordering_key": event.ordering_key,
+            "attempts": event.attempts,
+            "last_error": event.last_error,
+            "received_at": event.received_at,
+            "dead_at": event.dead_at,
+        }
+        for event in rows
+    ]
+    return items, total
+
+
 # ---------------------------------------------------------------------------
 # Users (all roles) — list, detail, posts, subscribers, actions
 # ---------------------------------------------------------------------------
@@ -446,7 +491,7 @@ async def list_user_posts_admin(
                 media_items.append({
                     "media_id": str(mo.id),
                     "content_type": mo.content_type or "",
-                    "download_url": generate_signed_download(storage, mo.object_key),
+                    "download_url": await generate_signed_download(storage, mo.object_key),
                 })
         items.append({
             "id": p.id,
@@ -738,101 +783,3 @@ async def admin_action_user(
 
     await session.commit()
     return {"status": "ok", "action": action, "user_id": str(target_user_id)}
-
-
-# ---------------------------------------------------------------------------
-# Broadcast notifications
-# ---------------------------------------------------------------------------
-
-BROADCAST_EMAIL_DELAY = 1  # seconds between emails (rate limiting)
-
-
-async def send_broadcast_notification(
-    session: AsyncSession,
-    *,
-    title: str,
-    message: str,
-    send_email: bool,
-    target_role: str | None = None,
-    target_user_id: UUID | None = None,
-) -> dict[str, int]:
-    """Send in-app notification (+ optional email) to targeted users.
-
-    The message body supports ``{display_name}`` placeholder for personalisation.
-    """
-    from app.modules.onboarding.mail import send_admin_notification_email
-
-    # Build user query
-    q = (
-        select(User, Profile)
-        .outerjoin(Profile, Profile.user_id == User.id)
-        .where(User.is_active.is_(True))
-    )
-
-    if target_user_id:
-        q = q.where(User.id == target_user_id)
-    elif target_role == "creator":
-        q = q.where(User.role == CREATOR_ROLE)
-    elif target_role == "fan":
-        q = q.where(User.role == FAN_ROLE)
-    elif target_role == "all":
-        pass  # no role filter — all active users
-    else:
-        raise AppError(status_code=400, detail="target_role or target_user_id required")
-
-    rows = (await session.execute(q)).all()
-
-    if not rows:
-        return {"sent_count": 0, "email_count": 0}
-
-    # Create in-app notifications
-    notifications = []
-    for user, _profile in rows:
-        notifications.append(
-            Notification(
-                user_id=user.id,
-                type="admin_broadcast",
-                payload_json={"title": title, "message": message},
-            )
-        )
-    session.add_all(notifications)
-    await session.commit()
-
-    sent_count = len(notifications)
-    email_count = 0
-
-    # Send emails (personalised with {display_name})
-    if send_email:
-        for user, profile in rows:
-            display_name = (
-                (profile.display_name if profile else None)
-                or user.email.split("@")[0]
-            )
-            personalised_title = title.replace("{display_name}", display_name)
-            personalised_message = message.replace("{display_name}", display_name)
-
-            try:
-                await send_admin_notification_email(
-                    recipient=user.email,
-                    title=personalised_title,
-                    message=personalised_message,
-                )
-                email_count += 1
-            except Exception:
-                logger.exception(
-                    "broadcast email failed for user_id=%s email=%s",
-                    user.id,
-                    user.email,
-                )
-
-            # Rate limit
-            await asyncio.sleep(BROADCAST_EMAIL_DELAY)
-
-    logger.info(
-        "broadcast_notification sent=%d emailed=%d target_role=%s target_user_id=%s",
-        sent_count,
-        email_count,
-        target_role,
-        target_user_id,
-    )
-    return {"sent_count": sent_count, "email_count": email_count}
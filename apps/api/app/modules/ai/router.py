@@ -26,7 +26,7 @@ from app.modules.ai.service import (
 from app.modules.auth.deps import get_current_user
 from app.modules.auth.models import User
 from app.modules.auth.rate_limit import check_rate_limit_custom
-from app.modules.media.service import generate_signed_download
+from app.modules.media.service import generate_signed_downloads
 from app.modules.media.storage import get_storage_client
 
 router = APIRouter()
@@ -46,10 +46,8 @@ async def list_ai_jobs(
     for job in jobs:
         result_urls: list[str] = []
         if job.status == "READY" and job.result_object_keys:
-            result_urls = [
-                generate_signed_download(storage, k)
-                for k in job.result_object_keys
-            ]
+            signed = await generate_signed_downloads(storage, job.result_object_keys)
+            result_urls = [signed[k] for k in job.result_object_keys]
         out.append(
             AiImageJobOut(
                 id=job.id,
@@ -103,10 +101,8 @@ async def get_job_detail(
     result_urls: list[str] = []
     if job.status == "READY" and job.result_object_keys:
         storage = get_storage_client()
-        result_urls = [
-            generate_signed_download(storage, k)
-            for k in job.result_object_keys
-        ]
+        signed = await generate_signed_downloads(storage, job.result_object_keys)
+        result_urls = [signed[k] for k in job.result_object_keys]
     return AiImageJobOut(
         id=job.id,
         status=job.status,
@@ -125,7 +125,7 @@ async def apply_ai_image(
     object_key = keys[result_index]
 
     storage = get_storage_client()
-    public_url = generate_signed_download(storage, object_key)
+    public_url = await generate_signed_download(storage, object_key)
 
     if apply_to == "landing.hero":
         if not _can_apply_landing_hero(user):
@@ -187,7 +187,7 @@ async def get_brand_assets_urls(session: AsyncSession) -> dict[str, str | None]:
     for key in ["landing.hero"]:
         asset = assets.get(key)
         if asset and asset.value_object_key:
-            out[key] = generate_signed_download(storage, asset.value_object_key)
+            out[key] = await generate_signed_download(storage, asset.value_object_key)
         else:
             out[key] = None
     return out
@@ -0,0 +1,116 @@
+"""Query embeddings for semantic media search.
+
+The API does not load sentence-transformers: the worker's ai_safety.embed_query task
+encodes the query and RPUSHes the vector to a one-off Redis reply key, which the
+search handler awaits with short BLPOPs (AI_SEARCH_EMBED_TIMEOUT_SECONDS in total),
+so the event loop keeps serving while the worker encodes. The BLPOPs run on their own
+bounded pool (get_blocking_redis, AI_SEARCH_EMBED_MAX_WAITERS connections), so a burst
+of searches queues there instead of exhausting the shared pool. Celery has no result
+backend here, so result.get() was never an option.
+
+Searches repeat, so vectors are cached by normalised query: an in-process LRU in
+front of Redis (shared by API processes, AI_SEARCH_EMBEDDING_CACHE_TTL_SECONDS).
+Without Redis there is no broker either and callers fall back to keyword search.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from collections import OrderedDict
+
+from app.core.redis import get_blocking_redis, get_redis
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "query_embedding:v1:"
+REPLY_KEY_PREFIX = "query_embedding:reply:"
+# Reply keys outlive the wait so a late worker reply does not leak a key forever.
+REPLY_TTL_SECONDS = 60
+# Each BLPOP must return within the client's socket timeout (REDIS_SOCKET_TIMEOUT_SECONDS).
+_BLPOP_SLICE_SECONDS = 0.5
+
+_local: OrderedDict[str, list[float]] = OrderedDict()
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, single-spaced query; what the worker encodes and the cache key."""
+    return " ".join(query.lower().split())
+
+
+def _local_get(key: str) -> list[float] | None:
+    embedding = _local.get(key)
+    if embedding is not None:
+        _local.move_to_end(key)
+    return embedding
+
+
+def _local_put(key: str, embedding: list[float]) -> None:
+    _local[key] = embedding
+    _local.move_to_end(key)
+    while len(_local) > get_settings().ai_search_embedding_cache_size:
+        _local.popitem(last=False)
+
+
+def reset_query_embedding_cache() -> None:
+    """Drop the in-process tier (tests)."""
+    _local.clear()
+
+
+def _parse(raw: bytes | str) -> list[float] | None:
+    value = json.loads(raw)
+    if isinstance(value, list) and value and all(isinstance(v, (int, float)) for v in value):
+        return [float(v) for v in value]
+    return None
+
+
+async def get_query_embedding(query: str) -> list[float] | None:
+    """Embedding for a search query, or None (no Redis, worker timeout or error)."""
+    key = normalize_query(query)
+    if not key:
+        return None
+    embedding = _local_get(key)
+    if embedding is not None:
+        return embedding
+    client = get_redis()
+    waiter = get_blocking_redis()
+    if client is None or waiter is None:
+        return None
+
+    settings = get_settings()
+    cache_key = CACHE_KEY_PREFIX + hashlib.sha256(key.encode()).hexdigest()
+    try:
+        raw = await client.get(cache_key)
+        if raw is not None and (embedding := _parse(raw)) is not None:
+            _local_put(key, embedding)
+            return embedding
+
+        from app.celery_client import enqueue_embed_query
+
+        reply_to = REPLY_KEY_PREFIX + uuid.uuid4().hex
+        enqueue_embed_query(key, reply_to)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.ai_search_embed_timeout_seconds
+        while (remaining := deadline - loop.time()) > 0:
+            reply = await waiter.blpop([reply_to], timeout=min(_BLPOP_SLICE_SECONDS, remaining))
+            if reply is not None:
+                embedding = _parse(reply[1])
+                break
+        else:
+            logger.warning("query embedding timed out after %.1fs", settings.ai_search_embed_timeout_seconds)
+            return None
+        if embedding is None:
+            return None
+        _local_put(key, embedding)
+        if settings.ai_search_embedding_cache_ttl_seconds:
+            await client.set(
+                cache_key, json.dumps(embedding), ex=settings.ai_search_embedding_cache_ttl_seconds
+            )
+        return embedding
+    except Exception:
+        logger.warning("query embedding failed, using keyword search", exc_info=True)
+        return None
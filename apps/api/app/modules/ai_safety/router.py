@@ -25,6 +25,7 @@ from app.modules.ai_safety.schemas import (
     SearchResultItem,
     TagsOut,
 )
+from app.modules.ai_safety.query_embedding import get_query_embedding
 from app.modules.ai_safety.service import (
     admin_review_scan,
     check_pgvector_available,
@@ -164,38 +165,27 @@ async def search_media(
 ) -> SearchResponse:
     """Search media by tags (keyword match).
 
-    Uses pgvector similarity search when available and a query embedding
-    is provided via worker task. Falls back to keyword matching on tags.
+    Uses pgvector similarity search when available and the worker returns a query
+    embedding in time (awaited, cached; see ai_safety.query_embedding). Falls back
+    to keyword matching on tags.
     """
     _require_ai_safety()
 
-    # Check if pgvector is available for vector search
-    has_vector = await check_pgvector_available(session)
-
-    if has_vector:
-        # For pgvector search, we need a query embedding.
-        # The worker generates embeddings — to avoid loading sentence-transformers
-        # in the API, we use a synchronous Celery task with a short timeout.
-        try:
-            from app.celery_client import _get_celery_app
-
-            app = _get_celery_app()
-            result = app.send_task(
-                "ai_safety.embed_query",
-                args=[q],
-            )
-            query_embedding = result.get(timeout=10)  # 10s timeout
-            if query_embedding and isinstance(query_embedding, list):
-                items, mode = await search_media_by_vector(
-                    session, user.id, query_embedding, limit
-                )
+    if await check_pgvector_available(session):
+        query_embedding = await get_query_embedding(q)
+        if query_embedding:
+            try:
+                async with session.begin_nested():
+                    items, mode = await search_media_by_vector(
+                        session, user.id, query_embedding, limit
+                    )
                 return SearchResponse(
                     items=[SearchResultItem(**item) for item in items],
                     mode=mode,
                     total=len(items),
                 )
-        except Exception:
-            logger.debug("Vector search failed, falling back to keyword search")
+            except Exception:
+                logger.warning("Vector search failed, falling back to keyword search", exc_info=True)
 
     # Fallback: keyword-based tag search
     items, mode = await search_media_by_tags(session, user.id, q, limit)
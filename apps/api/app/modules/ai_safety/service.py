@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 import logging
+import time
 import uuid
 from datetime import UTC, datetime
 
-from sqlalchemy import func, select, text, update
+from sqlalchemy import ColumnElement, Text, and_, case, cast, func, or_, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.errors import AppError
@@ -15,6 +16,9 @@ from app.modules.media.models import MediaObject
 
 logger = logging.getLogger(__name__)
 
+_PGVECTOR_RECHECK_SECONDS = 300.0
+_pgvector_cache: tuple[float, bool] | None = None
+
 
 async def get_scan_for_media(
     session: AsyncSession,
@@ -64,36 +68,45 @@ async def search_media_by_tags(
     """Search media by keyword matching against tags.
 
     Returns (results, mode) where mode is "keyword".
-    This is the fallback when pgvector is not available.
+    This is the fallback when pgvector is not available. A keyword matches when it
+    is a substring of any tag; matching and scoring run in SQL per array element
+    (jsonb_array_elements_text), behind a LIKE on lower(tags::text) that
+    ix_image_tags_tags_trgm indexes when pg_trgm is installed. The element check keeps
+    the JSON punctuation of the text form (e.g. "," or "[") from matching every row.
     """
     keywords = [w.strip().lower() for w in query.split() if w.strip()]
-    if not keywords:
+    # Tags are plain words; a keyword with JSON-escaped characters cannot match one.
+    usable = [kw for kw in keywords if '"' not in kw and "\\" not in kw]
+    if not usable:
         return [], "keyword"
 
-    # Query image_tags joined with media_assets for ownership check
-    q = (
-        select(ImageTag.media_asset_id, ImageTag.tags)
-        .join(MediaObject, MediaObject.id == ImageTag.media_asset_id)
-        .where(MediaObject.owner_user_id == owner_user_id)
-    )
-    rows = (await session.execute(q)).all()
+    tags_text = func.lower(cast(ImageTag.tags, Text))
 
-    # Score by number of matching keywords
-    results = []
-    for row in rows:
-        tags = row.tags or []
-        match_count = sum(
-            1 for kw in keywords if any(kw in tag.lower() for tag in tags)
-        )
-        if match_count > 0:
-            results.append({
-                "media_asset_id": row.media_asset_id,
-                "tags": tags,
-                "score": float(match_count) / len(keywords),
-            })
+    def _matches(kw: str) -> ColumnElement[bool]:
+        tag = func.jsonb_array_elements_text(ImageTag.tags).table_valued("value").alias("tag")
+        in_some_tag = select(tag.c.value).where(func.lower(tag.c.value).contains(kw, autoescape=True))
+        return and_(tags_text.contains(kw, autoescape=True), in_some_tag.exists())
 
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return results[:limit], "keyword"
+    matches = [_matches(kw) for kw in usable]
+    match_count = sum((case((m, 1), else_=0) for m in matches[1:]), case((matches[0], 1), else_=0))
+    rows = (
+        await session.execute(
+            select(ImageTag.media_asset_id, ImageTag.tags, match_count.label("match_count"))
+            .join(MediaObject, MediaObject.id == ImageTag.media_asset_id)
+            .where(MediaObject.owner_user_id == owner_user_id, or_(*matches))
+            .order_by(match_count.desc(), ImageTag.media_asset_id)
+            .limit(limit)
+        )
+    ).all()
+    results = [
+        {
+            "media_asset_id": row.media_asset_id,
+            "tags": row.tags or [],
+            "score": float(row.match_count) / len(keywords),
+        }
+        for row in rows
+    ]
+    return results, "keyword"
 
 
 async def search_media_by_vector(
@@ -109,12 +122,12 @@ async def search_media_by_vector(
     embedding_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
     q = text("""
         SELECT it.media_asset_id, it.tags,
-               1 - (it.embedding <=> :query_vec::vector) AS score
+               1 - (it.embedding <=> CAST(:query_vec AS vector)) AS score
         FROM image_tags it
         JOIN media_assets ma ON ma.id = it.media_asset_id
         WHERE ma.owner_user_id = :owner_id
           AND it.embedding IS NOT NULL
-        ORDER BY it.embedding <=> :query_vec::vector
+        ORDER BY it.embedding <=> CAST(:query_vec AS vector)
         LIMIT :lim
     """)
     rows = (
@@ -139,14 +152,28 @@ async def search_media_by_vector(
 
 
 async def check_pgvector_available(session: AsyncSession) -> bool:
-    """Check if pgvector extension is installed and embedding column exists."""
+    """Check if pgvector extension is installed and embedding column exists.
+
+    Cached per process for _PGVECTOR_RECHECK_SECONDS: the answer only changes with
+    a migration or an extension install, not between requests.
+    """
+    global _pgvector_cache
+    now = time.monotonic()
+    if _pgvector_cache is not None and now < _pgvector_cache[0]:
+        return _pgvector_cache[1]
     try:
         r = await session.execute(
-            text("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector') "
+                "AND EXISTS (SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'image_tags' AND column_name = 'embedding')"
+            )
         )
-        return r.scalar_one_or_none() is not None
+        available = bool(r.scalar_one())
     except Exception:
-        return False
+        available = False
+    _pgvector_cache = (now + _PGVECTOR_RECHECK_SECONDS, available)
+    return available
 
 
 async def admin_review_scan(
@@ -40,6 +40,8 @@ class AiToolJob(Base):
     result_object_key: Mapped[str | None] = mapped_column(String(512), nullable=True)
     params: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text(), nullable=True)
+    # Per-stage worker timings in ms (download_ms, inference_ms, ...), set when the job ends.
+    timings: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -155,7 +155,7 @@ async def remove_bg_status(
     result_url: str | None = None
     if job.status == "ready" and job.result_object_key:
         storage = get_storage_client()
-        result_url = generate_signed_download(storage, job.result_object_key)
+        result_url = await generate_signed_download(storage, job.result_object_key)
 
     return RemoveBgStatusOut(
         job_id=job.id,
@@ -240,7 +240,7 @@ async def cartoonize_status(
     result_url: str | None = None
     if job.status == "ready" and job.result_object_key:
         storage = get_storage_client()
-        result_url = generate_signed_download(storage, job.result_object_key)
+        result_url = await generate_signed_download(storage, job.result_object_key)
 
     return CartoonizeStatusOut(
         job_id=job.id,
@@ -347,7 +347,7 @@ async def animate_image_status(
     result_url: str | None = None
     if job.status == "ready" and job.result_object_key:
         storage = get_storage_client()
-        result_url = generate_signed_download(storage, job.result_object_key)
+        result_url = await generate_signed_download(storage, job.result_object_key)
 
     return AnimateImageStatusOut(
         job_id=job.id,
@@ -586,7 +586,7 @@ async def virtual_tryon_status(
     result_url: str | None = None
     if job.status == "ready" and job.result_object_key:
         storage = get_storage_client()
-        result_url = generate_signed_download(storage, job.result_object_key)
+        result_url = await generate_signed_download(storage, job.result_object_key)
 
     return VirtualTryOnStatusOut(
         job_id=job.id,
@@ -854,11 +854,11 @@ async def motion_transfer_status(
     preview_url: str | None = None
     if job.status == "ready" and job.result_object_key:
         storage = get_storage_client()
-        result_url = generate_signed_download(storage, job.result_object_key)
+        result_url = await generate_signed_download(storage, job.result_object_key)
         # Check for preview/thumbnail
         preview_key = job.params.get("preview_object_key") if job.params else None
         if preview_key:
-            preview_url = generate_signed_download(storage, preview_key)
+            preview_url = await generate_signed_download(storage, preview_key)
 
     params = job.params or {}
     stage = params.get("stage")
@@ -1042,7 +1042,7 @@ async def resolve_image_ref_endpoint(
         raise AppError(status_code=404, detail="media_not_found")
 
     storage = get_storage_client()
-    download_url = generate_signed_download(storage, media.object_key)
+    download_url = await generate_signed_download(storage, media.object_key)
 
     return ImageRefResolveResponse(
         media_asset_id=str(ref.media_asset_id),
@@ -0,0 +1,79 @@
+"""Buffered last_activity_at writes.
+
+Authenticated requests record the caller here instead of issuing their own UPDATE on a
+second session. The buffer keeps the latest timestamp per user and is written every
+ACTIVITY_FLUSH_INTERVAL_SECONDS as one UPDATE ... FROM (VALUES ...) per chunk, started
+from the app lifespan. Presence only needs minute resolution (creators._ONLINE_THRESHOLD),
+so losing up to one interval on a crash is acceptable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, column, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from app.core.settings import get_settings
+from app.db.session import async_session_factory
+from app.modules.auth.models import User
+from app.modules.auth.principal_cache import SKIP_INVALIDATION_OPTION
+
+logger = logging.getLogger(__name__)
+
+FLUSH_CHUNK_SIZE = 1000
+
+_pending: dict[UUID, datetime] = {}
+
+
+def record_activity(user_id: UUID, at: datetime) -> None:
+    """Buffer a last_activity_at for user_id; the latest timestamp wins."""
+    current = _pending.get(user_id)
+    if current is None or at > current:
+        _pending[user_id] = at
+
+
+def pending_activity_count() -> int:
+    return len(_pending)
+
+
+async def flush_activity() -> int:
+    """Write buffered timestamps; returns rows sent. Failed batches go back into the buffer."""
+    if not _pending:
+        return 0
+    batch = list(_pending.items())
+    _pending.clear()
+    try:
+        async with async_session_factory() as session:
+            for start in range(0, len(batch), FLUSH_CHUNK_SIZE):
+                rows = values(
+                    column("user_id", PG_UUID(as_uuid=True)),
+                    column("seen_at", DateTime(timezone=True)),
+                    name="activity",
+                ).data(batch[start : start + FLUSH_CHUNK_SIZE])
+                await session.execute(
+                    update(User)
+                    .where(User.id == rows.c.user_id)
+                    .where(or_(User.last_activity_at.is_(None), User.last_activity_at < rows.c.seen_at))
+                    # Presence is not a profile change: leave updated_at alone.
+                    .values(last_activity_at=rows.c.seen_at, updated_at=User.updated_at)
+                    .execution_options(synchronize_session=False, **{SKIP_INVALIDATION_OPTION: True})
+                )
+            await session.commit()
+    except Exception:
+        logger.warning("Failed to flush last_activity_at for %d users", len(batch), exc_info=True)
+        for user_id, at in batch:
+            record_activity(user_id, at)
+        return 0
+    return len(batch)
+
+
+async def run_activity_flusher() -> None:
+    """Flush forever (cancel to stop); the caller does a final flush_activity() on shutdown."""
+    interval = get_settings().activity_flush_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        await flush_activity()
@@ -1,22 +1,21 @@
 from __future__ import annotations
 
-import logging
 from datetime import UTC, datetime, timedelta
 from uuid import UUID
 
 from fastapi import Depends, Request
-from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core.errors import AppError
-from app.db.session import async_session_factory, get_async_session
+from app.db.session import get_async_session
+from app.modules.auth.activity import record_activity
 from app.modules.auth.constants import ADMIN_ROLE, READER_ROLE, SUPER_ADMIN_ROLE
 from app.modules.auth.models import User
+from app.modules.auth.principal_cache import load_principal
 from app.modules.auth.security import decode_access_token
 
 _ACTIVITY_DEBOUNCE = timedelta(seconds=60)
-_logger = logging.getLogger(__name__)
 
 
 def _get_token_from_request(request: Request) -> str | None:
@@ -55,30 +54,19 @@ async def _resolve_user_from_request(
             raise AppError(status_code=401, detail="invalid_token") from exc
         return None
 
-    result = await session.execute(
-        select(User).options(selectinload(User.profile)).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
+    user = await load_principal(session, user_id)
     if not user or not user.is_active:
         if required:
             raise AppError(status_code=403, detail="inactive_user")
         return None
 
-    # Touch last_activity_at (debounced; uses a separate session to avoid
-    # interfering with the request's own transaction/ORM state).
+    # Touch last_activity_at (debounced, written in batches by auth.activity). The
+    # in-memory value is updated without dirtying the instance, so the request's own
+    # commit does not turn into an UPDATE of the user row.
     now = datetime.now(UTC)
     if not user.last_activity_at or (now - user.last_activity_at) > _ACTIVITY_DEBOUNCE:
-        try:
-            async with async_session_factory() as activity_session:
-                await activity_session.execute(
-                    update(User)
-                    .where(User.id == user.id)
-                    .values(last_activity_at=now)
-                )
-                await activity_session.commit()
-            user.last_activity_at = now  # keep in-memory object current
-        except Exception:
-            _logger.debug("Failed to update last_activity_at for user %s", user.id, exc_info=True)
+        record_activity(user.id, now)
+        set_committed_value(user, "last_activity_at", now)
 
     return user
 
@@ -43,7 +43,7 @@ class Profile(TimestampMixin, Base):
     __tablename__ = "profiles"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"))
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     display_name: Mapped[str] = mapped_column(String(120))
     handle: Mapped[str | None] = mapped_column(String(64), nullable=True)
     handle_normalized: Mapped[str | None] = mapped_column(String(64), nullable=True)
@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.errors import AppError
 from app.core.settings import get_settings
 from app.modules.auth.models import User
-from app.modules.auth.security import hash_password
+from app.modules.auth.security import hash_password_async
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +56,7 @@ async def consume_password_reset_token(
     if not user:
         raise AppError(status_code=400, detail="invalid_or_expired_reset_token")
 
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await hash_password_async(new_password)
     user.password_reset_token = None
     user.password_reset_expires = None
     await session.commit()
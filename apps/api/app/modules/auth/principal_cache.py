@@ -0,0 +1,376 @@
+"""Short-lived cache of authenticated principals (User + Profile) for get_current_user.
+
+Resolving the caller is the most executed query in the API. Snapshots of the user and
+profile columns are kept in a per-process LRU (PRINCIPAL_CACHE_LOCAL_TTL_SECONDS) in front
+of Redis (PRINCIPAL_CACHE_TTL_SECONDS). A hit is attached to the request session with
+merge(load=False), so handlers can still modify and commit the user as before, with no
+SELECT issued.
+
+Invalidation is driven by the ORM: any committed change to a User or Profile row drops
+that user's entry, and bulk UPDATE/DELETE statements on users/profiles drop everything
+(bump the Redis generation). Other processes may serve their local copy for up to the
+local TTL after a change.
+
+A miss writes back to Redis only if no invalidation happened while it read the database,
+in any process: dropping an entry also bumps the user's epoch key in Redis, and the
+write is a compare-and-set on the epoch the miss saw before its SELECT.
+
+Secrets (password hash, reset token) are never cached; they are left unloaded on a
+cached principal, so code that needs them must refresh them explicitly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, Session, joinedload, make_transient_to_detached
+
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.modules.auth.models import Profile, User
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "principal:"
+REDIS_GENERATION_KEY = "principal:generation"
+REDIS_EPOCH_KEY_PREFIX = "principal:epoch:"
+# Execution option for bulk statements that must not invalidate (e.g. activity flushes).
+SKIP_INVALIDATION_OPTION = "skip_principal_invalidation"
+_SECRET_COLUMNS = frozenset({"password_hash", "password_reset_token", "password_reset_expires"})
+_REDIS_COOLDOWN_SECONDS = 30.0
+_PENDING_IDS_KEY = "principal_cache.pending_ids"
+_PENDING_ALL_KEY = "principal_cache.pending_all"
+
+Snapshot = dict[str, Any]
+
+_local: OrderedDict[uuid.UUID, tuple[float, Snapshot]] = OrderedDict()
+_local_lock = threading.Lock()
+# Bumped on every invalidation; a miss only populates the local tier if no invalidation
+# happened in this process while it was reading from the database.
+_epoch = 0
+_redis_down_until = 0.0
+_background: set[asyncio.Task[Any]] = set()
+
+# SET the entry only while the user's epoch is still the one read before the SELECT.
+#   KEYS: entry, epoch    ARGV: expected epoch, payload, ttl_seconds
+_PUT_IF_EPOCH_LUA = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+_put_script: Any = None
+
+
+# Lazy: inspecting column_attrs configures all mappers, which needs every model imported.
+@lru_cache
+def _cached_columns(model: type) -> tuple[str, ...]:
+    mapper: Mapper[Any] = inspect(model)
+    return tuple(a.key for a in mapper.column_attrs if a.key not in _SECRET_COLUMNS)
+
+
+def _snapshot(user: User) -> Snapshot:
+    profile = user.profile
+    return {
+        "user": {key: getattr(user, key) for key in _cached_columns(User)},
+        "profile": (
+            {key: getattr(profile, key) for key in _cached_columns(Profile)} if profile else None
+        ),
+    }
+
+
+def _materialize(snapshot: Snapshot) -> User:
+    """Build a detached User (+ Profile) whose loaded state is exactly the snapshot."""
+    user = User(**snapshot["user"])
+    profile_data = snapshot["profile"]
+    user.profile = Profile(**profile_data) if profile_data else None  # type: ignore[assignment]
+    make_transient_to_detached(user)
+    if user.profile is not None:
+        make_transient_to_detached(user.profile)
+    return user
+
+
+# -- redis encoding ------------------------------------------------------------
+
+
+@lru_cache
+def _decoders(model: type) -> dict[str, Callable[[Any], Any]]:
+    decoders: dict[str, Callable[[Any], Any]] = {}
+    mapper: Mapper[Any] = inspect(model)
+    for attr in mapper.column_attrs:
+        python_type = attr.columns[0].type.python_type
+        if python_type is uuid.UUID:
+            decoders[attr.key] = uuid.UUID
+        elif python_type is datetime:
+            decoders[attr.key] = datetime.fromisoformat
+        elif python_type is date:
+            decoders[attr.key] = date.fromisoformat
+    return decoders
+
+
+def _encode(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _decode_row(data: dict[str, Any], decoders: dict[str, Callable[[Any], Any]]) -> dict[str, Any]:
+    return {
+        key: decoders[key](value) if value is not None and key in decoders else value
+        for key, value in data.items()
+    }
+
+
+def _dumps(snapshot: Snapshot, generation: int) -> str:
+    return json.dumps({"generation": generation, **snapshot}, default=_encode)
+
+
+def _loads(raw: bytes | str, generation: int) -> Snapshot | None:
+    data = json.loads(raw)
+    if data.get("generation") != generation:
+        return None
+    user = data["user"]
+    if set(user) != set(_cached_columns(User)):
+        return None  # written by a different model version
+    profile = data["profile"]
+    return {
+        "user": _decode_row(user, _decoders(User)),
+        "profile": _decode_row(profile, _decoders(Profile)) if profile else None,
+    }
+
+
+# -- tiers -------------------------------------------------------------------
+
+
+def _local_get(user_id: uuid.UUID) -> Snapshot | None:
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry is None:
+            return None
+        expires_at, snapshot = entry
+        if expires_at <= time.monotonic():
+            del _local[user_id]
+            return None
+        _local.move_to_end(user_id)
+        return snapshot
+
+
+def _local_put(user_id: uuid.UUID, snapshot: Snapshot, epoch: int) -> None:
+    settings = get_settings()
+    with _local_lock:
+        if epoch != _epoch or settings.principal_cache_local_ttl_seconds <= 0:
+            return
+        _local[user_id] = (time.monotonic() + settings.principal_cache_local_ttl_seconds, snapshot)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.principal_cache_size:
+            _local.popitem(last=False)
+
+
+def _redis_client() -> Any:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return get_redis()
+
+
+def _redis_failed() -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + _REDIS_COOLDOWN_SECONDS
+    logger.warning("principal cache: redis unavailable, using database", exc_info=True)
+
+
+async def _redis_get(
+    user_id: uuid.UUID,
+) -> tuple[Snapshot | None, tuple[int, int] | None]:
+    """(snapshot, (generation, user epoch)) from one MGET; the pair is None when Redis is unusable."""
+    client = _redis_client()
+    if client is None:
+        return None, None
+    try:
+        raw_generation, raw_epoch, raw = await client.mget(
+            REDIS_GENERATION_KEY, f"{REDIS_EPOCH_KEY_PREFIX}{user_id}", f"{REDIS_KEY_PREFIX}{user_id}"
+        )
+    except Exception:
+        _redis_failed()
+        return None, None
+    generation = int(raw_generation or 0)
+    versions = (generation, int(raw_epoch or 0))
+    if raw is None:
+        return None, versions
+    try:
+        return _loads(raw, generation), versions
+    except (ValueError, KeyError, TypeError):
+        logger.debug("principal cache: undecodable entry for %s", user_id, exc_info=True)
+        return None, versions
+
+
+async def _redis_put(user_id: uuid.UUID, snapshot: Snapshot, versions: tuple[int, int]) -> None:
+    """Write the entry unless the user was invalidated since ``versions`` was read."""
+    global _put_script
+    client = _redis_client()
+    if client is None:
+        return
+    generation, epoch = versions
+    if _put_script is None:
+        _put_script = client.register_script(_PUT_IF_EPOCH_LUA)  # EVALSHA, reloads on NOSCRIPT
+    try:
+        await _put_script(
+            keys=[f"{REDIS_KEY_PREFIX}{user_id}", f"{REDIS_EPOCH_KEY_PREFIX}{user_id}"],
+            args=[epoch, _dumps(snapshot, generation), get_settings().principal_cache_ttl_seconds],
+            client=client,
+        )
+    except Exception:
+        _redis_failed()
+
+
+# -- public ------------------------------------------------------------------
+
+
+async def load_principal(session: AsyncSession, user_id: uuid.UUID) -> User | None:
+    """User (with profile) for user_id, attached to session; cache first, then one SELECT."""
+    enabled = get_settings().principal_cache_ttl_seconds > 0
+    epoch = _epoch
+    versions: tuple[int, int] | None = None
+    if enabled:
+        snapshot = _local_get(user_id)
+        if snapshot is None:
+            snapshot, versions = await _redis_get(user_id)
+            if snapshot is not None:
+                _local_put(user_id, snapshot, epoch)
+        if snapshot is not None:
+            return await session.merge(_materialize(snapshot), load=False)
+
+    result = await session.execute(
+        select(User).options(joinedload(User.profile)).where(User.id == user_id)
+    )
+    user = result.scalar_one_or_none()
+    if user is not None and enabled:
+        snapshot = _snapshot(user)
+        _local_put(user_id, snapshot, epoch)
+        if versions is not None and epoch == _epoch:
+            await _redis_put(user_id, snapshot, versions)
+    return user
+
+
+def _spawn(coro_factory: Callable[[Any], Any]) -> None:
+    """Run a Redis write in the background if there is a loop and a client."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sync context (scripts): entries age out after PRINCIPAL_CACHE_TTL_SECONDS
+    client = get_redis()
+    if client is None:
+        return
+
+    async def runner() -> None:
+        try:
+            await coro_factory(client)
+        except Exception:
+            logger.debug("principal cache: redis invalidation failed", exc_info=True)
+
+    task = loop.create_task(runner())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _redis_invalidate(client: Any, user_ids: list[uuid.UUID]) -> None:
+    """Bump each user's epoch and drop its entry in one MULTI/EXEC.
+
+    Writes racing this one (a miss that read the database before the change) then fail
+    their epoch check; the epoch key outlives any such read by the entry TTL.
+    """
+    ttl = max(get_settings().principal_cache_ttl_seconds, 1)
+    async with client.pipeline(transaction=True) as pipe:
+        for uid in user_ids:
+            pipe.incr(f"{REDIS_EPOCH_KEY_PREFIX}{uid}")
+            pipe.expire(f"{REDIS_EPOCH_KEY_PREFIX}{uid}", ttl)
+            pipe.delete(f"{REDIS_KEY_PREFIX}{uid}")
+        await pipe.execute()
+
+
+def invalidate_principals(user_ids: Iterable[uuid.UUID]) -> None:
+    """Drop cached principals for user_ids (this process now, Redis in the background)."""
+    global _epoch
+    ids = [uid for uid in user_ids if uid is not None]
+    if not ids:
+        return
+    with _local_lock:
+        _epoch += 1
+        for uid in ids:
+            _local.pop(uid, None)
+    _spawn(lambda client: _redis_invalidate(client, ids))
+
+
+def invalidate_all_principals() -> None:
+    """Drop every cached principal (bulk writes whose rows are unknown)."""
+    global _epoch
+    with _local_lock:
+        _epoch += 1
+        _local.clear()
+    _spawn(lambda client: client.incr(REDIS_GENERATION_KEY))
+
+
+# -- ORM hooks -----------------------------------------------------------------
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_principals(session: Session, flush_context: Any) -> None:
+    ids: set[uuid.UUID] = session.info.setdefault(_PENDING_IDS_KEY, set())
+    for obj in session.dirty:
+        if isinstance(obj, (User, Profile)) and session.is_modified(obj):
+            ids.add(obj.id if isinstance(obj, User) else obj.user_id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            ids.add(obj.id)
+        elif isinstance(obj, Profile):
+            ids.add(obj.user_id)
+    for obj in session.new:
+        if isinstance(obj, Profile):
+            ids.add(obj.user_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_principal_writes(orm_execute_state: Any) -> None:
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if orm_execute_state.execution_options.get(SKIP_INVALIDATION_OPTION):
+        return
+    table_name = getattr(orm_execute_state.statement.table, "name", None)
+    if table_name in (User.__tablename__, Profile.__tablename__):
+        orm_execute_state.session.info[_PENDING_ALL_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session: Session) -> None:
+    ids = session.info.pop(_PENDING_IDS_KEY, None)
+    if session.info.pop(_PENDING_ALL_KEY, False):
+        invalidate_all_principals()
+    elif ids:
+        invalidate_principals(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_IDS_KEY, None)
+    session.info.pop(_PENDING_ALL_KEY, None)
+
+
+def reset_principal_cache() -> None:
+    """Clear this process's tier (tests)."""
+    global _epoch, _redis_down_until
+    with _local_lock:
+        _epoch += 1
+        _local.clear()
+    _redis_down_until = 0.0
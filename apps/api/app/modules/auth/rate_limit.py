@@ -1,38 +1,104 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-from collections import defaultdict, deque
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from typing import Any
 
+from app.core.redis import get_redis
 from app.core.settings import get_settings
 
-_LOCAL_WINDOWS: dict[str, deque[datetime]] = defaultdict(deque)
+logger = logging.getLogger(__name__)
 
+# (key, max_count, window_seconds)
+RateLimit = tuple[str, int, int]
 
-def _check_local_window(key: str, max_count: int, window_seconds: int) -> bool:
-    now = datetime.now(timezone.utc)
-    window_start = now - timedelta(seconds=window_seconds)
-    q = _LOCAL_WINDOWS[key]
-    while q and q[0] < window_start:
-        q.popleft()
-    q.append(now)
-    return len(q) <= max_count
+REDIS_KEY_PREFIX = "ratelimit:"
 
+# Sliding-window log over one sorted set per key, all limits checked and recorded in one
+# atomic round trip. A request is admitted only if every key is under its limit, and only
+# admitted requests are recorded. Returns 0 if admitted, else the 1-based index of the
+# first limit that was hit.
+#   KEYS: one per limit    ARGV: now_ms, member, then (max_count, window_ms) per key
+_SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+  local limit = tonumber(ARGV[1 + 2 * i])
+  local window = tonumber(ARGV[2 + 2 * i])
+  redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+  if redis.call('ZCARD', key) >= limit then
+    return i
+  end
+end
+for i, key in ipairs(KEYS) do
+  redis.call('ZADD', key, now, ARGV[2])
+  redis.call('PEXPIRE', key, tonumber(ARGV[2 + 2 * i]))
+end
+return 0
+"""
 
-async def check_rate_limit(key: str) -> bool:
-    settings = get_settings()
-    if not (settings.redis_url or "").strip():
-        return _check_local_window(key, settings.rate_limit_max, settings.rate_limit_window_seconds)
-    from redis.asyncio import Redis
-    client = Redis.from_url(str(settings.redis_url))
+_LOCAL_WINDOWS: OrderedDict[str, deque[float]] = OrderedDict()
+_local_lock = threading.Lock()
+_script: Any = None
+
+
+def _check_local_windows(limits: Sequence[RateLimit]) -> bool:
+    """In-process twin of the Lua script; keeps at most RATE_LIMIT_LOCAL_MAX_KEYS keys (LRU)."""
+    now = time.monotonic()
+    max_keys = get_settings().rate_limit_local_max_keys
+    with _local_lock:
+        windows = []
+        for key, _, window_seconds in limits:
+            q = _LOCAL_WINDOWS.get(key)
+            if q is None:
+                q = _LOCAL_WINDOWS[key] = deque()
+            _LOCAL_WINDOWS.move_to_end(key)
+            while q and q[0] <= now - window_seconds:
+                q.popleft()
+            windows.append(q)
+        allowed = all(len(q) < limit[1] for q, limit in zip(windows, limits, strict=True))
+        if allowed:
+            for q in windows:
+                q.append(now)
+        while len(_LOCAL_WINDOWS) > max_keys:
+            _LOCAL_WINDOWS.popitem(last=False)
+    return allowed
+
+
+async def check_rate_limits(limits: Sequence[RateLimit]) -> bool:
+    """Return True if the request is under every limit (e.g. per-user and per-IP) and record it.
+
+    One Redis round trip on the shared pool; falls back to the in-process window when
+    Redis is not configured or errors.
+    """
+    if not limits:
+        return True
+    client = get_redis()
+    if client is None:
+        return _check_local_windows(limits)
+    # Unique across replicas: containers often share a pid, and a shared member would overwrite.
+    args: list[int | str] = [int(time.time() * 1000), uuid.uuid4().hex]
+    for _, max_count, window_seconds in limits:
+        args += [max_count, window_seconds * 1000]
+    global _script
+    if _script is None:
+        _script = client.register_script(_SLIDING_WINDOW_LUA)  # EVALSHA, reloads on NOSCRIPT
     try:
-        current = await client.incr(key)
-        if current == 1:
-            await client.expire(key, settings.rate_limit_window_seconds)
-        return current <= settings.rate_limit_max
+        hit = await _script(
+            keys=[REDIS_KEY_PREFIX + key for key, _, _ in limits], args=args, client=client
+        )
     except Exception:
-        return _check_local_window(key, settings.rate_limit_max, settings.rate_limit_window_seconds)
-    finally:
-        await client.aclose()  # type: ignore[attr-defined]
+        logger.warning("rate limit: redis unavailable, using local window", exc_info=True)
+        return _check_local_windows(limits)
+    return int(hit) == 0
+
+
+async def check_rate_limit(key: str) -> bool:
+    settings = get_settings()
+    return await check_rate_limits([(key, settings.rate_limit_max, settings.rate_limit_window_seconds)])
 
 
 async def check_rate_limit_custom(
@@ -41,23 +107,6 @@ async def check_rate_limit_custom(
     """Return True if under limit. Raise AppError if over limit."""
     from app.core.errors import AppError
 
-    settings = get_settings()
-    if not (settings.redis_url or "").strip():
-        if not _check_local_window(key, max_count, window_seconds):
-            raise AppError(status_code=429, detail="rate_limit_exceeded")
-        return True
-    from redis.asyncio import Redis
-    client = Redis.from_url(str(settings.redis_url))
-    try:
-        current = await client.incr(key)
-        if current == 1:
-            await client.expire(key, window_seconds)
-        if current > max_count:
-            raise AppError(status_code=429, detail="rate_limit_exceeded")
-        return True
-    except Exception:
-        if not _check_local_window(key, max_count, window_seconds):
-            raise AppError(status_code=429, detail="rate_limit_exceeded")
-        return True
-    finally:
-        await client.aclose()  # type: ignore[attr-defined]
+    if not await check_rate_limits([(key, max_count, window_seconds)]):
+        raise AppError(status_code=429, detail="rate_limit_exceeded")
+    return True
@@ -15,7 +15,7 @@ from app.core.settings import get_settings
 from app.db.session import get_async_session
 from app.modules.auth.deps import get_current_user
 from app.modules.auth.models import User
-from app.modules.auth.rate_limit import check_rate_limit
+from app.modules.auth.rate_limit import RateLimit, check_rate_limits
 from app.modules.auth.schemas import ChangePasswordRequest, ForgotPasswordRequest, ProfileOut, ResetPasswordRequest, TokenResponse, UserCreate, UserLogin, UserOut
 from app.modules.auth.service import (
     authenticate_user,
@@ -66,6 +66,16 @@ def _get_client_ip(request: Request) -> str | None:
     return request.client.host if request.client else None
 
 
+def _auth_rate_limits(action: str, client_ip: str, email: str) -> list[RateLimit]:
+    """Per-(IP, email) limit plus a wider per-IP limit so one address cannot spray many emails."""
+    settings = get_settings()
+    window = settings.rate_limit_window_seconds
+    return [
+        (f"{action}:{client_ip}:{email}", settings.rate_limit_max, window),
+        (f"{action}:{client_ip}", settings.rate_limit_ip_max, window),
+    ]
+
+
 def _cookie_settings() -> dict[str, object]:
     settings = get_settings()
     cookie_settings: dict[str, object] = {
@@ -149,8 +159,7 @@ async def resend_verification_email(
     session: AsyncSession = Depends(get_async_session),
 ) -> dict:
     client_ip = _get_client_ip(request) or "unknown"
-    rate_limit_key = f"resend_verify:{client_ip}:{payload.email}"
-    if not await check_rate_limit(rate_limit_key):
+    if not await check_rate_limits(_auth_rate_limits("resend_verify", client_ip, payload.email)):
         raise AppError(status_code=429, detail="rate_limit_exceeded")
 
     # Default response: do not reveal whether email exists.
@@ -336,8 +345,7 @@ async def forgot_password(
     from app.modules.auth.password_reset import create_password_reset_token
 
     client_ip = _get_client_ip(request) or "unknown"
-    rate_limit_key = f"password_reset:{client_ip}:{payload.email}"
-    if not await check_rate_limit(rate_limit_key):
+    if not await check_rate_limits(_auth_rate_limits("password_reset", client_ip, payload.email)):
         raise AppError(status_code=429, detail="rate_limited")
 
     token = await create_password_reset_token(session, payload.email)
@@ -421,8 +429,7 @@ async def login(
     import secrets as _secrets
 
     client_ip = _get_client_ip(request) or "unknown"
-    rate_limit_key = f"login:{client_ip}:{payload.email}"
-    if not await check_rate_limit(rate_limit_key):
+    if not await check_rate_limits(_auth_rate_limits("login", client_ip, payload.email)):
         raise AppError(status_code=429, detail="rate_limit_exceeded")
     from datetime import UTC, datetime as _dt
 
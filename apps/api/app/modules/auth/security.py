@@ -1,27 +1,151 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from typing import Any, cast
 
 from argon2 import PasswordHasher
 from jose import JWTError, jwt
 
+from app.core.errors import AppError
 from app.core.settings import get_settings
 
+logger = logging.getLogger(__name__)
+
 _password_hasher = PasswordHasher()
 
 
 def hash_password(password: str) -> str:
+    """Blocking (~50-100ms of CPU). In request handlers use hash_password_async."""
     return _password_hasher.hash(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
+    """Blocking (~50-100ms of CPU). In request handlers use verify_password_async."""
     try:
         return _password_hasher.verify(hashed, password)
     except Exception:
         return False
 
 
+class PasswordHashPool:
+    """Runs Argon2 off the event loop on a small thread pool with a cap on pending calls.
+
+    argon2-cffi releases the GIL while hashing, so threads give real parallelism and
+    the loop keeps serving other requests during a login burst. Once
+    PASSWORD_HASH_MAX_PENDING calls are running or queued, new ones fail fast with
+    503 auth_busy instead of queueing behind a backlog that would time out anyway.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="argon2")
+        self._workers = workers
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._hash_total = 0.0
+        self._hash_max = 0.0
+
+    async def run[T](self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self.rejected += 1
+                raise AppError(status_code=503, detail="auth_busy", headers={"Retry-After": "1"})
+            self._pending += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+        submitted = time.perf_counter()
+
+        def timed() -> T:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.completed += 1
+                    self._wait_total += started - submitted
+                    self._wait_max = max(self._wait_max, started - submitted)
+                    self._hash_total += finished - started
+                    self._hash_max = max(self._hash_max, finished - started)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self._workers,
+                "max_pending": self._max_pending,
+                "pending": self._pending,
+                "peak_pending": self.peak_pending,
+                "completed": completed,
+                "rejected": self.rejected,
+                "queue_wait_ms_avg": round(self._wait_total * 1000 / completed, 2) if completed else 0.0,
+                "queue_wait_ms_max": round(self._wait_max * 1000, 2),
+                "hash_ms_avg": round(self._hash_total * 1000 / completed, 2) if completed else 0.0,
+                "hash_ms_max": round(self._hash_max * 1000, 2),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: PasswordHashPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_password_hash_pool() -> PasswordHashPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = get_settings()
+                _pool = PasswordHashPool(
+                    settings.password_hash_workers, settings.password_hash_max_pending
+                )
+    return _pool
+
+
+def shutdown_password_hash_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+def _reset_pool_after_fork() -> None:
+    # Executor threads do not survive fork; the child builds its own pool on first use.
+    global _pool
+    _pool = None
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_password_hash_pool().run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await get_password_hash_pool().run(verify_password, password, hashed)
+
+
 def create_access_token(subject: str, role: str) -> str:
     settings = get_settings()
     expire = datetime.now(UTC) + timedelta(minutes=settings.jwt_expire_minutes)
@@ -10,7 +10,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.errors import AppError
 from app.modules.auth.constants import CREATOR_ROLE, FAN_ROLE
 from app.modules.auth.models import Profile, User
-from app.modules.auth.security import create_access_token, hash_password, verify_password
+from app.modules.auth.security import (
+    create_access_token,
+    hash_password_async,
+    verify_password_async,
+)
 
 
 def _sanitize_handle(raw: str) -> str:
@@ -42,7 +46,7 @@ async def create_user(
 ) -> User:
     user = User(
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await hash_password_async(password),
         role=FAN_ROLE,
         onboarding_state="CREATED",
     )
@@ -70,7 +74,7 @@ async def register_creator(
     handle = await _generate_unique_handle(session, base_handle)
     user = User(
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await hash_password_async(password),
         role=CREATOR_ROLE,
         onboarding_state="CREATED",
     )
@@ -93,7 +97,7 @@ async def register_creator(
 async def authenticate_user(session: AsyncSession, email: str, password: str) -> User:
     result = await session.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await verify_password_async(password, user.password_hash):
         raise AppError(status_code=401, detail="invalid_credentials")
     # Block login for users who haven't verified their email yet.
     if user.onboarding_state == "CREATED":
@@ -105,11 +109,13 @@ async def change_password(
     session: AsyncSession, user: User, current_password: str, new_password: str
 ) -> None:
     """Change password for an authenticated user. Verifies current password first."""
-    if not verify_password(current_password, user.password_hash):
+    # The cached principal never carries the hash (auth.principal_cache); read it now.
+    await session.refresh(user, attribute_names=["password_hash"])
+    if not await verify_password_async(current_password, user.password_hash):
         raise AppError(status_code=400, detail="wrong_current_password")
-    if verify_password(new_password, user.password_hash):
+    if await verify_password_async(new_password, user.password_hash):
         raise AppError(status_code=400, detail="same_as_current")
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await hash_password_async(new_password)
     await session.commit()
 
 
@@ -4,6 +4,10 @@ DEFAULT_PLAN_PRICE = "4.99"
 DEFAULT_PLAN_CURRENCY = "eur"
 PLATFORM_ACCOUNT_ID = "platform"
 
+# payment_events.provider for webhook inbox rows (checkout intents have none)
+PAYMENT_PROVIDER_CCBILL = "ccbill"
+PAYMENT_PROVIDER_WORLDLINE = "worldline"
+
 
 def creator_pending_account_id(creator_user_id: str) -> str:
     return f"creator_pending:{creator_user_id}"
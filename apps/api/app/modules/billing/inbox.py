@@ -0,0 +1,174 @@
+"""Payment webhook inbox.
+
+Webhook endpoints verify the provider signature, store the raw event in
+payment_events with one INSERT (idempotent on event_id) and acknowledge. With
+PAYMENT_WEBHOOKS_ASYNC the worker applies stored events here, in batches:
+
+- Events are claimed with FOR UPDATE SKIP LOCKED, so several workers can drain the
+  inbox together. An event is only claimable when no earlier pending event shares its
+  ordering_key, which keeps a subscription's (or checkout's, or creator's) events in
+  received order even across workers.
+- Each event runs in its own savepoint inside the batch transaction; a failing
+  handler rolls back only that event, which is retried with exponential backoff.
+- After PAYMENT_EVENT_MAX_ATTEMPTS failures the event is dead-lettered (dead_at) and
+  stops blocking its key. Admins list dead events and requeue them once fixed.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import exists, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.errors import AppError
+from app.core.settings import get_settings
+from app.modules.billing.constants import PAYMENT_PROVIDER_CCBILL, PAYMENT_PROVIDER_WORLDLINE
+from app.modules.billing.models import PaymentEvent
+from app.modules.billing.service import (
+    handle_ccbill_event,
+    handle_worldline_event,
+    worldline_merchant_reference,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAX_BACKOFF_SECONDS = 3600.0
+_LAST_ERROR_MAX_CHARS = 2000
+
+
+def ccbill_ordering_key(params: dict) -> str | None:
+    """Subscription for subscription events, else the creator (tips, PPV)."""
+    if params.get("subscriptionId"):
+        return f"ccbill:sub:{params['subscriptionId']}"
+    if params.get("zv_creator_user_id"):
+        return f"creator:{params['zv_creator_user_id']}"
+    return None
+
+
+def worldline_ordering_key(payload: dict) -> str | None:
+    """The checkout (merchantReference) the payment or refund belongs to."""
+    merchant_ref = worldline_merchant_reference(payload)
+    if merchant_ref:
+        return f"worldline:{merchant_ref}"
+    payment_id = (payload.get("payment") or {}).get("id")
+    return f"worldline:payment:{payment_id}" if payment_id else None
+
+
+def _pending(event: Any) -> list[Any]:
+    return [
+        event.provider.is_not(None),
+        event.processed_at.is_(None),
+        event.dead_at.is_(None),
+    ]
+
+
+async def apply_payment_event(session: AsyncSession, event: PaymentEvent) -> str:
+    """Run the provider handler for one stored event and mark it processed (no commit)."""
+    payload = event.payload or {}
+    if event.provider == PAYMENT_PROVIDER_CCBILL:
+        outcome = await handle_ccbill_event(session, payload)
+    elif event.provider == PAYMENT_PROVIDER_WORLDLINE:
+        outcome = await handle_worldline_event(session, payload)
+    else:
+        raise ValueError(f"unknown payment provider {event.provider!r}")
+    event.processed_at = datetime.now(timezone.utc)
+    await session.flush()
+    return outcome
+
+
+async def _claim_due_events(session: AsyncSession, limit: int) -> list[PaymentEvent]:
+    now = datetime.now(timezone.utc)
+    earlier = aliased(PaymentEvent)
+    blocked = exists().where(
+        earlier.ordering_key == PaymentEvent.ordering_key,
+        *_pending(earlier),
+        tuple_(earlier.received_at, earlier.id) < tuple_(PaymentEvent.received_at, PaymentEvent.id),
+    )
+    result = await session.execute(
+        select(PaymentEvent)
+        .where(
+            *_pending(PaymentEvent),
+            or_(PaymentEvent.next_attempt_at.is_(None), PaymentEvent.next_attempt_at <= now),
+            ~blocked,
+        )
+        .order_by(PaymentEvent.received_at, PaymentEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return list(result.scalars().all())
+
+
+async def _record_failure(session: AsyncSession, event_id: UUID, attempts: int, error: str) -> bool:
+    """Schedule a retry, or dead-letter the event. Returns True if dead-lettered."""
+    settings = get_settings()
+    now = datetime.now(timezone.utc)
+    dead = attempts >= settings.payment_event_max_attempts
+    delay = min(settings.payment_event_retry_base_seconds * 2 ** (attempts - 1), _MAX_BACKOFF_SECONDS)
+    await session.execute(
+        update(PaymentEvent)
+        .where(PaymentEvent.id == event_id)
+        .values(
+            attempts=attempts,
+            last_error=error[:_LAST_ERROR_MAX_CHARS],
+            next_attempt_at=None if dead else now + timedelta(seconds=delay),
+            dead_at=now if dead else None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return dead
+
+
+async def process_payment_events(session: AsyncSession, *, batch_size: int | None = None) -> int:
+    """Apply due inbox events until none are left; returns how many were processed.
+
+    One transaction (and commit) per batch. Failed events are rescheduled, not raised.
+    Keeps claiming while batches make progress: finishing an event can unblock the
+    next one for its key.
+    """
+    limit = batch_size or get_settings().payment_events_batch_size
+    processed = 0
+    while True:
+        settled = 0
+        async with session.begin():
+            events = await _claim_due_events(session, limit)
+            for event in events:
+                event_id, event_key, attempts = event.id, event.event_id, event.attempts
+                try:
+                    async with session.begin_nested():
+                        outcome = await apply_payment_event(session, event)
+                except Exception as exc:
+                    dead = await _record_failure(session, event_id, attempts + 1, repr(exc))
+                    settled += dead
+                    logger.warning(
+                        "payment event failed event_id=%s attempt=%s dead_lettered=%s",
+                        event_key,
+                        attempts + 1,
+                        dead,
+                        exc_info=True,
+                    )
+                else:
+                    processed += 1
+                    settled += 1
+                    logger.info("payment event processed event_id=%s outcome=%s", event_key, outcome)
+        session.expunge_all()
+        if not settled:
+            return processed
+
+
+async def requeue_payment_event(session: AsyncSession, event_id: UUID) -> PaymentEvent:
+    """Give a dead-lettered event a fresh set of attempts (commits)."""
+    event = await session.get(PaymentEvent, event_id)
+    if event is None or event.provider is None:
+        raise AppError(status_code=404, detail="payment_event_not_found")
+    if event.dead_at is None:
+        raise AppError(status_code=409, detail="payment_event_not_dead")
+    event.dead_at = None
+    event.attempts = 0
+    event.next_attempt_at = None
+    await session.commit()
+    return event
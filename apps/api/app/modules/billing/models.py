@@ -4,8 +4,19 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Numeric, String, UniqueConstraint
-from sqlalchemy import func
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -14,6 +25,13 @@ from app.db.mixins import TimestampMixin
 
 
 class PaymentEvent(TimestampMixin, Base):
+    """Provider webhook events (the inbox) and Worldline checkout intents.
+
+    Inbox rows have a provider; they are pending until processed_at or dead_at is set.
+    Events sharing an ordering_key (subscription, checkout or creator) are applied in
+    received order.
+    """
+
     __tablename__ = "payment_events"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -24,6 +42,25 @@ class PaymentEvent(TimestampMixin, Base):
     )
     payload: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    provider: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    ordering_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    next_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    dead_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_payment_events_pending",
+            "ordering_key",
+            "received_at",
+            "id",
+            postgresql_where=text(
+                "provider IS NOT NULL AND processed_at IS NULL AND dead_at IS NULL"
+            ),
+        ),
+        Index("ix_payment_events_dead", "dead_at", postgresql_where=text("dead_at IS NOT NULL")),
+    )
 
 
 class CreatorPlan(TimestampMixin, Base):
@@ -15,9 +15,12 @@ from app.core.request_id import get_request_id
 from app.core.settings import get_settings
 
 logger = logging.getLogger(__name__)
+from app.celery_client import enqueue_process_payment_events
 from app.db.session import get_async_session
 from app.modules.auth.deps import get_current_user
 from app.modules.auth.models import User
+from app.modules.billing.constants import PAYMENT_PROVIDER_CCBILL, PAYMENT_PROVIDER_WORLDLINE
+from app.modules.billing.inbox import ccbill_ordering_key, worldline_ordering_key
 from app.modules.billing.models import Subscription
 from app.modules.billing.schemas import (
     BillingHealthOut,
@@ -50,31 +53,47 @@ from app.modules.creators.service import get_creator_by_handle_any
 router = APIRouter()
 
 
-async def _process_ccbill_event_once(
+async def _accept_webhook_event(
     session: AsyncSession,
     *,
+    provider: str,
     request_id: str,
     event_id: str,
     event_type: str,
     event_payload: dict,
+    ordering_key: str | None,
 ) -> WebhookAck:
+    """Store the event in the inbox; apply it inline unless PAYMENT_WEBHOOKS_ASYNC."""
+    process_async = get_settings().payment_webhooks_async
+    log_extra = {"request_id": request_id, "event_id": event_id, "event_type": event_type}
     async with session.begin():
         processed, _ = await record_payment_event(
-            session, event_id, event_type, payload=event_payload
+            session,
+            event_id,
+            event_type,
+            payload=event_payload,
+            provider=provider,
+            ordering_key=ordering_key,
         )
         if not processed:
-            logger.info(
-                "ccbill webhook duplicate",
-                extra={"request_id": request_id, "event_id": event_id, "event_type": event_type},
-            )
+            logger.info(f"{provider} webhook duplicate", extra=log_extra)
             return WebhookAck(status="duplicate_ignored")
-        outcome = await handle_ccbill_event(session, event_payload)
-        await mark_event_processed(session, event_id)
-
-    logger.info(
-        "ccbill webhook completed",
-        extra={"request_id": request_id, "event_id": event_id, "event_type": event_type, "outcome": outcome},
-    )
+        if process_async:
+            outcome = "queued"
+        else:
+            if provider == PAYMENT_PROVIDER_CCBILL:
+                outcome = await handle_ccbill_event(session, event_payload)
+            else:
+                outcome = await handle_worldline_event(session, event_payload)
+            await mark_event_processed(session, event_id)
+
+    if process_async:
+        try:
+            enqueue_process_payment_events()
+        except Exception as e:
+            # Stored already; the scheduled drain picks it up.
+            logger.warning("Failed to enqueue payment event processing: %s", e)
+    logger.info(f"{provider} webhook completed", extra={**log_extra, "outcome": outcome})
     return WebhookAck(status=outcome)
 
 
@@ -147,12 +166,14 @@ async def ccbill_webhook(
         event_id = params.get("transactionId") or params.get("subscriptionId") or ""
         if not event_type:
             raise AppError(status_code=400, detail="missing_event_type")
-        return await _process_ccbill_event_once(
+        return await _accept_webhook_event(
             session,
+            provider=PAYMENT_PROVIDER_CCBILL,
             request_id=request_id,
             event_id=f"{event_type}:{event_id}",
             event_type=event_type,
             event_payload=params,
+            ordering_key=ccbill_ordering_key(params),
         )
 
     # Verify webhook digest
@@ -165,12 +186,14 @@ async def ccbill_webhook(
     if not event_type:
         raise AppError(status_code=400, detail="missing_event_type")
 
-    return await _process_ccbill_event_once(
+    return await _accept_webhook_event(
         session,
+        provider=PAYMENT_PROVIDER_CCBILL,
         request_id=request_id,
         event_id=f"{event_type}:{event_id}",
         event_type=event_type,
         event_payload=params,
+        ordering_key=ccbill_ordering_key(params),
     )
 
 
@@ -222,25 +245,15 @@ async def worldline_webhook(
     if not event_type:
         raise AppError(status_code=400, detail="missing_event_type")
 
-    # Idempotent processing
-    async with session.begin():
-        processed, _ = await record_payment_event(
-            session, f"wl:{event_id}", event_type, payload=payload
-        )
-        if not processed:
-            logger.info(
-                "worldline webhook duplicate",
-                extra={"request_id": request_id, "event_id": event_id, "event_type": event_type},
-            )
-            return WebhookAck(status="duplicate_ignored")
-        outcome = await handle_worldline_event(session, payload)
-        await mark_event_processed(session, f"wl:{event_id}")
-
-    logger.info(
-        "worldline webhook completed",
-        extra={"request_id": request_id, "event_id": event_id, "event_type": event_type, "outcome": outcome},
+    return await _accept_webhook_event(
+        session,
+        provider=PAYMENT_PROVIDER_WORLDLINE,
+        request_id=request_id,
+        event_id=f"wl:{event_id}",
+        event_type=event_type,
+        event_payload=payload,
+        ordering_key=worldline_ordering_key(payload),
     )
-    return WebhookAck(status=outcome)
 
 
 @router.get(
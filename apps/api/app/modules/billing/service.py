@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterable
 from typing import Any
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
@@ -54,11 +55,23 @@ async def record_payment_event(
     event_id: str,
     event_type: str,
     payload: dict | None = None,
+    *,
+    provider: str | None = None,
+    ordering_key: str | None = None,
 ) -> tuple[bool, str | None]:
-    """Store event; return (True, id) if new, (False, None) if duplicate."""
+    """Store event; return (True, id) if new, (False, None) if duplicate.
+
+    Webhooks pass provider (and ordering_key) so the row is part of the inbox.
+    """
     stmt = (
         pg_insert(PaymentEvent)
-        .values(event_id=event_id, event_type=event_type, payload=payload)
+        .values(
+            event_id=event_id,
+            event_type=event_type,
+            payload=payload,
+            provider=provider,
+            ordering_key=ordering_key,
+        )
         .on_conflict_do_nothing(index_elements=[PaymentEvent.event_id])
         .returning(PaymentEvent.event_id)
     )
@@ -680,6 +693,18 @@ def _worldline_amount_to_str(amount_minor: int, currency: str = "EUR") -> str:
     return str(Decimal(amount_minor) / 100)
 
 
+def worldline_merchant_reference(payload: dict) -> str:
+    """merchantReference (checkout correlation_id) from the payment or refund output."""
+    payment = payload.get("payment") or {}
+    refs = (payment.get("paymentOutput") or {}).get("references") or {}
+    merchant_ref = refs.get("merchantReference", "")
+    refund_obj = payload.get("refund") or {}
+    if not merchant_ref and refund_obj:
+        refund_refs = (refund_obj.get("refundOutput") or {}).get("references") or {}
+        merchant_ref = refund_refs.get("merchantReference", "")
+    return merchant_ref
+
+
 async def handle_worldline_event(session: AsyncSession, payload: dict) -> str:
     """Dispatch Worldline webhook event. Return outcome: processed|ignored|error.
 
@@ -696,16 +721,7 @@ async def handle_worldline_event(session: AsyncSession, payload: dict) -> str:
     # Extract payment/refund objects
     payment = payload.get("payment") or {}
     refund_obj = payload.get("refund") or {}
-
-    # Get merchantReference (correlation_id) from payment or refund output
-    payment_output = payment.get("paymentOutput") or {}
-    refs = payment_output.get("references") or {}
-    merchant_ref = refs.get("merchantReference", "")
-
-    if not merchant_ref and refund_obj:
-        refund_output = refund_obj.get("refundOutput") or {}
-        refund_refs = refund_output.get("references") or {}
-        merchant_ref = refund_refs.get("merchantReference", "")
+    merchant_ref = worldline_merchant_reference(payload)
 
     # Look up custom fields from correlation table
     if merchant_ref:
@@ -1076,6 +1092,19 @@ def _subscription_active_filter() -> Any:
     return sa.and_(period_valid, status_valid)
 
 
+def active_subscription_exists(fan_user_id: UUID, creator_user_id: Any) -> Any:
+    """EXISTS clause for an active subscription; creator_user_id may be a column (correlated)."""
+    return (
+        select(Subscription.id)
+        .where(
+            Subscription.fan_user_id == fan_user_id,
+            Subscription.creator_user_id == creator_user_id,
+            _subscription_active_filter(),
+        )
+        .exists()
+    )
+
+
 async def is_active_subscriber(
     session: AsyncSession, fan_user_id: UUID, creator_user_id: UUID
 ) -> bool:
@@ -1090,14 +1119,21 @@ async def is_active_subscriber(
 
 
 async def get_subscribed_creator_ids(
-    session: AsyncSession, fan_user_id: UUID
+    session: AsyncSession,
+    fan_user_id: UUID,
+    creator_user_ids: Iterable[UUID] | None = None,
 ) -> set[UUID]:
-    result = await session.execute(
-        select(Subscription.creator_user_id).where(
-            Subscription.fan_user_id == fan_user_id,
-            _subscription_active_filter(),
-        )
+    """Creators the fan actively subscribes to, optionally restricted to creator_user_ids."""
+    query = select(Subscription.creator_user_id).where(
+        Subscription.fan_user_id == fan_user_id,
+        _subscription_active_filter(),
     )
+    if creator_user_ids is not None:
+        creator_user_ids = set(creator_user_ids)
+        if not creator_user_ids:
+            return set()
+        query = query.where(Subscription.creator_user_id.in_(creator_user_ids))
+    result = await session.execute(query)
     return {row[0] for row in result.all()}
 
 
@@ -34,6 +34,8 @@ from app.modules.creators.service import (
 )
 from app.modules.billing.models import CreatorPlan
 from app.modules.billing.service import is_active_subscriber
+from app.modules.media.service import sign_post_media
+from app.modules.media.storage import get_storage_client
 from app.modules.posts.schemas import PostOut, PostPage
 from app.modules.posts.service import get_creator_posts_page, _post_to_out, _post_to_out_locked
 
@@ -212,6 +214,10 @@ async def list_creator_posts(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     include_locked: bool = Query(True, description="Include locked posts as teasers (FOLLOW_REQUIRED / SUBSCRIPTION_REQUIRED)."),
+    include_urls: str | None = Query(
+        None,
+        description="Variant to pre-sign for every asset (e.g. grid); fills download_urls.",
+    ),
 ) -> PostPage:
     posts_with_lock, total = await get_creator_posts_page(
         session,
@@ -222,8 +228,20 @@ async def list_creator_posts(
         current_user_role=current_user.role if current_user else None,
         include_locked=include_locked,
     )
+    download_urls: dict[UUID, dict[str, str]] = {}
+    if include_urls:
+        download_urls = await sign_post_media(
+            session,
+            get_storage_client(),
+            [(p, is_locked) for p, is_locked, _ in posts_with_lock],
+            include_urls,
+            viewer_user_id=current_user.id if current_user else None,
+        )
     items = [
-        PostOut(**(_post_to_out_locked(p, reason or "") if is_locked else _post_to_out(p)))
+        PostOut(
+            **(_post_to_out_locked(p, reason or "") if is_locked else _post_to_out(p)),
+            download_urls=download_urls.get(p.id, {}),
+        )
         for p, is_locked, reason in posts_with_lock
     ]
     return PostPage(items=items, total=total, page=page, page_size=page_size)
@@ -22,6 +22,7 @@ from app.modules.creators.constants import (
 from app.modules.creators.models import Follow
 from app.shared.pagination import normalize_pagination
 from app.modules.posts.models import Post
+from app.modules.posts.timeline import backfill_follow, remove_follow
 
 
 _ONLINE_THRESHOLD = timedelta(minutes=5)
@@ -300,6 +301,7 @@ async def follow_creator(
         return False
     follow = Follow(fan_user_id=fan_user_id, creator_user_id=creator_user_id)
     session.add(follow)
+    await backfill_follow(session, fan_user_id, creator_user_id)
     await session.commit()
     return True
 
@@ -317,6 +319,7 @@ async def unfollow_creator(
     if not follow:
         return False
     await session.delete(follow)
+    await remove_follow(session, fan_user_id, creator_user_id)
     await session.commit()
     return True
 
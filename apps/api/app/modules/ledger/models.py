@@ -4,7 +4,19 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, Numeric, String, UniqueConstraint, func
+from sqlalchemy import (
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    SmallInteger,
+    String,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -32,6 +44,17 @@ class LedgerEvent(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    # Set when payouts.service.reconcile_availability moved net_cents pending -> available
+    available_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_ledger_events_unreconciled",
+            "created_at",
+            "id",
+            postgresql_where=text("available_at IS NULL AND net_cents > 0"),
+        ),
+    )
 
 
 class LedgerEntry(TimestampMixin, Base):
@@ -54,9 +77,21 @@ class LedgerEntry(TimestampMixin, Base):
 
 
 class LedgerBalance(TimestampMixin, Base):
+    """One shard of an account balance; the balance is the sum over its shards.
+
+    Written only through ledger.service.apply_balance_delta.
+    """
+
     __tablename__ = "ledger_balances"
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    account_id: Mapped[str] = mapped_column(String(64), index=True)
+    account_id: Mapped[str] = mapped_column(String(64))
     currency: Mapped[str] = mapped_column(String(8))
+    shard: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0")
     balance: Mapped[Decimal] = mapped_column(Numeric(18, 2))
+
+    __table_args__ = (
+        UniqueConstraint(
+            "account_id", "currency", "shard", name="uq_ledger_balance_account_currency_shard"
+        ),
+    )
@@ -1,16 +1,98 @@
 from __future__ import annotations
 
+import random
 from decimal import Decimal
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import Select, SmallInteger, func, literal, select
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from uuid import UUID
-
+from app.core.settings import get_settings
 from app.modules.ledger.constants import DEFAULT_BALANCE, LEDGER_DIRECTION_CREDIT
 from app.modules.ledger.models import LedgerBalance, LedgerEntry, LedgerEvent
 
 
+def _on_conflict_add(stmt: Insert) -> Insert:
+    return stmt.on_conflict_do_update(
+        constraint="uq_ledger_balance_account_currency_shard",
+        set_={
+            "balance": LedgerBalance.balance + stmt.excluded.balance,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def _pick_shard() -> int:
+    return random.randrange(get_settings().ledger_balance_shards)
+
+
+async def apply_balance_delta(
+    session: AsyncSession,
+    account_id: str,
+    currency: str,
+    delta: Decimal,
+) -> None:
+    """Add delta to one randomly chosen balance shard of the account (no commit).
+
+    A single upsert: no read, and the row lock held until commit covers one of
+    LEDGER_BALANCE_SHARDS rows, so concurrent payments to the same account (the
+    platform account takes every payment) rarely wait on each other.
+    """
+    await session.execute(
+        _on_conflict_add(
+            pg_insert(LedgerBalance).values(
+                id=uuid4(),
+                account_id=account_id,
+                currency=currency,
+                shard=_pick_shard(),
+                balance=delta,
+            )
+        )
+    )
+
+
+def balance_deltas_upsert(deltas: Select) -> Insert:
+    """Set-based apply_balance_delta: one upsert adding every (account_id, currency, delta) row.
+
+    deltas must yield at most one row per (account_id, currency); all of them land on
+    the same randomly chosen shard. Execute it, or embed it as a CTE.
+    """
+    account_id, currency, delta = deltas.subquery().c
+    return _on_conflict_add(
+        pg_insert(LedgerBalance).from_select(
+            ["id", "account_id", "currency", "shard", "balance"],
+            select(
+                func.gen_random_uuid(),
+                account_id,
+                currency,
+                literal(_pick_shard(), SmallInteger),
+                delta,
+            ),
+        )
+    )
+
+
+def balance_totals() -> Select:
+    """(account_id, currency, balance) summed over shards; filter and HAVING as needed."""
+    return select(
+        LedgerBalance.account_id,
+        LedgerBalance.currency,
+        func.sum(LedgerBalance.balance).label("balance"),
+    ).group_by(LedgerBalance.account_id, LedgerBalance.currency)
+
+
+async def get_balance(session: AsyncSession, account_id: str, currency: str) -> Decimal:
+    """Exact current balance of an account (sum of its shards; 0 if none)."""
+    result = await session.execute(
+        select(func.coalesce(func.sum(LedgerBalance.balance), Decimal(DEFAULT_BALANCE))).where(
+            LedgerBalance.account_id == account_id, LedgerBalance.currency == currency
+        )
+    )
+    return result.scalar_one()
+
+
 async def create_ledger_entry(
     session: AsyncSession,
     account_id: str,
@@ -26,44 +108,28 @@ async def create_ledger_entry(
     If an entry with the same account_id + reference already exists, skip (return None).
     This prevents double ledger entries from duplicate webhook events.
     """
-    # Idempotency check: skip if entry already exists for this account + reference
-    existing = await session.execute(
-        select(LedgerEntry.id).where(
-            LedgerEntry.account_id == account_id,
-            LedgerEntry.reference == reference,
+    # Idempotency: the unique (account_id, reference) constraint decides, so
+    # concurrent duplicates cannot both apply their delta.
+    entry = await session.scalar(
+        pg_insert(LedgerEntry)
+        .values(
+            id=uuid4(),
+            account_id=account_id,
+            currency=currency,
+            amount=amount,
+            direction=direction,
+            reference=reference,
         )
+        .on_conflict_do_nothing(constraint="uq_ledger_entry_account_reference")
+        .returning(LedgerEntry)
     )
-    if existing.scalar_one_or_none() is not None:
+    if entry is None:
         return None
 
     delta = amount if direction == LEDGER_DIRECTION_CREDIT else -amount
-    entry = LedgerEntry(
-        account_id=account_id,
-        currency=currency,
-        amount=amount,
-        direction=direction,
-        reference=reference,
-    )
-
-    result = await session.execute(
-        select(LedgerBalance)
-        .where(LedgerBalance.account_id == account_id, LedgerBalance.currency == currency)
-        .with_for_update()
-    )
-    balance = result.scalar_one_or_none()
-    if balance is None:
-        balance = LedgerBalance(
-            account_id=account_id, currency=currency, balance=Decimal(DEFAULT_BALANCE)
-        )
-        session.add(balance)
-    balance.balance = balance.balance + delta
-
-    session.add(entry)
+    await apply_balance_delta(session, account_id, currency, delta)
     if auto_commit:
         await session.commit()
-        await session.refresh(entry)
-    else:
-        await session.flush()
     return entry
 
 
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any
 
 from botocore.signers import CloudFrontSigner
 from cryptography.hazmat.primitives import hashes, serialization
@@ -11,16 +13,30 @@ from cryptography.hazmat.primitives.asymmetric import padding
 from app.core.settings import get_settings
 
 
-def _rsa_signer(message: bytes) -> bytes:
-    """Sign message with the CloudFront private key."""
-    settings = get_settings()
-    pem = settings.cloudfront_private_key_pem
-    if not pem:
-        raise RuntimeError("CLOUDFRONT_PRIVATE_KEY_PEM is not configured")
+@lru_cache(maxsize=4)
+def _load_private_key(pem: str) -> Any:
+    """Parse the PEM once per key; RSA key loading dominates per-URL signing cost."""
     # Support escaped newlines in env vars
     pem_bytes = pem.replace("\\n", "\n").encode("utf-8")
-    private_key = serialization.load_pem_private_key(pem_bytes, password=None)
-    return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())  # type: ignore[union-attr,arg-type,call-arg]
+    return serialization.load_pem_private_key(pem_bytes, password=None)
+
+
+@lru_cache(maxsize=4)
+def _get_signer(key_pair_id: str, pem: str) -> CloudFrontSigner:
+    """One signer per (key pair, key); the RSA callback closes over the parsed key."""
+    private_key = _load_private_key(pem)
+
+    def _rsa_signer(message: bytes) -> bytes:
+        """Sign message with the CloudFront private key."""
+        return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())  # type: ignore[no-any-return]
+
+    return CloudFrontSigner(key_pair_id, _rsa_signer)
+
+
+def clear_signer_cache() -> None:
+    """Drop the cached key and signer (key rotation, tests)."""
+    _load_private_key.cache_clear()
+    _get_signer.cache_clear()
 
 
 def generate_signed_url(object_key: str) -> str:
@@ -28,8 +44,10 @@ def generate_signed_url(object_key: str) -> str:
     settings = get_settings()
     if not settings.cloudfront_domain or not settings.cloudfront_key_pair_id:
         raise RuntimeError("CloudFront is not configured (CLOUDFRONT_DOMAIN and CLOUDFRONT_KEY_PAIR_ID required)")
+    if not settings.cloudfront_private_key_pem:
+        raise RuntimeError("CLOUDFRONT_PRIVATE_KEY_PEM is not configured")
 
-    signer = CloudFrontSigner(settings.cloudfront_key_pair_id, _rsa_signer)
+    signer = _get_signer(settings.cloudfront_key_pair_id, settings.cloudfront_private_key_pem)
     url = f"https://{settings.cloudfront_domain}/{object_key}"
     expires = datetime.now(timezone.utc) + timedelta(seconds=settings.cloudfront_url_ttl_seconds)
     return signer.generate_presigned_url(url, date_less_than=expires)
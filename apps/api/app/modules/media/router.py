@@ -16,6 +16,9 @@ from app.modules.auth.constants import ADMIN_ROLE, SUPER_ADMIN_ROLE
 from app.modules.creators.constants import CREATOR_ROLE
 from app.modules.media.models import MediaObject
 from app.modules.media.schemas import (
+    BatchDownloadUrlOut,
+    BatchDownloadUrlRequest,
+    BatchDownloadUrlResponse,
     BatchMediaCreate,
     BatchUploadUrlResponse,
     MediaCreate,
@@ -25,14 +28,12 @@ from app.modules.media.schemas import (
     UploadUrlResponse,
 )
 from app.modules.media.service import (
-    can_anonymous_access_media,
-    can_user_access_media,
     create_media_object,
     delete_media,
-    generate_signed_download,
     generate_signed_upload,
-    is_fully_entitled,
-    resolve_download_object_key,
+    media_access_allows,
+    resolve_media_access,
+    sign_media_downloads,
     validate_media_upload,
 )
 from app.modules.media.storage import get_storage_client
@@ -187,34 +188,18 @@ async def create_download_url(
         media_uuid = UUID(media_id)
     except ValueError as exc:
         raise AppError(status_code=404, detail="media_not_found") from exc
-    if user is not None:
-        allowed = await can_user_access_media(session, media_uuid, user.id, variant=variant)
-    else:
-        allowed = await can_anonymous_access_media(session, media_uuid, variant=variant)
-    if not allowed:
+    # One entitlement pass (media row + referencing posts + profile assets) with the
+    # already-resolved user; signing reuses the loaded MediaObject.
+    media_by_id, access = await resolve_media_access(session, [media_uuid], user)
+    media = media_by_id.get(media_uuid)
+    if media is None or not media_access_allows(access.get(media_uuid), variant):
         raise AppError(status_code=404, detail="media_not_found")
-    # Substitute wm_preview for non-entitled users requesting grid/full
-    original_variant = variant
-    if variant in ("grid", "full") and get_settings().media_wm_preview_enabled:
-        entitled = await is_fully_entitled(session, media_uuid, user.id) if user else False
-        if not entitled:
-            variant = "wm_preview"
-    result = await session.execute(select(MediaObject).where(MediaObject.id == media_uuid))
-    media = result.scalar_one_or_none()
-    if not media:
-        raise AppError(status_code=404, detail="media_not_found")
-    object_key = await resolve_download_object_key(
-        session, media_uuid, media.object_key, variant
+    urls = await sign_media_downloads(
+        session, get_storage_client(), media_by_id, access, [(media_uuid, variant)]
     )
-    # Graceful fallback: if wm_preview doesn't exist yet, serve the original variant
-    if object_key is None and variant == "wm_preview" and original_variant is not None:
-        object_key = await resolve_download_object_key(
-            session, media_uuid, media.object_key, original_variant
-        )
-    if object_key is None:
+    download_url = urls.get((media_uuid, variant))
+    if download_url is None:
         raise AppError(status_code=404, detail="variant_not_found")
-    storage = get_storage_client()
-    download_url = generate_signed_download(storage, object_key)
     return SignedUrlResponse(
         download_url=download_url,
         blurhash=media.blurhash,
@@ -222,6 +207,47 @@ async def create_download_url(
     )
 
 
+@router.post(
+    "/download-urls",
+    response_model=BatchDownloadUrlResponse,
+    operation_id="media_batch_download_urls",
+)
+async def create_batch_download_urls(
+    payload: BatchDownloadUrlRequest,
+    session: AsyncSession = Depends(get_async_session),
+    user: User | None = Depends(get_optional_user),
+) -> BatchDownloadUrlResponse:
+    """Signed URLs for many (asset_id, variant) pairs in one round trip (e.g. a whole feed page).
+
+    Same access rules as GET /media/{id}/download-url; entitlement is resolved for all
+    assets with a fixed number of queries. Denied or unknown assets get an error entry
+    instead of failing the whole batch.
+    """
+    pairs = [(item.asset_id, item.variant) for item in payload.items]
+    media_by_id, access = await resolve_media_access(session, {mid for mid, _ in pairs}, user)
+    urls = await sign_media_downloads(session, get_storage_client(), media_by_id, access, pairs)
+    items = []
+    for media_id, variant in pairs:
+        media = media_by_id.get(media_id)
+        if media is None or not media_access_allows(access.get(media_id), variant):
+            items.append(
+                BatchDownloadUrlOut(asset_id=media_id, variant=variant, error="media_not_found")
+            )
+            continue
+        download_url = urls.get((media_id, variant))
+        items.append(
+            BatchDownloadUrlOut(
+                asset_id=media_id,
+                variant=variant,
+                download_url=download_url,
+                blurhash=media.blurhash,
+                dominant_color=media.dominant_color,
+                error=None if download_url is not None else "variant_not_found",
+            )
+        )
+    return BatchDownloadUrlResponse(items=items)
+
+
 @router.get("/mine", response_model=MediaMinePage, operation_id="media_mine")
 async def media_mine(
     cursor: str | None = None,
@@ -56,3 +56,34 @@ class BatchUploadUrlResponse(BaseModel):
     """Batch upload response — one entry per input item."""
 
     items: list[UploadUrlResponse]
+
+
+class BatchDownloadUrlItem(BaseModel):
+    asset_id: UUID
+    variant: str | None = None
+
+
+class BatchDownloadUrlRequest(BaseModel):
+    """Batch download request — up to 100 (asset_id, variant) pairs at once."""
+
+    items: list[BatchDownloadUrlItem] = Field(min_length=1, max_length=100)
+
+
+class BatchDownloadUrlOut(BaseModel):
+    """One signed download URL; error is set (and download_url null) when it cannot be served."""
+
+    asset_id: UUID
+    variant: str | None = None
+    download_url: str | None = None
+    blurhash: str | None = None
+    dominant_color: str | None = None
+    error: str | None = Field(
+        default=None,
+        description="media_not_found or variant_not_found when no URL is returned.",
+    )
+
+
+class BatchDownloadUrlResponse(BaseModel):
+    """Batch download response — one entry per input item, in input order."""
+
+    items: list[BatchDownloadUrlOut]
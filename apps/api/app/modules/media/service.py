@@ -1,22 +1,30 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import datetime, timezone
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, and_, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.errors import AppError
 from app.core.settings import get_settings
 from app.modules.auth.models import Profile, User
-from app.modules.billing.service import is_active_subscriber
+from app.modules.billing.service import active_subscription_exists
 from app.modules.creators.models import Follow
 from app.modules.media.models import MediaDerivedAsset, MediaObject
 from app.modules.media.storage import StorageClient, get_storage_client
+from app.modules.media.url_cache import get_signed_url_cache
 from app.modules.payments.models import PostPurchase
 from app.modules.posts.models import Post, PostMedia
-from app.modules.posts.service import _can_see_post
-from app.modules.posts.constants import POST_STATUS_PUBLISHED, VISIBILITY_PPV, VISIBILITY_PUBLIC
+from app.modules.posts.constants import (
+    POST_STATUS_PUBLISHED,
+    VISIBILITY_FOLLOWERS,
+    VISIBILITY_PPV,
+    VISIBILITY_PUBLIC,
+    VISIBILITY_SUBSCRIBERS,
+)
 
 CONTENT_TYPE_VIDEO_MP4 = "video/mp4"
 
@@ -29,6 +37,15 @@ VALID_DOWNLOAD_VARIANTS = frozenset({
 VARIANT_NO_FALLBACK = frozenset({"poster", "teaser", "wm_preview"})
 TEASER_VARIANTS = frozenset({"thumb", "grid", "teaser", "wm_preview"})
 
+# Access levels returned by resolve_media_access (absent key = no access).
+# FULL: owner, staff, or viewer can see a post using the asset (fully entitled).
+# PUBLIC: any variant may be served, but not entitled (avatars/banners, anonymous public posts).
+# TEASER: only TEASER_VARIANTS of a locked, published post.
+MEDIA_ACCESS_FULL = "full"
+MEDIA_ACCESS_PUBLIC = "public"
+MEDIA_ACCESS_TEASER = "teaser"
+_MEDIA_ACCESS_RANK = {MEDIA_ACCESS_TEASER: 1, MEDIA_ACCESS_PUBLIC: 2, MEDIA_ACCESS_FULL: 3}
+
 
 def validate_media_upload(content_type: str, size_bytes: int) -> None:
     """Raise AppError if content_type or size is not allowed. Does not decode or stream."""
@@ -72,179 +89,233 @@ async def resolve_download_object_key(
     return original_object_key
 
 
-async def can_anonymous_access_media(
-    session: AsyncSession,
-    media_id: UUID,
-    variant: str | None = None,
-) -> bool:
-    """True if media is publicly viewable: used in a PUBLIC post or is a creator avatar/banner."""
-    # Used in any post with visibility PUBLIC
-    post_public = await session.execute(
-        select(Post.id)
-        .join(PostMedia, PostMedia.post_id == Post.id)
+def _merge_access(access: dict[UUID, str], media_id: UUID, level: str) -> None:
+    current = access.get(media_id)
+    if current is None or _MEDIA_ACCESS_RANK[level] > _MEDIA_ACCESS_RANK[current]:
+        access[media_id] = level
+
+
+def media_access_allows(level: str | None, variant: str | None) -> bool:
+    """True if an access level from resolve_media_access permits downloading variant."""
+    if level in (MEDIA_ACCESS_FULL, MEDIA_ACCESS_PUBLIC):
+        return True
+    return level == MEDIA_ACCESS_TEASER and variant in TEASER_VARIANTS
+
+
+def _post_visible_clause(
+    viewer_id: UUID | None,
+    *,
+    followed_ids: set[UUID] | None,
+    subscribed_ids: set[UUID] | None,
+) -> Any:
+    """SQL twin of posts.service._can_see_post for a non-staff viewer, correlated to Post."""
+    if viewer_id is None:
+        return Post.visibility == VISIBILITY_PUBLIC
+    is_follower: ColumnElement[bool]
+    is_subscriber: ColumnElement[bool]
+    if followed_ids is not None:
+        is_follower = Post.creator_user_id.in_(followed_ids)
+    else:
+        is_follower = (
+            select(Follow.id)
+            .where(Follow.fan_user_id == viewer_id, Follow.creator_user_id == Post.creator_user_id)
+            .exists()
+        )
+    if subscribed_ids is not None:
+        is_subscriber = Post.creator_user_id.in_(subscribed_ids)
+    else:
+        is_subscriber = active_subscription_exists(viewer_id, Post.creator_user_id)
+    ppv_unlocked = (
+        select(PostPurchase.id)
         .where(
-            PostMedia.media_asset_id == media_id,
-            Post.visibility == VISIBILITY_PUBLIC,
+            PostPurchase.purchaser_id == viewer_id,
+            PostPurchase.post_id == Post.id,
+            PostPurchase.status == "SUCCEEDED",
         )
-        .limit(1)
+        .exists()
     )
-    if post_public.scalar_one_or_none() is not None:
-        return True
-    # Locked teaser behavior: permit signed thumb/grid for non-public published posts.
-    if variant in TEASER_VARIANTS:
-        now = datetime.now(timezone.utc)
-        teaser_post = await session.execute(
-            select(Post.id)
-            .join(PostMedia, PostMedia.post_id == Post.id)
-            .where(
-                PostMedia.media_asset_id == media_id,
-                Post.visibility != VISIBILITY_PUBLIC,
-                Post.status == POST_STATUS_PUBLISHED,
-                ((Post.publish_at.is_(None)) | (Post.publish_at <= now)),
-            )
-            .limit(1)
-        )
-        if teaser_post.scalar_one_or_none() is not None:
-            return True
-    # Creator profile avatar or banner
-    profile_asset = await session.execute(
-        select(Profile.id).where(
-            (Profile.avatar_asset_id == media_id) | (Profile.banner_asset_id == media_id),
-        ).limit(1)
+    return or_(
+        Post.visibility == VISIBILITY_PUBLIC,
+        Post.creator_user_id == viewer_id,
+        and_(Post.visibility == VISIBILITY_FOLLOWERS, is_follower),
+        and_(Post.visibility == VISIBILITY_SUBSCRIBERS, is_subscriber),
+        and_(Post.visibility == VISIBILITY_PPV, ppv_unlocked),
     )
-    return profile_asset.scalar_one_or_none() is not None
 
 
-async def can_user_access_media(
+async def resolve_media_access(
     session: AsyncSession,
-    media_id: UUID,
-    user_id: UUID,
-    variant: str | None = None,
-) -> bool:
-    """True if user is media owner or can see a post that references this asset (visibility rules)."""
-    result = await session.execute(select(MediaObject).where(MediaObject.id == media_id))
-    media = result.scalar_one_or_none()
-    if not media:
-        return False
-    if media.owner_user_id == user_id:
-        return True
-    # Admin / reader roles can view all media
+    media_ids: Iterable[UUID],
+    viewer: User | None,
+    *,
+    followed_ids: set[UUID] | None = None,
+    subscribed_ids: set[UUID] | None = None,
+) -> tuple[dict[UUID, MediaObject], dict[UUID, str]]:
+    """Entitlement engine: (media by id, access level by id) for any number of assets.
+
+    At most three queries however many assets or referencing posts are involved:
+    the media rows, one aggregate over every referencing post (follow, subscription
+    and PPV checks are correlated EXISTS subqueries), and a profile avatar/banner
+    lookup for assets still short of PUBLIC. Takes the already-resolved viewer so
+    its role is not reloaded; callers holding follow/subscription sets (e.g. the
+    feed) can pass them in place of the EXISTS subqueries.
+    """
     from app.modules.auth.constants import ADMIN_ROLE, READER_ROLE, SUPER_ADMIN_ROLE
-    user_result = await session.execute(select(User.role).where(User.id == user_id))
-    user_role = user_result.scalar_one_or_none()
-    if user_role in (ADMIN_ROLE, SUPER_ADMIN_ROLE, READER_ROLE):
-        return True
-    # Check if any post that uses this asset is visible to the viewer
-    posts_result = await session.execute(
-        select(Post)
-        .join(PostMedia, PostMedia.post_id == Post.id)
-        .where(PostMedia.media_asset_id == media_id)
-    )
-    posts = list(posts_result.scalars().unique().all())
-
-    # Query PPV purchases once for all PPV posts
-    ppv_post_ids = [p.id for p in posts if p.visibility == VISIBILITY_PPV]
-    ppv_unlocked: set[UUID] = set()
-    if ppv_post_ids:
-        ppv_result = await session.execute(
-            select(PostPurchase.post_id).where(
-                PostPurchase.purchaser_id == user_id,
-                PostPurchase.post_id.in_(ppv_post_ids),
-                PostPurchase.status == "SUCCEEDED",
-            )
+
+    ids = set(media_ids)
+    if not ids:
+        return {}, {}
+    media_result = await session.execute(select(MediaObject).where(MediaObject.id.in_(ids)))
+    media_by_id = {m.id: m for m in media_result.scalars().all()}
+    if viewer is not None and viewer.role in (ADMIN_ROLE, SUPER_ADMIN_ROLE, READER_ROLE):
+        return media_by_id, {mid: MEDIA_ACCESS_FULL for mid in media_by_id}
+    viewer_id = viewer.id if viewer is not None else None
+    access: dict[UUID, str] = {}
+    if viewer_id is not None:
+        for mid, media in media_by_id.items():
+            if media.owner_user_id == viewer_id:
+                access[mid] = MEDIA_ACCESS_FULL
+
+    pending = set(media_by_id) - set(access)
+    if pending:
+        now = datetime.now(timezone.utc)
+        visible = _post_visible_clause(
+            viewer_id, followed_ids=followed_ids, subscribed_ids=subscribed_ids
         )
-        ppv_unlocked = {row[0] for row in ppv_result.all()}
-
-    for post in posts:
-        is_follower_result = await session.execute(
-            select(Follow.id).where(
-                Follow.fan_user_id == user_id,
-                Follow.creator_user_id == post.creator_user_id,
-            ).limit(1)
+        live = and_(
+            Post.status == POST_STATUS_PUBLISHED,
+            or_(Post.publish_at.is_(None), Post.publish_at <= now),
         )
-        is_follower = is_follower_result.scalar_one_or_none() is not None
-        is_subscriber = await is_active_subscriber(session, user_id, post.creator_user_id)
-        if await _can_see_post(
-            session,
-            post,
-            viewer_user_id=user_id,
-            is_follower=is_follower,
-            is_subscriber=is_subscriber,
-            ppv_unlocked_post_ids=ppv_unlocked,
-        ):
-            return True
-        # Locked teaser behavior: allow only non-full variants for inaccessible posts.
-        if variant in TEASER_VARIANTS:
-            now = datetime.now(timezone.utc)
-            if (
-                post.visibility != VISIBILITY_PUBLIC
-                and post.status == POST_STATUS_PUBLISHED
-                and (post.publish_at is None or post.publish_at <= now)
-            ):
-                return True
-    # Fall back to anonymous access (profile avatars/banners, public posts)
-    return await can_anonymous_access_media(session, media_id, variant=variant)
-
-
-async def is_fully_entitled(
-    session: AsyncSession,
-    media_id: UUID,
-    user_id: UUID,
-) -> bool:
-    """True if user owns media or can fully see a post that uses it (not just teaser access)."""
-    result = await session.execute(select(MediaObject).where(MediaObject.id == media_id))
-    media = result.scalar_one_or_none()
-    if not media:
-        return False
-    if media.owner_user_id == user_id:
-        return True
-    # Admin / reader roles are fully entitled
-    from app.modules.auth.constants import ADMIN_ROLE, READER_ROLE, SUPER_ADMIN_ROLE
-    user_result = await session.execute(select(User.role).where(User.id == user_id))
-    user_role = user_result.scalar_one_or_none()
-    if user_role in (ADMIN_ROLE, SUPER_ADMIN_ROLE, READER_ROLE):
-        return True
-
-    posts_result = await session.execute(
-        select(Post)
-        .join(PostMedia, PostMedia.post_id == Post.id)
-        .where(PostMedia.media_asset_id == media_id)
-    )
-    posts = list(posts_result.scalars().unique().all())
-    if not posts:
-        return False
-
-    ppv_post_ids = [p.id for p in posts if p.visibility == VISIBILITY_PPV]
-    ppv_unlocked: set[UUID] = set()
-    if ppv_post_ids:
-        ppv_result = await session.execute(
-            select(PostPurchase.post_id).where(
-                PostPurchase.purchaser_id == user_id,
-                PostPurchase.post_id.in_(ppv_post_ids),
-                PostPurchase.status == "SUCCEEDED",
+        posts_result = await session.execute(
+            select(PostMedia.media_asset_id, func.bool_or(visible), func.bool_or(live))
+            .join(Post, Post.id == PostMedia.post_id)
+            .where(PostMedia.media_asset_id.in_(pending))
+            .group_by(PostMedia.media_asset_id)
+        )
+        for mid, any_visible, any_live in posts_result.all():
+            if any_visible:
+                # Anonymous viewers can see public posts but are never "entitled".
+                access[mid] = MEDIA_ACCESS_FULL if viewer_id is not None else MEDIA_ACCESS_PUBLIC
+            elif any_live:
+                # Locked teaser behavior: non-full variants of inaccessible published posts.
+                access[mid] = MEDIA_ACCESS_TEASER
+
+    pending = {mid for mid in media_by_id if access.get(mid) in (None, MEDIA_ACCESS_TEASER)}
+    if pending:
+        profile_result = await session.execute(
+            select(Profile.avatar_asset_id, Profile.banner_asset_id).where(
+                Profile.avatar_asset_id.in_(pending) | Profile.banner_asset_id.in_(pending)
             )
         )
-        ppv_unlocked = {row[0] for row in ppv_result.all()}
-
-    for post in posts:
-        is_follower_result = await session.execute(
-            select(Follow.id).where(
-                Follow.fan_user_id == user_id,
-                Follow.creator_user_id == post.creator_user_id,
-            ).limit(1)
+        for avatar_id, banner_id in profile_result.all():
+            for asset_id in (avatar_id, banner_id):
+                if asset_id is not None and asset_id in pending:
+                    _merge_access(access, asset_id, MEDIA_ACCESS_PUBLIC)
+    return media_by_id, access
+
+
+async def sign_media_downloads(
+    session: AsyncSession,
+    storage: StorageClient,
+    media_by_id: dict[UUID, MediaObject],
+    access: dict[UUID, str],
+    requests: Iterable[tuple[UUID, str | None]],
+) -> dict[tuple[UUID, str | None], str | None]:
+    """Signed URL per (asset_id, variant); None when access is denied or the variant is missing.
+
+    Applies the same teaser gating, wm_preview substitution and fallback as
+    GET /media/{id}/download-url, with one derived-asset query for the whole batch.
+    """
+    wm_enabled = get_settings().media_wm_preview_enabled
+    wanted: dict[tuple[UUID, str | None], str | None] = {}
+    for media_id, variant in requests:
+        if media_id not in media_by_id or not media_access_allows(access.get(media_id), variant):
+            continue
+        effective = variant
+        if variant in ("grid", "full") and wm_enabled and access.get(media_id) != MEDIA_ACCESS_FULL:
+            effective = "wm_preview"
+        wanted[(media_id, variant)] = effective
+
+    derived: dict[tuple[UUID, str], str] = {}
+    lookup_variants = {
+        v for key, eff in wanted.items() for v in (key[1], eff) if v in VALID_DOWNLOAD_VARIANTS
+    }
+    if lookup_variants:
+        derived_result = await session.execute(
+            select(
+                MediaDerivedAsset.parent_asset_id,
+                MediaDerivedAsset.variant,
+                MediaDerivedAsset.object_key,
+            ).where(
+                MediaDerivedAsset.parent_asset_id.in_({mid for mid, _ in wanted}),
+                MediaDerivedAsset.variant.in_(lookup_variants),
+            )
         )
-        is_follower = is_follower_result.scalar_one_or_none() is not None
-        is_subscriber = await is_active_subscriber(session, user_id, post.creator_user_id)
-        if await _can_see_post(
-            session,
-            post,
-            viewer_user_id=user_id,
-            is_follower=is_follower,
-            is_subscriber=is_subscriber,
-            ppv_unlocked_post_ids=ppv_unlocked,
-        ):
-            return True
-    return False
+        for parent_id, derived_variant, derived_key in derived_result.all():
+            derived.setdefault((parent_id, derived_variant), derived_key)
+
+    def _object_key(media: MediaObject, variant: str | None) -> str | None:
+        if not variant or variant not in VALID_DOWNLOAD_VARIANTS:
+            return media.object_key
+        key = derived.get((media.id, variant))
+        if key is not None:
+            return key
+        return None if variant in VARIANT_NO_FALLBACK else media.object_key
+
+    object_keys: dict[tuple[UUID, str | None], str | None] = {}
+    for (media_id, variant), effective in wanted.items():
+        media = media_by_id[media_id]
+        object_key = _object_key(media, effective)
+        # Graceful fallback: if wm_preview doesn't exist yet, serve the original variant
+        if object_key is None and effective == "wm_preview" and variant is not None:
+            object_key = _object_key(media, variant)
+        object_keys[(media_id, variant)] = object_key
+    signed = await generate_signed_downloads(storage, {k for k in object_keys.values() if k is not None})
+    return {
+        pair: signed[object_key] if object_key is not None else None
+        for pair, object_key in object_keys.items()
+    }
+
+
+async def sign_post_media(
+    session: AsyncSession,
+    storage: StorageClient,
+    posts: Iterable[tuple[Post, bool]],
+    variant: str | None,
+    *,
+    viewer_user_id: UUID | None,
+) -> dict[UUID, dict[str, str]]:
+    """Signed URLs for every asset of already-gated posts: post_id -> {asset_id: url}.
+
+    Entitlement comes from the (post, is_locked) pairs the feed/creator/search pages
+    already computed, so only the derived-asset lookup hits the database.
+    """
+    posts = list(posts)
+    media_by_id: dict[UUID, MediaObject] = {}
+    access: dict[UUID, str] = {}
+    for post, is_locked in posts:
+        if is_locked:
+            level = MEDIA_ACCESS_TEASER
+        elif viewer_user_id is not None:
+            level = MEDIA_ACCESS_FULL
+        else:
+            level = MEDIA_ACCESS_PUBLIC
+        for pm in post.media:
+            if pm.media_object is not None:
+                media_by_id[pm.media_asset_id] = pm.media_object
+                _merge_access(access, pm.media_asset_id, level)
+    urls = await sign_media_downloads(
+        session, storage, media_by_id, access, [(mid, variant) for mid in media_by_id]
+    )
+    out: dict[UUID, dict[str, str]] = {}
+    for post, _ in posts:
+        post_urls: dict[str, str] = {}
+        for pm in post.media:
+            url = urls.get((pm.media_asset_id, variant))
+            if url is not None:
+                post_urls[str(pm.media_asset_id)] = url
+        out[post.id] = post_urls
+    return out
 
 
 async def create_media_object(
@@ -327,5 +398,15 @@ def generate_signed_upload(storage: StorageClient, object_key: str, content_type
     return storage.create_signed_upload_url(object_key, content_type)
 
 
-def generate_signed_download(storage: StorageClient, object_key: str) -> str:
-    return storage.create_signed_download_url(object_key)
+async def generate_signed_download(storage: StorageClient, object_key: str) -> str:
+    return (await generate_signed_downloads(storage, [object_key]))[object_key]
+
+
+async def generate_signed_downloads(storage: StorageClient, object_keys: Iterable[str]) -> dict[str, str]:
+    """Signed URL per object key, reusing cached URLs that are still well inside their TTL."""
+    namespace = getattr(storage, "url_cache_namespace", None)
+    if namespace is None:
+        return {key: storage.create_signed_download_url(key) for key in object_keys}
+    return await get_signed_url_cache().get_or_sign_many(
+        namespace, object_keys, storage.download_url_ttl_seconds, storage.create_signed_download_url
+    )
@@ -1,17 +1,109 @@
 from __future__ import annotations
 
+import os
+import threading
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from datetime import timedelta
+from typing import Any
 from urllib.parse import urlparse, urlunparse
 
 import boto3
+import urllib3
 from botocore.config import Config
 from minio import Minio
 
 from app.core.settings import get_settings
 
+# Process-wide client registry. boto3 clients, Minio clients and the storage
+# wrappers are thread-safe once built, so one instance per process shares a single
+# HTTP connection pool (and MinIO's cached bucket region) across all requests/tasks.
+_registry_lock = threading.RLock()  # re-entrant: storage wrappers build their S3/MinIO client inside the factory
+_registry: dict[str, Any] = {}
+
+
+def _get_or_create[T](name: str, factory: Callable[[], T]) -> T:
+    client = _registry.get(name)
+    if client is None:
+        with _registry_lock:
+            client = _registry.get(name)
+            if client is None:
+                client = factory()
+                _registry[name] = client
+    return client  # type: ignore[no-any-return]
+
+
+def _create_s3_client() -> Any:
+    settings = get_settings()
+    config = Config(
+        signature_version="s3v4",
+        s3={"addressing_style": "virtual"},
+        max_pool_connections=settings.storage_max_pool_connections,
+        retries={"max_attempts": 3, "mode": "standard"},
+    )
+    # Dedicated session: boto3's default session is not safe to build clients from concurrently.
+    return boto3.session.Session().client(
+        "s3", region_name=settings.aws_region or "us-east-1", config=config
+    )
+
+
+def _create_minio_client() -> Minio:
+    settings = get_settings()
+    http_client = _get_or_create(
+        "minio_http",
+        lambda: urllib3.PoolManager(
+            maxsize=settings.storage_max_pool_connections,
+            retries=urllib3.Retry(
+                total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]
+            ),
+        ),
+    )
+    return Minio(
+        settings.minio_endpoint,
+        access_key=settings.minio_access_key,
+        secret_key=settings.minio_secret_key,
+        secure=settings.minio_secure,
+        http_client=http_client,
+    )
+
+
+def get_s3_client() -> Any:
+    """Shared boto3 S3 client for this process (API and worker)."""
+    return _get_or_create("s3", _create_s3_client)
+
+
+def get_minio_client() -> Minio:
+    """Shared MinIO client for this process (API and worker)."""
+    return _get_or_create("minio", _create_minio_client)
+
+
+def close_storage_clients() -> None:
+    """Close pooled connections and drop cached clients (app shutdown, worker exit, tests)."""
+    with _registry_lock:
+        clients = list(_registry.values())
+        _registry.clear()
+    for client in clients:
+        if isinstance(client, urllib3.PoolManager):
+            client.clear()
+        elif hasattr(client, "close"):
+            client.close()
+    from app.modules.media.cloudfront_signer import clear_signer_cache
+    from app.modules.media.url_cache import reset_signed_url_cache
+
+    clear_signer_cache()
+    reset_signed_url_cache()
+
+
+# Forked children (Celery prefork) must not reuse the parent's sockets.
+os.register_at_fork(after_in_child=_registry.clear)
+
 
 class StorageClient(ABC):
+    # Signed download URLs are reused from media.url_cache when a namespace is set;
+    # download_url_ttl_seconds is how long each URL stays valid.
+    url_cache_namespace: str | None = None
+    download_url_ttl_seconds: int = 0
+
     @abstractmethod
     def create_signed_upload_url(self, object_key: str, content_type: str) -> str:
         raise NotImplementedError
@@ -36,13 +128,10 @@ class MinioStorage(StorageClient):
         settings = get_settings()
         self._bucket = settings.minio_bucket
         self._public_endpoint = settings.minio_public_endpoint
-        self._client = Minio(
-            settings.minio_endpoint,
-            access_key=settings.minio_access_key,
-            secret_key=settings.minio_secret_key,
-            secure=settings.minio_secure,
-        )
+        self._client = get_minio_client()
         self._ttl = timedelta(seconds=settings.media_url_ttl_seconds)
+        self.url_cache_namespace = f"minio:{self._bucket}"
+        self.download_url_ttl_seconds = settings.media_url_ttl_seconds
 
     def create_signed_upload_url(self, object_key: str, content_type: str) -> str:
         # Note: Minio presigned PUT does not enforce Content-Type like S3.
@@ -75,9 +164,9 @@ class S3Storage(StorageClient):
             raise ValueError("S3_BUCKET is required for S3Storage")
         self._bucket = settings.s3_bucket
         self._expires = settings.media_url_ttl_seconds
-        self._region = settings.aws_region or "us-east-1"
-        config = Config(signature_version="s3v4", s3={"addressing_style": "virtual"})
-        self._client = boto3.client("s3", region_name=self._region, config=config)
+        self._client = get_s3_client()
+        self.url_cache_namespace = f"s3:{self._bucket}"
+        self.download_url_ttl_seconds = settings.media_url_ttl_seconds
 
     def create_signed_upload_url(self, object_key: str, content_type: str) -> str:
         """Generate presigned PUT URL with Content-Type condition enforcement."""
@@ -113,6 +202,8 @@ class CloudFrontStorage(StorageClient):
         if not settings.s3_bucket:
             raise ValueError("S3_BUCKET is required for CloudFrontStorage")
         self._s3 = S3Storage()
+        self.url_cache_namespace = f"cloudfront:{settings.cloudfront_domain}"
+        self.download_url_ttl_seconds = settings.cloudfront_url_ttl_seconds
 
     def create_signed_upload_url(self, object_key: str, content_type: str) -> str:
         return self._s3.create_signed_upload_url(object_key, content_type)
@@ -126,6 +217,11 @@ class CloudFrontStorage(StorageClient):
 
 
 def get_storage_client() -> StorageClient:
+    """Process-wide storage client. CloudFront > S3 > MinIO (see _create_storage_client)."""
+    return _get_or_create("storage", _create_storage_client)
+
+
+def _create_storage_client() -> StorageClient:
     """Select storage by STORAGE env or S3_BUCKET presence. CloudFront > S3 > MinIO."""
     settings = get_settings()
     if settings.storage == "s3" or settings.s3_bucket:
@@ -0,0 +1,196 @@
+"""Signed download URL cache: in-process LRU in front of Redis.
+
+A signed URL for an object key stays valid for the storage TTL (MEDIA_URL_TTL_SECONDS /
+CLOUDFRONT_URL_TTL_SECONDS), so hot assets (avatars, public post media) are re-used until
+SIGNED_URL_CACHE_MARGIN_SECONDS before expiry instead of being re-signed on every request.
+Identical URLs also let CDN and browser caches hit. Access checks happen before signing,
+so the cache never widens who gets a URL.
+
+Redis (the shared async pool, app.core.redis) is shared between API processes and is
+best-effort: errors are counted, Redis is skipped for a short cool-down, and signing
+falls back to the local tier.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+
+from redis.asyncio import Redis
+
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "signed_url:"
+_REDIS_COOLDOWN_SECONDS = 30.0
+
+
+class SignedUrlCache:
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    # -- local tier ---------------------------------------------------------
+
+    def _local_get(self, key: str, now: float) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            reuse_until, url = entry
+            if reuse_until <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return url
+
+    def _local_put(self, key: str, reuse_until: float, url: str) -> None:
+        with self._lock:
+            self._entries[key] = (reuse_until, url)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    # -- redis tier ---------------------------------------------------------
+
+    def _get_redis(self) -> Redis | None:
+        if time.monotonic() < self._redis_down_until:
+            return None
+        return get_redis()
+
+    def _redis_failed(self) -> None:
+        self.redis_errors += 1
+        self._redis_down_until = time.monotonic() + _REDIS_COOLDOWN_SECONDS
+        logger.warning("signed url cache: redis unavailable, using local cache only", exc_info=True)
+
+    async def _redis_get_many(self, keys: list[str], now: float) -> dict[str, tuple[float, str]]:
+        client = self._get_redis()
+        if client is None or not keys:
+            return {}
+        try:
+            values = await client.mget([REDIS_KEY_PREFIX + k for k in keys])
+        except Exception:
+            self._redis_failed()
+            return {}
+        found: dict[str, tuple[float, str]] = {}
+        for key, raw in zip(keys, values, strict=True):
+            if raw is None:
+                continue
+            reuse_until_s, _, url = raw.decode("utf-8").partition("|")
+            # Redis stores wall-clock deadlines; convert to this process's monotonic clock.
+            reuse_until = float(reuse_until_s) - time.time() + now
+            if reuse_until > now and url:
+                found[key] = (reuse_until, url)
+        return found
+
+    async def _redis_put_many(self, items: dict[str, tuple[int, str]]) -> None:
+        client = self._get_redis()
+        if client is None or not items:
+            return
+        wall_now = time.time()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, (reuse_seconds, url) in items.items():
+                pipe.set(REDIS_KEY_PREFIX + key, f"{wall_now + reuse_seconds}|{url}", ex=reuse_seconds)
+            await pipe.execute()
+        except Exception:
+            self._redis_failed()
+
+    # -- public -------------------------------------------------------------
+
+    async def get_or_sign_many(
+        self,
+        namespace: str,
+        object_keys: Iterable[str],
+        ttl_seconds: int,
+        sign: Callable[[str], str],
+    ) -> dict[str, str]:
+        """Signed URL per object key: local hit, then one Redis MGET, then sign the rest."""
+        settings = get_settings()
+        reuse_seconds = ttl_seconds - settings.signed_url_cache_margin_seconds
+        keys = list(dict.fromkeys(object_keys))
+        if reuse_seconds <= 0:
+            self.misses += len(keys)
+            return {k: sign(k) for k in keys}
+
+        now = time.monotonic()
+        urls: dict[str, str] = {}
+        missing: list[str] = []
+        for object_key in keys:
+            url = self._local_get(f"{namespace}:{object_key}", now)
+            if url is not None:
+                self.local_hits += 1
+                urls[object_key] = url
+            else:
+                missing.append(object_key)
+        if not missing:
+            return urls
+
+        from_redis = await self._redis_get_many([f"{namespace}:{k}" for k in missing], now)
+        to_store: dict[str, tuple[int, str]] = {}
+        for object_key in missing:
+            cache_key = f"{namespace}:{object_key}"
+            hit = from_redis.get(cache_key)
+            if hit is not None:
+                self.redis_hits += 1
+                self._local_put(cache_key, *hit)
+                urls[object_key] = hit[1]
+                continue
+            self.misses += 1
+            url = sign(object_key)
+            self._local_put(cache_key, now + reuse_seconds, url)
+            to_store[cache_key] = (reuse_seconds, url)
+            urls[object_key] = url
+        await self._redis_put_many(to_store)
+        return urls
+
+    def stats(self) -> dict[str, int | float]:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "redis_errors": self.redis_errors,
+            "hit_ratio": round((self.local_hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+            "size": size,
+            "maxsize": self._maxsize,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: SignedUrlCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_signed_url_cache() -> SignedUrlCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SignedUrlCache(get_settings().signed_url_cache_size)
+    return _cache
+
+
+def reset_signed_url_cache() -> None:
+    """Drop cached URLs and counters (storage client teardown, tests)."""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
@@ -6,7 +6,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,7 +18,17 @@ if TYPE_CHECKING:
 
 
 class Conversation(TimestampMixin, Base):
+    """updated_at orders the inbox: it moves on each message and is kept on mark-read.
+
+    The last-message and per-side unread columns are maintained by create_message and
+    mark_conversation_read so the inbox is a single indexed range scan.
+    """
+
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_creator_inbox", "creator_user_id", "updated_at", "id"),
+        Index("ix_conversations_fan_inbox", "fan_user_id", "updated_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     creator_user_id: Mapped[uuid.UUID] = mapped_column(
@@ -27,6 +37,18 @@ class Conversation(TimestampMixin, Base):
     fan_user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
     )
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_message_preview: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    creator_unread_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    fan_unread_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    creator_last_read_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    fan_last_read_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     messages: Mapped[list["Message"]] = relationship(
         "Message", back_populates="conversation", order_by="Message.created_at"
@@ -40,6 +62,9 @@ class Message(Base):
     """Messages have created_at only (no updated_at)."""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     conversation_id: Mapped[uuid.UUID] = mapped_column(
@@ -0,0 +1,398 @@
+"""Real-time DM events: per-user Server-Sent Event streams fanned out over Redis pub/sub.
+
+After create_message commits, each participant gets a `message` event (their own view
+of the media locks) and a `conversation` event (inbox preview and their unread count);
+mark_conversation_read sends both a `read` event (read receipt). Events go to Redis
+channel dm:user:{user_id}. Every API process holds one pub/sub connection, subscribed only to
+the channels of users with an open stream on that process, and copies events into
+the bounded queue of each local stream. Without Redis (dev, tests) events are
+delivered in-process.
+
+Pub/sub delivery is at-most-once. A stream that falls behind (queue full) or whose
+process lost its subscription is sent a `resync` event and closed; the client
+reconnects with its last event id (a message id) and the gap is replayed from the
+database, or it is told to resync again and refetches over REST.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncGenerator, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from redis.asyncio import Redis
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.errors import AppError
+from app.core.redis import get_redis
+from app.core.settings import get_settings
+from app.modules.messaging.models import Conversation, Message
+from app.modules.messaging.schemas import MessageMediaOut, MessageOut
+from app.modules.payments.service import purchased_message_media_ids
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "dm:user:"
+EVENT_MESSAGE = "message"
+EVENT_CONVERSATION = "conversation"
+EVENT_READ = "read"
+EVENT_RESYNC = "resync"
+_RECONNECT_DELAY_SECONDS = 1.0
+_RETRY_MILLISECONDS = 3000
+
+Event = dict[str, Any]
+
+
+def _channel(user_id: UUID) -> str:
+    return f"{CHANNEL_PREFIX}{user_id}"
+
+
+def message_preview(text: str | None) -> str:
+    return text[:100] if text else "[Media]"
+
+
+# -- events --------------------------------------------------------------------
+
+
+def message_event(
+    msg: Message,
+    viewer_id: UUID,
+    creator_user_id: UUID,
+    purchased_media_ids: frozenset[UUID] = frozenset(),
+) -> Event:
+    """A message as viewer_id sees it (locked media is unlocked for the creator or buyer)."""
+    media = []
+    for mm in msg.media:
+        unlocked = not mm.is_locked or viewer_id == creator_user_id or mm.id in purchased_media_ids
+        media.append(
+            MessageMediaOut(
+                id=mm.id,
+                media_asset_id=mm.media_asset_id,
+                is_locked=mm.is_locked,
+                price_cents=mm.price_cents,
+                currency=mm.currency,
+                unlocked=unlocked,
+                viewer_has_unlocked=unlocked,
+            )
+        )
+    out = MessageOut(
+        id=msg.id,
+        conversation_id=msg.conversation_id,
+        sender_id=msg.sender_id,
+        sender_role=msg.sender_role,
+        message_type=msg.message_type,
+        text=msg.text,
+        media=media,
+        created_at=msg.created_at,
+    )
+    return {"type": EVENT_MESSAGE, "id": str(msg.id), "data": out.model_dump(mode="json")}
+
+
+def conversation_event(msg: Message, unread_count: int) -> Event:
+    return {
+        "type": EVENT_CONVERSATION,
+        "data": {
+            "conversation_id": str(msg.conversation_id),
+            "sender_id": str(msg.sender_id),
+            "last_message_preview": message_preview(msg.text),
+            "last_message_at": msg.created_at.isoformat(),
+            "unread_count": unread_count,
+        },
+    }
+
+
+def resync_event() -> Event:
+    return {"type": EVENT_RESYNC, "data": {}}
+
+
+def format_sse(event: Event) -> str:
+    lines = []
+    if event.get("id"):
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+# -- hub -----------------------------------------------------------------------
+
+
+@dataclass(eq=False)
+class DmStream:
+    user_id: UUID
+    queue: asyncio.Queue[Event | None]
+    # Set when an event could not be queued; the stream must resync and close.
+    lagged: bool = False
+    sent_ids: set[str] = field(default_factory=set)
+
+
+class DmEventHub:
+    """Open streams of one event loop, plus its Redis subscription when configured."""
+
+    def __init__(self, redis: Redis | None) -> None:
+        self._redis = redis
+        self._streams: dict[UUID, set[DmStream]] = {}
+        self._subscribed: set[UUID] = set()
+        self._pubsub: Any = None
+        self._reader: asyncio.Task[None] | None = None
+        self._lock = asyncio.Lock()
+        self._background: set[asyncio.Task[Any]] = set()
+
+    def stream_count(self) -> int:
+        return sum(len(streams) for streams in self._streams.values())
+
+    async def open(self, user_id: UUID) -> DmStream:
+        stream = DmStream(user_id, asyncio.Queue(maxsize=get_settings().dm_stream_queue_size))
+        self._streams.setdefault(user_id, set()).add(stream)
+        if self._redis is not None:
+            try:
+                await self._sync_subscriptions()
+            except Exception as exc:
+                self.close(stream)
+                logger.warning("dm realtime: redis subscribe failed", exc_info=True)
+                raise AppError(status_code=503, detail="realtime_unavailable") from exc
+        return stream
+
+    def close(self, stream: DmStream) -> None:
+        """Forget a stream. Synchronous so it is safe in a cancelled generator's finally."""
+        streams = self._streams.get(stream.user_id)
+        if streams is not None:
+            streams.discard(stream)
+            if not streams:
+                del self._streams[stream.user_id]
+        if self._redis is not None and stream.user_id not in self._streams:
+            task = asyncio.get_running_loop().create_task(self._unsubscribe_idle())
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    def deliver(self, user_id: UUID, event: Event) -> None:
+        for stream in self._streams.get(user_id, ()):
+            if stream.lagged:
+                continue
+            try:
+                stream.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                stream.lagged = True
+
+    def _resync_all(self) -> None:
+        for streams in self._streams.values():
+            for stream in streams:
+                stream.lagged = True
+                try:
+                    stream.queue.put_nowait(None)  # wake the writer
+                except asyncio.QueueFull:
+                    pass
+
+    async def _sync_subscriptions(self) -> None:
+        async with self._lock:
+            assert self._redis is not None
+            wanted = set(self._streams)
+            added, removed = wanted - self._subscribed, self._subscribed - wanted
+            if self._pubsub is None:
+                self._pubsub = self._redis.pubsub()
+            if added:
+                await self._pubsub.subscribe(*(_channel(uid) for uid in added))
+                self._subscribed |= added
+            if removed:
+                await self._pubsub.unsubscribe(*(_channel(uid) for uid in removed))
+                self._subscribed -= removed
+            if self._subscribed and (self._reader is None or self._reader.done()):
+                self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def _unsubscribe_idle(self) -> None:
+        try:
+            await self._sync_subscriptions()
+        except Exception:
+            logger.debug("dm realtime: unsubscribe failed", exc_info=True)
+
+    async def _read(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # redis-py reconnects and resubscribes on the next read; anything
+                # published meanwhile is lost, so every local stream resyncs.
+                logger.warning("dm realtime: pub/sub connection lost", exc_info=True)
+                self._resync_all()
+                await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                user_id = UUID(channel.removeprefix(CHANNEL_PREFIX))
+                event = json.loads(message["data"])
+            except (ValueError, TypeError):
+                logger.debug("dm realtime: ignoring malformed event on %s", channel)
+                continue
+            self.deliver(user_id, event)
+
+    async def aclose(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        self._pubsub = None
+        self._subscribed.clear()
+
+
+_hubs: dict[int, tuple[asyncio.AbstractEventLoop, DmEventHub]] = {}
+
+
+def get_dm_hub() -> DmEventHub:
+    """Hub for the running loop (pub/sub connections, like pools, are loop-bound)."""
+    loop = asyncio.get_running_loop()
+    entry = _hubs.get(id(loop))
+    if entry is None or entry[0] is not loop:
+        for key, (other, _) in list(_hubs.items()):
+            if other.is_closed():
+                del _hubs[key]
+        entry = (loop, DmEventHub(get_redis()))
+        _hubs[id(loop)] = entry
+    return entry[1]
+
+
+async def close_dm_hub() -> None:
+    """Stop the running loop's subscription (app shutdown)."""
+    entry = _hubs.pop(id(asyncio.get_running_loop()), None)
+    if entry is not None:
+        await entry[1].aclose()
+
+
+# -- publish -------------------------------------------------------------------
+
+
+async def publish_dm_events(events: Iterable[tuple[UUID, Event]]) -> None:
+    """Send events to users' streams on every process. Never raises."""
+    batch = list(events)
+    if not batch:
+        return
+    redis = get_redis()
+    if redis is None:
+        hub = get_dm_hub()
+        for user_id, event in batch:
+            hub.deliver(user_id, event)
+        return
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for user_id, event in batch:
+                pipe.publish(_channel(user_id), json.dumps(event, separators=(",", ":")))
+            await pipe.execute()
+    except Exception:
+        logger.warning("dm realtime: publish failed; clients catch up on reconnect", exc_info=True)
+
+
+async def publish_new_message(
+    msg: Message, conv: Conversation, *, creator_unread: int, fan_unread: int
+) -> None:
+    """Push a committed message and the inbox update to both participants."""
+    events: list[tuple[UUID, Event]] = []
+    for user_id, unread in ((conv.creator_user_id, creator_unread), (conv.fan_user_id, fan_unread)):
+        events.append((user_id, message_event(msg, user_id, conv.creator_user_id)))
+        events.append((user_id, conversation_event(msg, unread)))
+    await publish_dm_events(events)
+
+
+async def publish_conversation_read(conv: Conversation, reader_id: UUID, read_at: datetime) -> None:
+    """Read receipt for the other participant; clears the badge on the reader's other devices."""
+    event: Event = {
+        "type": EVENT_READ,
+        "data": {
+            "conversation_id": str(conv.id),
+            "reader_id": str(reader_id),
+            "read_at": read_at.isoformat(),
+        },
+    }
+    await publish_dm_events((user_id, event) for user_id in (conv.creator_user_id, conv.fan_user_id))
+
+
+# -- stream --------------------------------------------------------------------
+
+
+async def replay_dm_events(
+    session: AsyncSession, user_id: UUID, last_event_id: str | None
+) -> list[Event]:
+    """Messages after last_event_id in any of the user's conversations, oldest first.
+
+    Returns a single resync event when the cursor is unknown or the gap is larger
+    than DM_STREAM_REPLAY_LIMIT.
+    """
+    if not last_event_id:
+        return []
+    try:
+        cursor_id = UUID(last_event_id)
+    except ValueError:
+        return [resync_event()]
+    participant = or_(Conversation.creator_user_id == user_id, Conversation.fan_user_id == user_id)
+    cursor_at = (
+        await session.execute(
+            select(Message.created_at)
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(Message.id == cursor_id, participant)
+        )
+    ).scalar_one_or_none()
+    if cursor_at is None:
+        return [resync_event()]
+    limit = get_settings().dm_stream_replay_limit
+    rows = (
+        await session.execute(
+            select(Message, Conversation.creator_user_id)
+            .join(Conversation, Conversation.id == Message.conversation_id)
+            .where(participant, tuple_(Message.created_at, Message.id) > tuple_(cursor_at, cursor_id))
+            .order_by(Message.created_at, Message.id)
+            .limit(limit + 1)
+            .options(selectinload(Message.media))
+        )
+    ).all()
+    if len(rows) > limit:
+        return [resync_event()]
+    purchased = await purchased_message_media_ids(
+        session, user_id, (mm.id for msg, _ in rows for mm in msg.media if mm.is_locked)
+    )
+    return [message_event(msg, user_id, creator_id, purchased) for msg, creator_id in rows]
+
+
+async def dm_event_stream(stream: DmStream, backlog: list[Event]) -> AsyncGenerator[str, None]:
+    """SSE body: replayed backlog, then live events with a heartbeat comment when idle."""
+    hub = get_dm_hub()
+    heartbeat = get_settings().dm_stream_heartbeat_seconds
+    try:
+        yield f"retry: {_RETRY_MILLISECONDS}\n\n"
+        for replayed in backlog:
+            yield format_sse(replayed)
+            if replayed["type"] == EVENT_RESYNC:
+                return
+            stream.sent_ids.add(replayed["id"])
+        while True:
+            if stream.lagged:
+                yield format_sse(resync_event())
+                return
+            try:
+                event = await asyncio.wait_for(stream.queue.get(), heartbeat)
+            except TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                continue
+            if event.get("id") and event["id"] in stream.sent_ids:
+                continue  # published while the backlog was being read
+            yield format_sse(event)
+    finally:
+        hub.close(stream)
@@ -4,14 +4,15 @@ from __future__ import annotations
 
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.errors import AppError
 from app.db.session import get_async_session
 from app.modules.auth.deps import get_current_user
-from app.modules.auth.models import Profile, User
+from app.modules.auth.models import User
 from app.modules.creators.constants import CREATOR_ROLE
 from app.modules.media.models import MediaObject
 from app.modules.media.schemas import SignedUrlResponse
@@ -32,33 +33,57 @@ from app.modules.messaging.schemas import (
 from app.modules.messaging.service import (
     can_access_dm_media,
     create_message,
+    get_conversation,
     get_dm_message_media_asset_id,
     get_messages_page,
     get_or_create_conversation,
     list_conversations,
+    mark_conversation_read,
+    unlocked_media_ids,
 )
 from app.modules.messaging.constants import MESSAGE_TYPE_MEDIA, MESSAGE_TYPE_TEXT
-from app.modules.messaging.models import Message, MessageMedia
+from app.modules.messaging.realtime import dm_event_stream, get_dm_hub, replay_dm_events
+from app.modules.messaging.models import Conversation, Message, MessageMedia
 
 router = APIRouter(prefix="/dm", tags=["messaging"])
 
 
-async def _get_other_party(
-    session: AsyncSession, conv, user_id: UUID
-) -> dict:
-    other_id = conv.fan_user_id if conv.creator_user_id == user_id else conv.creator_user_id
-    result = await session.execute(
-        select(Profile, User).join(User, User.id == Profile.user_id).where(User.id == other_id)
+def _message_out(msg: Message, unlocked: frozenset[UUID]) -> MessageOut:
+    return MessageOut(
+        id=msg.id,
+        conversation_id=msg.conversation_id,
+        sender_id=msg.sender_id,
+        sender_role=msg.sender_role,
+        message_type=msg.message_type,
+        text=msg.text,
+        media=[
+            MessageMediaOut(
+                id=mm.id,
+                media_asset_id=mm.media_asset_id,
+                is_locked=mm.is_locked,
+                price_cents=mm.price_cents,
+                currency=mm.currency,
+                unlocked=mm.id in unlocked,
+                viewer_has_unlocked=mm.id in unlocked,
+            )
+            for mm in msg.media
+        ],
+        created_at=msg.created_at,
+    )
+
+
+def _conversation_out(conv: Conversation, other_party: dict, user_id: UUID) -> ConversationOut:
+    is_creator = conv.creator_user_id == user_id
+    return ConversationOut(
+        id=conv.id,
+        creator_user_id=conv.creator_user_id,
+        fan_user_id=conv.fan_user_id,
+        last_message_preview=conv.last_message_preview,
+        last_message_at=conv.last_message_at,
+        unread_count=conv.creator_unread_count if is_creator else conv.fan_unread_count,
+        other_party_last_read_at=conv.fan_last_read_at if is_creator else conv.creator_last_read_at,
+        other_party=other_party,
     )
-    row = result.one_or_none()
-    if not row:
-        return {"handle": "", "display_name": "Unknown", "avatar_asset_id": None}
-    profile, user = row
-    return {
-        "handle": profile.handle or "",
-        "display_name": profile.display_name or user.email,
-        "avatar_asset_id": str(profile.avatar_asset_id) if profile.avatar_asset_id else None,
-    }
 
 
 @router.post("/conversations", operation_id="dm_create_conversation")
@@ -80,68 +105,91 @@ async def create_conversation(
 
 @router.get("/conversations", response_model=ConversationListOut)
 async def get_conversations(
+    cursor: str | None = Query(None),
+    page_size: int = Query(50, ge=1, le=100),
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ):
-    items_raw = await list_conversations(session, user.id)
-    items = []
-    for conv, preview, at in items_raw:
-        other = await _get_other_party(session, conv, user.id)
-        items.append(
-            ConversationOut(
-                id=conv.id,
-                creator_user_id=conv.creator_user_id,
-                fan_user_id=conv.fan_user_id,
-                last_message_preview=preview,
-                last_message_at=at,
-                unread_count=0,  # TODO: implement unread tracking
-                other_party=other,
-            )
+    rows, next_cursor = await list_conversations(
+        session, user.id, cursor=cursor, page_size=page_size
+    )
+    items = [_conversation_out(conv, other, user.id) for conv, other in rows]
+    return ConversationListOut(items=items, total=len(items), next_cursor=next_cursor)
+
+
+@router.get("/conversations/{conversation_id}", response_model=ConversationOut)
+async def get_conversation_detail(
+    conversation_id: UUID,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user),
+):
+    conv, other = await get_conversation(session, conversation_id, user.id)
+    return _conversation_out(conv, other, user.id)
+
+
+@router.post("/conversations/{conversation_id}/read", operation_id="dm_mark_read")
+async def read_conversation(
+    conversation_id: UUID,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user),
+) -> dict[str, str]:
+    await mark_conversation_read(session, conversation_id, user.id)
+    return {"status": "ok"}
+
+
+@router.get("/stream", operation_id="dm_stream")
+async def stream_dm_events(
+    request: Request,
+    last_event_id: str | None = Query(None),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(get_current_user),
+):
+    """Server-Sent Events for the caller's DMs (replaces polling the inbox and threads).
+
+    Events: `message` (id = message id, data = MessageOut), `conversation` (inbox
+    preview) and `resync` (refetch over REST, then reconnect). Reconnects resume after
+    the Last-Event-ID header or ?last_event_id=; comment lines are heartbeats.
+    """
+    stream = await get_dm_hub().open(user.id)
+    try:
+        backlog = await replay_dm_events(
+            session, user.id, last_event_id or request.headers.get("Last-Event-ID")
         )
-    return ConversationListOut(items=items, total=len(items))
+    except BaseException:
+        get_dm_hub().close(stream)
+        raise
+    # The request session would otherwise hold a pooled connection for the whole stream.
+    await session.close()
+    return StreamingResponse(
+        dm_event_stream(stream, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=MessagePageOut)
 async def get_conversation_messages(
     conversation_id: UUID,
     cursor: str | None = Query(None),
+    direction: str = Query("older", pattern="^(older|newer)$"),
     page_size: int = Query(50, ge=1, le=100),
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ):
-    messages, next_cursor = await get_messages_page(
-        session, conversation_id, user.id, cursor=cursor, page_size=page_size
+    messages, next_cursor, newest_cursor = await get_messages_page(
+        session,
+        conversation_id,
+        user.id,
+        cursor=cursor,
+        direction=direction,
+        page_size=page_size,
+    )
+    unlocked = await unlocked_media_ids(session, user.id, messages)
+    return MessagePageOut(
+        items=[_message_out(msg, unlocked) for msg in messages],
+        next_cursor=next_cursor,
+        newest_cursor=newest_cursor,
     )
-    # For each message with media, check if user has unlocked each locked media
-    out_items = []
-    for msg in messages:
-        media_out = []
-        for mm in msg.media:
-            unlocked = await can_access_dm_media(session, msg.id, mm.id, user.id)
-            media_out.append(
-                MessageMediaOut(
-                    id=mm.id,
-                    media_asset_id=mm.media_asset_id,
-                    is_locked=mm.is_locked,
-                    price_cents=mm.price_cents,
-                    currency=mm.currency,
-                    unlocked=unlocked,
-                    viewer_has_unlocked=unlocked,
-                )
-            )
-        out_items.append(
-            MessageOut(
-                id=msg.id,
-                conversation_id=msg.conversation_id,
-                sender_id=msg.sender_id,
-                sender_role=msg.sender_role,
-                message_type=msg.message_type,
-                text=msg.text,
-                media=media_out,
-                created_at=msg.created_at,
-            )
-        )
-    return MessagePageOut(items=out_items, next_cursor=next_cursor)
 
 
 @router.post("/conversations/{conversation_id}/messages", response_model=MessageOut)
@@ -167,30 +215,7 @@ async def post_message(
         lock_price_cents=lock_cents,
         lock_currency=lock_currency,
     )
-    media_out = []
-    for mm in msg.media:
-        unlocked = await can_access_dm_media(session, msg.id, mm.id, user.id)
-        media_out.append(
-            MessageMediaOut(
-                id=mm.id,
-                media_asset_id=mm.media_asset_id,
-                is_locked=mm.is_locked,
-                price_cents=mm.price_cents,
-                currency=mm.currency,
-                unlocked=unlocked,
-                viewer_has_unlocked=unlocked,
-            )
-        )
-    return MessageOut(
-        id=msg.id,
-        conversation_id=msg.conversation_id,
-        sender_id=msg.sender_id,
-        sender_role=msg.sender_role,
-        message_type=msg.message_type,
-        text=msg.text,
-        media=media_out,
-        created_at=msg.created_at,
-    )
+    return _message_out(msg, await unlocked_media_ids(session, user.id, [msg]))
 
 
 @router.get(
@@ -218,7 +243,7 @@ async def get_dm_media_download_url(
     if object_key is None:
         raise AppError(status_code=404, detail="variant_not_found")
     storage = get_storage_client()
-    download_url = generate_signed_download(storage, object_key)
+    download_url = await generate_signed_download(storage, object_key)
     return SignedUrlResponse(download_url=download_url)
 
 
@@ -254,5 +279,5 @@ async def get_dm_message_media_download_url(
     if object_key is None:
         raise AppError(status_code=404, detail="variant_not_found")
     storage = get_storage_client()
-    download_url = generate_signed_download(storage, object_key)
+    download_url = await generate_signed_download(storage, object_key)
     return SignedUrlResponse(download_url=download_url)
@@ -21,12 +21,14 @@ class ConversationOut(BaseModel):
     last_message_preview: str | None = None
     last_message_at: datetime | None = None
     unread_count: int = 0
+    other_party_last_read_at: datetime | None = None  # read receipt for the caller's messages
     other_party: dict  # handle, display_name, avatar_asset_id
 
 
 class ConversationListOut(BaseModel):
     items: list[ConversationOut]
-    total: int
+    total: int  # items on this page
+    next_cursor: str | None = None
 
 
 class MessageMediaOut(BaseModel):
@@ -53,6 +55,7 @@ class MessageOut(BaseModel):
 class MessagePageOut(BaseModel):
     items: list[MessageOut]
     next_cursor: str | None = None
+    newest_cursor: str | None = None
 
 
 class MessageCreateText(BaseModel):
@@ -4,16 +4,19 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import and_, desc, func, or_, select
+from sqlalchemy import Select, and_, case, func, or_, select, tuple_, union_all, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.core.errors import AppError
 from app.core.settings import get_settings
 from app.modules.auth.constants import ADMIN_ROLE, SUPER_ADMIN_ROLE
+from app.modules.auth.models import Profile, User
 from app.modules.billing.service import is_active_subscriber
 from app.modules.creators.constants import CREATOR_ROLE
 from app.modules.creators.service import get_creator_by_handle_any
@@ -24,8 +27,14 @@ from app.modules.messaging.constants import (
     SENDER_ROLE_FAN,
 )
 from app.modules.messaging.models import Conversation, Message, MessageMedia
+from app.modules.messaging.realtime import (
+    message_preview,
+    publish_conversation_read,
+    publish_new_message,
+)
 from app.modules.media.models import MediaObject
 from app.modules.payments.models import PpvPurchase
+from app.modules.payments.service import purchased_message_media_ids
 
 logger = logging.getLogger(__name__)
 
@@ -117,37 +126,204 @@ async def _is_participant(
     return result.scalar_one_or_none() is not None
 
 
+def _inbox_cursor_encode(updated_at: datetime, conversation_id: UUID) -> str:
+    return f"{updated_at.isoformat()}|{conversation_id}"
+
+
+def _inbox_cursor_decode(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        updated_at_s, conversation_id_s = cursor.split("|", 1)
+        return datetime.fromisoformat(updated_at_s), UUID(conversation_id_s)
+    except Exception as exc:
+        raise AppError(status_code=400, detail="invalid_cursor") from exc
+
+
+def _with_other_party(
+    other_id: Any, page: Any = None
+) -> Select[Conversation, UUID, str | None, str, UUID | None, str]:
+    """Conversation plus the other participant's profile fields, in one statement."""
+    stmt = select(
+        Conversation,
+        Profile.user_id,
+        Profile.handle,
+        Profile.display_name,
+        Profile.avatar_asset_id,
+        User.email,
+    )
+    if page is not None:
+        stmt = stmt.select_from(page).join(Conversation, Conversation.id == page.c.id)
+    return stmt.outerjoin(Profile, Profile.user_id == other_id).outerjoin(
+        User, User.id == Profile.user_id
+    )
+
+
+def _other_party(row: Any) -> dict:
+    _, profile_user_id, handle, display_name, avatar_asset_id, email = row
+    if profile_user_id is None or email is None:
+        return {"handle": "", "display_name": "Unknown", "avatar_asset_id": None}
+    return {
+        "handle": handle or "",
+        "display_name": display_name or email,
+        "avatar_asset_id": str(avatar_asset_id) if avatar_asset_id else None,
+    }
+
+
 async def list_conversations(
-    session: AsyncSession, user_id: UUID
-) -> list[tuple[Conversation, str | None, datetime | None]]:
-    """List conversations for user with last message preview and timestamp."""
-    result = await session.execute(
-        select(Conversation)
-        .where(
-            or_(
-                Conversation.creator_user_id == user_id,
-                Conversation.fan_user_id == user_id,
+    session: AsyncSession,
+    user_id: UUID,
+    *,
+    cursor: str | None = None,
+    page_size: int = 50,
+) -> tuple[list[tuple[Conversation, dict]], str | None]:
+    """Inbox page, most recent first: (conversation, other party) rows and next cursor.
+
+    The user can be on either side, so each side is read from its own
+    (participant, updated_at, id) index and only the page-sized union is joined
+    to the other party's profile.
+    """
+    before = _inbox_cursor_decode(cursor) if cursor else None
+
+    def side(column: Any, other: Any) -> Select[Any]:
+        q = select(
+            Conversation.id, Conversation.updated_at, other.label("other_id")
+        ).where(column == user_id)
+        if before is not None:
+            q = q.where(
+                (Conversation.updated_at < before[0])
+                | ((Conversation.updated_at == before[0]) & (Conversation.id < before[1]))
             )
+        return q.order_by(Conversation.updated_at.desc(), Conversation.id.desc()).limit(
+            page_size + 1
+        )
+
+    page = union_all(
+        side(Conversation.creator_user_id, Conversation.fan_user_id),
+        side(Conversation.fan_user_id, Conversation.creator_user_id),
+    ).subquery()
+    rows = (
+        await session.execute(
+            _with_other_party(page.c.other_id, page)
+            .order_by(page.c.updated_at.desc(), page.c.id.desc())
+            .limit(page_size + 1)
         )
-        .order_by(desc(Conversation.updated_at))
+    ).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1][0]
+        next_cursor = _inbox_cursor_encode(last.updated_at, last.id)
+    return [(row[0], _other_party(row)) for row in rows], next_cursor
+
+
+async def get_conversation(
+    session: AsyncSession, conversation_id: UUID, user_id: UUID
+) -> tuple[Conversation, dict]:
+    """One inbox row for a participant."""
+    other_id = case(
+        (Conversation.creator_user_id == user_id, Conversation.fan_user_id),
+        else_=Conversation.creator_user_id,
     )
-    convs = list(result.scalars().unique().all())
-    out = []
-    for conv in convs:
-        last_msg_result = await session.execute(
-            select(Message.text, Message.created_at)
-            .where(Message.conversation_id == conv.id)
-            .order_by(desc(Message.created_at))
-            .limit(1)
+    row = (
+        await session.execute(
+            _with_other_party(other_id).where(
+                Conversation.id == conversation_id,
+                or_(
+                    Conversation.creator_user_id == user_id,
+                    Conversation.fan_user_id == user_id,
+                ),
+            )
         )
-        row = last_msg_result.one_or_none()
-        preview = None
-        at = None
-        if row:
-            preview = (row[0] or "[Media]")[:100] if row[0] else "[Media]"
-            at = row[1]
-        out.append((conv, preview, at))
-    return out
+    ).one_or_none()
+    if row is None:
+        raise AppError(status_code=404, detail="conversation_not_found")
+    return row[0], _other_party(row)
+
+
+async def mark_conversation_read(
+    session: AsyncSession, conversation_id: UUID, user_id: UUID
+) -> None:
+    """Clear the caller's unread count and record their read mark (read receipt)."""
+    conv = (
+        await session.execute(
+            select(Conversation).where(
+                Conversation.id == conversation_id,
+                or_(
+                    Conversation.creator_user_id == user_id,
+                    Conversation.fan_user_id == user_id,
+                ),
+            )
+        )
+    ).scalar_one_or_none()
+    if conv is None:
+        raise AppError(status_code=404, detail="conversation_not_found")
+    is_creator = conv.creator_user_id == user_id
+    unread = conv.creator_unread_count if is_creator else conv.fan_unread_count
+    read_at = conv.creator_last_read_at if is_creator else conv.fan_last_read_at
+    if unread == 0 and read_at is not None and (
+        conv.last_message_at is None or read_at >= conv.last_message_at
+    ):
+        return  # nothing new: clients may call this on every view
+    now = datetime.now(timezone.utc)
+    values: dict[str, Any] = (
+        {"creator_unread_count": 0, "creator_last_read_at": now}
+        if is_creator
+        else {"fan_unread_count": 0, "fan_last_read_at": now}
+    )
+    await session.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation_id)
+        # Reading is not activity: keep the conversation's place in the inbox.
+        .values(updated_at=Conversation.updated_at, **values)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    await publish_conversation_read(conv, user_id, now)
+
+
+def _message_cursor_encode(msg: Message) -> str:
+    return f"{msg.created_at.isoformat()}|{msg.id}"
+
+
+async def _message_cursor_decode(
+    session: AsyncSession, conversation_id: UUID, cursor: str
+) -> tuple[datetime, UUID]:
+    """(created_at, id) from a cursor; bare message ids (older clients) cost one lookup."""
+    if "|" in cursor:
+        try:
+            created_at_s, message_id_s = cursor.split("|", 1)
+            return datetime.fromisoformat(created_at_s), UUID(message_id_s)
+        except ValueError as exc:
+            raise AppError(status_code=400, detail="invalid_cursor") from exc
+    try:
+        message_id = UUID(cursor)
+    except ValueError as exc:
+        raise AppError(status_code=400, detail="invalid_cursor") from exc
+    created_at = (
+        await session.execute(
+            select(Message.created_at).where(
+                Message.id == message_id, Message.conversation_id == conversation_id
+            )
+        )
+    ).scalar_one_or_none()
+    if created_at is None:
+        raise AppError(status_code=400, detail="invalid_cursor")
+    return created_at, message_id
+
+
+async def _load_media(session: AsyncSession, messages: list[Message]) -> None:
+    """Populate Message.media with one query, only for media messages."""
+    media_ids = [msg.id for msg in messages if msg.message_type == MESSAGE_TYPE_MEDIA]
+    by_message: dict[UUID, list[MessageMedia]] = {msg_id: [] for msg_id in media_ids}
+    if media_ids:
+        rows = await session.execute(
+            select(MessageMedia)
+            .where(MessageMedia.message_id.in_(media_ids))
+            .order_by(MessageMedia.created_at, MessageMedia.id)
+        )
+        for mm in rows.scalars():
+            by_message[mm.message_id].append(mm)
+    for msg in messages:
+        set_committed_value(msg, "media", by_message.get(msg.id, []))
 
 
 async def get_messages_page(
@@ -156,35 +332,68 @@ async def get_messages_page(
     user_id: UUID,
     *,
     cursor: str | None = None,
+    direction: str = "older",
     page_size: int = 50,
-) -> tuple[list[Message], str | None]:
-    """Paginated messages. cursor is message id (uuid) for next page."""
+) -> tuple[list[Message], str | None, str | None]:
+    """One page of a thread in chronological order: (messages, next_cursor, newest_cursor).
+
+    Keyset on (created_at, id), so messages sharing a timestamp are neither skipped nor
+    repeated. direction="older" returns the messages right before cursor (or the newest
+    ones) and next_cursor is the page's oldest message; "newer" returns the messages right
+    after cursor, for catching up, and next_cursor is the page's newest message.
+    newest_cursor is what to pass with "newer" next time.
+    """
     if not await _is_participant(session, conversation_id, user_id):
         raise AppError(status_code=403, detail="not_participant")
 
-    q = (
-        select(Message)
-        .where(Message.conversation_id == conversation_id)
-        .order_by(desc(Message.created_at))
-    )
+    key = tuple_(Message.created_at, Message.id)
+    q = select(Message).where(Message.conversation_id == conversation_id)
+    after = None
     if cursor:
-        try:
-            cursor_uuid = UUID(cursor)
-        except ValueError:
-            raise AppError(status_code=400, detail="invalid_cursor")
-        cursor_msg = await session.get(Message, cursor_uuid)
-        if not cursor_msg or cursor_msg.conversation_id != conversation_id:
-            raise AppError(status_code=400, detail="invalid_cursor")
-        q = q.where(Message.created_at < cursor_msg.created_at)
-    q = q.limit(page_size + 1)
-    result = await session.execute(q.options(selectinload(Message.media)))
-    messages = list(result.scalars().unique().all())
+        after = await _message_cursor_decode(session, conversation_id, cursor)
+        q = q.where(key > tuple_(*after) if direction == "newer" else key < tuple_(*after))
+    if direction == "newer":
+        q = q.order_by(Message.created_at, Message.id)
+    else:
+        q = q.order_by(Message.created_at.desc(), Message.id.desc())
+    messages = list((await session.execute(q.limit(page_size + 1))).scalars().all())
     next_cursor = None
     if len(messages) > page_size:
         messages = messages[:page_size]
-        next_cursor = str(messages[-1].id)
-    messages.reverse()  # chronological for display
-    return messages, next_cursor
+        next_cursor = _message_cursor_encode(messages[-1])
+    if direction == "older":
+        messages.reverse()  # chronological for display
+    await _load_media(session, messages)
+    newest_cursor: str | None
+    if messages:
+        newest_cursor = _message_cursor_encode(messages[-1])
+    else:
+        newest_cursor = cursor if direction == "newer" else None
+    return messages, next_cursor, newest_cursor
+
+
+async def unlocked_media_ids(
+    session: AsyncSession, user_id: UUID, messages: list[Message]
+) -> frozenset[UUID]:
+    """Media on these (media-loaded) messages the user may open, in at most one query.
+
+    Same rule as can_access_dm_media for participants: unlocked media, media the user
+    sent (only the creator can lock), or a succeeded PPV purchase.
+    """
+    locked = [
+        mm.id
+        for msg in messages
+        if msg.sender_id != user_id
+        for mm in msg.media
+        if mm.is_locked
+    ]
+    purchased = await purchased_message_media_ids(session, user_id, locked)
+    return frozenset(
+        mm.id
+        for msg in messages
+        for mm in msg.media
+        if not mm.is_locked or msg.sender_id == user_id or mm.id in purchased
+    )
 
 
 async def create_message(
@@ -275,7 +484,36 @@ async def create_message(
     else:
         raise AppError(status_code=400, detail="invalid_message_type")
 
-    conv.updated_at = datetime.now(timezone.utc)
+    # Both sides' inbox rows in the same transaction; counters are incremented in SQL so
+    # concurrent sends and reads do not lose updates. Sending also marks the thread read.
+    sender_is_creator = conv.creator_user_id == user_id
+    side_values: dict[str, Any] = (
+        {
+            "creator_unread_count": 0,
+            "creator_last_read_at": func.now(),
+            "fan_unread_count": Conversation.fan_unread_count + 1,
+        }
+        if sender_is_creator
+        else {
+            "fan_unread_count": 0,
+            "fan_last_read_at": func.now(),
+            "creator_unread_count": Conversation.creator_unread_count + 1,
+        }
+    )
+    unread = (
+        await session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(
+                updated_at=func.now(),
+                last_message_at=func.now(),
+                last_message_preview=message_preview(msg.text),
+                **side_values,
+            )
+            .returning(Conversation.creator_unread_count, Conversation.fan_unread_count)
+            .execution_options(synchronize_session=False)
+        )
+    ).one()
     await session.commit()
     loaded = (
         await session.execute(
@@ -284,6 +522,9 @@ async def create_message(
             .options(selectinload(Message.media))
         )
     ).scalar_one()
+    await publish_new_message(
+        loaded, conv, creator_unread=unread.creator_unread_count, fan_unread=unread.fan_unread_count
+    )
     return loaded
 
 
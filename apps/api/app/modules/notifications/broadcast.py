@@ -0,0 +1,422 @@
+"""Admin broadcast jobs.
+
+The admin endpoint only stores a BroadcastJob; the worker runs it
+(notify.run_broadcast, and the notify.resume_broadcasts sweep for jobs whose
+enqueue failed or whose worker died):
+
+- Recipients are read in chunks of BROADCAST_CHUNK_SIZE by keyset over users.id, so
+  no audience is ever loaded whole and the job's cursor_user_id is a resume point.
+- Per chunk, emails go out first through the provider's batch API
+  (BROADCAST_EMAIL_BATCH_SIZE per request), paced by a token bucket
+  (BROADCAST_EMAIL_REQUESTS_PER_SECOND) with BROADCAST_EMAIL_CONCURRENCY requests
+  in flight. Then one transaction inserts the chunk's notifications and advances the
+  cursor and counters. Notifications are created exactly once; after a crash the
+  emails of at most one chunk are sent again.
+- A running job holds a lease that every chunk extends. Updates are guarded by the
+  lease token, so a job resumed elsewhere after its lease expired stops the old run.
+- A failed run is requeued for the sweep, and marked failed after
+  BROADCAST_MAX_ATTEMPTS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, cast
+from uuid import UUID
+
+from sqlalchemy import Row, Select, and_, func, insert, or_, select, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.errors import AppError
+from app.core.settings import get_settings
+from app.modules.auth.constants import CREATOR_ROLE, FAN_ROLE
+from app.modules.auth.models import Profile, User
+from app.modules.notifications.models import BroadcastJob, Notification
+from app.modules.onboarding.mail import (
+    GenericEmail,
+    MailProvider,
+    build_admin_notification_email,
+    get_mail_provider,
+)
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_NOTIFICATION_TYPE = "admin_broadcast"
+BROADCAST_STATUS_QUEUED = "queued"
+BROADCAST_STATUS_RUNNING = "running"
+BROADCAST_STATUS_COMPLETED = "completed"
+BROADCAST_STATUS_FAILED = "failed"
+
+_LAST_ERROR_MAX_CHARS = 2000
+
+
+class TokenBucket:
+    """Paces provider requests: ``acquire()`` waits for one of ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+async def send_emails_batched(
+    messages: Iterable[GenericEmail],
+    *,
+    provider: MailProvider | None = None,
+    governor: TokenBucket | None = None,
+) -> tuple[int, int]:
+    """Send through the provider's batch API under the rate governor; returns (sent, failed).
+
+    A failed provider request counts all of its emails as failed and is logged, not raised.
+    Pass one governor to successive calls to keep pacing across them.
+    """
+    settings = get_settings()
+    provider = provider or get_mail_provider()
+    governor = governor or TokenBucket(settings.broadcast_email_requests_per_second)
+    semaphore = asyncio.Semaphore(settings.broadcast_email_concurrency)
+    messages = list(messages)
+    size = settings.broadcast_email_batch_size
+
+    async def _send(batch: list[GenericEmail]) -> int:
+        async with semaphore:
+            await governor.acquire()
+            try:
+                await provider.send_generic_batch(batch)
+            except Exception:
+                logger.exception("email batch failed size=%s", len(batch))
+                return 0
+            return len(batch)
+
+    results = await asyncio.gather(
+        *(_send(messages[i : i + size]) for i in range(0, len(messages), size))
+    )
+    sent = sum(results)
+    return sent, len(messages) - sent
+
+
+async def send_emails_to_rows(
+    session: AsyncSession, query: Select[Any], build: Callable[[Row[Any]], GenericEmail]
+) -> tuple[int, int, int]:
+    """Batch-send ``build(row)`` for every row of ``query``; returns (sent, failed, total).
+
+    For cohort emails without progress tracking (worker admin and onboarding emails).
+    ``query`` selects from users; it is read in chunks of BROADCAST_CHUNK_SIZE by keyset
+    over users.id, and each chunk's transaction ends before its emails go out.
+    """
+    settings = get_settings()
+    chunk_size = settings.broadcast_chunk_size
+    provider = get_mail_provider()
+    governor = TokenBucket(settings.broadcast_email_requests_per_second)
+    keyed = query.add_columns(User.id.label("keyset_id")).order_by(User.id).limit(chunk_size)
+    sent = failed = total = 0
+    cursor: UUID | None = None
+    while True:
+        q = keyed if cursor is None else keyed.where(User.id > cursor)
+        rows = (await session.execute(q)).all()
+        # Don't sit idle in a transaction while emails go out.
+        await session.rollback()
+        if rows:
+            chunk_sent, chunk_failed = await send_emails_batched(
+                [build(row) for row in rows], provider=provider, governor=governor
+            )
+            sent += chunk_sent
+            failed += chunk_failed
+            total += len(rows)
+            cursor = rows[-1].keyset_id
+        if len(rows) < chunk_size:
+            return sent, failed, total
+
+
+def _audience(target_role: str | None, target_user_id: UUID | None) -> list[Any]:
+    conditions: list[Any] = [User.is_active.is_(True)]
+    if target_user_id:
+        conditions.append(User.id == target_user_id)
+    elif target_role == "creator":
+        conditions.append(User.role == CREATOR_ROLE)
+    elif target_role == "fan":
+        conditions.append(User.role == FAN_ROLE)
+    elif target_role != "all":
+        raise AppError(status_code=400, detail="target_role or target_user_id required")
+    return conditions
+
+
+async def create_broadcast_job(
+    session: AsyncSession,
+    *,
+    title: str,
+    message: str,
+    send_email: bool,
+    target_role: str | None = None,
+    target_user_id: UUID | None = None,
+    created_by: UUID | None = None,
+) -> BroadcastJob:
+    """Store a queued broadcast with its audience size (commits). The worker sends it."""
+    conditions = _audience(target_role, target_user_id)
+    total = (await session.execute(select(func.count()).select_from(User).where(*conditions))).scalar_one()
+    job = BroadcastJob(
+        title=title,
+        message=message,
+        send_email=send_email,
+        target_role=None if target_user_id else target_role,
+        target_user_id=target_user_id,
+        created_by=created_by,
+        total_count=total,
+        status=BROADCAST_STATUS_COMPLETED if total == 0 else BROADCAST_STATUS_QUEUED,
+    )
+    if total == 0:
+        job.finished_at = datetime.now(timezone.utc)
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    logger.info(
+        "broadcast_job_created job_id=%s total=%d target_role=%s target_user_id=%s send_email=%s",
+        job.id,
+        total,
+        target_role,
+        target_user_id,
+        send_email,
+    )
+    return job
+
+
+async def get_broadcast_job(session: AsyncSession, job_id: UUID) -> BroadcastJob:
+    job = await session.get(BroadcastJob, job_id)
+    if job is None:
+        raise AppError(status_code=404, detail="broadcast_job_not_found")
+    return job
+
+
+@dataclass(slots=True)
+class _Claim:
+    job_id: UUID
+    token: UUID
+    title: str
+    message: str
+    send_email: bool
+    target_role: str | None
+    target_user_id: UUID | None
+    cursor: UUID | None
+    attempts: int
+
+
+def _claimable(now: datetime) -> Any:
+    return or_(
+        BroadcastJob.status == BROADCAST_STATUS_QUEUED,
+        and_(BroadcastJob.status == BROADCAST_STATUS_RUNNING, BroadcastJob.lease_expires_at < now),
+    )
+
+
+async def _claim(
+    session: AsyncSession, job_id: UUID | None = None, *, exclude: Iterable[UUID] = ()
+) -> _Claim | None:
+    """Take the lease on a queued (or stalled running) job; commits."""
+    now = datetime.now(timezone.utc)
+    token = uuid.uuid4()
+    if job_id is not None:
+        target = BroadcastJob.id == job_id
+    else:
+        target = BroadcastJob.id == (
+            select(BroadcastJob.id)
+            .where(_claimable(now), BroadcastJob.id.not_in(list(exclude)))
+            .order_by(BroadcastJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+    row = (
+        await session.execute(
+            update(BroadcastJob)
+            .where(target, _claimable(now))
+            .values(
+                status=BROADCAST_STATUS_RUNNING,
+                lease_token=token,
+                lease_expires_at=now + timedelta(seconds=get_settings().broadcast_lease_seconds),
+                started_at=func.coalesce(BroadcastJob.started_at, now),
+            )
+            .returning(
+                BroadcastJob.id,
+                BroadcastJob.title,
+                BroadcastJob.message,
+                BroadcastJob.send_email,
+                BroadcastJob.target_role,
+                BroadcastJob.target_user_id,
+                BroadcastJob.cursor_user_id,
+                BroadcastJob.attempts,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+    await session.commit()
+    if row is None:
+        return None
+    return _Claim(
+        job_id=row.id,
+        token=token,
+        title=row.title,
+        message=row.message,
+        send_email=row.send_email,
+        target_role=row.target_role,
+        target_user_id=row.target_user_id,
+        cursor=row.cursor_user_id,
+        attempts=row.attempts,
+    )
+
+
+def _personalise(text: str, display_name: str) -> str:
+    return text.replace("{display_name}", display_name)
+
+
+async def _run_claimed(session: AsyncSession, claim: _Claim) -> str | None:
+    """Process the claimed job chunk by chunk; returns its final status (None if the lease was lost)."""
+    settings = get_settings()
+    chunk_size = settings.broadcast_chunk_size
+    conditions = _audience(claim.target_role, claim.target_user_id)
+    provider = get_mail_provider() if claim.send_email else None
+    governor = TokenBucket(settings.broadcast_email_requests_per_second)
+    payload = {"title": claim.title, "message": claim.message}
+    cursor = claim.cursor
+    while True:
+        q = (
+            select(User.id, User.email, Profile.display_name)
+            .outerjoin(Profile, Profile.user_id == User.id)
+            .where(*conditions)
+            .order_by(User.id)
+            .limit(chunk_size)
+        )
+        if cursor is not None:
+            q = q.where(User.id > cursor)
+        rows = (await session.execute(q)).all()
+        # Don't sit idle in a transaction while emails go out.
+        await session.rollback()
+
+        sent = failed = 0
+        if rows and provider is not None:
+            messages = []
+            for _user_id, email, display_name in rows:
+                name = display_name or email.split("@")[0]
+                messages.append(
+                    build_admin_notification_email(
+                        email, _personalise(claim.title, name), _personalise(claim.message, name)
+                    )
+                )
+            sent, failed = await send_emails_batched(messages, provider=provider, governor=governor)
+
+        if rows:
+            await session.execute(
+                insert(Notification),
+                [
+                    {"user_id": user_id, "type": BROADCAST_NOTIFICATION_TYPE, "payload_json": payload}
+                    for user_id, _email, _name in rows
+                ],
+            )
+            cursor = rows[-1].id
+        done = len(rows) < chunk_size
+        now = datetime.now(timezone.utc)
+        values: dict[str, Any] = {
+            "cursor_user_id": cursor,
+            "sent_count": BroadcastJob.sent_count + len(rows),
+            "email_count": BroadcastJob.email_count + sent,
+            "email_failed_count": BroadcastJob.email_failed_count + failed,
+            "lease_expires_at": now + timedelta(seconds=settings.broadcast_lease_seconds),
+        }
+        if done:
+            values.update(
+                status=BROADCAST_STATUS_COMPLETED, finished_at=now, lease_token=None, lease_expires_at=None
+            )
+        result = cast(
+            CursorResult[Any],
+            await session.execute(
+                update(BroadcastJob)
+                .where(BroadcastJob.id == claim.job_id, BroadcastJob.lease_token == claim.token)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            ),
+        )
+        if not result.rowcount:
+            await session.rollback()
+            logger.warning("broadcast lease lost job_id=%s cursor=%s", claim.job_id, cursor)
+            return None
+        await session.commit()
+        if done:
+            return BROADCAST_STATUS_COMPLETED
+
+
+async def _record_failure(session: AsyncSession, claim: _Claim, error: str) -> str:
+    attempts = claim.attempts + 1
+    status = (
+        BROADCAST_STATUS_FAILED
+        if attempts >= get_settings().broadcast_max_attempts
+        else BROADCAST_STATUS_QUEUED
+    )
+    await session.execute(
+        update(BroadcastJob)
+        .where(BroadcastJob.id == claim.job_id, BroadcastJob.lease_token == claim.token)
+        .values(
+            status=status,
+            attempts=attempts,
+            last_error=error[:_LAST_ERROR_MAX_CHARS],
+            lease_token=None,
+            lease_expires_at=None,
+            finished_at=datetime.now(timezone.utc) if status == BROADCAST_STATUS_FAILED else None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return status
+
+
+async def _run(session: AsyncSession, claim: _Claim) -> str | None:
+    try:
+        status = await _run_claimed(session, claim)
+    except Exception as exc:
+        await session.rollback()
+        status = await _record_failure(session, claim, repr(exc))
+        logger.warning(
+            "broadcast run failed job_id=%s attempt=%s status=%s",
+            claim.job_id,
+            claim.attempts + 1,
+            status,
+            exc_info=True,
+        )
+        return status
+    logger.info("broadcast run finished job_id=%s status=%s", claim.job_id, status)
+    return status
+
+
+async def run_broadcast_job(session: AsyncSession, job_id: UUID) -> str | None:
+    """Run (or resume) one job if it is claimable; returns its status, None if not claimed."""
+    claim = await _claim(session, job_id)
+    if claim is None:
+        return None
+    return await _run(session, claim)
+
+
+async def run_pending_broadcasts(session: AsyncSession) -> int:
+    """Run queued jobs and resume stalled ones, each at most once per call; returns how many."""
+    seen: list[UUID] = []
+    while True:
+        claim = await _claim(session, exclude=seen)
+        if claim is None:
+            return len(seen)
+        seen.append(claim.job_id)
+        await _run(session, claim)
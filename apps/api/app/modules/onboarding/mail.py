@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Any, Protocol
 from urllib.parse import quote
 
 import resend
@@ -46,6 +47,14 @@ class ContactFormEmailPayload:
     message: str
 
 
+@dataclass(slots=True)
+class GenericEmail:
+    recipient: str
+    subject: str
+    text_body: str
+    html_body: str
+
+
 class MailProvider(Protocol):
     async def send_verification_email(self, payload: VerificationEmailPayload) -> None:
         ...
@@ -61,6 +70,10 @@ class MailProvider(Protocol):
     ) -> None:
         ...
 
+    async def send_generic_batch(self, messages: list[GenericEmail]) -> None:
+        """Send several generic emails in one provider request where supported."""
+        ...
+
 
 def _build_verify_link(token: str) -> str:
     settings = get_settings()
@@ -145,6 +158,15 @@ class ConsoleMailProvider:
             },
         )
 
+    async def send_generic_batch(self, messages: list[GenericEmail]) -> None:
+        for message in messages:
+            await self.send_generic_email(
+                recipient=message.recipient,
+                subject=message.subject,
+                text_body=message.text_body,
+                html_body=message.html_body,
+            )
+
 
 def _wrap_html(body_content: str) -> str:
     """Wrap email body in a proper HTML document structure for deliverability."""
@@ -207,7 +229,13 @@ class ResendMailProvider:
                 },
             )
             return
-        params: resend.Emails.SendParams = {
+        params = self._params(recipient, subject, text_body, html_body)
+        await self._deliver(resend.Emails.send, params, email_type=email_type, recipient=recipient)
+
+    def _params(
+        self, recipient: str, subject: str, text_body: str, html_body: str
+    ) -> resend.Emails.SendParams:
+        return {
             "from": self._mail_from,
             "to": [recipient],
             "reply_to": [self._reply_to],
@@ -219,11 +247,15 @@ class ResendMailProvider:
                 "List-Unsubscribe-Post": "List-Unsubscribe=One-Click",
             },
         }
+
+    async def _deliver(
+        self, send: Callable[[Any], Any], params: Any, *, email_type: str, recipient: str
+    ) -> None:
         total_attempts = len(_RESEND_RETRY_DELAYS) + 1
         last_exc: Exception | None = None
         for attempt in range(1, total_attempts + 1):
             try:
-                response = await asyncio.to_thread(resend.Emails.send, params)
+                response = await asyncio.to_thread(send, params)
                 logger.info(
                     "%s email delivered",
                     email_type,
@@ -377,6 +409,26 @@ class ResendMailProvider:
             email_type="generic",
         )
 
+    async def send_generic_batch(self, messages: list[GenericEmail]) -> None:
+        """One Resend batch request (up to 100 emails); it succeeds or fails as a whole."""
+        if not messages:
+            return
+        recipients = f"{len(messages)} recipients"
+        if self._dry_run:
+            logger.info(
+                "generic batch email DRY-RUN (not sent)",
+                extra={
+                    "request_id": get_request_id(),
+                    "provider": "resend",
+                    "outcome": "dry_run",
+                    "to": recipients,
+                    "from": self._mail_from,
+                },
+            )
+            return
+        params = [self._params(m.recipient, m.subject, m.text_body, m.html_body) for m in messages]
+        await self._deliver(resend.Batch.send, params, email_type="generic_batch", recipient=recipients)
+
     async def send_password_reset_email(self, payload: PasswordResetEmailPayload) -> None:
         await self._send_email(
             recipient=payload.recipient,
@@ -470,6 +522,15 @@ class MailpitProvider:
             email_type="generic",
         )
 
+    async def send_generic_batch(self, messages: list[GenericEmail]) -> None:
+        for message in messages:
+            await self.send_generic_email(
+                recipient=message.recipient,
+                subject=message.subject,
+                text_body=message.text_body,
+                html_body=message.html_body,
+            )
+
     async def send_verification_email(self, payload: VerificationEmailPayload) -> None:
         verify_link = _build_verify_link(payload.token)
         await self._send_email(
@@ -629,31 +690,39 @@ async def send_kyc_reminder_email(recipient: str) -> None:
     )
 
 
-async def send_admin_notification_email(
-    recipient: str, title: str, message: str
-) -> None:
-    """Send an admin broadcast notification email to a user."""
+def build_admin_notification_email(recipient: str, title: str, message: str) -> GenericEmail:
+    """The admin broadcast notification email for one user (title and message escaped in HTML)."""
     import html as _html
 
     safe_title = _html.escape(title)
     safe_message = _html.escape(message).replace("\n", "<br/>")
 
-    subject = f"Zinovia Fans: {title}"
-    text_body = (
-        f"{title}\n\n"
-        f"{message}\n\n"
-        "Best regards,\n"
-        "The Zinovia Fans Team\n"
-        "https://zinovia.ai"
-    )
-    html_body = _wrap_html(
-        f'<p style="margin:0 0 16px;font-size:18px;font-weight:600;">{safe_title}</p>'
-        f'<div style="margin:0 0 16px;font-size:14px;line-height:1.6;">{safe_message}</div>'
+    return GenericEmail(
+        recipient=recipient,
+        subject=f"Zinovia Fans: {title}",
+        text_body=(
+            f"{title}\n\n"
+            f"{message}\n\n"
+            "Best regards,\n"
+            "The Zinovia Fans Team\n"
+            "https://zinovia.ai"
+        ),
+        html_body=_wrap_html(
+            f'<p style="margin:0 0 16px;font-size:18px;font-weight:600;">{safe_title}</p>'
+            f'<div style="margin:0 0 16px;font-size:14px;line-height:1.6;">{safe_message}</div>'
+        ),
     )
+
+
+async def send_admin_notification_email(
+    recipient: str, title: str, message: str
+) -> None:
+    """Send an admin broadcast notification email to a user."""
+    email = build_admin_notification_email(recipient, title, message)
     provider = get_mail_provider()
     await provider.send_generic_email(
-        recipient=recipient,
-        subject=subject,
-        text_body=text_body,
-        html_body=html_body,
+        recipient=email.recipient,
+        subject=email.subject,
+        text_body=email.text_body,
+        html_body=email.html_body,
     )
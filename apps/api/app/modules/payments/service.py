@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterable
 from uuid import UUID
 
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.errors import AppError
@@ -119,3 +121,20 @@ async def create_ppv_intent(
     if not purchase:
         raise AppError(status_code=500, detail="ppv_purchase_missing")
     return purchase, data.get("checkout_url") or ""
+
+
+async def purchased_message_media_ids(
+    session: AsyncSession, purchaser_id: UUID, message_media_ids: Iterable[UUID]
+) -> frozenset[UUID]:
+    """The subset of message_media_ids the purchaser has unlocked, in one query."""
+    ids = list(message_media_ids)
+    if not ids:
+        return frozenset()
+    result = await session.execute(
+        select(PpvPurchase.message_media_id).where(
+            PpvPurchase.message_media_id.in_(ids),
+            PpvPurchase.purchaser_id == purchaser_id,
+            PpvPurchase.status == "SUCCEEDED",
+        )
+    )
+    return frozenset(result.scalars())
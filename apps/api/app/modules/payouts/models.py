@@ -100,6 +100,8 @@ class PayoutItem(Base):
 
     __table_args__ = (
         UniqueConstraint("payout_id", "ledger_event_id", name="uq_payout_item_event"),
+        # A ledger event is paid out at most once
+        UniqueConstraint("ledger_event_id", name="uq_payout_items_ledger_event"),
     )
 
 
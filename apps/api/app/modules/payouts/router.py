@@ -24,10 +24,12 @@ from app.modules.payouts.schemas import (
     ReconcileResult,
 )
 from app.modules.payouts.service import (
-    export_payouts_csv,
     generate_weekly_payouts,
     get_payout_settings,
     reconcile_availability,
+    reopen_payout_export,
+    start_payout_export,
+    stream_payout_export,
     update_payout_status,
     upsert_payout_settings,
 )
@@ -132,10 +134,11 @@ async def upsert_settings_endpoint(
     summary="Move funds from pending → available (admin cron job)",
 )
 async def admin_reconcile(
+    dry_run: bool = Query(False, description="Report what would move without writing"),
     session: AsyncSession = Depends(get_async_session),
     _admin: User = Depends(require_admin_writer),
 ) -> ReconcileResult:
-    result = await reconcile_availability(session)
+    result = await reconcile_availability(session, dry_run=dry_run)
     return ReconcileResult(**result)
 
 
@@ -223,14 +226,41 @@ async def admin_export_csv(
     admin: User = Depends(require_admin),
     status: str = Query("queued", description="Status to export"),
 ) -> StreamingResponse:
-    csv_data = await export_payouts_csv(session, admin.id, status_filter=status)
-    if not csv_data:
+    batch_id = await start_payout_export(session, admin.id, status_filter=status)
+    if batch_id is None:
         raise AppError(status_code=404, detail="No payouts to export")
 
     return StreamingResponse(
-        iter([csv_data]),
+        stream_payout_export(batch_id),
         media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=payouts-export.csv"},
+        headers={
+            "Content-Disposition": "attachment; filename=payouts-export.csv",
+            # The payouts are marked before streaming: re-download with this id if it breaks off.
+            "X-Export-Batch-Id": batch_id,
+        },
+    )
+
+
+@admin_router.get(
+    "/payouts/export/{batch_id}.csv",
+    operation_id="admin_reexport_payouts_csv",
+    summary="Download an existing export batch again (decrypts IBAN)",
+)
+async def admin_reexport_csv(
+    batch_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    admin: User = Depends(require_admin),
+) -> StreamingResponse:
+    if not await reopen_payout_export(session, admin.id, batch_id):
+        raise AppError(status_code=404, detail="Export batch not found")
+
+    return StreamingResponse(
+        stream_payout_export(batch_id),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename=payouts-{batch_id}.csv",
+            "X-Export-Batch-Id": batch_id,
+        },
     )
 
 
@@ -70,9 +70,12 @@ class PayoutStatusUpdate(BaseModel):
 class ReconcileResult(BaseModel):
     creators_updated: int
     total_cents_moved: int
+    events_moved: int = 0
+    dry_run: bool = False
 
 
 class GeneratePayoutsResult(BaseModel):
     payouts_created: int
     total_cents: int
     skipped_below_threshold: int
+    failed: int = 0
@@ -2,19 +2,46 @@
 
 from __future__ import annotations
 
+import asyncio
 import csv
 import io
+import logging
+import typing
 import uuid
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import String, func, select
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Row,
+    DateTime,
+    Numeric,
+    Select,
+    String,
+    case,
+    cast,
+    distinct,
+    exists,
+    func,
+    literal,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.settings import get_settings
-from app.crypto.encryption import decrypt, encrypt
+from app.crypto.encryption import decrypt_many, encrypt
+from app.db.session import async_session_factory
 from app.modules.ledger.constants import LEDGER_DIRECTION_CREDIT, LEDGER_DIRECTION_DEBIT
 from app.modules.ledger.models import LedgerBalance, LedgerEntry, LedgerEvent
+from app.modules.ledger.service import apply_balance_delta, balance_deltas_upsert, balance_totals
 from app.modules.payouts.models import (
     CreatorPayoutSettings,
     Payout,
@@ -23,6 +50,8 @@ from app.modules.payouts.models import (
 )
 from app.modules.payouts.validation import iban_last4, validate_bic, validate_iban
 
+logger = logging.getLogger(__name__)
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -120,221 +149,318 @@ async def upsert_payout_settings(
 # ---------------------------------------------------------------------------
 
 
+def _awaiting_availability(cutoff: datetime) -> tuple:
+    """Events past the hold period not yet moved to available (ix_ledger_events_unreconciled)."""
+    return (
+        LedgerEvent.available_at.is_(None),
+        LedgerEvent.net_cents > 0,
+        LedgerEvent.created_at <= cutoff,
+    )
+
+
+def _creator_transfer(
+    creator_id: ColumnElement,
+    currency: ColumnElement,
+    cents: ColumnElement,
+    reference: ColumnElement,
+    from_prefix: str,
+    to_prefix: str,
+) -> tuple[CTE, CTE]:
+    """Data-modifying CTEs moving `cents` per source row between two creator accounts.
+
+    INSERT ... SELECT the debit/credit entry pair (idempotent on the account/reference
+    constraint), then upsert the per-account sums of the entries actually inserted
+    into the balance shards. Returns (entries, balances) for Select.add_cte.
+    """
+
+    def leg(account_prefix: str, direction: str) -> Select:
+        return select(
+            func.gen_random_uuid(),
+            func.concat(account_prefix, cast(creator_id, String)),
+            currency,
+            cast(cents, Numeric(18, 2)) / 100,
+            literal(direction, String),
+            reference,
+        )
+
+    entries = (
+        pg_insert(LedgerEntry)
+        .from_select(
+            ["id", "account_id", "currency", "amount", "direction", "reference"],
+            union_all(leg(from_prefix, LEDGER_DIRECTION_DEBIT), leg(to_prefix, LEDGER_DIRECTION_CREDIT)),
+        )
+        .on_conflict_do_nothing(constraint="uq_ledger_entry_account_reference")
+        .returning(LedgerEntry.account_id, LedgerEntry.currency, LedgerEntry.amount, LedgerEntry.direction)
+        .cte("entries")
+    )
+    balances = balance_deltas_upsert(
+        select(
+            entries.c.account_id,
+            entries.c.currency,
+            func.sum(
+                case(
+                    (entries.c.direction == LEDGER_DIRECTION_CREDIT, entries.c.amount),
+                    else_=-entries.c.amount,
+                )
+            ),
+        ).group_by(entries.c.account_id, entries.c.currency)
+    ).cte("balances")
+    return entries, balances
+
+
+def _availability_move(cutoff: datetime, now: datetime, limit: int) -> Select:
+    """One statement moving up to `limit` due events pending -> available.
+
+    Claims the chunk (SKIP LOCKED, so concurrent runs split the backlog), stamps
+    available_at and books the transfer (reference 'avail:<event id>').
+    Yields (creator_id, events, net_cents) per creator.
+    """
+    chunk = (
+        select(LedgerEvent.id)
+        .where(*_awaiting_availability(cutoff))
+        .order_by(LedgerEvent.created_at, LedgerEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("chunk")
+    )
+    moved = (
+        update(LedgerEvent)
+        .where(LedgerEvent.id.in_(select(chunk.c.id)))
+        .values(available_at=now)
+        .returning(LedgerEvent.id, LedgerEvent.creator_id, LedgerEvent.currency, LedgerEvent.net_cents)
+        .cte("moved")
+    )
+    ctes = _creator_transfer(
+        moved.c.creator_id,
+        moved.c.currency,
+        moved.c.net_cents,
+        func.concat("avail:", cast(moved.c.id, String)),
+        "creator_pending:",
+        "creator_available:",
+    )
+    return (
+        select(moved.c.creator_id, func.count(), func.sum(moved.c.net_cents))
+        .group_by(moved.c.creator_id)
+        .add_cte(*ctes)
+    )
+
+
 async def reconcile_availability(
-    session: AsyncSession, now: datetime | None = None
+    session: AsyncSession,
+    now: datetime | None = None,
+    *,
+    dry_run: bool = False,
+    chunk_size: int | None = None,
 ) -> dict:
     """Move funds from pending → available for ledger events past hold period.
 
-    Idempotent: only processes events that have not been reconciled (no
-    matching ledger entry for the 'available' reference).
+    Drains the whole backlog in chunks of PAYOUT_RECONCILE_CHUNK_SIZE events, one
+    statement and one commit per chunk. Idempotent: moved events carry available_at.
+    With dry_run nothing is written; the report says what a run would move.
     """
     if now is None:
         now = datetime.now(timezone.utc)
-
-    # Find ledger events that are:
-    # 1. Older than HOLD_DAYS
-    # 2. Status = succeeded (not refunded/disputed)
-    # 3. Haven't already been moved to available (no matching available entry)
     cutoff = now - timedelta(days=HOLD_DAYS)
 
-    # Get all creator pending ledger events that are old enough and not yet reconciled
-    # A reconciled event has a matching entry with reference = 'avail:{event_id}'
-    already_reconciled = select(LedgerEntry.reference).where(
-        LedgerEntry.reference.like("avail:%")
-    ).scalar_subquery()
-
-    events = (
-        await session.execute(
-            select(LedgerEvent)
-            .where(
-                LedgerEvent.created_at <= cutoff,
-                LedgerEvent.net_cents > 0,
-                # Not already reconciled
-                ~func.concat("avail:", LedgerEvent.id.cast(String)).in_(
-                    select(LedgerEntry.reference)
-                ),
+    if dry_run:
+        events, creators, cents = (
+            await session.execute(
+                select(
+                    func.count(),
+                    func.count(distinct(LedgerEvent.creator_id)),
+                    func.coalesce(func.sum(LedgerEvent.net_cents), 0),
+                ).where(*_awaiting_availability(cutoff))
             )
-            .limit(1000)  # Process in batches for safety
-        )
-    ).scalars().all()
-
+        ).one()
+        await session.rollback()
+        return {
+            "creators_updated": creators,
+            "total_cents_moved": cents,
+            "events_moved": events,
+            "dry_run": True,
+        }
+
+    limit = chunk_size or get_settings().payout_reconcile_chunk_size
     total_moved = 0
+    events_moved = 0
     creators_updated: set[uuid.UUID] = set()
+    while True:
+        rows = (await session.execute(_availability_move(cutoff, now, limit))).all()
+        await session.commit()
+        chunk_events = 0
+        for creator_id, events, cents in rows:
+            creators_updated.add(creator_id)
+            chunk_events += events
+            total_moved += cents
+        events_moved += chunk_events
+        if chunk_events < limit:
+            break
 
-    for event in events:
-        ref = f"avail:{event.id}"
-        creator_pending_acct = f"creator_pending:{event.creator_id}"
-        creator_avail_acct = f"creator_available:{event.creator_id}"
-        amount = Decimal(event.net_cents) / 100
+    return {
+        "creators_updated": len(creators_updated),
+        "total_cents_moved": total_moved,
+        "events_moved": events_moved,
+        "dry_run": False,
+    }
 
-        # Debit pending
-        session.add(LedgerEntry(
-            account_id=creator_pending_acct,
-            currency=event.currency,
-            amount=amount,
-            direction=LEDGER_DIRECTION_DEBIT,
-            reference=ref,
-        ))
-        # Credit available
-        session.add(LedgerEntry(
-            account_id=creator_avail_acct,
-            currency=event.currency,
-            amount=amount,
-            direction=LEDGER_DIRECTION_CREDIT,
-            reference=ref,
-        ))
 
-        # Update balances
-        await _update_balance(session, creator_pending_acct, event.currency, -amount)
-        await _update_balance(session, creator_avail_acct, event.currency, amount)
+# ---------------------------------------------------------------------------
+# Weekly payout generation
+# ---------------------------------------------------------------------------
 
-        total_moved += event.net_cents
-        creators_updated.add(event.creator_id)
 
-    await session.commit()
-    return {"creators_updated": len(creators_updated), "total_cents_moved": total_moved}
+def _payout_candidates(period_start: datetime, period_end: datetime) -> Select:
+    """Creators with an available balance >= MIN_PAYOUT_CENTS and no payout for the period.
+
+    One pass over the balance shards; yields (creator_id, payouts_active) ordered by
+    creator, payouts_active False when payout settings are missing or not active.
+    """
+    balances = (
+        balance_totals()
+        .where(LedgerBalance.account_id.like("creator_available:%"))
+        .having(func.sum(LedgerBalance.balance) >= Decimal(MIN_PAYOUT_CENTS) / 100)
+        .subquery()
+    )
+    creator_id = cast(func.substr(balances.c.account_id, len("creator_available:") + 1), PG_UUID)
+    return (
+        select(
+            creator_id,
+            func.coalesce(CreatorPayoutSettings.status == "active", False),
+        )
+        .select_from(balances)
+        .outerjoin(CreatorPayoutSettings, CreatorPayoutSettings.creator_id == creator_id)
+        .where(
+            balances.c.currency == "eur",
+            # Skips malformed account ids instead of failing the uuid cast
+            balances.c.account_id.op("~")("^creator_available:[0-9a-f-]{36}$"),
+            ~exists().where(
+                Payout.creator_id == creator_id,
+                Payout.period_start == period_start,
+                Payout.period_end == period_end,
+            ),
+        )
+        .order_by(creator_id)
+    )
 
 
-# ---------------------------------------------------------------------------
-# Weekly payout generation
-# ---------------------------------------------------------------------------
+def _payout_batch(creator_ids: list[uuid.UUID], period_start: datetime, period_end: datetime) -> Select:
+    """One statement creating the period's payouts for a batch of creators.
+
+    Eligible events (reconciled, inside the period, in no payout yet) are summed per
+    creator; creators reaching MIN_PAYOUT_CENTS get a Payout, its PayoutItems and the
+    creator_available -> creator_paid_out transfer (reference 'payout:<payout id>').
+    The (creator, period) and one-payout-per-event constraints make it idempotent:
+    a conflicting payout is skipped, a conflicting item fails the statement.
+    Yields (creator_id, amount_cents) per payout created.
+    """
+    eligible = (
+        select(LedgerEvent.id, LedgerEvent.creator_id, LedgerEvent.net_cents)
+        .where(
+            LedgerEvent.creator_id.in_(creator_ids),
+            LedgerEvent.net_cents > 0,
+            LedgerEvent.created_at >= period_start,
+            LedgerEvent.created_at <= period_end,
+            LedgerEvent.available_at.is_not(None),
+            ~exists().where(PayoutItem.ledger_event_id == LedgerEvent.id),
+        )
+        .cte("eligible")
+    )
+    totals = (
+        select(eligible.c.creator_id, func.sum(eligible.c.net_cents).label("amount_cents"))
+        .group_by(eligible.c.creator_id)
+        .having(func.sum(eligible.c.net_cents) >= MIN_PAYOUT_CENTS)
+        .subquery("totals")
+    )
+    created = (
+        pg_insert(Payout)
+        .from_select(
+            ["id", "creator_id", "amount_cents", "currency", "method", "status", "period_start", "period_end"],
+            select(
+                func.gen_random_uuid(),
+                totals.c.creator_id,
+                totals.c.amount_cents,
+                literal("eur", String),
+                literal("sepa", String),
+                literal("queued", String),
+                literal(period_start, DateTime(timezone=True)),
+                literal(period_end, DateTime(timezone=True)),
+            ),
+        )
+        .on_conflict_do_nothing(constraint="uq_payout_creator_period")
+        .returning(Payout.id, Payout.creator_id, Payout.amount_cents)
+        .cte("created")
+    )
+    items = (
+        pg_insert(PayoutItem)
+        .from_select(
+            ["id", "payout_id", "ledger_event_id", "amount_cents"],
+            select(func.gen_random_uuid(), created.c.id, eligible.c.id, eligible.c.net_cents).join_from(
+                eligible, created, eligible.c.creator_id == created.c.creator_id
+            ),
+        )
+        .cte("items")
+    )
+    entries, balances = _creator_transfer(
+        created.c.creator_id,
+        literal("eur", String),
+        created.c.amount_cents,
+        func.concat("payout:", cast(created.c.id, String)),
+        "creator_available:",
+        "creator_paid_out:",
+    )
+    return select(created.c.creator_id, created.c.amount_cents).add_cte(items, entries, balances)
 
 
 async def generate_weekly_payouts(
     session: AsyncSession,
     period_start: datetime,
     period_end: datetime,
+    *,
+    batch_size: int | None = None,
 ) -> dict:
     """Generate payouts for eligible creators.
 
+    Candidates come from one query; payouts are then created PAYOUT_GENERATE_BATCH_SIZE
+    creators per statement and committed per batch, so an interrupted run resumes
+    where it stopped (creators with a payout for the period are no longer candidates).
+    A batch that fails is retried creator by creator, each under its own savepoint:
+    only the creators that fail are left out (counted in `failed`).
     Idempotent: unique constraint on (creator_id, period_start, period_end) prevents duplicates.
     """
-    # Find creators with active payout settings and sufficient available balance
-    avail_balances = (
-        await session.execute(
-            select(LedgerBalance)
-            .where(
-                LedgerBalance.account_id.like("creator_available:%"),
-                LedgerBalance.balance >= Decimal(MIN_PAYOUT_CENTS) / 100,
-            )
-        )
-    ).scalars().all()
+    limit = batch_size or get_settings().payout_generate_batch_size
+    candidates = (await session.execute(_payout_candidates(period_start, period_end))).all()
+    await session.commit()
+    active = [creator_id for creator_id, payouts_active in candidates if payouts_active]
 
     payouts_created = 0
     total_cents = 0
-    skipped = 0
-
-    for bal in avail_balances:
-        # Extract creator_id from account_id format "creator_available:{uuid}"
-        creator_id_str = bal.account_id.replace("creator_available:", "")
+    failed = 0
+    for start in range(0, len(active), limit):
+        batch = active[start : start + limit]
         try:
-            creator_id = uuid.UUID(creator_id_str)
-        except ValueError:
-            continue
-
-        # Check payout settings
-        settings = await get_payout_settings(session, creator_id)
-        if not settings or settings.status != "active":
-            skipped += 1
-            continue
-
-        # Calculate available cents
-        available_cents = int(bal.balance * 100)
-        if available_cents < MIN_PAYOUT_CENTS:
-            skipped += 1
-            continue
-
-        # Get un-paid ledger events that are available (have been reconciled)
-        # i.e., events that have a 'avail:' entry and are not yet in any payout_item
-        avail_events = (
-            await session.execute(
-                select(LedgerEvent)
-                .where(
-                    LedgerEvent.creator_id == creator_id,
-                    LedgerEvent.net_cents > 0,
-                    LedgerEvent.created_at >= period_start,
-                    LedgerEvent.created_at <= period_end,
-                    # Has been reconciled (avail entry exists)
-                    func.concat("avail:", LedgerEvent.id.cast(String)).in_(
-                        select(LedgerEntry.reference).where(
-                            LedgerEntry.reference.like("avail:%")
-                        )
-                    ),
-                    # Not already in a payout
-                    ~LedgerEvent.id.in_(
-                        select(PayoutItem.ledger_event_id)
-                    ),
-                )
-            )
-        ).scalars().all()
-
-        if not avail_events:
-            skipped += 1
-            continue
-
-        payout_amount_cents = sum(e.net_cents for e in avail_events)
-        if payout_amount_cents < MIN_PAYOUT_CENTS:
-            skipped += 1
-            continue
-
-        # Create payout — unique constraint prevents duplicates
-        try:
-            payout = Payout(
-                creator_id=creator_id,
-                amount_cents=payout_amount_cents,
-                currency="eur",
-                method="sepa",
-                status="queued",
-                period_start=period_start,
-                period_end=period_end,
-            )
-            session.add(payout)
-            await session.flush()  # Get payout.id
-
-            # Create payout items
-            for event in avail_events:
-                session.add(PayoutItem(
-                    payout_id=payout.id,
-                    ledger_event_id=event.id,
-                    amount_cents=event.net_cents,
-                ))
-
-            # Debit available, credit paid_out
-            payout_amount = Decimal(payout_amount_cents) / 100
-            creator_avail_acct = f"creator_available:{creator_id}"
-            creator_paidout_acct = f"creator_paid_out:{creator_id}"
-            payout_ref = f"payout:{payout.id}"
-
-            session.add(LedgerEntry(
-                account_id=creator_avail_acct,
-                currency="eur",
-                amount=payout_amount,
-                direction=LEDGER_DIRECTION_DEBIT,
-                reference=payout_ref,
-            ))
-            session.add(LedgerEntry(
-                account_id=creator_paidout_acct,
-                currency="eur",
-                amount=payout_amount,
-                direction=LEDGER_DIRECTION_CREDIT,
-                reference=payout_ref,
-            ))
-            await _update_balance(session, creator_avail_acct, "eur", -payout_amount)
-            await _update_balance(session, creator_paidout_acct, "eur", payout_amount)
-
-            payouts_created += 1
-            total_cents += payout_amount_cents
-
-        except Exception:
-            # Unique constraint violation = already created for this period → skip
-            await session.rollback()
-            continue
+            async with session.begin_nested():
+                rows = (await session.execute(_payout_batch(batch, period_start, period_end))).all()
+        except DBAPIError:
+            logger.warning("payout batch failed, retrying per creator size=%s", len(batch), exc_info=True)
+            rows = []
+            for creator_id in batch:
+                try:
+                    async with session.begin_nested():
+                        rows += (
+                            await session.execute(_payout_batch([creator_id], period_start, period_end))
+                        ).all()
+                except DBAPIError:
+                    failed += 1
+                    logger.warning("payout generation failed creator_id=%s", creator_id, exc_info=True)
+        await session.commit()
+        payouts_created += len(rows)
+        total_cents += sum(amount_cents for _, amount_cents in rows)
 
-    await session.commit()
     return {
         "payouts_created": payouts_created,
         "total_cents": total_cents,
-        "skipped_below_threshold": skipped,
+        "skipped_below_threshold": len(candidates) - payouts_created - failed,
+        "failed": failed,
     }
 
 
@@ -343,58 +469,40 @@ async def generate_weekly_payouts(
 # ---------------------------------------------------------------------------
 
 
-async def export_payouts_csv(
+EXPORT_CSV_HEADER = [
+    "payout_id", "beneficiary_name", "iban", "bic", "amount_eur",
+    "currency", "reference", "creator_id",
+]
+
+
+async def start_payout_export(
     session: AsyncSession,
     actor_id: uuid.UUID,
     status_filter: str = "queued",
-) -> str:
-    """Export payouts as CSV for bank portal upload. Decrypts IBAN/BIC.
+) -> str | None:
+    """Mark payouts for a SEPA CSV export; returns the batch id (None if nothing to export).
 
-    Marks exported payouts with batch ID and exported_at timestamp.
-    Creates audit log entry.
+    One UPDATE stamps every matching payout that has payout settings with the batch
+    ID, exported_at and status 'exported', plus an audit log entry; the file itself
+    is produced by stream_payout_export(batch_id). A download that fails part-way is
+    recovered with reopen_payout_export(batch_id).
     """
-    payouts = (
+    batch_id = f"batch-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    result = typing.cast(
+        CursorResult[typing.Any],
         await session.execute(
-            select(Payout)
-            .where(Payout.status == status_filter)
-            .order_by(Payout.creator_id)
-        )
-    ).scalars().all()
-
-    if not payouts:
-        return ""
-
-    batch_id = f"batch-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}"
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "payout_id", "beneficiary_name", "iban", "bic", "amount_eur",
-        "currency", "reference", "creator_id",
-    ])
-
-    for payout in payouts:
-        settings = await get_payout_settings(session, payout.creator_id)
-        if not settings:
-            continue
-
-        iban_plain = decrypt(settings.iban_encrypted)
-        bic_plain = decrypt(settings.bic_encrypted) if settings.bic_encrypted else ""
-
-        writer.writerow([
-            str(payout.id),
-            settings.account_holder_name,
-            iban_plain,
-            bic_plain,
-            f"{payout.amount_cents / 100:.2f}",
-            payout.currency.upper(),
-            f"ZINOVIA-{str(payout.id)[:8].upper()}",
-            str(payout.creator_id),
-        ])
-
-        # Mark as exported
-        payout.status = "exported"
-        payout.export_batch_id = batch_id
-        payout.exported_at = datetime.now(timezone.utc)
+            update(Payout)
+            .where(
+                Payout.status == status_filter,
+                exists().where(CreatorPayoutSettings.creator_id == Payout.creator_id),
+            )
+            .values(status="exported", export_batch_id=batch_id, exported_at=func.now())
+            .execution_options(synchronize_session=False)
+        ),
+    )
+    if not result.rowcount:
+        await session.rollback()
+        return None
 
     # Audit log
     session.add(PayoutAuditLog(
@@ -402,13 +510,90 @@ async def export_payouts_csv(
         action="EXPORT_CSV",
         entity_type="payout_batch",
         entity_id=batch_id,
-        details={"count": len(payouts), "status_filter": status_filter},
+        details={"count": result.rowcount, "status_filter": status_filter},
     ))
+    await session.commit()
+    return batch_id
+
 
+async def reopen_payout_export(session: AsyncSession, actor_id: uuid.UUID, batch_id: str) -> bool:
+    """Audit a repeat download of an export batch; False if the batch has no payouts.
+
+    The batch is already marked; the file is produced again by stream_payout_export.
+    """
+    count = (
+        await session.execute(select(func.count(Payout.id)).where(Payout.export_batch_id == batch_id))
+    ).scalar_one()
+    if not count:
+        return False
+    session.add(PayoutAuditLog(
+        actor_user_id=actor_id,
+        action="REEXPORT_CSV",
+        entity_type="payout_batch",
+        entity_id=batch_id,
+        details={"count": count},
+    ))
     await session.commit()
+    return True
+
+
+def _export_csv_chunk(rows: Sequence[Row]) -> str:
+    """CSV text for a chunk of (payout, settings) rows; decrypts IBAN/BIC."""
+    ibans = decrypt_many(row.iban_encrypted for row in rows)
+    bics = decrypt_many(row.bic_encrypted for row in rows)
+    output = io.StringIO()
+    csv.writer(output).writerows(
+        [
+            str(row.id),
+            row.account_holder_name,
+            iban,
+            bic or "",
+            f"{row.amount_cents / 100:.2f}",
+            row.currency.upper(),
+            f"ZINOVIA-{str(row.id)[:8].upper()}",
+            str(row.creator_id),
+        ]
+        for row, iban, bic in zip(rows, ibans, bics, strict=True)
+    )
     return output.getvalue()
 
 
+async def stream_payout_export(batch_id: str) -> AsyncIterator[str]:
+    """Yield the CSV of an export batch for bank portal upload, PAYOUT_EXPORT_CHUNK_SIZE rows at a time.
+
+    Payouts and settings come from one joined query over a server-side cursor, so
+    memory stays bounded by the chunk size whatever the batch size. Runs on its own
+    session: it outlives the request's. Chunks are decrypted in a worker thread
+    unless PAYOUT_EXPORT_DECRYPT_IN_THREAD is off.
+    """
+    settings = get_settings()
+    chunk_size = settings.payout_export_chunk_size
+    output = io.StringIO()
+    csv.writer(output).writerow(EXPORT_CSV_HEADER)
+    yield output.getvalue()
+    async with async_session_factory() as session:
+        result = await session.stream(
+            select(
+                Payout.id,
+                Payout.amount_cents,
+                Payout.currency,
+                Payout.creator_id,
+                CreatorPayoutSettings.account_holder_name,
+                CreatorPayoutSettings.iban_encrypted,
+                CreatorPayoutSettings.bic_encrypted,
+            )
+            .join(CreatorPayoutSettings, CreatorPayoutSettings.creator_id == Payout.creator_id)
+            .where(Payout.export_batch_id == batch_id)
+            .order_by(Payout.creator_id, Payout.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in result.partitions(chunk_size):
+            if settings.payout_export_decrypt_in_thread:
+                yield await asyncio.to_thread(_export_csv_chunk, rows)
+            else:
+                yield _export_csv_chunk(rows)
+
+
 # ---------------------------------------------------------------------------
 # Payout status transitions
 # ---------------------------------------------------------------------------
@@ -475,8 +660,8 @@ async def update_payout_status(
             direction=LEDGER_DIRECTION_DEBIT,
             reference=fail_ref,
         ))
-        await _update_balance(session, creator_avail, payout.currency, payout_amount)
-        await _update_balance(session, creator_paidout, payout.currency, -payout_amount)
+        await apply_balance_delta(session, creator_avail, payout.currency, payout_amount)
+        await apply_balance_delta(session, creator_paidout, payout.currency, -payout_amount)
 
     if bank_reference:
         payout.bank_reference = bank_reference
@@ -498,32 +683,3 @@ async def update_payout_status(
     await session.commit()
     await session.refresh(payout)
     return payout
-
-
-# ---------------------------------------------------------------------------
-# Balance helper
-# ---------------------------------------------------------------------------
-
-
-async def _update_balance(
-    session: AsyncSession,
-    account_id: str,
-    currency: str,
-    delta: Decimal,
-) -> None:
-    """Atomically update a ledger balance (upsert)."""
-    result = await session.execute(
-        select(LedgerBalance).where(
-            LedgerBalance.account_id == account_id,
-            LedgerBalance.currency == currency,
-        )
-    )
-    bal = result.scalar_one_or_none()
-    if bal:
-        bal.balance = bal.balance + delta
-    else:
-        session.add(LedgerBalance(
-            account_id=account_id,
-            currency=currency,
-            balance=delta,
-        ))
@@ -11,6 +11,8 @@ from app.db.session import get_async_session
 from app.modules.auth.deps import get_current_user
 from app.modules.auth.models import User
 from app.modules.creators.deps import require_creator_with_profile
+from app.modules.media.service import sign_post_media
+from app.modules.media.storage import get_storage_client
 from app.modules.posts.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.modules.posts.schemas import (
     CreatorSummary,
@@ -47,6 +49,11 @@ router = APIRouter()
 
 feed_router = APIRouter()
 
+INCLUDE_URLS_DESCRIPTION = (
+    "Variant to pre-sign for every asset (e.g. grid); fills download_urls so clients "
+    "skip per-asset /media/{id}/download-url calls."
+)
+
 
 def _ensure_likes_enabled() -> None:
     if not get_settings().enable_likes:
@@ -65,6 +72,7 @@ async def feed(
     page: int = Query(1, ge=1),
     page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     cursor: str | None = Query(None, description="Opaque cursor for infinite scroll pagination."),
+    include_urls: str | None = Query(None, description=INCLUDE_URLS_DESCRIPTION),
 ) -> FeedPage:
     from app.modules.posts.service import _post_to_out_locked
 
@@ -72,12 +80,22 @@ async def feed(
         session, current_user.id, page=page, page_size=page_size, cursor=cursor,
         current_user_role=current_user.role,
     )
+    download_urls: dict[UUID, dict[str, str]] = {}
+    if include_urls:
+        download_urls = await sign_post_media(
+            session,
+            get_storage_client(),
+            [(post, is_locked) for post, _, _, is_locked, _ in items_tuples],
+            include_urls,
+            viewer_user_id=current_user.id,
+        )
     items = []
     for post, user, profile, is_locked, locked_reason in items_tuples:
         data = _post_to_out_locked(post, locked_reason or "subscription") if is_locked else _post_to_out(post)
         items.append(
             PostWithCreator(
                 **data,
+                download_urls=download_urls.get(post.id, {}),
                 creator=CreatorSummary(
                     user_id=user.id,
                     handle=profile.handle or "",
@@ -95,10 +113,21 @@ async def search(
     q: str = Query(..., min_length=1, max_length=200, description="Search query"),
     page: int = Query(1, ge=1),
     page_size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    include_urls: str | None = Query(None, description=INCLUDE_URLS_DESCRIPTION),
     session: AsyncSession = Depends(get_async_session),
 ) -> PostSearchPage:
     """Search public posts by caption (trigram GIN index)."""
     items_tuples, total = await search_posts(session, q, page=page, page_size=page_size)
+    download_urls: dict[UUID, dict[str, str]] = {}
+    if include_urls:
+        # Search only returns public posts and is unauthenticated: sign as an anonymous viewer.
+        download_urls = await sign_post_media(
+            session,
+            get_storage_client(),
+            [(post, False) for post, _, _ in items_tuples],
+            include_urls,
+            viewer_user_id=None,
+        )
     items = [
         PostSearchResult(
             id=post.id,
@@ -110,6 +139,7 @@ async def search(
             created_at=post.created_at,
             updated_at=post.updated_at,
             asset_ids=[pm.media_asset_id for pm in sorted(post.media, key=lambda m: m.position)],
+            download_urls=download_urls.get(post.id, {}),
             creator=CreatorSummary(
                 user_id=user.id,
                 handle=profile.handle or "",
@@ -88,6 +88,10 @@ class PostOut(BaseModel):
         default_factory=dict,
         description="Map of asset_id → {blurhash, dominant_color} for instant placeholders.",
     )
+    download_urls: dict[str, str] = Field(
+        default_factory=dict,
+        description="Map of asset_id → signed URL; only filled when the request sets include_urls.",
+    )
     publish_at: datetime | None = None
     status: str = Field(
         default=POST_STATUS_PUBLISHED,
@@ -118,6 +122,10 @@ class PostWithCreator(BaseModel):
         default_factory=dict,
         description="Map of asset_id → {blurhash, dominant_color} for instant placeholders.",
     )
+    download_urls: dict[str, str] = Field(
+        default_factory=dict,
+        description="Map of asset_id → signed URL; only filled when the request sets include_urls.",
+    )
     publish_at: datetime | None = None
     status: str = Field(
         default=POST_STATUS_PUBLISHED,
@@ -189,6 +197,10 @@ class PostSearchResult(BaseModel):
     created_at: datetime
     updated_at: datetime
     asset_ids: list[UUID] = Field(default_factory=list)
+    download_urls: dict[str, str] = Field(
+        default_factory=dict,
+        description="Map of asset_id → signed URL; only filled when the request sets include_urls.",
+    )
     creator: CreatorSummary | None = None
 
 
@@ -33,6 +33,7 @@ from app.modules.posts.constants import (
     VISIBILITY_SUBSCRIBERS,
 )
 from app.modules.posts.models import Post, PostComment, PostLike, PostMedia
+from app.modules.posts.timeline import approximate_feed_total, fan_out_posts, read_timeline
 from app.shared.pagination import normalize_pagination
 
 logger = logging.getLogger(__name__)
@@ -141,6 +142,8 @@ async def create_post(
     await session.flush()
     for i, mid in enumerate(asset_ids):
         session.add(PostMedia(post_id=post.id, media_asset_id=mid, position=i))
+    if post_status == POST_STATUS_PUBLISHED:
+        await fan_out_posts(session, [post.id])
     await session.commit()
     if type_ == POST_TYPE_IMAGE and asset_ids:
         try:
@@ -402,6 +405,7 @@ async def get_feed_page(
     """
     Feed: latest posts from creators the user follows, plus the user's own posts.
 
+    Reads the materialised timeline (posts.timeline); total is a cached approximation.
     Returns (items, total, next_cursor).
     Each item is (post, user, profile, is_locked, locked_reason).
     Posts the user is not entitled to see are returned as locked teasers.
@@ -414,47 +418,15 @@ async def get_feed_page(
         invalid_page_size_use_default=False,
     )
 
-    subscribed_ids = await get_subscribed_creator_ids(session, current_user_id)
-    followed_result = await session.execute(
-        select(Follow.creator_user_id).where(Follow.fan_user_id == current_user_id)
+    before = _feed_cursor_decode(cursor) if cursor else None
+    post_ids = await read_timeline(
+        session,
+        current_user_id,
+        limit=limit + 1,
+        offset=0 if before else offset,
+        before=before,
     )
-    followed_ids = {row[0] for row in followed_result.all()}
-
-    now = datetime.now(timezone.utc)
-
-    # Base filter: published posts from followed creators or own posts
-    visibility_conditions = [Post.creator_user_id == current_user_id]
-    if followed_ids:
-        visibility_conditions.append(Post.creator_user_id.in_(followed_ids))
-    base_filter = and_(
-        Post.status == POST_STATUS_PUBLISHED,
-        or_(Post.publish_at.is_(None), Post.publish_at <= now),
-        or_(*visibility_conditions),
-    )
-
-    count_stmt = select(func.count(Post.id)).select_from(Post).where(base_filter)
-    total_result = await session.execute(count_stmt)
-    total = total_result.scalar_one() or 0
-
-    ids_stmt = (
-        select(Post.id)
-        .where(base_filter)
-        .order_by(Post.created_at.desc(), Post.id.desc())
-    )
-
-    # Cursor-based pagination (preferred for infinite scroll)
-    if cursor:
-        cursor_dt, cursor_id = _feed_cursor_decode(cursor)
-        ids_stmt = ids_stmt.where(
-            (Post.created_at < cursor_dt)
-            | ((Post.created_at == cursor_dt) & (Post.id < cursor_id))
-        )
-    else:
-        ids_stmt = ids_stmt.offset(offset)
-
-    ids_stmt = ids_stmt.limit(limit + 1)
-    ids_result = await session.execute(ids_stmt)
-    post_ids = [row[0] for row in ids_result.all()]
+    total = await approximate_feed_total(session, current_user_id)
 
     next_cursor = None
     if len(post_ids) > limit:
@@ -475,6 +447,19 @@ async def get_feed_page(
     rows = (await session.execute(posts_query)).all()
     order_map = {p.id: (p, u, prof) for p, u, prof in rows}
 
+    # Follow/subscription state only for the creators on this page.
+    page_creator_ids = {p.creator_user_id for p, _, _ in rows} - {current_user_id}
+    subscribed_ids = await get_subscribed_creator_ids(session, current_user_id, page_creator_ids)
+    followed_ids: set[UUID] = set()
+    if page_creator_ids:
+        followed_result = await session.execute(
+            select(Follow.creator_user_id).where(
+                Follow.fan_user_id == current_user_id,
+                Follow.creator_user_id.in_(page_creator_ids),
+            )
+        )
+        followed_ids = {row[0] for row in followed_result.all()}
+
     # Check PPV purchases for feed posts
     ppv_feed_ids = [pid for pid in post_ids if pid in order_map and order_map[pid][0].visibility == VISIBILITY_PPV]
     ppv_unlocked_feed: set[UUID] = set()
@@ -746,8 +731,12 @@ async def publish_post_now(session: AsyncSession, post_id: UUID, creator_user_id
     ).scalar_one_or_none()
     if not post:
         raise AppError(status_code=404, detail="post_not_found")
+    was_published = post.status == POST_STATUS_PUBLISHED
     post.status = POST_STATUS_PUBLISHED
     post.publish_at = datetime.now(timezone.utc)
+    if not was_published:
+        await session.flush()
+        await fan_out_posts(session, [post.id])
     await session.commit()
     await session.refresh(post)
     return post
@@ -769,6 +758,8 @@ async def publish_due_scheduled_posts(session: AsyncSession) -> int:
     for post in due_posts:
         post.status = POST_STATUS_PUBLISHED
     if due_posts:
+        await session.flush()
+        await fan_out_posts(session, [post.id for post in due_posts])
         await session.commit()
         logger.info("scheduled_posts_published count=%s", len(due_posts))
     return len(due_posts)
@@ -0,0 +1,304 @@
+"""Materialised home feed (fan-out on write, with pull for large creators).
+
+Each reader's feed is a set of feed_entries rows (post id + the post's created_at)
+written when a post is published and when the reader follows a creator, so
+get_feed_page reads one index range instead of filtering posts by thousands of
+followed creator ids.
+
+Creators with more than FEED_FANOUT_MAX_FOLLOWERS followers are not fanned out:
+their posts are pulled at read time from posts (index on creator_user_id,
+created_at) and merged with the reader's entries. The feed_pull_creators table is
+the one source of truth for who is pulled, read by writers and readers alike, and is
+kept in line with the threshold by refresh_pull_creators (posts.refresh_feed_pull_creators,
+every few minutes). A creator who drops back under the threshold has the posts of
+their pull period backfilled into followers' timelines before the row goes, in one
+transaction that holds the row FOR UPDATE; fan-out and follow backfill hold it FOR
+SHARE, so nothing published or followed meanwhile is lost.
+
+Entries are written for every visibility (locked teasers are part of the feed);
+publish status and publish_at are still checked at read time, so admin removal
+or a restored post need no timeline maintenance. Deleting a post, user or creator
+removes entries through ON DELETE CASCADE.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import delete, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.settings import get_settings
+from app.modules.creators.models import Follow
+from app.modules.posts.constants import POST_STATUS_PUBLISHED
+from app.modules.posts.models import FeedEntry, FeedPullCreator, Post
+
+_totals: OrderedDict[UUID, tuple[float, int]] = OrderedDict()
+_totals_lock = threading.Lock()
+_TOTALS_MAX_ENTRIES = 10000
+
+
+async def _share_pull_rows(session: AsyncSession, creator_ids: Any) -> set[UUID]:
+    """Which of ``creator_ids`` are pulled, holding their rows FOR SHARE until commit."""
+    result = await session.execute(
+        select(FeedPullCreator.creator_user_id)
+        .where(FeedPullCreator.creator_user_id.in_(creator_ids))
+        .with_for_update(read=True)
+    )
+    return {row[0] for row in result.all()}
+
+
+def _published_now() -> list[Any]:
+    now = datetime.now(timezone.utc)
+    return [Post.status == POST_STATUS_PUBLISHED, or_(Post.publish_at.is_(None), Post.publish_at <= now)]
+
+
+async def fan_out_posts(session: AsyncSession, post_ids: Iterable[UUID]) -> None:
+    """Add newly published posts to their creator's and followers' timelines (no commit).
+
+    Pulled creators only get the entry in their own timeline. One INSERT ... SELECT
+    for the whole batch; already present entries are left alone.
+    """
+    ids = list(post_ids)
+    if not ids:
+        return
+    pulled = await _share_pull_rows(
+        session, select(Post.creator_user_id).where(Post.id.in_(ids)).distinct()
+    )
+    to_followers = (
+        select(Follow.fan_user_id, Post.id, Post.creator_user_id, Post.created_at)
+        .join(Follow, Follow.creator_user_id == Post.creator_user_id)
+        .where(Post.id.in_(ids))
+    )
+    if pulled:
+        to_followers = to_followers.where(Post.creator_user_id.not_in(pulled))
+    to_self = select(Post.creator_user_id, Post.id, Post.creator_user_id, Post.created_at).where(
+        Post.id.in_(ids)
+    )
+    await session.execute(
+        pg_insert(FeedEntry)
+        .from_select(
+            ["user_id", "post_id", "creator_user_id", "created_at"],
+            union_all(to_followers, to_self),
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+async def backfill_follow(session: AsyncSession, fan_user_id: UUID, creator_user_id: UUID) -> None:
+    """Copy the creator's latest published posts into a new follower's timeline (no commit)."""
+    if await _share_pull_rows(session, [creator_user_id]):
+        return
+    recent = (
+        select(literal(fan_user_id), Post.id, Post.creator_user_id, Post.created_at)
+        .where(Post.creator_user_id == creator_user_id, *_published_now())
+        .order_by(Post.created_at.desc())
+        .limit(get_settings().feed_follow_backfill_posts)
+    )
+    await session.execute(
+        pg_insert(FeedEntry)
+        .from_select(["user_id", "post_id", "creator_user_id", "created_at"], recent)
+        .on_conflict_do_nothing()
+    )
+    _forget_total(fan_user_id)
+
+
+async def remove_follow(session: AsyncSession, fan_user_id: UUID, creator_user_id: UUID) -> None:
+    """Drop an unfollowed creator's posts from the fan's timeline (no commit)."""
+    await session.execute(
+        delete(FeedEntry).where(
+            FeedEntry.user_id == fan_user_id, FeedEntry.creator_user_id == creator_user_id
+        )
+    )
+    _forget_total(fan_user_id)
+
+
+async def _followed_pull_creators(session: AsyncSession, user_id: UUID) -> list[UUID]:
+    result = await session.execute(
+        select(Follow.creator_user_id)
+        .join(FeedPullCreator, FeedPullCreator.creator_user_id == Follow.creator_user_id)
+        .where(Follow.fan_user_id == user_id)
+    )
+    return [row[0] for row in result.all()]
+
+
+@dataclass(slots=True)
+class PullRefresh:
+    pulled: int = 0  # creators switched to pull
+    pushed: int = 0  # creators switched back to fan-out, pull period backfilled
+
+
+async def _switch_to_push(session: AsyncSession, creator_user_id: UUID, threshold: int) -> bool:
+    """Backfill a pulled creator's followers and drop the pull row, if still under threshold."""
+    row = (
+        await session.execute(
+            select(FeedPullCreator)
+            .where(FeedPullCreator.creator_user_id == creator_user_id)
+            .with_for_update()
+        )
+    ).scalar_one_or_none()
+    if row is None:
+        return False
+    followers = await session.scalar(
+        select(func.count()).select_from(Follow).where(Follow.creator_user_id == creator_user_id)
+    ) or 0
+    if followers > threshold:
+        return False
+    # Everything published while pulled, plus the latest posts a follow made during the
+    # pull period would have copied.
+    latest = (
+        select(Post.id)
+        .where(Post.creator_user_id == creator_user_id, *_published_now())
+        .order_by(Post.created_at.desc())
+        .limit(get_settings().feed_follow_backfill_posts)
+    )
+    backfill = (
+        select(Follow.fan_user_id, Post.id, Post.creator_user_id, Post.created_at)
+        .join(Follow, Follow.creator_user_id == Post.creator_user_id)
+        .where(
+            Post.creator_user_id == creator_user_id,
+            *_published_now(),
+            or_(Post.created_at >= row.pulled_since, Post.id.in_(latest)),
+        )
+    )
+    await session.execute(
+        pg_insert(FeedEntry)
+        .from_select(["user_id", "post_id", "creator_user_id", "created_at"], backfill)
+        .on_conflict_do_nothing()
+    )
+    await session.delete(row)
+    return True
+
+
+async def refresh_pull_creators(session: AsyncSession) -> PullRefresh:
+    """Bring feed_pull_creators in line with FEED_FANOUT_MAX_FOLLOWERS (commits).
+
+    Creators above the threshold become pulled straight away: readers then ignore their
+    fanned-out entries and read all their posts. Creators back under it are switched
+    one at a time, each in its own short transaction.
+    """
+    threshold = get_settings().feed_fanout_max_followers
+    above = (
+        select(Follow.creator_user_id)
+        .group_by(Follow.creator_user_id)
+        .having(func.count() > threshold)
+    )
+    added = await session.execute(
+        pg_insert(FeedPullCreator)
+        .from_select(["creator_user_id"], above)
+        .on_conflict_do_nothing()
+        .returning(FeedPullCreator.creator_user_id)
+    )
+    refresh = PullRefresh(pulled=len(added.all()))
+    below = (
+        await session.execute(
+            select(FeedPullCreator.creator_user_id).where(
+                FeedPullCreator.creator_user_id.not_in(above)
+            )
+        )
+    ).scalars().all()
+    await session.commit()
+    for creator_user_id in below:
+        if await _switch_to_push(session, creator_user_id, threshold):
+            refresh.pushed += 1
+        await session.commit()
+    return refresh
+
+
+async def read_timeline(
+    session: AsyncSession,
+    user_id: UUID,
+    *,
+    limit: int,
+    offset: int = 0,
+    before: tuple[datetime, UUID] | None = None,
+) -> list[UUID]:
+    """Post ids for one feed page, newest first (created_at, id), keyset or offset."""
+    pulled = await _followed_pull_creators(session, user_id)
+    pushed = (
+        select(FeedEntry.post_id.label("post_id"), FeedEntry.created_at.label("created_at"))
+        .join(Post, Post.id == FeedEntry.post_id)
+        .where(FeedEntry.user_id == user_id, *_published_now())
+    )
+    if before is not None:
+        pushed = pushed.where(
+            or_(
+                FeedEntry.created_at < before[0],
+                (FeedEntry.created_at == before[0]) & (FeedEntry.post_id < before[1]),
+            )
+        )
+    if not pulled:
+        timeline = pushed.subquery()
+    else:
+        # Entries pushed for these creators before they crossed the threshold are
+        # skipped so a post is never listed twice.
+        pushed = pushed.where(FeedEntry.creator_user_id.not_in(pulled))
+        pull = select(Post.id.label("post_id"), Post.created_at.label("created_at")).where(
+            Post.creator_user_id.in_(pulled), *_published_now()
+        )
+        if before is not None:
+            pull = pull.where(
+                or_(
+                    Post.created_at < before[0],
+                    (Post.created_at == before[0]) & (Post.id < before[1]),
+                )
+            )
+        timeline = union_all(pushed, pull).subquery()
+    stmt = (
+        select(timeline.c.post_id)
+        .order_by(timeline.c.created_at.desc(), timeline.c.post_id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [row[0] for row in (await session.execute(stmt)).all()]
+
+
+def _forget_total(user_id: UUID) -> None:
+    with _totals_lock:
+        _totals.pop(user_id, None)
+
+
+async def approximate_feed_total(session: AsyncSession, user_id: UUID) -> int:
+    """Feed size for display, cached FEED_TOTAL_CACHE_SECONDS per reader.
+
+    Counts timeline entries plus pulled creators' posts without the per-post status
+    checks, so removed or not-yet-visible posts may be included.
+    """
+    now = time.monotonic()
+    with _totals_lock:
+        cached = _totals.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+    pulled = await _followed_pull_creators(session, user_id)
+    pushed_count = select(func.count()).select_from(FeedEntry).where(FeedEntry.user_id == user_id)
+    if pulled:
+        pushed_count = pushed_count.where(FeedEntry.creator_user_id.not_in(pulled))
+    total = (await session.execute(pushed_count)).scalar_one()
+    if pulled:
+        total += (
+            await session.execute(
+                select(func.count(Post.id)).where(
+                    Post.creator_user_id.in_(pulled), Post.status == POST_STATUS_PUBLISHED
+                )
+            )
+        ).scalar_one()
+    with _totals_lock:
+        _totals[user_id] = (now + get_settings().feed_total_cache_seconds, total)
+        _totals.move_to_end(user_id)
+        while len(_totals) > _TOTALS_MAX_ENTRIES:
+            _totals.popitem(last=False)
+    return total
+
+
+def reset_timeline_caches() -> None:
+    """Forget cached feed totals (tests)."""
+    with _totals_lock:
+        _totals.clear()
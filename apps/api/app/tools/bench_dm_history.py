@@ -0,0 +1,178 @@
+"""DM history paging benchmark. Run: python -m app.tools.bench_dm_history [--messages 1000000].
+
+Seeds one conversation with --messages text messages (--ties messages per timestamp,
+as bursts and imports produce) inside a transaction that is rolled back, then times
+message pages at the newest end and deep in the thread for the old implementation
+(cursor = message id looked up with session.get, created_at < cursor, selectinload of
+media) and for get_messages_page (composite (created_at, id) cursor, media loaded only
+for media messages). It also walks --walk pages with each and reports how many
+messages the old created_at-only cursor skipped. Needs the database from DATABASE_URL
+with migrations applied.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from uuid import UUID
+
+from sqlalchemy import desc, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.db.session import engine
+from app.modules.auth.models import User
+from app.modules.messaging.models import Conversation, Message
+from app.modules.messaging.service import get_messages_page
+
+_PAGE_SIZE = 50
+
+
+async def _old_page(
+    session: AsyncSession, conversation_id: UUID, cursor: str | None
+) -> tuple[list[Message], str | None]:
+    q = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(desc(Message.created_at))
+        .limit(_PAGE_SIZE + 1)
+        .options(selectinload(Message.media))
+    )
+    if cursor:
+        cursor_msg = await session.get(Message, UUID(cursor))
+        if cursor_msg:
+            q = q.where(Message.created_at < cursor_msg.created_at)
+    messages = list((await session.execute(q)).scalars().all())
+    next_cursor = None
+    if len(messages) > _PAGE_SIZE:
+        messages = messages[:_PAGE_SIZE]
+        next_cursor = str(messages[-1].id)
+    return messages, next_cursor
+
+
+async def _time(label: str, runs: int, fn: Callable[[], Awaitable[object]]) -> None:
+    await fn()  # warm-up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"  {label:<44} p50 {statistics.median(samples):>7.2f} ms  max {max(samples):>7.2f} ms")
+
+
+async def _seed(session: AsyncSession, messages: int, ties: int) -> tuple[UUID, UUID]:
+    creator = User(email=f"bench-dm-{uuid.uuid4().hex}@example.invalid", password_hash="x", role="creator")
+    fan = User(email=f"bench-dm-{uuid.uuid4().hex}@example.invalid", password_hash="x", role="fan")
+    session.add_all([creator, fan])
+    await session.flush()
+    conv = Conversation(creator_user_id=creator.id, fan_user_id=fan.id)
+    session.add(conv)
+    await session.flush()
+    await session.execute(
+        text(
+            """
+            INSERT INTO messages (id, conversation_id, sender_id, sender_role, message_type, text, created_at)
+            SELECT gen_random_uuid(), :conv, CASE WHEN g % 2 = 0 THEN CAST(:creator AS uuid) ELSE CAST(:fan AS uuid) END,
+                   CASE WHEN g % 2 = 0 THEN 'CREATOR' ELSE 'FAN' END, 'TEXT', 'message ' || g,
+                   now() - interval '1 year' + (g / CAST(:ties AS integer)) * interval '1 second'
+            FROM generate_series(1, CAST(:n AS integer)) AS g
+            """
+        ),
+        {"conv": conv.id, "creator": creator.id, "fan": fan.id, "ties": ties, "n": messages},
+    )
+    await session.execute(text("ANALYZE messages"))
+    await session.execute(text("ANALYZE message_media"))
+    return conv.id, fan.id
+
+
+async def run(messages: int, ties: int, runs: int, walk: int) -> None:
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        try:
+            start = time.perf_counter()
+            conversation_id, fan_id = await _seed(session, messages, ties)
+            print(f"seeded {messages} messages ({ties} per timestamp) in {time.perf_counter() - start:.1f}s")
+
+            middle = (
+                await session.execute(
+                    select(Message.id, Message.created_at)
+                    .where(Message.conversation_id == conversation_id)
+                    .order_by(Message.created_at, Message.id)
+                    .offset(messages // 2)
+                    .limit(1)
+                )
+            ).one()
+            old_cursor = str(middle.id)
+            new_cursor = f"{middle.created_at.isoformat()}|{middle.id}"
+
+            async def new_page(cursor: str | None, direction: str = "older") -> object:
+                session.expunge_all()
+                return await get_messages_page(
+                    session, conversation_id, fan_id, cursor=cursor, direction=direction,
+                    page_size=_PAGE_SIZE,
+                )
+
+            async def old_page(cursor: str | None) -> object:
+                session.expunge_all()
+                return await _old_page(session, conversation_id, cursor)
+
+            print(f"page of {_PAGE_SIZE}, {runs} runs each:")
+            await _time("old: newest page", runs, lambda: old_page(None))
+            await _time("new: newest page", runs, lambda: new_page(None))
+            await _time("old: page at depth (lookup + created_at <)", runs, lambda: old_page(old_cursor))
+            await _time("new: page at depth ((created_at, id) <)", runs, lambda: new_page(new_cursor))
+            await _time("new: newer than depth cursor", runs, lambda: new_page(new_cursor, "newer"))
+
+            # The old cursor restarts strictly before the last message's timestamp, so
+            # the rest of that timestamp's group is never returned.
+            old_seen: set[UUID] = set()
+            oldest = None
+            cursor: str | None = old_cursor
+            for _ in range(walk):
+                page, cursor = await _old_page(session, conversation_id, cursor)
+                old_seen.update(m.id for m in page)
+                oldest = page[-1].created_at
+            spanned = (
+                await session.execute(
+                    select(func.count()).where(
+                        Message.conversation_id == conversation_id,
+                        Message.created_at >= oldest,
+                        Message.created_at < middle.created_at,
+                    )
+                )
+            ).scalar_one()
+            new_seen: set[UUID] = set()
+            cursor = new_cursor
+            for _ in range(walk):
+                page, cursor, _ = await get_messages_page(
+                    session, conversation_id, fan_id, cursor=cursor, page_size=_PAGE_SIZE
+                )
+                new_seen.update(m.id for m in page)
+            print(
+                f"walking {walk} pages back from the middle: old cursor skipped "
+                f"{spanned - len(old_seen)} of {spanned} messages; new returned "
+                f"{len(new_seen)} distinct of {walk * _PAGE_SIZE}"
+            )
+        finally:
+            await session.close()
+            await trans.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--ties", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--walk", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.ties, args.runs, args.walk))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Login-storm load test. Run: python -m app.tools.bench_login_storm [--logins 200 --concurrency 50].
+
+Fires a burst of concurrent password verifications (what POST /auth/login spends its
+time on) while a probe coroutine plays the part of feed requests on the same event
+loop, issuing one lightweight request every few milliseconds. It reports probe latency
+for two cases: Argon2 run inline on the loop (the old behaviour), and the bounded
+PasswordHashPool. With the pool, probe latency stays flat; inline, every probe waits
+behind whole hashes. No database or settings needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from app.core.errors import AppError
+from app.modules.auth.security import PasswordHashPool, hash_password, verify_password
+
+_PROBE_INTERVAL_SECONDS = 0.005
+
+
+async def _probe(stop: asyncio.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(_PROBE_INTERVAL_SECONDS)
+        latencies.append(time.perf_counter() - start - _PROBE_INTERVAL_SECONDS)
+
+
+async def _storm(
+    label: str, logins: int, concurrency: int, verify: Callable[[], Awaitable[bool]]
+) -> None:
+    latencies: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, latencies))
+    await asyncio.sleep(0.05)  # baseline samples before the storm
+    gate = asyncio.Semaphore(concurrency)
+    shed = 0
+
+    async def one_login() -> None:
+        nonlocal shed
+        async with gate:
+            try:
+                await verify()
+            except AppError:
+                shed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    ms = sorted(x * 1000 for x in latencies)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    print(
+        f"  {label:<28} logins/s {logins / elapsed:>7.1f}   shed {shed:>4}   "
+        f"probe lag ms p50 {statistics.median(ms):>7.2f}  p99 {p99:>7.2f}  max {ms[-1]:>7.2f}"
+    )
+
+
+async def run(logins: int, concurrency: int, workers: int, max_pending: int) -> None:
+    hashed = hash_password("correct horse battery staple")
+
+    async def inline() -> bool:
+        return verify_password("wrong password", hashed)
+
+    pool = PasswordHashPool(workers, max_pending)
+
+    async def pooled() -> bool:
+        return await pool.run(verify_password, "wrong password", hashed)
+
+    print(f"{logins} logins, {concurrency} concurrent, pool workers={workers} max_pending={max_pending}:")
+    await _storm("argon2 inline on the loop", logins, concurrency, inline)
+    await _storm("bounded PasswordHashPool", logins, concurrency, pooled)
+    print(f"  pool stats: {pool.stats()}")
+    pool.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency, args.workers, args.max_pending))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Offline signing microbenchmark. Run: python -m app.tools.bench_signing [--n 2000].
+
+Compares URLs/second for the old per-call path (fresh boto3 client per URL, PEM
+parsed and CloudFrontSigner built per URL) against the pooled S3 client and the
+cached CloudFront signer. Uses dummy AWS credentials and a throwaway RSA key, so
+no network or real bucket is needed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+import boto3
+from botocore.config import Config
+from botocore.signers import CloudFrontSigner
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from app.modules.media import cloudfront_signer
+from app.modules.media.storage import close_storage_clients, get_s3_client
+
+_BUCKET = "bench-bucket"
+_DOMAIN = "cdn.example.invalid"
+_KEY_PAIR_ID = "KBENCHKEYPAIR"
+
+
+def _throwaway_pem() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.TraditionalOpenSSL,
+        serialization.NoEncryption(),
+    ).decode("ascii")
+
+
+def _rate(label: str, n: int, fn: Callable[[int], str]) -> float:
+    fn(0)  # warm-up
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    per_sec = n / elapsed
+    print(f"  {label:<40} {per_sec:>10.0f} URLs/s  ({elapsed * 1000 / n:.3f} ms/URL)")
+    return per_sec
+
+
+def run(n: int) -> None:
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "AKIABENCHMARK")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench-secret")
+    os.environ.setdefault("AWS_REGION", "us-east-1")
+    pem = _throwaway_pem()
+    expires = datetime.now(timezone.utc) + timedelta(minutes=10)
+
+    def s3_per_call(i: int) -> str:
+        config = Config(signature_version="s3v4", s3={"addressing_style": "virtual"})
+        client = boto3.client("s3", region_name="us-east-1", config=config)
+        return str(client.generate_presigned_url(
+            "get_object", Params={"Bucket": _BUCKET, "Key": f"media/{i}"}, ExpiresIn=600
+        ))
+
+    def s3_pooled(i: int) -> str:
+        return str(get_s3_client().generate_presigned_url(
+            "get_object", Params={"Bucket": _BUCKET, "Key": f"media/{i}"}, ExpiresIn=600
+        ))
+
+    def cf_per_call(i: int) -> str:
+        def rsa_signer(message: bytes) -> bytes:
+            key = serialization.load_pem_private_key(pem.encode("utf-8"), password=None)
+            return key.sign(message, padding.PKCS1v15(), hashes.SHA1())  # type: ignore[union-attr,arg-type,call-arg]
+
+        signer = CloudFrontSigner(_KEY_PAIR_ID, rsa_signer)
+        return signer.generate_presigned_url(f"https://{_DOMAIN}/media/{i}", date_less_than=expires)
+
+    def cf_cached(i: int) -> str:
+        signer = cloudfront_signer._get_signer(_KEY_PAIR_ID, pem)
+        return signer.generate_presigned_url(f"https://{_DOMAIN}/media/{i}", date_less_than=expires)
+
+    s3_n = max(1, n // 10)  # building a boto3 client per URL is slow; keep the run short
+    print(f"S3 presign (n={s3_n}):")
+    before = _rate("boto3 client per URL", s3_n, s3_per_call)
+    after = _rate("pooled process-wide client", n, s3_pooled)
+    print(f"  speedup: {after / before:.1f}x")
+    print(f"CloudFront sign (n={n}):")
+    before = _rate("PEM parse + signer per URL", n, cf_per_call)
+    after = _rate("cached key + signer", n, cf_cached)
+    print(f"  speedup: {after / before:.1f}x")
+    close_storage_clients()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=2000, help="URLs per measured run")
+    args = parser.parse_args()
+    run(args.n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Weekly payout generation benchmark. Run: python -m app.tools.bench_weekly_payouts [--creators 50000].
+
+Seeds --creators creators with active payout settings, --events reconciled ledger
+events each inside the period and a matching available balance, inside a
+transaction that is rolled back. Times the old per-creator loop (settings lookup,
+event query with the 'avail:' and payout_items IN-subquery anti-joins, ORM inserts)
+on --old-sample creators and extrapolates, then times generate_weekly_payouts over
+all of them, and a second run over the same period (nothing left to pay). Needs the
+database from DATABASE_URL with migrations applied.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import String, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import engine
+from app.modules.auth.models import User as _User  # noqa: F401 — register users table
+from app.modules.ledger.constants import LEDGER_DIRECTION_CREDIT, LEDGER_DIRECTION_DEBIT
+from app.modules.ledger.models import LedgerEntry, LedgerEvent
+from app.modules.ledger.service import apply_balance_delta
+from app.modules.payouts.models import Payout, PayoutItem
+from app.modules.payouts.service import MIN_PAYOUT_CENTS, generate_weekly_payouts, get_payout_settings
+
+
+async def _old_generate(
+    session: AsyncSession, creator_ids: list[uuid.UUID], period_start: datetime, period_end: datetime
+) -> int:
+    created = 0
+    for creator_id in creator_ids:
+        settings = await get_payout_settings(session, creator_id)
+        if not settings or settings.status != "active":
+            continue
+        events = (
+            await session.execute(
+                select(LedgerEvent).where(
+                    LedgerEvent.creator_id == creator_id,
+                    LedgerEvent.net_cents > 0,
+                    LedgerEvent.created_at >= period_start,
+                    LedgerEvent.created_at <= period_end,
+                    func.concat("avail:", LedgerEvent.id.cast(String)).in_(
+                        select(LedgerEntry.reference).where(LedgerEntry.reference.like("avail:%"))
+                    ),
+                    ~LedgerEvent.id.in_(select(PayoutItem.ledger_event_id)),
+                )
+            )
+        ).scalars().all()
+        amount_cents = sum(e.net_cents for e in events)
+        if amount_cents < MIN_PAYOUT_CENTS:
+            continue
+        payout = Payout(
+            creator_id=creator_id, amount_cents=amount_cents, currency="eur", method="sepa",
+            status="queued", period_start=period_start, period_end=period_end,
+        )
+        session.add(payout)
+        await session.flush()
+        for event in events:
+            session.add(PayoutItem(payout_id=payout.id, ledger_event_id=event.id, amount_cents=event.net_cents))
+        amount = Decimal(amount_cents) / 100
+        for account, direction, delta in (
+            (f"creator_available:{creator_id}", LEDGER_DIRECTION_DEBIT, -amount),
+            (f"creator_paid_out:{creator_id}", LEDGER_DIRECTION_CREDIT, amount),
+        ):
+            session.add(LedgerEntry(
+                account_id=account, currency="eur", amount=amount, direction=direction,
+                reference=f"payout:{payout.id}",
+            ))
+            await apply_balance_delta(session, account, "eur", delta)
+        created += 1
+    await session.flush()
+    return created
+
+
+async def _seed(session: AsyncSession, creators: int, events: int, period_start: datetime) -> list[uuid.UUID]:
+    tag = uuid.uuid4().hex
+    params = {"n": creators, "events": events, "tag": tag, "start": period_start}
+    for sql in (
+        """
+        INSERT INTO users (id, email, password_hash, role)
+        SELECT gen_random_uuid(), 'bench-payout-' || :tag || '-' || g || '@example.invalid', 'x', 'creator'
+        FROM generate_series(1, CAST(:n AS integer)) AS g
+        """,
+        """
+        INSERT INTO creator_payout_settings (creator_id, account_holder_name, iban_encrypted, iban_last4, country_code)
+        SELECT id, 'Bench', 'x', '0000', 'DE' FROM users WHERE email LIKE 'bench-payout-' || :tag || '-%'
+        """,
+        """
+        INSERT INTO ledger_events (id, creator_id, type, gross_cents, fee_cents, net_cents, currency,
+                                   created_at, available_at)
+        SELECT gen_random_uuid(), u.id, 'tip', 3000, 600, 2400, 'eur',
+               CAST(:start AS timestamptz) + e * interval '1 hour', now()
+        FROM users u CROSS JOIN generate_series(1, CAST(:events AS integer)) AS e
+        WHERE u.email LIKE 'bench-payout-' || :tag || '-%'
+        """,
+        # The 'avail:' entries the old implementation looks for, one per event.
+        """
+        INSERT INTO ledger_entries (id, account_id, currency, amount, direction, reference)
+        SELECT gen_random_uuid(), 'creator_available:' || ev.creator_id, 'eur', 24.00, 'credit', 'avail:' || ev.id
+        FROM ledger_events ev JOIN users u ON u.id = ev.creator_id
+        WHERE u.email LIKE 'bench-payout-' || :tag || '-%'
+        """,
+        """
+        INSERT INTO ledger_balances (id, account_id, currency, shard, balance)
+        SELECT gen_random_uuid(), 'creator_available:' || id, 'eur', 0, 24.00 * CAST(:events AS integer)
+        FROM users WHERE email LIKE 'bench-payout-' || :tag || '-%'
+        """,
+    ):
+        await session.execute(text(sql), params)
+    for table in ("users", "creator_payout_settings", "ledger_events", "ledger_entries", "ledger_balances"):
+        await session.execute(text(f"ANALYZE {table}"))
+    result = await session.execute(
+        text("SELECT id FROM users WHERE email LIKE 'bench-payout-' || :tag || '-%' ORDER BY id"), params
+    )
+    return list(result.scalars().all())
+
+
+async def run(creators: int, events: int, old_sample: int) -> None:
+    period_start = datetime(2020, 1, 6, tzinfo=timezone.utc)
+    period_end = period_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        try:
+            session = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            start = time.perf_counter()
+            creator_ids = await _seed(session, creators, events, period_start)
+            print(f"seeded {creators} creators x {events} events in {time.perf_counter() - start:.1f}s")
+
+            sample = creator_ids[:old_sample]
+            nested = await conn.begin_nested()
+            start = time.perf_counter()
+            created = await _old_generate(session, sample, period_start, period_end)
+            elapsed = time.perf_counter() - start
+            await nested.rollback()
+            session.expunge_all()
+            print(
+                f"  old per-creator loop: {created} payouts in {elapsed:.2f}s "
+                f"-> ~{elapsed / max(len(sample), 1) * creators:.0f}s for {creators}"
+            )
+
+            start = time.perf_counter()
+            result = await generate_weekly_payouts(session, period_start, period_end)
+            print(f"  generate_weekly_payouts: {result} in {time.perf_counter() - start:.2f}s")
+            start = time.perf_counter()
+            result = await generate_weekly_payouts(session, period_start, period_end)
+            print(f"  second run (resume/idempotent): {result} in {time.perf_counter() - start:.2f}s")
+            await session.close()
+        finally:
+            await trans.rollback()
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--creators", type=int, default=50_000)
+    parser.add_argument("--events", type=int, default=3)
+    parser.add_argument("--old-sample", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.creators, args.events, args.old_sample))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,29 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.redis import get_redis
 from app.db.session import async_session_factory
 from app.main import app
+from app.modules.auth import rate_limit
 from app.modules.auth.models import User
 
 
 @pytest.fixture
-async def async_client() -> AsyncGenerator[AsyncClient, None]:
+async def reset_rate_limits() -> None:
+    """Forget every recorded request, in process and in Redis."""
+    with rate_limit._local_lock:
+        rate_limit._LOCAL_WINDOWS.clear()
+    client = get_redis()
+    if client is None:
+        return
+    keys = [key async for key in client.scan_iter(match=f"{rate_limit.REDIS_KEY_PREFIX}*")]
+    if keys:
+        await client.delete(*keys)
+
+
+@pytest.fixture
+async def async_client(reset_rate_limits: None) -> AsyncGenerator[AsyncClient, None]:
+    # Every test client shares one IP: start each test with empty auth rate-limit windows.
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
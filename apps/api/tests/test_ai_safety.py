@@ -0,0 +1,73 @@
+"""AI safety media search: keyword path in SQL and query embedding cache."""
+
+from __future__ import annotations
+
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.ai_safety import query_embedding
+from app.modules.ai_safety.models import ImageTag
+from app.modules.ai_safety.service import check_pgvector_available, search_media_by_tags
+from app.modules.auth.models import User
+from app.modules.media.models import MediaObject
+
+
+@pytest.mark.asyncio
+async def test_keyword_search_matches_substrings_for_owner_only(db_session: AsyncSession) -> None:
+    owner = User(email=f"search-{uuid.uuid4().hex}@test.com", password_hash="x", role="creator")
+    other = User(email=f"search-{uuid.uuid4().hex}@test.com", password_hash="x", role="creator")
+    db_session.add_all([owner, other])
+    await db_session.flush()
+    tagged = {
+        "both": (owner.id, ["sunset", "beach", "palm"]),
+        "one": (owner.id, ["beaches", "sand"]),
+        "none": (owner.id, ["city", "night"]),
+        "percent": (owner.id, ["100%", "deal"]),
+        "foreign": (other.id, ["sunset", "beach"]),
+    }
+    ids: dict[str, uuid.UUID] = {}
+    for name, (owner_id, tags) in tagged.items():
+        media = MediaObject(
+            owner_user_id=owner_id, object_key=f"test/{uuid.uuid4()}.jpg",
+            content_type="image/jpeg", size_bytes=1,
+        )
+        db_session.add(media)
+        await db_session.flush()
+        db_session.add(ImageTag(media_asset_id=media.id, tags=tags))
+        ids[name] = media.id
+    await db_session.commit()
+
+    results, mode = await search_media_by_tags(db_session, owner.id, "Sun BEACH", limit=10)
+    assert mode == "keyword"
+    assert [(r["media_asset_id"], r["score"]) for r in results] == [
+        (ids["both"], 1.0),
+        (ids["one"], 0.5),
+    ]
+    assert results[0]["tags"] == ["sunset", "beach", "palm"]
+
+    # LIKE wildcards in the query are literal characters.
+    results, _ = await search_media_by_tags(db_session, owner.id, "%", limit=10)
+    assert [r["media_asset_id"] for r in results] == [ids["percent"]]
+    results, _ = await search_media_by_tags(db_session, owner.id, "beach", limit=1)
+    assert len(results) == 1
+    assert await search_media_by_tags(db_session, owner.id, '"', limit=10) == ([], "keyword")
+    # JSON punctuation of the stored array is not part of any tag.
+    for punctuation in (",", "[", "]", "[,]"):
+        assert await search_media_by_tags(db_session, owner.id, punctuation, limit=10) == ([], "keyword")
+
+    assert isinstance(await check_pgvector_available(db_session), bool)
+
+
+@pytest.mark.asyncio
+async def test_query_embedding_uses_local_cache_and_needs_redis() -> None:
+    query_embedding.reset_query_embedding_cache()
+    try:
+        # REDIS_URL is unset in tests: no broker, so no embedding (keyword fallback).
+        assert await query_embedding.get_query_embedding("red dress") is None
+        query_embedding._local_put("red dress", [0.25, 0.5])
+        assert await query_embedding.get_query_embedding("  Red   DRESS ") == [0.25, 0.5]
+        assert await query_embedding.get_query_embedding("   ") is None
+    finally:
+        query_embedding.reset_query_embedding_cache()
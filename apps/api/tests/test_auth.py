@@ -115,3 +115,137 @@ async def test_me_unauthorized_without_token(async_client: AsyncClient) -> None:
     r = await async_client.get("/auth/me")
     assert r.status_code == 401, r.json()
     assert r.json().get("detail", {}).get("code") == "missing_token"
+
+
+@pytest.mark.asyncio
+async def test_me_uses_cached_principal_and_sees_role_changes(async_client: AsyncClient) -> None:
+    """Repeat requests skip the users SELECT; a committed role change is visible immediately."""
+    from sqlalchemy import event, update
+
+    from app.db.session import async_session_factory, engine
+    from app.modules.auth.models import User
+
+    email = _unique_email()
+    token = await signup_verify_login(async_client, email, role="fan")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await async_client.get("/auth/me", headers=headers)).status_code == 200
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    try:
+        r = await async_client.get("/auth/me", headers=headers)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _record)
+    assert r.status_code == 200
+    assert not [s for s in statements if "FROM users" in s]
+
+    async with async_session_factory() as session:
+        await session.execute(update(User).where(User.email == email).values(role="creator"))
+        await session.commit()
+    r = await async_client.get("/auth/me", headers=headers)
+    assert r.json()["role"] == "creator"
+
+
+@pytest.mark.asyncio
+async def test_change_password_with_cached_principal(async_client: AsyncClient) -> None:
+    """The cached principal carries no password hash; change-password still verifies and saves."""
+    email = _unique_email()
+    token = await signup_verify_login(async_client, email, password="password123", role="fan")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await async_client.get("/auth/me", headers=headers)).status_code == 200
+
+    r = await async_client.post(
+        "/auth/change-password",
+        json={"current_password": "wrong-password", "new_password": "new-password-123"},
+        headers=headers,
+    )
+    assert r.status_code == 400
+    r = await async_client.post(
+        "/auth/change-password",
+        json={"current_password": "password123", "new_password": "new-password-123"},
+        headers=headers,
+    )
+    assert r.status_code == 200, r.json()
+    r = await async_client.post("/auth/login", json={"email": email, "password": "new-password-123"})
+    assert r.status_code == 200, r.json()
+
+
+@pytest.mark.asyncio
+async def test_activity_is_buffered_and_flushed_in_batch(async_client: AsyncClient) -> None:
+    """Requests only buffer last_activity_at; flush_activity writes it without touching updated_at."""
+    from sqlalchemy import select
+
+    from app.db.session import async_session_factory
+    from app.modules.auth import activity
+    from app.modules.auth.models import User
+
+    email = _unique_email()
+    token = await signup_verify_login(async_client, email, role="fan")
+    async with async_session_factory() as session:
+        before = (await session.execute(select(User).where(User.email == email))).scalar_one()
+        user_id, updated_at = before.id, before.updated_at
+
+    r = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    assert user_id in activity._pending
+
+    assert await activity.flush_activity() >= 1
+    assert not activity._pending
+    async with async_session_factory() as session:
+        after = (await session.execute(select(User).where(User.id == user_id))).scalar_one()
+    assert after.last_activity_at is not None
+    assert after.updated_at == updated_at
+
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_sheds_when_saturated() -> None:
+    """Calls beyond max_pending fail fast with 503 auth_busy instead of queueing."""
+    import asyncio
+    import threading
+
+    from app.core.errors import AppError
+    from app.modules.auth.security import PasswordHashPool
+
+    pool = PasswordHashPool(workers=1, max_pending=1)
+    release = threading.Event()
+    try:
+        blocked = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(AppError) as exc_info:
+            await pool.run(lambda: True)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
+        release.set()
+        assert await blocked is True
+        assert await pool.run(lambda: "ok") == "ok"
+        stats = pool.stats()
+        assert stats["completed"] == 2
+        assert stats["rejected"] == 1
+        assert stats["pending"] == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_hash_pool_is_full(
+    async_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A saturated hash pool surfaces as 503 auth_busy with Retry-After."""
+    from app.modules.auth import security
+
+    email = _unique_email()
+    await signup_verify_login(async_client, email, role="fan")
+    pool = security.PasswordHashPool(workers=1, max_pending=0)
+    monkeypatch.setattr(security, "_pool", pool)
+    try:
+        r = await async_client.post("/auth/login", json={"email": email, "password": "password123"})
+    finally:
+        pool.shutdown()
+    assert r.status_code == 503, r.json()
+    assert r.json()["detail"]["code"] == "auth_busy"
+    assert r.headers["retry-after"] == "1"
@@ -1,4 +1,4 @@
-"""Billing tests: CCBill webhook idempotency, subscription visibility, checkout 501."""
+"""Billing tests: CCBill webhook idempotency and inbox, subscription visibility, checkout 501."""
 
 from __future__ import annotations
 
@@ -7,12 +7,15 @@ from uuid import UUID
 
 import pytest
 from httpx import AsyncClient
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from conftest import signup_verify_login
 
 from app.core.settings import get_settings
+from app.db.session import async_session_factory
+from app.modules.auth.models import User
+from app.modules.billing import inbox
 from app.modules.billing.models import PaymentEvent, Subscription
 
 
@@ -382,3 +385,111 @@ async def test_billing_health_reports_status(
         assert payload["webhook_configured"] is True
     finally:
         get_settings.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_async_webhook_inbox_orders_retries_and_dead_letters(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """With PAYMENT_WEBHOOKS_ASYNC the webhook only stores the event; the drain applies it."""
+    monkeypatch.setenv("CCBILL_WEBHOOK_TEST_BYPASS", "true")
+    monkeypatch.setenv("PAYMENT_WEBHOOKS_ASYNC", "true")
+    monkeypatch.setenv("PAYMENT_EVENT_MAX_ATTEMPTS", "2")
+    get_settings.cache_clear()
+    try:
+        admin_email = _unique_email()
+        admin_token = await signup_verify_login(async_client, admin_email, display_name="Admin")
+        async_client.cookies.clear()
+        # Promoted before the token is first used, so the principal is loaded as admin.
+        creator = User(email=_unique_email(), password_hash="x", role="creator")
+        fan = User(email=_unique_email(), password_hash="x", role="fan")
+        db_session.add_all([creator, fan])
+        await db_session.execute(update(User).where(User.email == admin_email).values(role="admin"))
+        await db_session.commit()
+        admin_auth = {"Authorization": f"Bearer {admin_token}"}
+        creator_id, fan_id = str(creator.id), str(fan.id)
+        subscription_id = f"sub_{uuid.uuid4().hex[:12]}"
+        sale = {
+            "eventType": "NewSaleSuccess",
+            "subscriptionId": subscription_id,
+            "transactionId": f"txn_{uuid.uuid4().hex[:12]}",
+            "zv_fan_user_id": fan_id,
+            "zv_creator_user_id": creator_id,
+            "zv_payment_type": "SUBSCRIPTION",
+            "billedInitialPrice": "4.99",
+            "billedCurrencyCode": "978",
+        }
+        renewal_failure = {
+            "eventType": "RenewalFailure",
+            "subscriptionId": subscription_id,
+            "transactionId": f"txn_{uuid.uuid4().hex[:12]}",
+        }
+        for body in (sale, renewal_failure):
+            r = await async_client.post("/billing/webhooks/ccbill", json=body)
+            assert r.status_code == 200
+            assert r.json()["status"] == "queued"
+        r = await async_client.post("/billing/webhooks/ccbill", json=sale)
+        assert r.json()["status"] == "duplicate_ignored"
+
+        sub_q = select(Subscription).where(Subscription.ccbill_subscription_id == subscription_id)
+        assert (await db_session.execute(sub_q)).scalar_one_or_none() is None
+
+        # The sale fails: it is rescheduled and the renewal for the same subscription waits.
+        real_handler = inbox.handle_ccbill_event
+        calls: list[str] = []
+
+        async def flaky(session: AsyncSession, params: dict) -> str:
+            calls.append(params["transactionId"])
+            if params.get("subscriptionId") == subscription_id and params["eventType"] == "NewSaleSuccess":
+                raise RuntimeError("database hiccup")
+            return await real_handler(session, params)
+
+        monkeypatch.setattr(inbox, "handle_ccbill_event", flaky)
+        async with async_session_factory() as session:
+            await inbox.process_payment_events(session)
+        sale_key = f"NewSaleSuccess:{sale['transactionId']}"
+        renewal_key = f"RenewalFailure:{renewal_failure['transactionId']}"
+        events = {
+            e.event_id: e
+            for e in (
+                await db_session.execute(
+                    select(PaymentEvent).where(PaymentEvent.event_id.in_([sale_key, renewal_key]))
+                )
+            ).scalars()
+        }
+        assert events[sale_key].attempts == 1 and events[sale_key].next_attempt_at is not None
+        assert events[sale_key].ordering_key == f"ccbill:sub:{subscription_id}"
+        assert events[renewal_key].processed_at is None and events[renewal_key].attempts == 0
+        assert renewal_failure["transactionId"] not in calls
+
+        # Second failure dead-letters the sale; the renewal then runs.
+        await db_session.execute(
+            update(PaymentEvent).where(PaymentEvent.event_id == sale_key).values(next_attempt_at=None)
+        )
+        await db_session.commit()
+        async with async_session_factory() as session:
+            await inbox.process_payment_events(session)
+        db_session.expire_all()
+        sale_event = (await db_session.execute(select(PaymentEvent).where(PaymentEvent.event_id == sale_key))).scalar_one()
+        assert sale_event.dead_at is not None and "database hiccup" in (sale_event.last_error or "")
+        renewal_event = (await db_session.execute(select(PaymentEvent).where(PaymentEvent.event_id == renewal_key))).scalar_one()
+        assert renewal_event.processed_at is not None
+
+        r = await async_client.get("/admin/payment-events/dead", params={"page_size": 100}, headers=admin_auth)
+        assert r.status_code == 200, r.text
+        assert sale_key in [item["event_id"] for item in r.json()["items"]]
+
+        # Once fixed, an admin requeues it and the next drain applies it.
+        monkeypatch.setattr(inbox, "handle_ccbill_event", real_handler)
+        r = await async_client.post(f"/admin/payment-events/{sale_event.id}/retry", headers=admin_auth)
+        assert r.status_code == 200, r.text
+        r = await async_client.post(f"/admin/payment-events/{sale_event.id}/retry", headers=admin_auth)
+        assert r.status_code == 409
+        async with async_session_factory() as session:
+            await inbox.process_payment_events(session)
+        sub = (await db_session.execute(sub_q)).scalar_one()
+        assert sub.status == "active"
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,74 @@
+"""Ledger tests: sharded balances under concurrent payments."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.settings import get_settings
+from app.modules.ledger.constants import LEDGER_DIRECTION_CREDIT, LEDGER_DIRECTION_DEBIT
+from app.modules.ledger.models import LedgerBalance, LedgerEntry
+from app.modules.ledger.service import create_ledger_entry, get_balance
+
+_PAYMENTS = 300
+
+
+@pytest.mark.asyncio
+async def test_concurrent_payments_keep_exact_sharded_balances() -> None:
+    """Hundreds of simultaneous payments to one hot account: none lost, none doubled."""
+    engine = create_async_engine(str(get_settings().database_url), pool_size=40, max_overflow=0)
+    factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    platform = f"platform-test:{uuid.uuid4().hex}"
+    creator = f"creator_pending:{uuid.uuid4()}"
+    fee, net = Decimal("0.99"), Decimal("3.96")
+
+    async def pay(n: int) -> None:
+        async with factory() as session:
+            ref = f"test-payment:{platform}:{n}"
+            await create_ledger_entry(
+                session, platform, "eur", fee, LEDGER_DIRECTION_CREDIT, ref, auto_commit=False
+            )
+            await create_ledger_entry(
+                session, creator, "eur", net, LEDGER_DIRECTION_CREDIT, ref, auto_commit=False
+            )
+            await session.commit()
+
+    async def refund(n: int) -> bool:
+        async with factory() as session:
+            entry = await create_ledger_entry(
+                session, platform, "eur", fee, LEDGER_DIRECTION_DEBIT, f"test-refund:{platform}:{n}"
+            )
+            return entry is not None
+
+    try:
+        # Every refund is delivered twice at the same time; only one may apply.
+        applied = await asyncio.gather(
+            *(pay(n) for n in range(_PAYMENTS)),
+            *(refund(n) for n in range(10)),
+            *(refund(n) for n in range(10)),
+        )
+        assert sum(1 for ok in applied[_PAYMENTS:] if ok) == 10
+
+        async with factory() as session:
+            assert await get_balance(session, platform, "eur") == fee * (_PAYMENTS - 10)
+            assert await get_balance(session, creator, "eur") == net * _PAYMENTS
+            assert await get_balance(session, platform, "usd") == Decimal("0.00")
+            shards = (
+                await session.execute(
+                    select(func.count()).where(LedgerBalance.account_id == platform)
+                )
+            ).scalar_one()
+            assert 1 < shards <= get_settings().ledger_balance_shards
+            entries = (
+                await session.execute(
+                    select(func.count()).where(LedgerEntry.account_id == platform)
+                )
+            ).scalar_one()
+            assert entries == _PAYMENTS + 10
+    finally:
+        await engine.dispose()
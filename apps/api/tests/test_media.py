@@ -10,12 +10,23 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.errors import AppError
+from app.core.settings import get_settings
 from app.modules.auth.models import Profile, User
 from app.modules.creators.constants import CREATOR_ROLE
 from app.modules.media.models import MediaDerivedAsset, MediaObject
 from app.modules.posts.constants import VISIBILITY_PUBLIC
 from app.modules.posts.models import Post, PostMedia
-from app.modules.media.service import resolve_download_object_key, validate_media_upload
+from app.modules.media.service import (
+    MEDIA_ACCESS_FULL,
+    MEDIA_ACCESS_TEASER,
+    generate_signed_download,
+    generate_signed_downloads,
+    resolve_download_object_key,
+    resolve_media_access,
+    validate_media_upload,
+)
+from app.modules.media.storage import close_storage_clients, get_s3_client, get_storage_client
+from app.modules.media.url_cache import get_signed_url_cache, reset_signed_url_cache
 from conftest import signup_verify_login
 
 
@@ -119,6 +130,127 @@ def test_validate_media_upload_rejects_oversize_video() -> None:
     assert exc_info.value.detail["code"] == "video_exceeds_max_size"  # type: ignore[index]
 
 
+def test_storage_clients_are_shared_per_process(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Storage and S3 clients are built once and reused until closed."""
+    monkeypatch.setenv("STORAGE", "s3")
+    monkeypatch.setenv("S3_BUCKET", "test-bucket")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    get_settings.cache_clear()
+    close_storage_clients()
+    try:
+        storage = get_storage_client()
+        assert get_storage_client() is storage
+        assert storage._client is get_s3_client()  # type: ignore[attr-defined]
+        close_storage_clients()
+        assert get_storage_client() is not storage
+    finally:
+        close_storage_clients()
+        get_settings.cache_clear()
+
+
+class _CountingStorage:
+    url_cache_namespace = "test:counting"
+
+    def __init__(self, ttl_seconds: int) -> None:
+        self.download_url_ttl_seconds = ttl_seconds
+        self.signed = 0
+
+    def create_signed_download_url(self, object_key: str) -> str:
+        self.signed += 1
+        return f"https://signed.example/{object_key}?sig={self.signed}"
+
+
+@pytest.mark.asyncio
+async def test_signed_download_urls_reused_within_ttl() -> None:
+    """Hot keys are signed once and reused; TTLs inside the safety margin are never cached."""
+    reset_signed_url_cache()
+    try:
+        storage = _CountingStorage(ttl_seconds=900)
+        first = await generate_signed_download(storage, "media/a.jpg")  # type: ignore[arg-type]
+        assert await generate_signed_download(storage, "media/a.jpg") == first  # type: ignore[arg-type]
+        urls = await generate_signed_downloads(storage, ["media/a.jpg", "media/b.jpg"])  # type: ignore[arg-type]
+        assert urls["media/a.jpg"] == first
+        assert storage.signed == 2
+        stats = get_signed_url_cache().stats()
+        assert (stats["local_hits"], stats["misses"]) == (2, 2)
+
+        short = _CountingStorage(ttl_seconds=get_settings().signed_url_cache_margin_seconds)
+        short.url_cache_namespace = "test:short"
+        await generate_signed_download(short, "media/a.jpg")  # type: ignore[arg-type]
+        await generate_signed_download(short, "media/a.jpg")  # type: ignore[arg-type]
+        assert short.signed == 2
+    finally:
+        reset_signed_url_cache()
+
+
+@pytest.mark.asyncio
+async def test_resolve_media_access_constant_queries_for_shared_asset(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+) -> None:
+    """Asset reused by many posts: access resolves in a fixed number of statements."""
+    from sqlalchemy import event
+
+    from app.db.session import engine
+    from app.modules.creators.models import Follow
+
+    creator_token = await signup_verify_login(
+        async_client, f"ec-{uuid.uuid4().hex[:12]}@test.com", display_name="Creator"
+    )
+    me = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {creator_token}"})
+    creator_id = uuid.UUID(me.json()["id"])
+    fan_token = await signup_verify_login(
+        async_client, f"ef-{uuid.uuid4().hex[:12]}@test.com", display_name="Fan", role="fan"
+    )
+    async_client.cookies.clear()
+    fan_me = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {fan_token}"})
+    fan = await db_session.get(User, uuid.UUID(fan_me.json()["id"]))
+    assert fan is not None
+
+    media = MediaObject(
+        owner_user_id=creator_id,
+        object_key=f"uploads/shared_{uuid.uuid4().hex}.jpg",
+        content_type="image/jpeg",
+        size_bytes=100,
+    )
+    db_session.add(media)
+    await db_session.flush()
+    for visibility in ["SUBSCRIBERS", "PPV"] + ["FOLLOWERS"] * 8:
+        post = Post(
+            creator_user_id=creator_id,
+            type="IMAGE",
+            visibility=visibility,
+            nsfw=False,
+            price_cents=500 if visibility == "PPV" else None,
+            currency="eur" if visibility == "PPV" else None,
+        )
+        db_session.add(post)
+        await db_session.flush()
+        db_session.add(PostMedia(post_id=post.id, media_asset_id=media.id, position=0))
+    await db_session.commit()
+
+    statements: list[str] = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        _, access = await resolve_media_access(db_session, [media.id], fan)
+        assert access[media.id] == MEDIA_ACCESS_TEASER
+        assert len(statements) <= 3
+
+        db_session.add(Follow(fan_user_id=fan.id, creator_user_id=creator_id))
+        await db_session.commit()
+        statements.clear()
+        _, access = await resolve_media_access(db_session, [media.id], fan)
+        assert access[media.id] == MEDIA_ACCESS_FULL
+        assert len(statements) <= 3
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+
+
 # ---------------------------------------------------------------------------
 # Integration: GET /media/{id}/download-url (mock storage to avoid MinIO)
 # ---------------------------------------------------------------------------
@@ -302,6 +434,79 @@ async def test_download_url_returns_200_for_public_post_media_without_auth(
     assert r.json().get("download_url") == f"https://mock-download.example/{object_key}"
 
 
+@pytest.mark.asyncio
+async def test_batch_download_urls_applies_per_asset_access(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """POST /media/download-urls signs allowed pairs and reports denied ones per item."""
+    from app.modules.media import router as media_router
+
+    monkeypatch.setattr(media_router, "get_storage_client", lambda: _MockStorage())
+
+    creator_token = await signup_verify_login(
+        async_client, f"bc-{uuid.uuid4().hex[:12]}@test.com", display_name="Creator"
+    )
+    me = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {creator_token}"})
+    creator_id = uuid.UUID(me.json()["id"])
+    fan_token = await signup_verify_login(
+        async_client, f"bf-{uuid.uuid4().hex[:12]}@test.com", display_name="Fan", role="fan"
+    )
+    async_client.cookies.clear()
+
+    locked_key = f"uploads/locked_{uuid.uuid4().hex}.jpg"
+    public_key = f"uploads/public_{uuid.uuid4().hex}.jpg"
+    locked_media = MediaObject(
+        owner_user_id=creator_id,
+        object_key=locked_key,
+        content_type="image/jpeg",
+        size_bytes=100,
+        blurhash="LEHV6nWB2yk8",
+    )
+    public_media = MediaObject(
+        owner_user_id=creator_id, object_key=public_key, content_type="image/jpeg", size_bytes=100
+    )
+    db_session.add_all([locked_media, public_media])
+    await db_session.flush()
+    locked_post = Post(creator_user_id=creator_id, type="IMAGE", visibility="SUBSCRIBERS", nsfw=False)
+    public_post = Post(creator_user_id=creator_id, type="IMAGE", visibility=VISIBILITY_PUBLIC, nsfw=False)
+    db_session.add_all([locked_post, public_post])
+    await db_session.flush()
+    db_session.add_all([
+        PostMedia(post_id=locked_post.id, media_asset_id=locked_media.id, position=0),
+        PostMedia(post_id=public_post.id, media_asset_id=public_media.id, position=0),
+    ])
+    await db_session.commit()
+
+    unknown_id = uuid.uuid4()
+    r = await async_client.post(
+        "/media/download-urls",
+        json={
+            "items": [
+                {"asset_id": str(locked_media.id), "variant": "grid"},
+                {"asset_id": str(locked_media.id), "variant": "full"},
+                {"asset_id": str(public_media.id)},
+                {"asset_id": str(unknown_id), "variant": "grid"},
+            ]
+        },
+        headers={"Authorization": f"Bearer {fan_token}"},
+    )
+    assert r.status_code == 200, r.json()
+    items = r.json()["items"]
+    assert len(items) == 4
+    # Teaser variant of a locked post: allowed (grid falls back to original when not derived yet)
+    assert items[0]["download_url"] == f"https://mock-download.example/{locked_key}"
+    assert items[0]["blurhash"] == "LEHV6nWB2yk8"
+    assert items[0]["error"] is None
+    # Full variant of a locked post: denied without failing the batch
+    assert items[1]["download_url"] is None
+    assert items[1]["error"] == "media_not_found"
+    assert items[2]["download_url"] == f"https://mock-download.example/{public_key}"
+    assert items[3]["asset_id"] == str(unknown_id)
+    assert items[3]["error"] == "media_not_found"
+
+
 # ---------------------------------------------------------------------------
 # DELETE /media/{media_id}
 # ---------------------------------------------------------------------------
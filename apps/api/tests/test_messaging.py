@@ -0,0 +1,279 @@
+"""DM tests: inbox, real-time event streams."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from conftest import signup_verify_login
+
+from app.core.settings import get_settings
+from app.modules.billing.models import Subscription
+from app.modules.messaging.models import Message
+from app.modules.messaging.realtime import (
+    dm_event_stream,
+    get_dm_hub,
+    replay_dm_events,
+)
+from app.modules.messaging.service import list_conversations
+
+
+def _email() -> str:
+    return f"dm-{uuid.uuid4().hex[:10]}@test.com"
+
+
+async def _login(client: AsyncClient, role: str = "creator", display_name: str = "Creator") -> tuple[str, str]:
+    token = await signup_verify_login(client, _email(), display_name=display_name, role=role)
+    client.cookies.clear()
+    me = await client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    return token, me.json()["id"]
+
+
+async def _open_conversation(
+    client: AsyncClient, creator_token: str, creator_id: str, fan_id: str
+) -> str:
+    conv = await client.post(
+        "/dm/conversations",
+        json={"creator_id": creator_id, "fan_id": fan_id},
+        headers={"Authorization": f"Bearer {creator_token}"},
+    )
+    assert conv.status_code == 200, conv.text
+    return conv.json()["conversation_id"]
+
+
+async def _creator_and_fan_conversation(client: AsyncClient) -> tuple[str, str, UUID, str]:
+    """Creator-initiated conversation (no subscription needed). Returns tokens, fan id, conversation id."""
+    creator_token, creator_id = await _login(client)
+    fan_token, fan_id = await _login(client, role="fan", display_name="Fan")
+    conversation_id = await _open_conversation(client, creator_token, creator_id, fan_id)
+    return creator_token, fan_token, UUID(fan_id), conversation_id
+
+
+async def _send(client: AsyncClient, token: str, conversation_id: str, text: str) -> str:
+    r = await client.post(
+        f"/dm/conversations/{conversation_id}/messages",
+        json={"type": "TEXT", "text": text},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200, r.text
+    return r.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_inbox_pages_with_previews_and_per_side_unread_counts(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+) -> None:
+    creator_token, creator_id = await _login(async_client)
+    fans = [await _login(async_client, role="fan", display_name=f"Fan{n}") for n in range(3)]
+    convs = [
+        await _open_conversation(async_client, creator_token, creator_id, fan_id)
+        for _, fan_id in fans
+    ]
+    for n, conversation_id in enumerate(convs):
+        await _send(async_client, creator_token, conversation_id, f"hi fan {n}")
+    db_session.add(
+        Subscription(
+            fan_user_id=UUID(fans[0][1]),
+            creator_user_id=UUID(creator_id),
+            status="active",
+            ccbill_subscription_id=f"sub_{uuid.uuid4().hex}",
+        )
+    )
+    await db_session.commit()
+    await _send(async_client, fans[0][0], convs[0], "first reply")
+    await _send(async_client, fans[0][0], convs[0], "second reply")
+
+    creator_auth = {"Authorization": f"Bearer {creator_token}"}
+    r = await async_client.get("/dm/conversations", params={"page_size": 2}, headers=creator_auth)
+    assert r.status_code == 200, r.text
+    page = r.json()
+    assert [c["id"] for c in page["items"]] == [convs[0], convs[2]]
+    assert page["items"][0]["last_message_preview"] == "second reply"
+    assert page["items"][0]["unread_count"] == 2
+    assert page["items"][0]["other_party"]["display_name"] == "Fan0"
+    assert page["items"][1]["unread_count"] == 0
+    r = await async_client.get(
+        "/dm/conversations",
+        params={"page_size": 2, "cursor": page["next_cursor"]},
+        headers=creator_auth,
+    )
+    assert [c["id"] for c in r.json()["items"]] == [convs[1]]
+    assert r.json()["next_cursor"] is None
+
+    # Replying cleared fan0's side; fan1 has one unread until it reads the thread.
+    fan0_inbox = await async_client.get(
+        "/dm/conversations", headers={"Authorization": f"Bearer {fans[0][0]}"}
+    )
+    assert fan0_inbox.json()["items"][0]["unread_count"] == 0
+    fan1_auth = {"Authorization": f"Bearer {fans[1][0]}"}
+    detail = await async_client.get(f"/dm/conversations/{convs[1]}", headers=fan1_auth)
+    assert detail.json()["unread_count"] == 1
+    assert detail.json()["other_party"]["display_name"] == "Creator"
+    r = await async_client.post(f"/dm/conversations/{convs[1]}/read", headers=fan1_auth)
+    assert r.status_code == 200, r.text
+    detail = await async_client.get(f"/dm/conversations/{convs[1]}", headers=fan1_auth)
+    assert detail.json()["unread_count"] == 0
+
+    # The read receipt is visible to the creator and does not move the conversation.
+    r = await async_client.get("/dm/conversations", headers=creator_auth)
+    items = r.json()["items"]
+    assert [c["id"] for c in items] == [convs[0], convs[2], convs[1]]
+    assert items[2]["other_party_last_read_at"] is not None
+    assert (
+        await async_client.get(
+            f"/dm/conversations/{convs[0]}", headers={"Authorization": f"Bearer {fans[1][0]}"}
+        )
+    ).status_code == 404
+
+    statements: list[str] = []
+    sync_engine = db_session.bind.sync_engine  # type: ignore[union-attr]
+
+    def count(conn, cursor, statement, *args) -> None:  # noqa: ANN001
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        rows, _ = await list_conversations(db_session, UUID(creator_id))
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+    assert len(rows) == 3
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_message_history_keyset_pages_both_ways_without_skipping_ties(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+) -> None:
+    creator_token, fan_token, _, conversation_id = await _creator_and_fan_conversation(
+        async_client
+    )
+    sent = [await _send(async_client, creator_token, conversation_id, f"m{n}") for n in range(5)]
+    # m1..m3 share a timestamp; a created_at-only cursor would skip some of them.
+    first = await db_session.get(Message, UUID(sent[1]))
+    assert first is not None
+    await db_session.execute(
+        update(Message)
+        .where(Message.id.in_([UUID(m) for m in sent[2:4]]))
+        .values(created_at=first.created_at)
+    )
+    await db_session.commit()
+
+    fan_auth = {"Authorization": f"Bearer {fan_token}"}
+    url = f"/dm/conversations/{conversation_id}/messages"
+    seen: list[str] = []
+    cursor = None
+    newest = None
+    while True:
+        params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+        r = await async_client.get(url, params=params, headers=fan_auth)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        newest = newest or page["newest_cursor"]
+        seen = [m["text"] for m in page["items"]] + seen
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    # Pages are chronological. Ties come back in id order, so only the ends are fixed;
+    # nothing lost or repeated.
+    assert sorted(seen) == [f"m{n}" for n in range(5)]
+    assert seen[0] == "m0" and seen[-1] == "m4"
+
+    r = await async_client.get(url, params={"direction": "newer", "cursor": newest}, headers=fan_auth)
+    assert r.json()["items"] == [] and r.json()["newest_cursor"] == newest
+    for n in (5, 6, 7):
+        await _send(async_client, creator_token, conversation_id, f"m{n}")
+    params = {"direction": "newer", "cursor": newest, "page_size": 2}
+    r = await async_client.get(url, params=params, headers=fan_auth)
+    assert [m["text"] for m in r.json()["items"]] == ["m5", "m6"]
+    assert r.json()["items"][0]["media"] == []
+    params["cursor"] = r.json()["next_cursor"]
+    r = await async_client.get(url, params=params, headers=fan_auth)
+    assert [m["text"] for m in r.json()["items"]] == ["m7"]
+    assert r.json()["next_cursor"] is None
+
+    # Cursors handed out before the composite format (bare message ids) still work.
+    r = await async_client.get(url, params={"cursor": sent[4]}, headers=fan_auth)
+    assert [m["text"] for m in r.json()["items"]] == seen[:-1]
+    r = await async_client.get(url, params={"cursor": "nope|nope"}, headers=fan_auth)
+    assert r.status_code == 400
+    r = await async_client.get(url, params={"direction": "sideways"}, headers=fan_auth)
+    assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_dm_stream_pushes_messages_and_replays_after_last_event_id(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+) -> None:
+    creator_token, fan_token, fan_id, conversation_id = await _creator_and_fan_conversation(
+        async_client
+    )
+    hub = get_dm_hub()
+    before = hub.stream_count()
+    events = dm_event_stream(await hub.open(fan_id), [])
+    assert (await anext(events)).startswith("retry:")
+
+    first_id = await _send(async_client, creator_token, conversation_id, "hello fan")
+    pushed = await asyncio.wait_for(anext(events), 2)
+    assert f"id: {first_id}\nevent: message\n" in pushed
+    assert '"text":"hello fan"' in pushed
+    inbox = await asyncio.wait_for(anext(events), 2)
+    assert "event: conversation" in inbox and '"last_message_preview":"hello fan"' in inbox
+    assert '"unread_count":1' in inbox
+    await events.aclose()
+    assert hub.stream_count() == before
+
+    # Reconnect: everything after the last seen message comes from the database.
+    await _send(async_client, creator_token, conversation_id, "second")
+    await _send(async_client, creator_token, conversation_id, "third")
+    replayed = await replay_dm_events(db_session, fan_id, first_id)
+    assert [e["data"]["text"] for e in replayed] == ["second", "third"]
+    assert [e["type"] for e in await replay_dm_events(db_session, uuid.uuid4(), first_id)] == [
+        "resync"
+    ]
+
+    r = await async_client.get(
+        "/dm/stream",
+        headers={"Authorization": f"Bearer {fan_token}", "Last-Event-ID": "not-a-message-id"},
+    )
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert "event: resync" in r.text
+    assert hub.stream_count() == before
+
+
+@pytest.mark.asyncio
+async def test_dm_stream_heartbeat_and_slow_consumer_resync(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("DM_STREAM_QUEUE_SIZE", "2")
+    monkeypatch.setenv("DM_STREAM_HEARTBEAT_SECONDS", "0.05")
+    get_settings.cache_clear()
+    hub = get_dm_hub()
+    before = hub.stream_count()
+    user_id = uuid.uuid4()
+
+    events = dm_event_stream(await hub.open(user_id), [])
+    await anext(events)
+    assert await asyncio.wait_for(anext(events), 1) == ": ping\n\n"
+    await events.aclose()
+
+    stream = await hub.open(user_id)
+    events = dm_event_stream(stream, [])
+    await anext(events)
+    for n in range(3):
+        hub.deliver(user_id, {"type": "conversation", "data": {"n": n}})
+    assert stream.lagged
+    assert "event: resync" in await anext(events)
+    with pytest.raises(StopAsyncIteration):
+        await anext(events)
+    assert hub.stream_count() == before
+    get_settings.cache_clear()
@@ -0,0 +1,222 @@
+"""Payout tests: set-based availability reconciliation and weekly payout generation."""
+
+from __future__ import annotations
+
+import base64
+import csv
+import io
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crypto.encryption import encrypt
+from app.core.settings import get_settings
+from app.modules.auth.models import User
+from app.modules.ledger.constants import LEDGER_DIRECTION_CREDIT
+from app.modules.ledger.models import LedgerEntry, LedgerEvent
+from app.modules.ledger.service import create_ledger_entry, get_balance
+from app.modules.payouts.models import CreatorPayoutSettings, Payout, PayoutItem
+from app.modules.payouts.service import (
+    generate_weekly_payouts,
+    reconcile_availability,
+    reopen_payout_export,
+    start_payout_export,
+    stream_payout_export,
+)
+
+_TEST_PAYOUT_KEY = base64.b64encode(b"payouts-test-key-0123456789abcde").decode()
+
+
+@pytest.fixture
+def payouts_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("PAYOUTS_ENCRYPTION_KEY_B64", _TEST_PAYOUT_KEY)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_availability_drains_in_chunks_once(db_session: AsyncSession) -> None:
+    creator = User(email=f"reconcile-{uuid.uuid4().hex}@test.com", password_hash="x", role="creator")
+    db_session.add(creator)
+    await db_session.flush()
+    creator_id = creator.id
+    now = datetime.now(timezone.utc)
+    old = now - timedelta(days=30)
+    events = [
+        LedgerEvent(creator_id=creator.id, type="tip", gross_cents=1250, fee_cents=250,
+                    net_cents=1000 + n, currency="eur", created_at=old + timedelta(seconds=n))
+        for n in range(5)
+    ]
+    # Still on hold, and an event without net earnings.
+    events.append(LedgerEvent(creator_id=creator.id, type="tip", gross_cents=500, fee_cents=100,
+                              net_cents=400, currency="eur", created_at=now))
+    events.append(LedgerEvent(creator_id=creator.id, type="tip", gross_cents=0, fee_cents=0,
+                              net_cents=0, currency="eur", created_at=old))
+    db_session.add_all(events)
+    pending, available = f"creator_pending:{creator.id}", f"creator_available:{creator.id}"
+    for event in events:
+        await create_ledger_entry(
+            db_session, pending, "eur", Decimal(event.net_cents) / 100, LEDGER_DIRECTION_CREDIT,
+            f"test-event:{event.id}", auto_commit=False,
+        )
+    await db_session.commit()
+    due_cents = sum(1000 + n for n in range(5))
+
+    report = await reconcile_availability(db_session, now, dry_run=True)
+    assert report["dry_run"] is True
+    assert report["events_moved"] >= 5
+    assert report["total_cents_moved"] >= due_cents
+    assert await get_balance(db_session, available, "eur") == Decimal("0.00")
+
+    result = await reconcile_availability(db_session, now, chunk_size=2)
+    assert result["events_moved"] >= 5
+    assert result["total_cents_moved"] >= due_cents
+    assert await get_balance(db_session, pending, "eur") == Decimal("4.00")
+    assert await get_balance(db_session, available, "eur") == Decimal(due_cents) / 100
+
+    moved = (
+        await db_session.execute(
+            select(LedgerEvent.net_cents).where(
+                LedgerEvent.creator_id == creator_id, LedgerEvent.available_at.is_not(None)
+            )
+        )
+    ).scalars().all()
+    assert sorted(moved) == [1000 + n for n in range(5)]
+    entries = (
+        await db_session.execute(
+            select(func.count()).where(
+                LedgerEntry.account_id.in_([pending, available]),
+                LedgerEntry.reference.like("avail:%"),
+            )
+        )
+    ).scalar_one()
+    assert entries == 10
+
+    again = await reconcile_availability(db_session, now)
+    assert again["events_moved"] == 0
+    assert await get_balance(db_session, available, "eur") == Decimal(due_cents) / 100
+
+
+@pytest.mark.asyncio
+async def test_generate_weekly_payouts_bulk_and_resumable(
+    db_session: AsyncSession, payouts_key: None
+) -> None:
+    now = datetime.now(timezone.utc)
+    period_start, period_end = now - timedelta(days=40), now - timedelta(days=20)
+    creators = [
+        User(email=f"payout-{uuid.uuid4().hex}@test.com", password_hash="x", role="creator")
+        for _ in range(4)
+    ]
+    db_session.add_all(creators)
+    await db_session.flush()
+    ids = [c.id for c in creators]
+    paid, small, inactive, unset = ids
+    for creator_id, status in ((paid, "active"), (small, "active"), (inactive, "disabled")):
+        db_session.add(CreatorPayoutSettings(
+            creator_id=creator_id, account_holder_name="Test", iban_encrypted=encrypt("DE89370400440532013000"),
+            iban_last4="0000", country_code="DE", status=status,
+        ))
+    nets = {paid: [3000, 2500, 1000], small: [4000], inactive: [6000], unset: [6000]}
+    for creator_id, amounts in nets.items():
+        for n, net in enumerate(amounts):
+            db_session.add(LedgerEvent(
+                creator_id=creator_id, type="tip", gross_cents=net, fee_cents=0, net_cents=net,
+                currency="eur", created_at=period_start + timedelta(days=1, seconds=n),
+                available_at=now,
+            ))
+        # Balance above the threshold for everyone; only the events decide the amount.
+        await create_ledger_entry(
+            db_session, f"creator_available:{creator_id}", "eur", Decimal("100.00"),
+            LEDGER_DIRECTION_CREDIT, f"test-available:{creator_id}", auto_commit=False,
+        )
+    # Outside the period: not paid.
+    db_session.add(LedgerEvent(
+        creator_id=paid, type="tip", gross_cents=900, fee_cents=0, net_cents=900,
+        currency="eur", created_at=period_end + timedelta(days=1), available_at=now,
+    ))
+    await db_session.commit()
+
+    result = await generate_weekly_payouts(db_session, period_start, period_end, batch_size=1)
+    assert result["failed"] == 0
+    payouts = (
+        await db_session.execute(
+            select(Payout.creator_id, Payout.amount_cents).where(Payout.creator_id.in_(ids))
+        )
+    ).all()
+    assert payouts == [(paid, 6500)]
+    items = (
+        await db_session.execute(
+            select(func.count(), func.sum(PayoutItem.amount_cents))
+            .join(Payout, Payout.id == PayoutItem.payout_id)
+            .where(Payout.creator_id == paid)
+        )
+    ).one()
+    assert tuple(items) == (3, 6500)
+    assert await get_balance(db_session, f"creator_available:{paid}", "eur") == Decimal("35.00")
+    assert await get_balance(db_session, f"creator_paid_out:{paid}", "eur") == Decimal("65.00")
+    assert await get_balance(db_session, f"creator_available:{small}", "eur") == Decimal("100.00")
+
+    again = await generate_weekly_payouts(db_session, period_start, period_end)
+    assert again["failed"] == 0
+    count = (
+        await db_session.execute(select(func.count()).where(Payout.creator_id.in_(ids)))
+    ).scalar_one()
+    assert count == 1
+    assert await get_balance(db_session, f"creator_paid_out:{paid}", "eur") == Decimal("65.00")
+
+
+@pytest.mark.asyncio
+async def test_payout_export_streams_joined_rows_in_chunks(
+    db_session: AsyncSession, payouts_key: None, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("PAYOUT_EXPORT_CHUNK_SIZE", "2")
+    get_settings.cache_clear()
+    now = datetime.now(timezone.utc)
+    creators = [
+        User(email=f"export-{uuid.uuid4().hex}@test.com", password_hash="x", role="creator")
+        for _ in range(5)
+    ]
+    db_session.add_all(creators)
+    await db_session.flush()
+    ids = [c.id for c in creators]
+    for n, creator_id in enumerate(ids[:4]):
+        db_session.add(CreatorPayoutSettings(
+            creator_id=creator_id, account_holder_name=f"Holder {n}",
+            iban_encrypted=encrypt(f"DE8937040044053201300{n}"),
+            bic_encrypted=encrypt("COBADEFFXXX") if n % 2 else None,
+            iban_last4=f"300{n}", country_code="DE",
+        ))
+    # The last creator has no payout settings: not exported, stays queued.
+    for n, creator_id in enumerate(ids):
+        db_session.add(Payout(
+            creator_id=creator_id, amount_cents=5000 + n, currency="eur", status="queued",
+            period_start=now - timedelta(days=7), period_end=now,
+        ))
+    await db_session.commit()
+
+    try:
+        batch_id = await start_payout_export(db_session, ids[0], status_filter="queued")
+        assert batch_id is not None
+        chunks = [chunk async for chunk in stream_payout_export(batch_id)]
+        # A broken download is fetched again by batch id, with the same content.
+        assert await reopen_payout_export(db_session, ids[0], batch_id)
+        assert [chunk async for chunk in stream_payout_export(batch_id)] == chunks
+        assert not await reopen_payout_export(db_session, ids[0], "batch-missing")
+    finally:
+        get_settings.cache_clear()
+
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0][:3] == ["payout_id", "beneficiary_name", "iban"]
+    ours = {row[7]: row for row in rows[1:] if row[7] in {str(i) for i in ids}}
+    assert set(ours) == {str(i) for i in ids[:4]}
+    assert ours[str(ids[1])][1:6] == ["Holder 1", "DE89370400440532013001", "COBADEFFXXX", "50.01", "EUR"]
+    assert ours[str(ids[0])][3] == ""
+    assert len(chunks) >= 3  # header + chunks of two rows
+
+    statuses = dict(
+        (await db_session.execute(select(Payout.creator_id, Payout.status).where(Payout.creator_id.in_(ids)))).all()
+    )
+    assert [statuses[i] for i in ids] == ["exported"] * 4 + ["queued"]
+    assert await start_payout_export(db_session, ids[0], status_filter="no-such-status") is None
@@ -652,6 +652,61 @@ async def test_feed_returns_followed_creators_public_posts(
     assert "avatar_asset_id" in data["items"][0]["creator"]
 
 
+@pytest.mark.asyncio
+async def test_feed_include_urls_presigns_asset_urls(
+    async_client: AsyncClient,
+    db_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """GET /feed?include_urls=grid returns signed URLs inline; default response has none."""
+    from app.modules.posts import router as posts_router
+
+    class _MockStorage:
+        def create_signed_download_url(self, object_key: str) -> str:
+            return f"https://mock-download.example/{object_key}"
+
+    monkeypatch.setattr(posts_router, "get_storage_client", lambda: _MockStorage())
+    email = _unique_email()
+    token = await signup_verify_login(async_client, email, display_name="UrlCreator")
+    me = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    user_id = uuid.UUID(me.json()["id"])
+    await async_client.patch(
+        "/creators/me",
+        json={"handle": f"urls-{uuid.uuid4().hex[:8]}"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    object_key = f"test/{uuid.uuid4().hex}"
+    media = MediaObject(
+        owner_user_id=user_id,
+        object_key=object_key,
+        content_type="image/jpeg",
+        size_bytes=100,
+    )
+    db_session.add(media)
+    await db_session.commit()
+    await db_session.refresh(media)
+    r = await async_client.post(
+        "/posts",
+        json={"type": "IMAGE", "visibility": "PUBLIC", "asset_ids": [str(media.id)]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 201, r.json()
+
+    plain = await async_client.get("/feed", headers={"Authorization": f"Bearer {token}"})
+    assert plain.status_code == 200
+    assert plain.json()["items"][0]["download_urls"] == {}
+
+    r = await async_client.get(
+        "/feed",
+        params={"include_urls": "grid"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200, r.json()
+    item = r.json()["items"][0]
+    assert item["asset_ids"] == [str(media.id)]
+    assert item["download_urls"] == {str(media.id): f"https://mock-download.example/{object_key}"}
+
+
 @pytest.mark.asyncio
 async def test_feed_empty_when_following_none(async_client: AsyncClient) -> None:
     """Feed returns empty when user follows no creators."""
@@ -879,3 +934,164 @@ async def test_feed_includes_subscribers_for_creator(async_client: AsyncClient)
     assert len(items) >= 1
     assert items[0]["visibility"] == "SUBSCRIBERS"
     assert items[0]["caption"] == "My subscribers post"
+
+
+async def _creator_with_handle(async_client: AsyncClient, prefix: str) -> tuple[str, str]:
+    token = await signup_verify_login(async_client, _unique_email(), display_name=prefix)
+    await async_client.patch(
+        "/creators/me",
+        json={"handle": f"{prefix}-{uuid.uuid4().hex[:8]}"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    async_client.cookies.clear()
+    me = await async_client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+    return token, me.json()["id"]
+
+
+async def _feed_captions(
+    async_client: AsyncClient, token: str, **params: str | int
+) -> tuple[list[str], dict]:
+    r = await async_client.get("/feed", params=params, headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200, r.json()
+    return [item["caption"] for item in r.json()["items"]], r.json()
+
+
+@pytest.mark.asyncio
+async def test_feed_timeline_follow_unfollow_and_scheduled_publish(
+    async_client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """Timeline entries are written on follow and publish, and removed on unfollow."""
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import select, update
+
+    from app.modules.admin.service import admin_action_post
+    from app.modules.posts.models import Post
+    from app.modules.posts.service import publish_due_scheduled_posts
+
+    token_c, creator_id = await _creator_with_handle(async_client, "tl")
+    headers_c = {"Authorization": f"Bearer {token_c}"}
+    await async_client.post(
+        "/posts",
+        json={"type": "TEXT", "caption": "Before follow", "visibility": "PUBLIC", "asset_ids": []},
+        headers=headers_c,
+    )
+    token_f = await signup_verify_login(async_client, _unique_email(), display_name="TlFan")
+    async_client.cookies.clear()
+    await async_client.post(f"/creators/{creator_id}/follow", headers={"Authorization": f"Bearer {token_f}"})
+
+    scheduled = await async_client.post(
+        "/posts",
+        json={
+            "type": "TEXT",
+            "caption": "Scheduled",
+            "visibility": "PUBLIC",
+            "asset_ids": [],
+            "publish_at": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+        },
+        headers=headers_c,
+    )
+    assert scheduled.status_code == 201, scheduled.json()
+    captions, _ = await _feed_captions(async_client, token_f)
+    assert captions == ["Before follow"]
+
+    await db_session.execute(
+        update(Post)
+        .where(Post.id == uuid.UUID(scheduled.json()["id"]))
+        .values(publish_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    await db_session.commit()
+    assert await publish_due_scheduled_posts(db_session) >= 1
+    captions, _ = await _feed_captions(async_client, token_f)
+    assert captions == ["Scheduled", "Before follow"]
+
+    await async_client.delete(f"/creators/{creator_id}/follow", headers={"Authorization": f"Bearer {token_f}"})
+    captions, _ = await _feed_captions(async_client, token_f)
+    assert captions == []
+
+    # A post removed by moderation is not copied on follow; restoring it fans it out.
+    before_follow = (
+        await db_session.execute(
+            select(Post.id).where(
+                Post.creator_user_id == uuid.UUID(creator_id), Post.caption == "Before follow"
+            )
+        )
+    ).scalar_one()
+    await admin_action_post(db_session, before_follow, "remove")
+    await async_client.post(f"/creators/{creator_id}/follow", headers={"Authorization": f"Bearer {token_f}"})
+    captions, _ = await _feed_captions(async_client, token_f)
+    assert captions == ["Scheduled"]
+    await admin_action_post(db_session, before_follow, "restore")
+    captions, _ = await _feed_captions(async_client, token_f)
+    assert captions == ["Scheduled", "Before follow"]
+
+
+@pytest.mark.asyncio
+async def test_feed_merges_pulled_creators_with_keyset_cursor(
+    async_client: AsyncClient, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Creators above FEED_FANOUT_MAX_FOLLOWERS are read at feed time and merged in order."""
+    from sqlalchemy import func
+
+    from app.core.settings import get_settings
+    from app.modules.posts import timeline
+    from app.modules.posts.models import FeedEntry, FeedPullCreator
+
+    token_small, small_id = await _creator_with_handle(async_client, "small")
+    token_big, big_id = await _creator_with_handle(async_client, "big")
+    fans = []
+    for name in ("MixFan", "OtherFan"):
+        fans.append(await signup_verify_login(async_client, _unique_email(), display_name=name))
+        async_client.cookies.clear()
+    headers_f = {"Authorization": f"Bearer {fans[0]}"}
+    await async_client.post(f"/creators/{small_id}/follow", headers=headers_f)
+    for token in fans:
+        await async_client.post(f"/creators/{big_id}/follow", headers={"Authorization": f"Bearer {token}"})
+
+    # "big" has two followers, "small" one: with a threshold of 1 only "big" is pulled.
+    monkeypatch.setenv("FEED_FANOUT_MAX_FOLLOWERS", "1")
+    get_settings.cache_clear()
+    timeline.reset_timeline_caches()
+    await timeline.refresh_pull_creators(db_session)
+    try:
+        for i, token in enumerate([token_small, token_big, token_small, token_big]):
+            await async_client.post(
+                "/posts",
+                json={"type": "TEXT", "caption": f"p{i}", "visibility": "PUBLIC", "asset_ids": []},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+        pushed_big = await db_session.scalar(
+            select(func.count()).select_from(FeedEntry).where(
+                FeedEntry.creator_user_id == uuid.UUID(big_id),
+                FeedEntry.user_id != uuid.UUID(big_id),
+            )
+        )
+        assert pushed_big == 0
+
+        first, data = await _feed_captions(async_client, fans[0], page_size=3)
+        assert first == ["p3", "p2", "p1"]
+        assert data["total"] == 4
+        rest, data = await _feed_captions(async_client, fans[0], page_size=3, cursor=data["next_cursor"])
+        assert rest == ["p0"]
+
+        # Back under the threshold: the pull period is fanned out, no post disappears.
+        monkeypatch.setenv("FEED_FANOUT_MAX_FOLLOWERS", "2")
+        get_settings.cache_clear()
+        timeline.reset_timeline_caches()
+        assert (await timeline.refresh_pull_creators(db_session)).pushed >= 1
+        assert await db_session.get(FeedPullCreator, uuid.UUID(big_id)) is None
+        pushed_big = await db_session.scalar(
+            select(func.count()).select_from(FeedEntry).where(
+                FeedEntry.creator_user_id == uuid.UUID(big_id),
+                FeedEntry.user_id != uuid.UUID(big_id),
+            )
+        )
+        assert pushed_big == 4
+        for token, expected in zip(fans, (["p3", "p2", "p1", "p0"], ["p3", "p1"]), strict=True):
+            captions, _ = await _feed_captions(async_client, token, page_size=10)
+            assert captions == expected
+    finally:
+        monkeypatch.delenv("FEED_FANOUT_MAX_FOLLOWERS")
+        get_settings.cache_clear()
+        timeline.reset_timeline_caches()
+        await timeline.refresh_pull_creators(db_session)
@@ -366,10 +366,10 @@ async def test_locked_media_download_url_access_control(
     third_token = await _signup_and_login(async_client, _email(), "Third")
 
     monkeypatch.setattr("app.modules.messaging.router.get_storage_client", lambda: object())
-    monkeypatch.setattr(
-        "app.modules.messaging.router.generate_signed_download",
-        lambda _storage, _object_key: "https://signed.example.com/file",
-    )
+    async def _signed(_storage: object, _object_key: str) -> str:
+        return "https://signed.example.com/file"
+
+    monkeypatch.setattr("app.modules.messaging.router.generate_signed_download", _signed)
 
     blocked = await async_client.get(
         f"/dm/message-media/{message_media_id}/download-url",
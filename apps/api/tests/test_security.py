@@ -295,3 +295,34 @@ async def test_admin_kyc_reject(async_client: AsyncClient) -> None:
         result = await session.execute(select(User).where(User.email == creator_email))
         creator = result.scalar_one()
         assert creator.onboarding_state == "KYC_REJECTED"
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_are_all_or_nothing_and_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Local fallback: a request blocked by one limit is not counted against the others."""
+    from app.core.settings import get_settings
+    from app.modules.auth import rate_limit
+
+    monkeypatch.setenv("REDIS_URL", "")
+    monkeypatch.setenv("RATE_LIMIT_LOCAL_MAX_KEYS", "3")
+    get_settings.cache_clear()
+    monkeypatch.setattr(rate_limit, "_LOCAL_WINDOWS", rate_limit.OrderedDict())
+    try:
+        tag = uuid.uuid4().hex
+        user_a, user_b, ip = f"u:{tag}:a", f"u:{tag}:b", f"ip:{tag}"
+        assert await rate_limit.check_rate_limits([(user_a, 1, 60), (ip, 2, 60)])
+        assert not await rate_limit.check_rate_limits([(user_a, 1, 60), (ip, 2, 60)])
+        # The rejected attempt above did not consume the IP budget.
+        assert await rate_limit.check_rate_limits([(user_b, 1, 60), (ip, 2, 60)])
+        assert len(rate_limit._LOCAL_WINDOWS) == 3
+
+        assert await rate_limit.check_rate_limits([(f"other:{tag}", 1, 60)])
+        assert len(rate_limit._LOCAL_WINDOWS) == 3
+        assert user_a not in rate_limit._LOCAL_WINDOWS
+    finally:
+        get_settings.cache_clear()
@@ -116,6 +116,18 @@ type AdminTransaction = {
   created_at: string;
 };
 
+type DeadPaymentEvent = {
+  id: string;
+  provider: string;
+  event_id: string;
+  event_type: string;
+  ordering_key: string | null;
+  attempts: number;
+  last_error: string | null;
+  received_at: string;
+  dead_at: string | null;
+};
+
 type SupportMessage = {
   id: string;
   email: string;
@@ -369,6 +381,7 @@ export default function AdminPage() {
   const [transactions, setTransactions] = useState<AdminTransaction[]>([]);
   const [txTotal, setTxTotal] = useState(0);
   const [txPage, setTxPage] = useState(1);
+  const [deadPaymentEvents, setDeadPaymentEvents] = useState<DeadPaymentEvent[]>([]);
 
   /* ---- Support Messages state ---- */
   const [supportMessages, setSupportMessages] = useState<SupportMessage[]>([]);
@@ -567,6 +580,33 @@ export default function AdminPage() {
     [handleApiError],
   );
 
+  /* ---- Fetch: dead-lettered payment webhooks ---- */
+  const fetchDeadPaymentEvents = useCallback(async () => {
+    try {
+      const data = await apiFetch<PagedResult<DeadPaymentEvent>>("/admin/payment-events/dead", {
+        method: "GET",
+        query: { page: 1, page_size: 100 },
+      });
+      setDeadPaymentEvents(data.items);
+    } catch (err) {
+      handleApiError(err);
+    }
+  }, [handleApiError]);
+
+  const retryPaymentEvent = async (eventId: string) => {
+    if (isReader) return;
+    setActionLoading(`payment-event-${eventId}`);
+    try {
+      await apiFetch(`/admin/payment-events/${eventId}/retry`, { method: "POST" });
+      setError(null);
+      fetchDeadPaymentEvents();
+    } catch (err) {
+      handleApiError(err);
+    } finally {
+      setActionLoading(null);
+    }
+  };
+
   /* ---- Fetch: support messages ---- */
   const fetchInbox = useCallback(
     async (pg = 1) => {
@@ -927,7 +967,7 @@ export default function AdminPage() {
   useEffect(() => {
     if (tab === "users") fetchUsers();
     else if (tab === "posts") fetchPosts();
-    else if (tab === "transactions") fetchTransactions();
+    else if (tab === "transactions") { fetchTransactions(); fetchDeadPaymentEvents(); }
     else if (tab === "moderation") fetchModeration();
     else if (tab === "kyc") fetchGlobalKyc();
     else if (tab === "emails") { fetchInboundEmails(); fetchInboundStats(); }
@@ -936,7 +976,7 @@ export default function AdminPage() {
       fetchInbox();
       fetchInboxStats();
     }
-  }, [tab, fetchUsers, fetchPosts, fetchTransactions, fetchInbox, fetchInboxStats, fetchModeration, fetchGlobalKyc, fetchInboundEmails, fetchInboundStats, fetchPayouts]);
+  }, [tab, fetchUsers, fetchPosts, fetchTransactions, fetchDeadPaymentEvents, fetchInbox, fetchInboxStats, fetchModeration, fetchGlobalKyc, fetchInboundEmails, fetchInboundStats, fetchPayouts]);
 
   // Reload users when search/role changes
   useEffect(() => {
@@ -1032,11 +1072,15 @@ export default function AdminPage() {
       } else {
         body.target_role = notifyRole;
       }
-      const result = await apiFetch<{ sent_count: number; email_count: number }>(
+      const result = await apiFetch<{ job_id: string; status: string; total_count: number }>(
         "/admin/notifications/send",
         { method: "POST", body },
       );
-      alert(`Sent ${result.sent_count} notification(s)${result.email_count > 0 ? ` + ${result.email_count} email(s)` : ""}.`);
+      alert(
+        result.status === "queued"
+          ? `Broadcast queued for ${result.total_count} user(s)${notifySendEmail ? " (with email)" : ""}.`
+          : "No matching users.",
+      );
       setShowNotifyForm(null);
       setNotifyTitle("");
       setNotifyMessage("");
@@ -2574,6 +2618,57 @@ export default function AdminPage() {
           </CardContent>
         </Card>
       )}
+      {tab === "transactions" && deadPaymentEvents.length > 0 && (
+        <Card className="mt-4">
+          <CardHeader>
+            <CardTitle>Failed Payment Webhooks</CardTitle>
+          </CardHeader>
+          <CardContent>
+            <div className="overflow-x-auto rounded-lg border border-border">
+              <table className="w-full text-sm">
+                <thead>
+                  <tr className="border-b border-border bg-muted/50 text-left text-xs uppercase tracking-wider text-muted-foreground">
+                    <th className="px-4 py-3 font-semibold">Received</th>
+                    <th className="px-4 py-3 font-semibold">Event</th>
+                    <th className="px-4 py-3 font-semibold">Attempts</th>
+                    <th className="px-4 py-3 font-semibold">Last error</th>
+                    <th className="px-4 py-3" />
+                  </tr>
+                </thead>
+                <tbody className="divide-y divide-border">
+                  {deadPaymentEvents.map((ev) => (
+                    <tr key={ev.id} className="text-foreground">
+                      <td className="px-4 py-3 whitespace-nowrap text-xs text-muted-foreground">
+                        {new Date(ev.received_at).toLocaleString("en-US")}
+                      </td>
+                      <td className="px-4 py-3">
+                        <span className="font-mono text-xs">{ev.provider}</span> {ev.event_type}
+                        <div className="font-mono text-xs text-muted-foreground">{ev.event_id}</div>
+                      </td>
+                      <td className="px-4 py-3">{ev.attempts}</td>
+                      <td className="max-w-md truncate px-4 py-3 font-mono text-xs text-red-400" title={ev.last_error ?? ""}>
+                        {ev.last_error || "\u2014"}
+                      </td>
+                      <td className="px-4 py-3 text-right">
+                        {!isReader && (
+                          <Button
+                            size="sm"
+                            variant="secondary"
+                            disabled={actionLoading === `payment-event-${ev.id}`}
+                            onClick={() => retryPaymentEvent(ev.id)}
+                          >
+                            Retry
+                          </Button>
+                        )}
+                      </td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          </CardContent>
+        </Card>
+      )}
 
       {/* ============================================================ */}
       {/* INBOX TAB                                                     */}
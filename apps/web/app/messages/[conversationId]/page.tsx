@@ -5,7 +5,14 @@ import Link from "next/link";
 import { useParams } from "next/navigation";
 import { z } from "zod";
 import { AuthService } from "@zinovia/contracts";
-import { getMessages, getMediaDownloadUrl, listConversations, sendMessage, type MessageOut } from "@/features/messaging/api";
+import {
+  getConversation,
+  getMessages,
+  getMediaDownloadUrl,
+  markConversationRead,
+  sendMessage,
+  type MessageOut,
+} from "@/features/messaging/api";
 import { listVaultMedia } from "@/features/engagement/api";
 import { createPpvIntent } from "@/lib/api/ppv";
 import { Page } from "@/components/brand/Page";
@@ -40,17 +47,17 @@ export default function ConversationPage() {
   const load = useCallback(async () => {
     setStatus("loading");
     try {
-      const [messagesRes, convRes, me] = await Promise.all([
+      const [messagesRes, conv, me] = await Promise.all([
         getMessages(conversationId),
-        listConversations(),
+        getConversation(conversationId),
         AuthService.authMe(),
       ]);
       setMessages(messagesRes.items);
-      const conv = convRes.items.find((item) => item.id === conversationId);
-      if (conv) {
-        setIsCreator(conv.creator_user_id === me.id);
-      }
+      setIsCreator(conv.creator_user_id === me.id);
       setStatus("ready");
+      if (conv.unread_count > 0) {
+        markConversationRead(conversationId).catch(() => undefined);
+      }
     } catch {
       setStatus("error");
     }
@@ -8,6 +8,7 @@ import { Page } from "@/components/brand/Page";
 import { Button } from "@/components/ui/button";
 import { Skeleton } from "@/components/ui/skeleton";
 import { Avatar, AvatarFallback } from "@/components/ui/avatar";
+import { Badge } from "@/components/ui/badge";
 import { Card } from "@/components/ui/card";
 import { getApiErrorMessage } from "@/lib/errors";
 import { useTranslation } from "@/lib/i18n";
@@ -27,6 +28,8 @@ export default function MessagesInboxPage() {
   const { t } = useTranslation();
   const router = useRouter();
   const [conversations, setConversations] = useState<ConversationOut[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [status, setStatus] = useState<"loading" | "ok" | "error">("loading");
   const [errorMessage, setErrorMessage] = useState<string | null>(null);
 
@@ -34,6 +37,7 @@ export default function MessagesInboxPage() {
     listConversations()
       .then((res) => {
         setConversations(res.items);
+        setNextCursor(res.next_cursor ?? null);
         setStatus("ok");
       })
       .catch((err) => {
@@ -47,6 +51,20 @@ export default function MessagesInboxPage() {
       });
   }, [router]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await listConversations(nextCursor);
+      setConversations((prev) => [...prev, ...res.items]);
+      setNextCursor(res.next_cursor ?? null);
+    } catch {
+      // Keep the cursor so the button can retry.
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (status === "loading") {
     return (
       <Page>
@@ -108,11 +126,27 @@ export default function MessagesInboxPage() {
                 <span className="shrink-0 text-xs text-muted-foreground">
                   {formatDate(c.last_message_at)}
                 </span>
+                {c.unread_count > 0 && (
+                  <Badge variant="primary" className="shrink-0">
+                    {c.unread_count}
+                  </Badge>
+                )}
               </Link>
             </li>
           ))}
         </ul>
       )}
+      {nextCursor && (
+        <Button
+          variant="secondary"
+          size="sm"
+          className="mt-4"
+          onClick={loadMore}
+          disabled={loadingMore}
+        >
+          {t.common.loadMore}
+        </Button>
+      )}
       <Button variant="ghost" size="sm" className="mt-4" asChild>
         <Link href="/">{t.messages.backToHome}</Link>
       </Button>
@@ -15,6 +15,7 @@ export interface ConversationOut {
   last_message_preview: string | null;
   last_message_at: string | null;
   unread_count: number;
+  other_party_last_read_at?: string | null;
   other_party: {
     handle: string;
     display_name: string;
@@ -24,6 +25,7 @@ export interface ConversationOut {
 
 export interface ConversationListOut {
   items: ConversationOut[];
+  next_cursor?: string | null;
 }
 
 export interface MessageMediaOut {
@@ -50,6 +52,7 @@ export interface MessageOut {
 export interface MessagePageOut {
   items: MessageOut[];
   next_cursor: string | null;
+  newest_cursor: string | null;
 }
 
 export interface MessageCreate {
@@ -74,16 +77,27 @@ export async function createConversation(
   });
 }
 
-export async function listConversations(): Promise<ConversationListOut> {
-  return apiFetch("/dm/conversations");
+export async function listConversations(cursor?: string): Promise<ConversationListOut> {
+  return apiFetch("/dm/conversations", {
+    params: cursor ? { cursor } : undefined,
+  });
+}
+
+export async function getConversation(conversationId: string): Promise<ConversationOut> {
+  return apiFetch(`/dm/conversations/${conversationId}`);
+}
+
+export async function markConversationRead(conversationId: string): Promise<{ status: string }> {
+  return apiFetch(`/dm/conversations/${conversationId}/read`, { method: "POST" });
 }
 
 export async function getMessages(
   conversationId: string,
-  cursor?: string
+  cursor?: string,
+  direction: "older" | "newer" = "older"
 ): Promise<MessagePageOut> {
   return apiFetch(`/dm/conversations/${conversationId}/messages`, {
-    params: cursor ? { cursor } : undefined,
+    params: cursor ? { cursor, direction } : undefined,
   });
 }
 
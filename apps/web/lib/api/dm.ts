@@ -1,8 +1,10 @@
 export {
   createConversation,
+  getConversation,
   getMessages,
   getMediaDownloadUrl,
   listConversations,
+  markConversationRead,
   sendMessage,
   type ConversationCreate,
   type ConversationListOut,
@@ -0,0 +1,196 @@
+"""Background removal: per-process sessions, downscaled inference, batched jobs with timings."""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+from sqlalchemy import delete, select
+
+from worker import runtime
+from worker.ml import background_removal
+
+
+class _FakeRembgSession:
+    """Mask = left half foreground; records the sizes it was asked to predict on."""
+
+    def __init__(self) -> None:
+        self.sizes: list[tuple[int, int]] = []
+
+    def predict(self, img: Image.Image) -> list[Image.Image]:
+        self.sizes.append(img.size)
+        mask = Image.new("L", img.size, 0)
+        mask.paste(255, (0, 0, img.size[0] // 2, img.size[1]))
+        return [mask]
+
+
+@pytest.fixture
+def fake_sessions(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    opened: list[str] = []
+
+    def new_session(model: str) -> _FakeRembgSession:
+        opened.append(model)
+        return _FakeRembgSession()
+
+    monkeypatch.setattr(background_removal, "_new_session", new_session)
+    monkeypatch.setattr(background_removal, "_sessions", {})
+    monkeypatch.setattr(background_removal, "_sessions_pid", None)
+    return opened
+
+
+def _png_bytes(size: tuple[int, int]) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_sessions_are_reused_per_model_and_reopened_after_fork(
+    monkeypatch: pytest.MonkeyPatch, fake_sessions: list[str]
+) -> None:
+    first = background_removal.get_session("u2net")
+    assert background_removal.get_session("u2net") is first
+    assert background_removal.get_session("u2netp") is not first
+    assert fake_sessions == ["u2net", "u2netp"]
+
+    monkeypatch.setattr(background_removal, "_sessions_pid", -1)  # as seen from a forked child
+    assert background_removal.get_session("u2net") is not first
+    assert fake_sessions == ["u2net", "u2netp", "u2net"]
+    with pytest.raises(ValueError, match="Unknown rembg model"):
+        background_removal._session_class("u2net_human")
+
+
+def test_cut_out_predicts_downscaled_and_keeps_full_resolution(fake_sessions: list[str]) -> None:
+    img = Image.new("RGBA", (3000, 1500), (10, 20, 30, 255))
+    img.putpixel((10, 10), (10, 20, 30, 100))  # already semi-transparent in the upload
+    timings = background_removal.StageTimings()
+
+    out = background_removal.cut_out(img, model="u2net", timings=timings)
+
+    session = background_removal.get_session("u2net").session
+    assert session.sizes == [(1024, 512)]
+    assert out.size == img.size and out.mode == "RGBA"
+    assert out.getpixel((10, 10)) == (10, 20, 30, 100)
+    assert out.getpixel((500, 700))[3] == 255
+    assert out.getpixel((2900, 700)) == (10, 20, 30, 0)
+    assert {"resize_ms", "inference_wait_ms", "inference_ms", "compose_ms"} <= set(timings)
+
+
+def test_remove_background_runs_claimed_batch_and_records_timings(fake_sessions: list[str]) -> None:
+    from worker.tasks import ai_tools
+
+    jobs = [
+        {"id": "00000000-0000-0000-0000-00000000000a", "input_object_key": "uploads/a.png"},
+        {"id": "00000000-0000-0000-0000-00000000000b", "input_object_key": "uploads/b.png"},
+        {"id": "00000000-0000-0000-0000-00000000000c", "input_object_key": "uploads/big.png"},
+    ]
+    inputs = {
+        "uploads/a.png": _png_bytes((800, 600)),
+        "uploads/b.png": _png_bytes((640, 640)),
+        "uploads/big.png": _png_bytes((ai_tools.MAX_DIMENSION + 1, 10)),
+    }
+    puts: dict[str, bytes] = {}
+    updates: dict[str, dict] = {}
+    lock = threading.Lock()
+
+    async def load_job(job_id: str) -> dict:
+        return {"id": job_id, "status": "pending", "input_object_key": "uploads/a.png"}
+
+    async def claim(job_id: str, limit: int, stale_after_seconds: int) -> list[dict]:
+        assert (job_id, limit, stale_after_seconds) == (jobs[0]["id"], 4, 600)
+        return jobs
+
+    async def update_job(job_id: str, status: str, **kwargs) -> None:
+        updates[job_id] = {"status": status, **kwargs}
+
+    def fake_put(bucket, key, data, content_type):
+        with lock:
+            puts[key] = data
+
+    with (
+        patch.object(ai_tools, "get_media_bucket", return_value="bucket"),
+        patch.object(ai_tools, "get_object_bytes", side_effect=lambda bucket, key: inputs[key]),
+        patch.object(ai_tools, "put_object_bytes", side_effect=fake_put),
+        patch.object(ai_tools, "_load_job", side_effect=load_job),
+        patch.object(ai_tools, "_claim_remove_bg_jobs", side_effect=claim),
+        patch.object(ai_tools, "_update_job", side_effect=update_job),
+    ):
+        result = ai_tools.remove_background(jobs[0]["id"])
+
+    assert result == ai_tools._result_object_key(jobs[0]["id"])
+    assert fake_sessions == ["u2net"]  # one session for the whole batch
+    for job, size in ((jobs[0], (800, 600)), (jobs[1], (640, 640))):
+        key = ai_tools._result_object_key(job["id"])
+        assert updates[job["id"]]["status"] == "ready"
+        assert updates[job["id"]]["result_object_key"] == key
+        assert Image.open(BytesIO(puts[key])).size == size
+        recorded = updates[job["id"]]["timings"]
+        assert recorded["batch_size"] == 3 and recorded["model"] == "u2net"
+        assert {"download_ms", "decode_ms", "inference_ms", "encode_ms", "upload_ms", "total_ms"} <= set(recorded)
+    failed = updates[jobs[2]["id"]]
+    assert failed["status"] == "failed" and "too large" in failed["error_message"]
+    assert "inference_ms" not in failed["timings"] and "total_ms" in failed["timings"]
+
+
+async def _claim_fixture() -> tuple[uuid.UUID, dict[str, str]]:
+    from app.modules.ai_tools.tool_models import AiToolJob
+    from app.modules.auth.models import User
+
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    async with runtime.get_session_factory()() as session:
+        user = User(email=f"rmbg-{uuid.uuid4().hex}@test.com", password_hash="x", role="creator")
+        session.add(user)
+        await session.flush()
+        rows = {
+            "own": AiToolJob(user_id=user.id, tool="remove_bg", status="pending", input_object_key="o"),
+            "pending": AiToolJob(user_id=user.id, tool="remove_bg", status="pending", input_object_key="p"),
+            # Left processing by a worker that died mid-batch.
+            "stale": AiToolJob(user_id=user.id, tool="remove_bg", status="processing",
+                               input_object_key="s", updated_at=long_ago),
+            "stale_too": AiToolJob(user_id=user.id, tool="remove_bg", status="processing",
+                                   input_object_key="t", updated_at=long_ago),
+            "running": AiToolJob(user_id=user.id, tool="remove_bg", status="processing", input_object_key="r"),
+        }
+        session.add_all(rows.values())
+        await session.commit()
+        return user.id, {name: str(row.id) for name, row in rows.items()}
+
+
+async def _statuses(ids: dict[str, str]) -> dict[str, str]:
+    from app.modules.ai_tools.tool_models import AiToolJob
+
+    async with runtime.get_session_factory()() as session:
+        by_id = dict((await session.execute(
+            select(AiToolJob.id, AiToolJob.status).where(AiToolJob.id.in_([uuid.UUID(i) for i in ids.values()]))
+        )).all())
+    return {name: by_id[uuid.UUID(i)] for name, i in ids.items()}
+
+
+async def _drop_user(user_id: uuid.UUID) -> None:
+    from app.modules.auth.models import User
+
+    async with runtime.get_session_factory()() as session:
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+def test_claim_takes_pending_and_stale_processing_jobs() -> None:
+    from worker.tasks import ai_tools
+
+    runtime.shutdown_runtime()
+    user_id, ids = runtime.run(_claim_fixture())
+    try:
+        claimed = runtime.run(ai_tools._claim_remove_bg_jobs(ids["stale"], 10, 600))
+        assert claimed[0]["id"] == ids["stale"]  # its own message takes over the stale claim
+        assert {j["id"] for j in claimed} == {ids[n] for n in ("stale", "own", "pending", "stale_too")}
+        assert runtime.run(_statuses(ids)) == dict.fromkeys(ids, "processing")
+        # Fresh claims, including the job of a live worker, are not taken.
+        assert runtime.run(ai_tools._claim_remove_bg_jobs(ids["running"], 10, 600)) == []
+        assert runtime.run(ai_tools._claim_remove_bg_jobs(ids["stale_too"], 10, 600)) == []
+    finally:
+        runtime.run(_drop_user(user_id))
+        runtime.shutdown_runtime()
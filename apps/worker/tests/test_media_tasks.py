@@ -14,3 +14,65 @@ def test_derived_object_key_distinct_from_original() -> None:
         assert derived.startswith("derived/")
         assert variant in derived
         assert derived.endswith(".jpg")
+
+
+def _jpeg_bytes(size: tuple[int, int]) -> bytes:
+    from io import BytesIO
+
+    import numpy as np
+    from PIL import Image
+
+    arr = np.random.default_rng(0).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    buf = BytesIO()
+    Image.fromarray(arr).save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+def test_decode_working_image_downscales_but_covers_largest_variant() -> None:
+    """Large JPEGs are decoded at reduced size, never below what full/crops need."""
+    from worker.tasks.media import VARIANT_SPECS, WORKING_MIN_SHORT_SIDE, _decode_working_image
+
+    img = _decode_working_image(_jpeg_bytes((4000, 3000)))
+    assert img.mode == "RGB"
+    assert max(img.size) >= VARIANT_SPECS["full"]
+    assert min(img.size) >= WORKING_MIN_SHORT_SIDE
+    assert img.size[0] < 4000 and img.size[1] < 3000
+
+
+def test_generate_derived_variants_fetches_and_detects_once() -> None:
+    """One GET, one attention pass and one DB write for the whole variant set."""
+    import uuid
+    from unittest.mock import patch
+
+    from worker.tasks import media
+
+    raw = _jpeg_bytes((2400, 1600))
+    puts: dict[str, bytes] = {}
+    recorded: dict[str, object] = {}
+
+    async def no_existing(*args, **kwargs):
+        return set()
+
+    async def record(parent_id, derived, placeholders):
+        recorded.update(derived=derived, placeholders=placeholders)
+
+    def fake_put(bucket, key, data, content_type):
+        puts[key] = data
+
+    with (
+        patch.object(media, "get_media_bucket", return_value="bucket"),
+        patch.object(media, "get_object_bytes", return_value=raw) as get_mock,
+        patch.object(media, "put_object_bytes", side_effect=fake_put),
+        patch.object(media, "_get_existing_variants", side_effect=no_existing),
+        patch.object(media, "_record_derived", side_effect=record),
+        patch.object(media, "_attention_point", wraps=media._attention_point) as attention,
+    ):
+        result = media.generate_derived_variants(str(uuid.uuid4()), "uploads/a.jpg", "image/jpeg")
+
+    assert get_mock.call_count == 1
+    assert attention.call_count == 1
+    for variant in ("thumb", "grid", "full", "teaser", *media.ASPECT_RATIO_SPECS):
+        assert result[variant] == media._derived_object_key("uploads/a.jpg", variant)
+        assert result[variant] in puts
+    assert recorded["derived"] == {k: v for k, v in result.items() if k not in ("blurhash", "dominant_color")}
+    assert recorded["placeholders"] == (result["blurhash"], result["dominant_color"])
@@ -0,0 +1,135 @@
+"""ONNX backend: sentence pooling, cache layout, and parity with the torch models.
+
+The parity tests export and run the real models (HF download on first run); they need
+torch, transformers, sentence-transformers, onnx and onnxruntime and are opt-in:
+RUN_ML_PARITY=1 pytest tests/test_onnx_parity.py (ML_ONNX_QUANTIZATION picks the
+export under test).
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.settings import get_settings
+from worker.ml import onnx_backend
+
+parity = pytest.mark.skipif(not os.environ.get("RUN_ML_PARITY"), reason="set RUN_ML_PARITY=1")
+
+
+class _FakeSession:
+    def __init__(self, hidden: np.ndarray) -> None:
+        self._hidden = hidden
+        self.feeds: dict[str, np.ndarray] = {}
+
+    def get_inputs(self) -> list[SimpleNamespace]:
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, outputs: list[str], feeds: dict[str, np.ndarray]) -> list[np.ndarray]:
+        self.feeds = feeds
+        return [self._hidden]
+
+
+def test_sentence_encoder_mean_pools_real_tokens_and_normalises() -> None:
+    hidden = np.array(
+        [[[3.0, 0.0], [0.0, 4.0], [100.0, 100.0]], [[1.0, 1.0], [1.0, 1.0], [1.0, 1.0]]], dtype=np.float32
+    )
+    session = _FakeSession(hidden)
+
+    def tokenizer(texts: list[str], **kwargs: object) -> dict[str, np.ndarray]:
+        assert kwargs["max_length"] == 8
+        return {"input_ids": np.ones((len(texts), 3)), "attention_mask": np.array([[1, 1, 0], [1, 1, 1]][: len(texts)])}
+
+    encoder = onnx_backend.OnnxSentenceEncoder(session, tokenizer, max_seq_length=8)
+    embeddings = encoder.encode(["a b", "c d e"])
+    # The padded position of the first sentence is ignored.
+    np.testing.assert_allclose(embeddings[0], [0.6, 0.8], rtol=1e-6)
+    np.testing.assert_allclose(embeddings[1], [2**-0.5, 2**-0.5], rtol=1e-6)
+    assert session.feeds["input_ids"].dtype == np.int64
+    assert encoder.encode("a b").shape == (2,)
+
+
+def test_cache_path_is_versioned_per_quantization(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.setenv("ML_ONNX_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("ML_ONNX_QUANTIZATION", "fp16")
+    get_settings.cache_clear()
+    try:
+        path = onnx_backend.model_path("org/model")
+        assert path == tmp_path / f"org--model-fp16-v{onnx_backend.ONNX_EXPORT_VERSION}" / "model.onnx"
+        assert onnx_backend.backend_tag() == "onnx-fp16"
+    finally:
+        get_settings.cache_clear()
+
+
+@pytest.fixture
+def onnx_cache(monkeypatch: pytest.MonkeyPatch, tmp_path_factory: pytest.TempPathFactory) -> None:
+    for module in ("torch", "transformers", "onnx", "onnxruntime"):
+        pytest.importorskip(module)
+    monkeypatch.setenv("ML_ONNX_CACHE_DIR", os.environ.get("ML_PARITY_CACHE_DIR") or str(tmp_path_factory.mktemp("onnx")))
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def _images() -> list:
+    from PIL import Image
+
+    return [Image.effect_noise((320, 400), 32 + 24 * i).convert("RGB") for i in range(4)]
+
+
+@parity
+@pytest.mark.parametrize("name", ["Falconsai/nsfw_image_detection", "nateraw/vit-age-classifier"])
+def test_classifier_probabilities_match_torch(name: str, onnx_cache: None) -> None:
+    import torch
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+    processor = AutoImageProcessor.from_pretrained(name)
+    pixels = processor(images=_images(), return_tensors="pt")["pixel_values"]
+    with torch.inference_mode():
+        expected = AutoModelForImageClassification.from_pretrained(name).eval()(pixel_values=pixels).logits.softmax(-1)
+    model = onnx_backend.load_image_model(name, AutoModelForImageClassification, processor)
+    actual = model(pixel_values=pixels).logits.softmax(-1)
+
+    assert model.config.id2label == AutoModelForImageClassification.from_pretrained(name).config.id2label
+    assert (actual - expected).abs().max().item() < 0.05
+    assert torch.equal(actual.argmax(-1), expected.argmax(-1))
+
+
+@parity
+def test_clothing_segmentation_labels_match_torch(onnx_cache: None) -> None:
+    import torch
+    from transformers import AutoModelForSemanticSegmentation, SegformerImageProcessor
+
+    from worker.ml.model_loader import CLOTHING_SEG_MODEL
+
+    processor = SegformerImageProcessor.from_pretrained(CLOTHING_SEG_MODEL)
+    inputs = processor(images=_images()[:2], return_tensors="pt")
+    with torch.inference_mode():
+        expected = AutoModelForSemanticSegmentation.from_pretrained(CLOTHING_SEG_MODEL).eval()(**inputs).logits
+    actual = onnx_backend.load_image_model(CLOTHING_SEG_MODEL, AutoModelForSemanticSegmentation, processor)(
+        **inputs
+    ).logits
+
+    assert actual.shape == expected.shape
+    agreement = (actual.argmax(1) == expected.argmax(1)).float().mean().item()
+    assert agreement > 0.97
+
+
+@parity
+def test_sentence_embeddings_match_sentence_transformers(onnx_cache: None) -> None:
+    pytest.importorskip("sentence_transformers")
+    from sentence_transformers import SentenceTransformer
+
+    from worker.ml.model_loader import EMBEDDING_DIM, SENTENCE_MAX_SEQ_LENGTH, SENTENCE_MODEL
+
+    texts = ["a woman in a red dress on the beach", "city skyline at night", "close-up of a coffee cup"]
+    expected = SentenceTransformer(SENTENCE_MODEL, device="cpu").encode(texts)
+    actual = onnx_backend.load_sentence_encoder(SENTENCE_MODEL, SENTENCE_MAX_SEQ_LENGTH).encode(texts)
+
+    assert actual.shape == (len(texts), EMBEDDING_DIM)
+    cosine = (actual * expected).sum(axis=1) / np.linalg.norm(expected, axis=1)
+    assert cosine.min() > 0.99
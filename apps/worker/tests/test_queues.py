@@ -0,0 +1,74 @@
+"""Queue topology: every task routed, priorities and acks per queue, worker profiles."""
+
+from __future__ import annotations
+
+import importlib
+import pkgutil
+
+import pytest
+from celery import Celery
+
+import worker.tasks
+from app.celery_routing import (
+    PRIORITY_HIGH,
+    QUEUE_GPU,
+    QUEUE_ML_HEAVY,
+    QUEUE_ML_LIGHT,
+    QUEUES,
+    TASK_ROUTES,
+    configure_routing,
+)
+from worker.profiles import PROFILES
+
+
+@pytest.fixture(scope="module")
+def celery_app() -> Celery:
+    # worker.celery_app needs a broker; same routing, every task module, in memory.
+    app = Celery("routing-test", broker="memory://")
+    configure_routing(app)
+    for module in pkgutil.iter_modules(worker.tasks.__path__):
+        importlib.import_module(f"worker.tasks.{module.name}")
+    app.finalize()
+    return app
+
+
+def _worker_tasks(celery_app: Celery) -> set[str]:
+    return {name for name in celery_app.tasks if not name.startswith("celery.")}
+
+
+def test_every_worker_task_has_a_route(celery_app: Celery) -> None:
+    tasks = _worker_tasks(celery_app)
+    assert tasks - set(TASK_ROUTES) == set()
+    assert set(TASK_ROUTES) - tasks == set()
+    assert {route["queue"] for route in TASK_ROUTES.values()} <= set(QUEUES)
+
+
+def test_router_applies_queue_priority_and_explicit_override(celery_app: Celery) -> None:
+    options = celery_app.amqp.router.route({}, "ai_safety.scan_image")
+    assert options["queue"].name == QUEUE_ML_LIGHT
+    assert options["priority"] == PRIORITY_HIGH
+    assert celery_app.amqp.router.route({"queue": None}, "ai_tools.motion_transfer")["queue"].name == QUEUE_ML_HEAVY
+    assert celery_app.amqp.router.route({"queue": QUEUE_GPU}, "ai_tools.motion_transfer")["queue"].name == QUEUE_GPU
+    assert celery_app.amqp.router.route({}, "unrouted.task")["queue"].name == "celery"
+
+
+def test_long_ml_tasks_ack_late_and_quick_ones_on_receipt(celery_app: Celery) -> None:
+    assert celery_app.tasks["ai_tools.virtual_tryon"].acks_late
+    assert celery_app.tasks["ai_tools.remove_background"].acks_late
+    assert not celery_app.tasks["notify.create_notification"].acks_late
+
+
+def test_profiles_cover_every_queue(monkeypatch: pytest.MonkeyPatch) -> None:
+    split = {q for name, p in PROFILES.items() if name not in ("fast", "all") for q in p.queues}
+    assert split == set(QUEUES)
+    assert set(PROFILES["all"].queues) == set(QUEUES) - {QUEUE_GPU}
+
+    command = PROFILES["ml-heavy"].command("ml-heavy")
+    assert command[command.index("-Q") + 1] == QUEUE_ML_HEAVY
+    assert command[command.index("--prefetch-multiplier") + 1] == "1"
+    monkeypatch.setenv("CELERY_CONCURRENCY_ML_LIGHT", "16")
+    monkeypatch.setenv("CELERY_CONCURRENCY", "3")
+    command = PROFILES["ml-light"].command("ml-light")
+    assert (command[command.index("-P") + 1], command[command.index("-c") + 1]) == ("threads", "16")
+    command = PROFILES["all"].command("all")
+    assert command[command.index("-c") + 1] == "3"
@@ -0,0 +1,28 @@
+"""Worker runtime: one loop and one engine per process, reused across task DB calls."""
+
+from __future__ import annotations
+
+from sqlalchemy import text
+
+from worker import runtime
+
+
+async def _select_one() -> int:
+    async with runtime.get_session_factory()() as session:
+        return (await session.execute(text("SELECT 1"))).scalar_one()
+
+
+def test_run_reuses_loop_engine_and_connection() -> None:
+    runtime.shutdown_runtime()
+    try:
+        assert runtime.run(_select_one()) == 1
+        loop, engine = runtime._state.loop, runtime._state.engine
+        assert runtime.run(_select_one()) == 1
+        assert runtime._state.loop is loop
+        assert runtime._state.engine is engine
+        # The second call checked the pooled connection back out instead of opening a new one.
+        assert engine is not None and engine.pool.checkedin() == 1
+    finally:
+        runtime.shutdown_runtime()
+    assert runtime._state.loop is None
+    assert loop is not None and loop.is_closed()
@@ -0,0 +1,75 @@
+"""AI safety micro-batcher: dynamic batches, max-wait deadline, errors, throughput stats."""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from worker.ml.safety_batch import MicroBatcher, _same_preprocessing
+
+
+def test_concurrent_submissions_share_batches() -> None:
+    seen: list[int] = []
+    release = threading.Event()
+
+    def square(items: list[int]) -> list[int]:
+        release.wait(5)
+        seen.append(len(items))
+        return [i * i for i in items]
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(square, max_size=4, max_wait=1.0, name="test-batch")
+    try:
+        futures = [batcher.submit(i) for i in range(10)]
+        release.set()
+        assert [f.result(timeout=5) for f in futures] == [i * i for i in range(10)]
+    finally:
+        batcher.close()
+    # The first batch closes at max_size while the function is blocked; the rest queue up.
+    assert sum(seen) == 10
+    assert max(seen) == 4
+    stats = batcher.stats()
+    assert sum(s["images"] for s in stats.values()) == 10
+    assert all(s["images_per_second"] > 0 for s in stats.values())
+
+
+def test_lone_submission_runs_after_max_wait() -> None:
+    batcher: MicroBatcher[int, int] = MicroBatcher(
+        lambda items: [i + 1 for i in items], max_size=8, max_wait=0.05, name="test-batch"
+    )
+    try:
+        start = time.monotonic()
+        assert batcher.submit(1).result(timeout=5) == 2
+        assert 0.04 <= time.monotonic() - start < 2
+    finally:
+        batcher.close()
+    assert list(batcher.stats()) == [1]
+
+
+def test_failed_batch_fails_each_submission() -> None:
+    def boom(items: list[int]) -> list[int]:
+        raise ValueError("model failed")
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(boom, max_size=2, max_wait=0.5, name="test-batch")
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(ValueError, match="model failed"):
+                future.result(timeout=5)
+        # The thread survives a failed batch and keeps serving.
+        with pytest.raises(ValueError):
+            batcher.submit(3).result(timeout=5)
+        assert batcher.stats() == {}
+    finally:
+        batcher.close()
+
+
+def test_shared_pixels_only_for_identical_preprocessing() -> None:
+    vit = dict(do_resize=True, size={"height": 224, "width": 224}, resample=2, do_rescale=True,
+               rescale_factor=1 / 255, do_normalize=True, image_mean=[0.5] * 3, image_std=[0.5] * 3)
+    assert _same_preprocessing(SimpleNamespace(**vit), SimpleNamespace(**vit))
+    assert not _same_preprocessing(
+        SimpleNamespace(**vit), SimpleNamespace(**{**vit, "image_mean": [0.485, 0.456, 0.406]})
+    )
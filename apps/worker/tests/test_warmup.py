@@ -0,0 +1,96 @@
+"""Pre-fork warm-up: per-queue config, frozen models and heap, readiness file, memory report."""
+
+from __future__ import annotations
+
+import gc
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.settings import get_settings
+from worker.ml import warmup
+
+
+class _FakeModule:
+    def __init__(self) -> None:
+        self.training = True
+        self.requires_grad = True
+
+    def eval(self) -> _FakeModule:
+        self.training = False
+        return self
+
+    def requires_grad_(self, flag: bool) -> _FakeModule:
+        self.requires_grad = flag
+        return self
+
+
+@pytest.fixture
+def ready_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    path = tmp_path / "worker-ready"
+    monkeypatch.setenv("WORKER_READY_FILE", str(path))
+    get_settings.cache_clear()
+    yield path
+    get_settings.cache_clear()
+
+
+def test_models_selected_per_consumed_queue() -> None:
+    raw = "celery=nsfw,age; gpu=segformer ;sentence"
+    assert warmup.models_for_queues(["celery"], raw) == ["sentence", "nsfw", "age"]
+    assert warmup.models_for_queues(["gpu", "celery"], raw) == ["sentence", "segformer", "nsfw", "age"]
+    assert warmup.models_for_queues(["other"], "celery=nsfw") == []
+    assert warmup.models_for_queues(["celery"], "") == []
+    with pytest.raises(ValueError, match="unknown models"):
+        warmup.parse_warmup_config("celery=nsfw,gpt")
+
+
+def test_warm_up_freezes_models_and_reports_readiness(
+    monkeypatch: pytest.MonkeyPatch, ready_file: Path
+) -> None:
+    processor, model = object(), _FakeModule()
+
+    def broken() -> None:
+        raise OSError("no weights")
+
+    monkeypatch.setitem(warmup.MODELS, "nsfw", ("test/nsfw", lambda: (processor, model)))
+    monkeypatch.setitem(warmup.MODELS, "age", ("test/age", broken))
+    ready_file.write_text("stale")
+    queues = SimpleNamespace(consume_from={"celery": None})
+    worker = SimpleNamespace(app=SimpleNamespace(amqp=SimpleNamespace(queues=queues)))
+    monkeypatch.setenv("WORKER_WARMUP_MODELS", "celery=nsfw,age")
+    get_settings.cache_clear()
+    assert gc.isenabled()
+    try:
+        report = warmup.warm_up_for_worker(worker)
+        assert not ready_file.exists()  # cleared until this start is warm
+        assert report is not None
+        assert list(report.models) == ["nsfw"]
+        assert "no weights" in report.failed["age"]
+        assert (model.training, model.requires_grad) == (False, False)
+        assert not gc.isenabled()
+        assert gc.get_freeze_count() > 0
+
+        state = warmup.mark_ready()
+        assert gc.isenabled()
+        assert json.loads(ready_file.read_text()) == state
+        assert state["pid"] == os.getpid()
+        assert state["warmup"]["models"] == report.models
+        assert state["startup_seconds"] > 0
+    finally:
+        gc.unfreeze()
+        gc.enable()
+        warmup._gc_disabled = False
+        warmup._report = None
+    warmup.clear_ready()
+    assert not ready_file.exists()
+
+
+def test_process_memory_reports_own_process() -> None:
+    if not Path("/proc/self/smaps_rollup").exists():
+        pytest.skip("smaps_rollup not available")
+    mem = warmup.process_memory(os.getpid())
+    assert mem["rss"] > 0 and 0 < mem["uss"] <= mem["rss"]
+    assert warmup.child_pids(os.getppid()).count(os.getpid()) == 1
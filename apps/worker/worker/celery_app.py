@@ -4,7 +4,15 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
-from celery.signals import worker_shutting_down
+from celery.signals import (
+    celeryd_after_setup,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutting_down,
+)
+
+from app.celery_routing import configure_routing
 
 
 def _redis_broker_url() -> str:
@@ -31,6 +39,31 @@ celery_app = Celery(
         "worker.tasks.translation",
     ],
 )
+# Queues, priorities and acks per task: app.celery_routing (worker profiles: worker.profiles).
+configure_routing(celery_app)
+
+
+@celeryd_after_setup.connect
+def _warm_up_models(sender, instance, **kwargs):  # noqa: ARG001
+    """Load the models configured for this worker's queues in the parent, before the pool forks."""
+    from worker.ml.warmup import warm_up_for_worker
+
+    warm_up_for_worker(instance)
+
+
+@worker_ready.connect
+def _mark_ready(**kwargs):  # noqa: ARG001
+    """Write the readiness file once warm-up is done and the pool is consuming."""
+    from worker.ml.warmup import mark_ready
+
+    mark_ready()
+
+
+@worker_shutting_down.connect
+def _clear_ready(**kwargs):  # noqa: ARG001
+    from worker.ml.warmup import clear_ready
+
+    clear_ready()
 
 
 @worker_shutting_down.connect
@@ -81,11 +114,45 @@ def _fail_stuck_jobs(sig, how, exitcode, **kwargs):  # noqa: ARG001
         asyncio.run(_fail_processing())
     except Exception:
         logger.exception("Failed to run shutdown cleanup")
+
+
+@worker_process_init.connect
+def _init_process_runtime(**kwargs):  # noqa: ARG001
+    """Create the per-process event loop and DB engine used by task DB helpers."""
+    from worker.ml.warmup import on_child_start
+    from worker.runtime import init_runtime
+
+    on_child_start()
+    init_runtime()
+
+
+@worker_process_shutdown.connect
+def _close_process_resources(**kwargs):  # noqa: ARG001
+    """Dispose the DB engine and release pooled S3/MinIO connections held by this worker process."""
+    from app.modules.media.storage import close_storage_clients
+    from worker.runtime import shutdown_runtime
+
+    shutdown_runtime()
+    close_storage_clients()
+
+
 celery_app.conf.beat_schedule = {
     "posts-publish-due-every-minute": {
         "task": "posts.publish_due_scheduled",
         "schedule": crontab(minute="*"),
     },
+    "billing-process-payment-events-every-minute": {
+        "task": "billing.process_payment_events",
+        "schedule": crontab(minute="*"),
+    },
+    "posts-refresh-feed-pull-creators-every-5-minutes": {
+        "task": "posts.refresh_feed_pull_creators",
+        "schedule": crontab(minute="*/5"),
+    },
+    "notify-resume-broadcasts-every-minute": {
+        "task": "notify.resume_broadcasts",
+        "schedule": crontab(minute="*"),
+    },
     "billing-renew-worldline-every-hour": {
         "task": "billing.renew_worldline_subscriptions",
         "schedule": crontab(minute=0),
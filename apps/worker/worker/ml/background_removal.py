@@ -0,0 +1,155 @@
+"""Background removal (ai_tools.remove_background) on long-lived rembg sessions.
+
+rembg.remove() without a session builds a new onnxruntime InferenceSession, and
+reads the model weights from disk, on every call. Here each process keeps one
+session per model (AI_TOOL_RMBG_MODEL: u2net, isnet-general-use or u2netp), opened
+on first use with AI_TOOL_RMBG_INTRA_OP_THREADS intra-op threads. Sessions are never
+shared across a fork: onnxruntime thread pools do not survive it, so a pool child
+opens its own. Inference on a session is serialised by its lock; the intra-op
+threads already spread one image over the cores, so concurrent tasks overlap their
+I/O with it instead of oversubscribing the CPU.
+
+The models see a 320x320 (u2net, u2netp) or 1024x1024 (isnet) input whatever the
+upload size, so the mask is predicted on a copy whose long side is at most
+AI_TOOL_RMBG_MAX_SIDE, upsampled to the original size and applied as its alpha
+channel: the cut-out keeps the full resolution of the upload.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from PIL import Image, ImageChops
+
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+REMBG_MODELS = ("u2net", "isnet-general-use", "u2netp")
+
+
+class StageTimings(dict[str, float]):
+    """Wall-clock milliseconds per named stage, e.g. {"inference_ms": 412.3}."""
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+@dataclass(slots=True)
+class RembgSession:
+    model: str
+    session: Any  # rembg.sessions.BaseSession
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def predict_mask(self, img: Image.Image, timings: StageTimings | None = None) -> Image.Image:
+        """Foreground mask ("L", same size as ``img``)."""
+        timings = StageTimings() if timings is None else timings
+        with timings.stage("inference_wait"):
+            self.lock.acquire()
+        try:
+            with timings.stage("inference"):
+                (mask, *_) = self.session.predict(img)
+        finally:
+            self.lock.release()
+        return mask.convert("L")
+
+
+_sessions: dict[str, RembgSession] = {}
+_sessions_pid: int | None = None
+_sessions_lock = threading.Lock()
+
+
+def _session_class(model: str) -> Any:
+    if model not in REMBG_MODELS:
+        raise ValueError(f"Unknown rembg model {model!r}; known: {list(REMBG_MODELS)}")
+    from rembg.sessions import sessions_class
+
+    return next(cls for cls in sessions_class if cls.name() == model)
+
+
+def _new_session(model: str) -> Any:
+    import onnxruntime as ort
+
+    # rembg.new_session() only takes thread counts from OMP_NUM_THREADS.
+    options = ort.SessionOptions()
+    threads = get_settings().ai_tool_rmbg_intra_op_threads
+    if threads:
+        options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return _session_class(model)(model, options)
+
+
+def get_session(model: str | None = None) -> RembgSession:
+    """This process's session for ``model`` (default AI_TOOL_RMBG_MODEL), opened on first use."""
+    global _sessions_pid
+    model = model or get_settings().ai_tool_rmbg_model
+    with _sessions_lock:
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        entry = _sessions.get(model)
+        if entry is None:
+            started = time.perf_counter()
+            entry = _sessions[model] = RembgSession(model, _new_session(model))
+            logger.info(
+                "rembg session ready",
+                extra={"model": model, "seconds": round(time.perf_counter() - started, 2)},
+            )
+        return entry
+
+
+def prefetch_weights(model: str | None = None) -> Path:
+    """Download the model's weights if missing and read them into the page cache.
+
+    Used by the pre-fork warm-up (worker.ml.warmup): sessions themselves open in the
+    children.
+    """
+    from worker.ml.onnx_backend import prefetch
+
+    model = model or get_settings().ai_tool_rmbg_model
+    path = Path(_session_class(model).download_models())
+    prefetch(path)
+    return path
+
+
+def inference_copy(img: Image.Image, max_side: int) -> Image.Image:
+    """RGB copy of ``img`` with its long side at most ``max_side`` (0 = full size)."""
+    small = img.convert("RGB")
+    if max_side and max(small.size) > max_side:
+        small.thumbnail((max_side, max_side), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    return small
+
+
+def apply_mask(img: Image.Image, mask: Image.Image) -> Image.Image:
+    """``img`` (RGBA) with its alpha multiplied by ``mask`` upsampled to full size."""
+    if mask.size != img.size:
+        mask = mask.resize(img.size, Image.Resampling.BILINEAR)
+    out = img.copy()
+    out.putalpha(ImageChops.multiply(img.getchannel("A"), mask))
+    return out
+
+
+def cut_out(
+    img: Image.Image, model: str | None = None, timings: StageTimings | None = None
+) -> Image.Image:
+    """Cut the foreground out of an RGBA image; the result keeps ``img``'s size."""
+    timings = StageTimings() if timings is None else timings
+    session = get_session(model)
+    with timings.stage("resize"):
+        small = inference_copy(img, get_settings().ai_tool_rmbg_max_side)
+    mask = session.predict_mask(small, timings)
+    with timings.stage("compose"):
+        return apply_mask(img, mask)
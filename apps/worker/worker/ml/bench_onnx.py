@@ -0,0 +1,116 @@
+"""Torch vs ONNX model latency and memory. Run: python -m worker.ml.bench_onnx [--models nsfw,age,segformer,sentence].
+
+Loads each model under each backend (ML_BACKEND=torch|onnx, ML_ONNX_QUANTIZATION
+applies) in a fresh process and prints load time, p50/p95 latency of one input over
+--runs calls, and the process RSS split into anonymous memory (private to the
+process) and file-backed pages (the memory-mapped ONNX weights, shared by every
+worker process). The first ONNX run per model includes the export into
+ML_ONNX_CACHE_DIR. Needs torch, transformers, sentence-transformers, onnx,
+onnxruntime and the models in HF_HOME (downloaded on first run).
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import time
+from collections.abc import Callable
+from typing import Any
+
+_MODELS = ("nsfw", "age", "segformer", "sentence")
+
+
+def _rss_mb() -> dict[str, float]:
+    fields = {"VmRSS": "rss", "RssAnon": "anon", "RssFile": "file"}
+    usage: dict[str, float] = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            key, _, value = line.partition(":")
+            if key in fields:
+                usage[fields[key]] = int(value.split()[0]) / 1024
+    return usage
+
+
+def _runner(model: str) -> Callable[[], Any]:
+    from PIL import Image
+
+    from worker.ml import model_loader
+
+    image = Image.effect_noise((640, 800), 64).convert("RGB")
+    if model in ("nsfw", "age"):
+        load = model_loader.get_nsfw_classifier if model == "nsfw" else model_loader.get_age_classifier
+        processor, classifier = load()
+        pixels = processor(images=[image], return_tensors="pt")["pixel_values"]
+        return lambda: classifier(pixel_values=pixels).logits
+    if model == "segformer":
+        processor, segmenter = model_loader.get_clothing_segmenter()
+        inputs = processor(images=image, return_tensors="pt")
+        return lambda: segmenter(**inputs).logits
+    encoder = model_loader.get_sentence_model()
+    return lambda: encoder.encode("a woman in a red dress standing on the beach at sunset")
+
+
+def _measure(model: str, backend: str, runs: int, results: Any) -> None:
+    os.environ["ML_BACKEND"] = backend
+    import torch
+
+    from app.core.settings import get_settings
+
+    get_settings.cache_clear()
+    start = time.perf_counter()
+    call = _runner(model)
+    loaded = time.perf_counter() - start
+    latencies = []
+    with torch.inference_mode():
+        call()  # warm-up
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    results.put(
+        {
+            "load_s": loaded,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            **_rss_mb(),
+        }
+    )
+
+
+def run(models: list[str], backends: list[str], runs: int) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'model':<10} {'backend':<8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'rss MB':>8} {'anon MB':>8} {'file MB':>8}")
+    for model in models:
+        for backend in backends:
+            results = ctx.Queue()
+            proc = ctx.Process(target=_measure, args=(model, backend, runs, results))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0:
+                print(f"{model:<10} {backend:<8} failed (exit code {proc.exitcode})")
+                continue
+            row = results.get()
+            print(
+                f"{model:<10} {backend:<8} {row['load_s']:>7.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['rss']:>8.0f} {row['anon']:>8.0f} {row['file']:>8.0f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", default=",".join(_MODELS))
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    models = [m for m in args.models.split(",") if m.strip()]
+    unknown = set(models) - set(_MODELS)
+    if unknown:
+        parser.error(f"unknown models: {', '.join(sorted(unknown))}")
+    run(models, [b for b in args.backends.split(",") if b.strip()], args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""AI safety inference throughput. Run: python -m worker.ml.bench_safety [--batch-sizes 1,2,4,8,16].
+
+Classifies --images images (from --image-dir, else synthetic noise images) with the
+batched SafetyClassifier at each batch size and prints images/sec, optionally after
+the old per-image path (--pipeline-baseline: the two HF pipelines, one image at a
+time). Set AI_SAFETY_TORCH_THREADS to compare intra-op thread counts. Needs torch,
+transformers and the models in HF_HOME (downloaded on first run).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from worker.ml.safety_batch import SafetyClassifier
+
+
+def _load_images(image_dir: str | None, count: int) -> list[Image.Image]:
+    if image_dir:
+        paths = sorted(p for p in Path(image_dir).iterdir() if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".webp"})
+        images = [Image.open(p).convert("RGB") for p in paths[:count]]
+        if images:
+            return [images[i % len(images)] for i in range(count)]
+    return [Image.effect_noise((640, 800), 64 + i % 64).convert("RGB") for i in range(count)]
+
+
+def _pipeline_baseline(images: list[Image.Image]) -> float:
+    from transformers import pipeline
+
+    from worker.ml.model_loader import AGE_MODEL, NSFW_MODEL
+
+    nsfw_pipe = pipeline("image-classification", model=NSFW_MODEL, device=-1)
+    age_pipe = pipeline("image-classification", model=AGE_MODEL, device=-1)
+    nsfw_pipe(images[0])
+    age_pipe(images[0])
+    start = time.perf_counter()
+    for img in images:
+        nsfw_pipe(img)
+        age_pipe(img)
+    return len(images) / (time.perf_counter() - start)
+
+
+def run(batch_sizes: list[int], count: int, image_dir: str | None, baseline: bool) -> None:
+    images = _load_images(image_dir, count)
+    if baseline:
+        print(f"pipelines, one image at a time: {_pipeline_baseline(images):.1f} images/s")
+    classifier = SafetyClassifier()
+    print(f"shared preprocessing tensor: {classifier.shared_pixels}")
+    classifier(images[:1])  # warm-up
+    for size in batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(images), size):
+            classifier(images[i : i + size])
+        elapsed = time.perf_counter() - start
+        print(f"batch size {size:>3}: {len(images) / elapsed:.1f} images/s ({elapsed:.2f}s for {len(images)})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-sizes", default="1,2,4,8,16")
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--image-dir")
+    parser.add_argument("--pipeline-baseline", action="store_true")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.batch_sizes.split(",") if s.strip()]
+    run(sizes, args.images, args.image_dir, args.pipeline_baseline)
+
+
+if __name__ == "__main__":
+    main()
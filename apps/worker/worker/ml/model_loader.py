@@ -8,15 +8,25 @@ Environment variables:
   to avoid downloading at runtime.
 
 IMPORTANT: Only ONE copy of each model is loaded per worker process.
-Set Celery concurrency to 1-2 to avoid multiple copies in memory.
+Set Celery concurrency to 1-2 to avoid multiple copies in memory, or use the
+threads pool (one copy shared by all threads; the AI safety classifiers are
+batched across those threads by worker.ml.safety_batch).
+
+ML_BACKEND=onnx serves the NSFW, age, sentence and clothing segmentation models
+through onnxruntime (worker.ml.onnx_backend): quantised, exported once to
+ML_ONNX_CACHE_DIR and memory-mapped, so worker processes share one copy of the
+weights. Callers see the same interfaces either way.
 """
 
 from __future__ import annotations
 
 import logging
 import os
+from pathlib import Path
 from typing import Any
 
+from app.core.settings import get_settings
+
 logger = logging.getLogger(__name__)
 
 # Ensure stable cache paths (set in Dockerfile, but also set here as fallback)
@@ -24,53 +34,70 @@ _HF_HOME = os.environ.get("HF_HOME", "/app/models")
 os.environ.setdefault("HF_HOME", _HF_HOME)
 os.environ.setdefault("TRANSFORMERS_CACHE", os.path.join(_HF_HOME, "transformers"))
 
+
+def _use_onnx() -> bool:
+    return get_settings().ml_backend == "onnx"
+
+
+def model_version(name: str) -> str:
+    """Model name as recorded on result rows, with the backend if not torch."""
+    if _use_onnx() and name in ONNX_MODELS:
+        from worker.ml.onnx_backend import backend_tag
+
+        return f"{name}+{backend_tag()}"
+    return name
+
+
 # --- NSFW classifier ---
-_nsfw_pipe: Any = None
+_nsfw_processor: Any = None
+_nsfw_model: Any = None
 
 NSFW_MODEL = "Falconsai/nsfw_image_detection"
 
 
-def get_nsfw_pipeline() -> Any:
-    """Return a cached HuggingFace image-classification pipeline for NSFW detection."""
-    global _nsfw_pipe
-    if _nsfw_pipe is None:
-        logger.info("Loading NSFW model: %s", NSFW_MODEL)
-        from transformers import pipeline
+def _load_image_classifier(name: str) -> tuple[Any, Any]:
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
 
-        _nsfw_pipe = pipeline(
-            "image-classification",
-            model=NSFW_MODEL,
-            device=-1,
-        )
+    processor = AutoImageProcessor.from_pretrained(name)
+    if _use_onnx():
+        from worker.ml.onnx_backend import load_image_model
+
+        return processor, load_image_model(name, AutoModelForImageClassification, processor)
+    model = AutoModelForImageClassification.from_pretrained(name)
+    model.eval()
+    return processor, model
+
+
+def get_nsfw_classifier() -> tuple[Any, Any]:
+    """Return (image processor, model) for NSFW detection. Cached."""
+    global _nsfw_processor, _nsfw_model
+    if _nsfw_processor is None or _nsfw_model is None:
+        logger.info("Loading NSFW model: %s", NSFW_MODEL)
+        _nsfw_processor, _nsfw_model = _load_image_classifier(NSFW_MODEL)
         logger.info("NSFW model loaded")
-    return _nsfw_pipe
+    return _nsfw_processor, _nsfw_model
 
 
 # --- Age-range classifier (PROXY signal only — not definitive age determination) ---
-_age_pipe: Any = None
+_age_processor: Any = None
+_age_model: Any = None
 
 AGE_MODEL = "nateraw/vit-age-classifier"
 
 
-def get_age_pipeline() -> Any:
-    """Return a cached HuggingFace image-classification pipeline for age-range estimation.
+def get_age_classifier() -> tuple[Any, Any]:
+    """Return (image processor, model) for age-range estimation. Cached.
 
     NOTE: This is a proxy signal only. The classifier predicts apparent age ranges
     from facial features. It is NOT a reliable age determination tool. All outputs
     must be validated by human review before enforcement.
     """
-    global _age_pipe
-    if _age_pipe is None:
+    global _age_processor, _age_model
+    if _age_processor is None or _age_model is None:
         logger.info("Loading age-range proxy model: %s", AGE_MODEL)
-        from transformers import pipeline
-
-        _age_pipe = pipeline(
-            "image-classification",
-            model=AGE_MODEL,
-            device=-1,
-        )
+        _age_processor, _age_model = _load_image_classifier(AGE_MODEL)
         logger.info("Age-range proxy model loaded")
-    return _age_pipe
+    return _age_processor, _age_model
 
 
 # --- BLIP image captioning ---
@@ -118,16 +145,25 @@ _sentence_model: Any = None
 
 SENTENCE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIM = 384
+SENTENCE_MAX_SEQ_LENGTH = 256  # max_seq_length in the model's sentence_bert_config.json
 
 
 def get_sentence_model() -> Any:
-    """Return a cached SentenceTransformer for text embeddings (384-dim)."""
+    """Return a cached SentenceTransformer for text embeddings (384-dim).
+
+    Under ML_BACKEND=onnx this is an OnnxSentenceEncoder with the same encode().
+    """
     global _sentence_model
     if _sentence_model is None:
         logger.info("Loading sentence model: %s", SENTENCE_MODEL)
-        from sentence_transformers import SentenceTransformer
+        if _use_onnx():
+            from worker.ml.onnx_backend import load_sentence_encoder
 
-        _sentence_model = SentenceTransformer(SENTENCE_MODEL, device="cpu")
+            _sentence_model = load_sentence_encoder(SENTENCE_MODEL, SENTENCE_MAX_SEQ_LENGTH)
+        else:
+            from sentence_transformers import SentenceTransformer
+
+            _sentence_model = SentenceTransformer(SENTENCE_MODEL, device="cpu")
         logger.info("Sentence model loaded")
     return _sentence_model
 
@@ -151,11 +187,45 @@ def get_clothing_segmenter() -> tuple[Any, Any]:
         from transformers import AutoModelForSemanticSegmentation, SegformerImageProcessor
 
         _clothing_seg_processor = SegformerImageProcessor.from_pretrained(CLOTHING_SEG_MODEL)
-        _clothing_seg_model = AutoModelForSemanticSegmentation.from_pretrained(CLOTHING_SEG_MODEL)
+        if _use_onnx():
+            from worker.ml.onnx_backend import load_image_model
+
+            _clothing_seg_model = load_image_model(
+                CLOTHING_SEG_MODEL, AutoModelForSemanticSegmentation, _clothing_seg_processor
+            )
+        else:
+            _clothing_seg_model = AutoModelForSemanticSegmentation.from_pretrained(CLOTHING_SEG_MODEL)
         logger.info("Clothing segmenter loaded")
     return _clothing_seg_processor, _clothing_seg_model
 
 
+# Models ML_BACKEND=onnx serves through onnxruntime; the rest always run on torch.
+ONNX_MODELS = frozenset({NSFW_MODEL, AGE_MODEL, SENTENCE_MODEL, CLOTHING_SEG_MODEL})
+
+
+def export_onnx_model(name: str) -> Path:
+    """Path of the cached ONNX export for an ONNX_MODELS entry, without opening a session.
+
+    onnxruntime sessions start their own thread pools, which do not survive a fork:
+    the pre-fork warm-up (worker.ml.warmup) exports and prefetches, children open.
+    """
+    from worker.ml import onnx_backend
+
+    if name == SENTENCE_MODEL:
+        return onnx_backend.export_sentence_encoder(name)
+    if name == CLOTHING_SEG_MODEL:
+        from transformers import AutoModelForSemanticSegmentation, SegformerImageProcessor
+
+        return onnx_backend.export_image_model(
+            name, AutoModelForSemanticSegmentation, SegformerImageProcessor.from_pretrained(name)
+        )
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+    return onnx_backend.export_image_model(
+        name, AutoModelForImageClassification, AutoImageProcessor.from_pretrained(name)
+    )
+
+
 # --- Virtual Try-On: CatVTON pipeline (ICLR 2025) ---
 _catvton_pipe: Any = None
 
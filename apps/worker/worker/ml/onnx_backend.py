@@ -0,0 +1,296 @@
+"""ONNX Runtime backend for the worker's encoder models (ML_BACKEND=onnx).
+
+Serves the NSFW and age ViT classifiers, the SegFormer clothing segmenter and the
+MiniLM sentence encoder through onnxruntime instead of float32 PyTorch. BLIP and GIT
+stay on torch: captioning is an autoregressive generate() loop, not one forward pass.
+
+On first use a model is exported from its HF checkpoint (torch.onnx, opset 17,
+dynamic batch/sequence axes), quantised per ML_ONNX_QUANTIZATION (int8: dynamic
+MatMul quantisation, the CPU default; fp16: half-precision weights with float32
+inputs/outputs; none), graph-optimised offline and written to
+ML_ONNX_CACHE_DIR/<model>-<quantization>-v<ONNX_EXPORT_VERSION>/ as model.onnx plus
+its weights in model.onnx.data. Exports happen under a file lock in a temporary
+directory that is renamed into place, so concurrent workers never see a partial model.
+
+Sessions load with graph optimisation and weight prepacking off, so onnxruntime maps
+model.onnx.data into memory read-only instead of copying the weights to the heap:
+every Celery child (forked or not) serving the same model shares one copy in the page
+cache. python -m worker.ml.bench_onnx compares latency and RSS with the torch models.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when the export or quantisation recipe changes: old cache entries are ignored.
+ONNX_EXPORT_VERSION = 1
+_OPSET = 17
+_MODEL_FILE = "model.onnx"
+_DATA_FILE = "model.onnx.data"
+# Smaller initializers (biases, norms) stay inline in model.onnx.
+_EXTERNAL_MIN_BYTES = 1024
+
+_INPUT_AXES: dict[str, dict[int, str]] = {
+    "pixel_values": {0: "batch"},
+    "input_ids": {0: "batch", 1: "sequence"},
+    "attention_mask": {0: "batch", 1: "sequence"},
+    "token_type_ids": {0: "batch", 1: "sequence"},
+}
+_OUTPUT_AXES: dict[str, dict[int, str]] = {
+    "logits": {0: "batch"},
+    "last_hidden_state": {0: "batch", 1: "sequence"},
+}
+
+
+def quantization() -> str:
+    return get_settings().ml_onnx_quantization
+
+
+def backend_tag() -> str:
+    """Suffix recorded next to model names, e.g. "onnx-int8"."""
+    return f"onnx-{quantization()}"
+
+
+def cache_dir() -> Path:
+    configured = get_settings().ml_onnx_cache_dir
+    return Path(configured or os.path.join(os.environ.get("HF_HOME", "/app/models"), "onnx"))
+
+
+def model_path(name: str) -> Path:
+    slug = name.replace("/", "--")
+    return cache_dir() / f"{slug}-{quantization()}-v{ONNX_EXPORT_VERSION}" / _MODEL_FILE
+
+
+def ensure_exported(
+    name: str,
+    load_torch_model: Callable[[], Any],
+    sample_inputs: Callable[[], Mapping[str, Any]],
+    output_name: str,
+) -> Path:
+    """Path of ``name``'s cached ONNX model, exporting it first if missing."""
+    path = model_path(name)
+    if path.exists():
+        return path
+    root = path.parent.parent
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / f".{path.parent.name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if path.exists():  # another worker exported it while we waited
+            return path
+        staging = Path(tempfile.mkdtemp(dir=root, prefix=f".{path.parent.name}-"))
+        try:
+            logger.info("Exporting %s to ONNX (%s)", name, quantization())
+            _export(load_torch_model(), dict(sample_inputs()), output_name, staging)
+            os.rename(staging, path.parent)
+            logger.info("ONNX model cached at %s", path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return path
+
+
+def _export(model: Any, sample: dict[str, Any], output_name: str, dest: Path) -> None:
+    import onnx
+    import torch
+
+    names = list(sample)
+
+    class _Forward(torch.nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args: Any) -> Any:
+            return self.model(**dict(zip(names, args)), return_dict=False)[0]
+
+    fp32 = dest / "fp32.onnx"
+    model.eval()
+    with torch.inference_mode():
+        torch.onnx.export(
+            _Forward(),
+            tuple(sample.values()),
+            str(fp32),
+            input_names=names,
+            output_names=[output_name],
+            dynamic_axes={**{n: _INPUT_AXES[n] for n in names}, output_name: _OUTPUT_AXES[output_name]},
+            opset_version=_OPSET,
+            do_constant_folding=True,
+        )
+
+    staged = dest / "staged.onnx"
+    mode = quantization()
+    if mode == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            str(fp32),
+            str(staged),
+            weight_type=QuantType.QInt8,
+            # ConvInteger is slow on CPU: the SegFormer convolutions stay float.
+            op_types_to_quantize=["MatMul", "Attention"],
+            use_external_data_format=True,
+        )
+        proto = onnx.load(str(staged))
+    elif mode == "fp16":
+        from onnxruntime.transformers.float16 import convert_float_to_float16
+
+        proto = convert_float_to_float16(onnx.load(str(fp32)), keep_io_types=True)
+    else:
+        proto = onnx.load(str(fp32))
+    onnx.save_model(
+        proto,
+        str(staged),
+        save_as_external_data=True,
+        all_tensors_to_one_file=True,
+        location="staged.onnx.data",
+        size_threshold=_EXTERNAL_MIN_BYTES,
+    )
+    _optimize_offline(staged, dest / _MODEL_FILE)
+    for leftover in dest.iterdir():
+        if leftover.name not in (_MODEL_FILE, _DATA_FILE):
+            leftover.unlink()
+
+
+def _optimize_offline(src: Path, dest: Path) -> None:
+    """Run the CPU graph optimisations once and save the result, weights external."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = str(dest)
+    options.add_session_config_entry("session.optimized_model_external_initializers_file_name", _DATA_FILE)
+    options.add_session_config_entry(
+        "session.optimized_model_external_initializers_min_size_in_bytes", str(_EXTERNAL_MIN_BYTES)
+    )
+    ort.InferenceSession(str(src), options, providers=["CPUExecutionProvider"])
+
+
+def load_session(path: Path) -> Any:
+    """An inference session whose weights stay memory-mapped from model.onnx.data."""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    # Already optimised offline; runtime passes and prepacking would copy weights to the heap.
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    options.add_session_config_entry("session.disable_prepacking", "1")
+    threads = get_settings().ml_onnx_intra_op_threads
+    if threads:
+        options.intra_op_num_threads = threads
+    return ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+
+class OnnxModel:
+    """Drop-in for an HF model's forward pass: ``model(**inputs).<output>`` as a torch tensor."""
+
+    def __init__(self, session: Any, config: Any, output_name: str) -> None:
+        self.session = session
+        self.config = config
+        self._output_name = output_name
+        self._input_names = [i.name for i in session.get_inputs()]
+
+    def __call__(self, **inputs: Any) -> SimpleNamespace:
+        import torch
+
+        feeds = {name: _numpy(inputs[name]) for name in self._input_names}
+        (output,) = self.session.run([self._output_name], feeds)
+        return SimpleNamespace(**{self._output_name: torch.from_numpy(output)})
+
+    def eval(self) -> OnnxModel:
+        return self
+
+
+class OnnxSentenceEncoder:
+    """SentenceTransformer.encode() for a mean-pooled, L2-normalised BERT encoder."""
+
+    def __init__(self, session: Any, tokenizer: Any, max_seq_length: int) -> None:
+        self.session = session
+        self._tokenizer = tokenizer
+        self._max_seq_length = max_seq_length
+        self._input_names = [i.name for i in session.get_inputs()]
+
+    def encode(self, sentences: str | list[str]) -> np.ndarray:
+        single = isinstance(sentences, str)
+        encoded = self._tokenizer(
+            [sentences] if single else list(sentences),
+            padding=True,
+            truncation=True,
+            max_length=self._max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {name: np.asarray(encoded[name], dtype=np.int64) for name in self._input_names}
+        (hidden,) = self.session.run(["last_hidden_state"], feeds)
+        mask = np.asarray(encoded["attention_mask"], dtype=np.float32)[..., None]
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled[0] if single else pooled
+
+
+def _numpy(value: Any) -> np.ndarray:
+    return value.detach().cpu().numpy() if hasattr(value, "detach") else np.asarray(value)
+
+
+def export_image_model(name: str, model_cls: Any, processor: Any) -> Path:
+    """Cached ONNX export of ``model_cls.from_pretrained(name)`` (logits output)."""
+    from PIL import Image
+
+    return ensure_exported(
+        name,
+        lambda: model_cls.from_pretrained(name),
+        lambda: {"pixel_values": processor(images=[Image.new("RGB", (256, 256))], return_tensors="pt")["pixel_values"]},
+        "logits",
+    )
+
+
+def load_image_model(name: str, model_cls: Any, processor: Any) -> OnnxModel:
+    """``model_cls.from_pretrained(name)`` served from its ONNX export."""
+    from transformers import AutoConfig
+
+    path = export_image_model(name, model_cls, processor)
+    return OnnxModel(load_session(path), AutoConfig.from_pretrained(name), "logits")
+
+
+def export_sentence_encoder(name: str, tokenizer: Any = None) -> Path:
+    """Cached ONNX export of a sentence-transformers BERT model (last_hidden_state output)."""
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = tokenizer or AutoTokenizer.from_pretrained(name)
+    return ensure_exported(
+        name,
+        lambda: AutoModel.from_pretrained(name),
+        lambda: dict(tokenizer(["an example sentence"], return_tensors="pt")),
+        "last_hidden_state",
+    )
+
+
+def load_sentence_encoder(name: str, max_seq_length: int) -> OnnxSentenceEncoder:
+    """A sentence-transformers BERT model (mean pooling + normalisation) from its ONNX export."""
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    path = export_sentence_encoder(name, tokenizer)
+    return OnnxSentenceEncoder(load_session(path), tokenizer, max_seq_length)
+
+
+def prefetch(path: Path) -> None:
+    """Ask the kernel to read an exported model's weights into the page cache."""
+    for file in (path, path.with_name(_DATA_FILE)):
+        if not file.exists():
+            continue
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
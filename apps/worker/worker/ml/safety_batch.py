@@ -0,0 +1,259 @@
+"""Micro-batched AI safety inference (NSFW + age-range proxy).
+
+scan_image tasks hand their decoded image to the process's batcher instead of
+running the two classifiers one image at a time. A daemon thread collects
+submissions until AI_SAFETY_BATCH_MAX_SIZE images are waiting or the first one has
+waited AI_SAFETY_BATCH_MAX_WAIT_MS, preprocesses the batch once into a pixel tensor
+shared by both ViT models (same input size and normalisation, checked at load;
+otherwise each model gets its own tensor) and runs one forward pass per model.
+
+Batches only fill when several scans run in the process at once: run the ai_safety
+worker with the threads pool (celery worker -P threads -c 8). Under prefork -c 1
+every batch holds a single image.
+
+Images/sec per batch size is kept in batch_stats() and logged every
+_STATS_LOG_EVERY batches; python -m worker.ml.bench_safety measures it offline.
+
+The age-range classifier is a PROXY signal only (see worker.tasks.ai_safety).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any
+
+from PIL import Image
+
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_STATS_LOG_EVERY = 100
+# Image processor attributes that decide the pixel tensor a ViT model sees.
+_PREPROCESSING_ATTRS = (
+    "do_resize",
+    "size",
+    "resample",
+    "do_rescale",
+    "rescale_factor",
+    "do_normalize",
+    "image_mean",
+    "image_std",
+)
+
+_STOP = object()
+
+
+@dataclass(slots=True)
+class _BatchStats:
+    batches: int = 0
+    images: int = 0
+    seconds: float = 0.0
+
+
+class MicroBatcher[T, R]:
+    """Runs ``fn(items) -> results`` over dynamic micro-batches of submitted items.
+
+    A batch closes when ``max_size`` items are collected or ``max_wait`` seconds after
+    its first item arrived. The worker thread is started on first submit (after the
+    Celery prefork), and again in a forked child.
+    """
+
+    def __init__(
+        self, fn: Callable[[list[T]], list[R]], *, max_size: int, max_wait: float, name: str
+    ) -> None:
+        self._fn = fn
+        self._max_size = max_size
+        self._max_wait = max_wait
+        self._name = name
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._stats: dict[int, _BatchStats] = {}
+        self._batches = 0
+
+    def submit(self, item: T) -> Future[R]:
+        future: Future[R] = Future()
+        self._ensure_thread()
+        self._queue.put((item, future))
+        return future
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._stats = {}
+                self._batches = 0
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name=self._name, daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """Stop the worker thread after the batches already submitted."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._queue.put(_STOP)
+        thread.join()
+
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._run(batch)
+            if stopping:
+                return
+
+    def _run(self, batch: list[tuple[T, Future[R]]]) -> None:
+        pending = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+        start = time.perf_counter()
+        try:
+            results = self._fn([item for item, _future in pending])
+            if len(results) != len(pending):
+                raise RuntimeError(f"{self._name}: {len(results)} results for {len(pending)} items")
+        except BaseException as exc:
+            for _item, future in pending:
+                future.set_exception(exc)
+            return
+        elapsed = time.perf_counter() - start
+        for (_item, future), result in zip(pending, results):
+            future.set_result(result)
+        self._record(len(pending), elapsed)
+
+    def _record(self, size: int, elapsed: float) -> None:
+        stats = self._stats.setdefault(size, _BatchStats())
+        stats.batches += 1
+        stats.images += size
+        stats.seconds += elapsed
+        self._batches += 1
+        logger.debug(
+            "%s batch size=%d seconds=%.3f images_per_second=%.1f",
+            self._name,
+            size,
+            elapsed,
+            size / elapsed if elapsed else 0.0,
+        )
+        if self._batches % _STATS_LOG_EVERY == 0:
+            logger.info("%s throughput %s", self._name, self.stats())
+
+    def stats(self) -> dict[int, dict[str, float]]:
+        """Per batch size: batches, images, seconds and images_per_second."""
+        return {
+            size: {
+                "batches": s.batches,
+                "images": s.images,
+                "seconds": round(s.seconds, 3),
+                "images_per_second": round(s.images / s.seconds, 2) if s.seconds else 0.0,
+            }
+            for size, s in sorted(self._stats.items())
+        }
+
+
+@dataclass(slots=True)
+class SafetyScores:
+    """Class probabilities per label, for one image."""
+
+    nsfw: dict[str, float]
+    age: dict[str, float]
+
+
+def _same_preprocessing(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and all(
+        getattr(a, attr, None) == getattr(b, attr, None) for attr in _PREPROCESSING_ATTRS
+    )
+
+
+class SafetyClassifier:
+    """Batched NSFW + age-range classification over PIL images."""
+
+    def __init__(self) -> None:
+        import torch
+
+        from worker.ml.model_loader import get_age_classifier, get_nsfw_classifier
+
+        threads = get_settings().ai_safety_torch_threads
+        if threads:
+            torch.set_num_threads(threads)
+        self._nsfw_processor, self._nsfw_model = get_nsfw_classifier()
+        self._age_processor, self._age_model = get_age_classifier()
+        self.shared_pixels = _same_preprocessing(self._nsfw_processor, self._age_processor)
+        if not self.shared_pixels:
+            logger.info("AI safety models preprocess differently; using one tensor per model")
+
+    def __call__(self, images: list[Image.Image]) -> list[SafetyScores]:
+        import torch
+
+        with torch.inference_mode():
+            pixels = self._nsfw_processor(images=images, return_tensors="pt")["pixel_values"]
+            nsfw = self._nsfw_model(pixel_values=pixels).logits.softmax(dim=-1).tolist()
+            if not self.shared_pixels:
+                pixels = self._age_processor(images=images, return_tensors="pt")["pixel_values"]
+            age = self._age_model(pixel_values=pixels).logits.softmax(dim=-1).tolist()
+        nsfw_labels = self._nsfw_model.config.id2label
+        age_labels = self._age_model.config.id2label
+        return [
+            SafetyScores(
+                nsfw={nsfw_labels[i]: p for i, p in enumerate(nsfw_row)},
+                age={age_labels[i]: p for i, p in enumerate(age_row)},
+            )
+            for nsfw_row, age_row in zip(nsfw, age)
+        ]
+
+
+_batcher: MicroBatcher[Image.Image, SafetyScores] | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_safety_batcher() -> MicroBatcher[Image.Image, SafetyScores]:
+    """This process's safety batcher (models load on first use)."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            settings = get_settings()
+            classifier: SafetyClassifier | None = None
+
+            def _classify(images: list[Image.Image]) -> list[SafetyScores]:
+                nonlocal classifier
+                if classifier is None:
+                    classifier = SafetyClassifier()
+                return classifier(images)
+
+            _batcher = MicroBatcher(
+                _classify,
+                max_size=settings.ai_safety_batch_max_size,
+                max_wait=settings.ai_safety_batch_max_wait_ms / 1000,
+                name="ai-safety-batch",
+            )
+        return _batcher
+
+
+def batch_stats() -> dict[int, dict[str, float]]:
+    """Images/sec per batch size observed by this process's safety batcher."""
+    return _batcher.stats() if _batcher is not None else {}
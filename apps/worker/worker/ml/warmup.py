@@ -0,0 +1,248 @@
+"""Pre-fork model warm-up and readiness for Celery workers.
+
+Models otherwise load lazily on the first task in each pool child: the first scan
+after a deploy pays the cold load, and every child of a prefork pool holds its own
+copy of the weights. WORKER_WARMUP_MODELS names the models to load for each queue
+the worker consumes (-Q); the celeryd_after_setup hook loads them in the parent
+before the pool forks:
+
+    WORKER_WARMUP_MODELS="celery=nsfw,age,sentence;gpu=" celery -A worker.celery_app worker -c 4
+
+Torch weights are put in eval mode with gradients off and, once loaded, every
+Python object in the parent is moved to the permanent GC generation (gc.freeze), so
+collections in the children never touch those objects' pages and the weights stay
+shared copy-on-write. gc is off in the parent during warm-up and turned back on in
+each child and, after the fork, in the parent. No inference runs in the parent:
+intra-op thread pools do not survive a fork. Models served by onnxruntime
+(ML_BACKEND=onnx) are exported and prefetched into the page cache instead, and so are
+the rembg weights (AI_TOOL_RMBG_MODEL); each child opens its session on first use.
+
+The worker writes WORKER_READY_FILE (JSON: pid, startup and per-model warm-up
+seconds) on worker_ready, i.e. after warm-up and pool start, and removes it on
+shutdown; container health checks test for it. python -m worker.ml.warmup prints
+per-process RSS/PSS/USS for a running worker's parent and children.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import os
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.core.settings import get_settings
+from worker.ml import background_removal, model_loader
+
+logger = logging.getLogger(__name__)
+
+# Short name -> (HF model, loader). Loaders are the model_loader getters tasks use.
+MODELS: dict[str, tuple[str, Callable[[], Any]]] = {
+    "nsfw": (model_loader.NSFW_MODEL, model_loader.get_nsfw_classifier),
+    "age": (model_loader.AGE_MODEL, model_loader.get_age_classifier),
+    "sentence": (model_loader.SENTENCE_MODEL, model_loader.get_sentence_model),
+    "blip": (model_loader.BLIP_MODEL, model_loader.get_blip_model),
+    "git": (model_loader.GIT_MODEL, model_loader.get_git_model),
+    "segformer": (model_loader.CLOTHING_SEG_MODEL, model_loader.get_clothing_segmenter),
+    "tryon": (model_loader.CATVTON_BASE_MODEL, model_loader.get_tryon_pipeline),
+    "rembg": ("rembg", background_removal.prefetch_weights),
+}
+
+_ANY_QUEUE = "*"
+
+
+@dataclass
+class WarmupReport:
+    models: dict[str, float] = field(default_factory=dict)  # seconds per model
+    failed: dict[str, str] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+_report: WarmupReport | None = None
+_gc_disabled = False
+
+
+def parse_warmup_config(raw: str) -> dict[str, tuple[str, ...]]:
+    """``"a=nsfw,age;b=segformer"`` -> {"a": ("nsfw", "age"), "b": ("segformer",)}.
+
+    Entries without ``queue=`` apply to every queue.
+    """
+    config: dict[str, tuple[str, ...]] = {}
+    for entry in raw.split(";"):
+        if not entry.strip():
+            continue
+        queue, sep, names = entry.partition("=")
+        if not sep:
+            queue, names = _ANY_QUEUE, entry
+        models = tuple(n.strip() for n in names.split(",") if n.strip())
+        unknown = [n for n in models if n not in MODELS]
+        if unknown:
+            raise ValueError(f"WORKER_WARMUP_MODELS: unknown models {unknown}; known: {sorted(MODELS)}")
+        config[queue.strip()] = config.get(queue.strip(), ()) + models
+    return config
+
+
+def models_for_queues(queues: Iterable[str], raw: str | None = None) -> list[str]:
+    """Models to warm up for a worker consuming ``queues``, in configured order."""
+    config = parse_warmup_config(get_settings().worker_warmup_models if raw is None else raw)
+    selected: list[str] = []
+    for queue in [_ANY_QUEUE, *queues]:
+        for name in config.get(queue, ()):
+            if name not in selected:
+                selected.append(name)
+    return selected
+
+
+def _freeze(loaded: Any) -> None:
+    for obj in loaded if isinstance(loaded, tuple) else (loaded,):
+        if hasattr(obj, "requires_grad_") and hasattr(obj, "eval"):
+            obj.eval()
+            obj.requires_grad_(False)
+
+
+def warm_up(models: list[str]) -> WarmupReport:
+    """Load ``models`` in this (parent) process and freeze the heap for copy-on-write."""
+    global _report, _gc_disabled
+    onnx = get_settings().ml_backend == "onnx"
+    report = WarmupReport()
+    if gc.isenabled():
+        gc.disable()
+        _gc_disabled = True
+    start = time.perf_counter()
+    for key in models:
+        name, load = MODELS[key]
+        t0 = time.perf_counter()
+        try:
+            if onnx and name in model_loader.ONNX_MODELS:
+                from worker.ml.onnx_backend import prefetch
+
+                prefetch(model_loader.export_onnx_model(name))
+            else:
+                _freeze(load())
+        except Exception as exc:
+            # The model loads lazily in the children instead.
+            logger.exception("Model warm-up failed", extra={"model": key})
+            report.failed[key] = str(exc)[:500]
+            continue
+        report.models[key] = round(time.perf_counter() - t0, 2)
+        logger.info("Model warmed up", extra={"model": key, "seconds": report.models[key]})
+    gc.collect()
+    gc.freeze()
+    report.seconds = round(time.perf_counter() - start, 2)
+    logger.info(
+        "Model warm-up done",
+        extra={"seconds": report.seconds, "models": list(report.models), "failed": list(report.failed)},
+    )
+    _report = report
+    return report
+
+
+def warm_up_for_worker(worker: Any) -> WarmupReport | None:
+    """celeryd_after_setup: warm up the models configured for the worker's queues."""
+    clear_ready()  # a restarted container keeps /tmp
+    queues = list(worker.app.amqp.queues.consume_from)
+    models = models_for_queues(queues)
+    if not models:
+        return None
+    logger.info("Warming up models before fork", extra={"queues": queues, "models": models})
+    return warm_up(models)
+
+
+def on_child_start() -> None:
+    """worker_process_init: children collect garbage again (frozen objects are skipped)."""
+    if _gc_disabled:
+        gc.enable()
+
+
+def _process_age_seconds() -> float:
+    with open("/proc/self/stat") as f:
+        start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def mark_ready() -> dict[str, Any]:
+    """worker_ready: re-enable gc in the parent and write the readiness file."""
+    global _gc_disabled
+    if _gc_disabled:
+        gc.enable()
+        _gc_disabled = False
+    state = {
+        "pid": os.getpid(),
+        "ready_at": time.time(),
+        "startup_seconds": round(_process_age_seconds(), 2),
+        "warmup": asdict(_report) if _report is not None else None,
+    }
+    path = Path(get_settings().worker_ready_file)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+    logger.info("Worker ready", extra={"startup_seconds": state["startup_seconds"]})
+    return state
+
+
+def clear_ready() -> None:
+    Path(get_settings().worker_ready_file).unlink(missing_ok=True)
+
+
+def process_memory(pid: int) -> dict[str, float]:
+    """RSS, PSS, USS (private) and shared memory of ``pid`` in MB."""
+    kb: dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                kb[key] = int(value.split()[0])
+    return {
+        "rss": kb.get("Rss", 0) / 1024,
+        "pss": kb.get("Pss", 0) / 1024,
+        "uss": (kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0)) / 1024,
+        "shared": (kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) / 1024,
+    }
+
+
+def child_pids(pid: int) -> list[int]:
+    children = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            ppid = int(stat.read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(stat.parent.name))
+    return sorted(children)
+
+
+def _print_worker(pid: int, state: dict[str, Any]) -> None:
+    if state:
+        warmup = state.get("warmup") or {}
+        print(f"startup {state['startup_seconds']:.1f}s, warm-up {warmup.get('seconds', 0):.1f}s {warmup.get('models', {})}")
+    print(f"{'process':<16} {'rss MB':>8} {'pss MB':>8} {'uss MB':>8} {'shared MB':>10}")
+    for role, p in [("parent", pid), *(("child", c) for c in child_pids(pid))]:
+        mem = process_memory(p)
+        print(f"{role + ' ' + str(p):<16} {mem['rss']:>8.0f} {mem['pss']:>8.0f} {mem['uss']:>8.0f} {mem['shared']:>10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-process memory of a running Celery worker.")
+    parser.add_argument("--pid", type=int, help="worker parent pid (default: from WORKER_READY_FILE)")
+    args = parser.parse_args()
+    if args.pid is not None:
+        _print_worker(args.pid, {})
+        return
+    state = json.loads(Path(get_settings().worker_ready_file).read_text())
+    # Several profiles under worker.profiles: one entry per worker.
+    for name, worker_state in state.get("profiles", {}).items() or [(None, state)]:
+        if name:
+            print(f"== {name}")
+        _print_worker(worker_state["pid"], worker_state)
+
+
+if __name__ == "__main__":
+    main()
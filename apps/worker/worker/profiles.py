@@ -0,0 +1,162 @@
+"""Celery worker profiles: one worker per queue class, each with its own pool settings.
+
+Run: python -m worker.profiles ml-light            (exec a single worker)
+     python -m worker.profiles fast ml-light ml-heavy  (several workers, one container)
+     python -m worker.profiles --print ml-heavy    (print the celery command)
+
+Queues and task routes are defined in app.celery_routing. A profile fixes the
+queues a worker consumes, its pool, concurrency and prefetch multiplier: heavy and
+acks_late queues prefetch one message per process so a long job never holds others
+back; the I/O- and batch-bound queues use the threads pool (ml-light batches AI
+safety inference across threads, worker.ml.safety_batch). Override a profile's
+concurrency with CELERY_CONCURRENCY_<PROFILE> (e.g. CELERY_CONCURRENCY_ML_LIGHT=16);
+"all" keeps the single-worker layout and honours CELERY_CONCURRENCY.
+
+Models are warmed per consumed queue (WORKER_WARMUP_MODELS, worker.ml.warmup).
+With several profiles each worker writes WORKER_READY_FILE.<profile>; this
+supervisor writes WORKER_READY_FILE once all are ready, forwards SIGTERM/SIGINT,
+and exits as soon as one worker exits so the container gets restarted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.celery_routing import (
+    QUEUE_BILLING,
+    QUEUE_DEFAULT,
+    QUEUE_EMAIL,
+    QUEUE_GPU,
+    QUEUE_MEDIA,
+    QUEUE_ML_HEAVY,
+    QUEUE_ML_LIGHT,
+    QUEUE_REALTIME,
+    QUEUES,
+)
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_POLL_SECONDS = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class WorkerProfile:
+    queues: tuple[str, ...]
+    pool: str  # "prefork" | "threads"
+    concurrency: int
+    prefetch_multiplier: int
+
+    def command(self, name: str) -> list[str]:
+        concurrency = os.environ.get(f"CELERY_CONCURRENCY_{name.upper().replace('-', '_')}")
+        if name == "all":
+            concurrency = concurrency or os.environ.get("CELERY_CONCURRENCY")
+        return [
+            "celery", "-A", "worker.celery_app", "worker", "-l", "INFO",
+            "-n", f"{name}@%h",
+            "-Q", ",".join(self.queues),
+            "-P", self.pool,
+            "-c", str(concurrency or self.concurrency),
+            "--prefetch-multiplier", str(self.prefetch_multiplier),
+        ]  # fmt: skip
+
+
+PROFILES: dict[str, WorkerProfile] = {
+    "realtime": WorkerProfile((QUEUE_REALTIME, QUEUE_DEFAULT), "threads", 8, 4),
+    "media": WorkerProfile((QUEUE_MEDIA,), "prefork", 2, 1),
+    "ml-light": WorkerProfile((QUEUE_ML_LIGHT,), "threads", 8, 1),
+    "ml-heavy": WorkerProfile((QUEUE_ML_HEAVY,), "prefork", 1, 1),
+    "email": WorkerProfile((QUEUE_EMAIL,), "threads", 4, 1),
+    "billing": WorkerProfile((QUEUE_BILLING,), "prefork", 1, 1),
+    "gpu": WorkerProfile((QUEUE_GPU,), "prefork", 1, 1),
+    # Everything except ML on one threads pool, for small deployments.
+    "fast": WorkerProfile(
+        (QUEUE_REALTIME, QUEUE_DEFAULT, QUEUE_MEDIA, QUEUE_EMAIL, QUEUE_BILLING), "threads", 8, 1
+    ),
+    # Previous layout: one prefork worker on every CPU queue.
+    "all": WorkerProfile(tuple(q for q in QUEUES if q != QUEUE_GPU), "prefork", 1, 1),
+}
+
+
+def ready_file(base: Path, name: str) -> Path:
+    return base.with_name(f"{base.name}.{name}")
+
+
+def supervise(names: list[str]) -> int:
+    """Run one worker per profile; return the exit code of the first one to exit."""
+    base = Path(get_settings().worker_ready_file)
+    base.unlink(missing_ok=True)
+    children: dict[str, subprocess.Popen[bytes]] = {}
+    for name in names:
+        ready_file(base, name).unlink(missing_ok=True)
+        env = {**os.environ, "WORKER_READY_FILE": str(ready_file(base, name))}
+        # Own session: a terminal Ctrl-C reaches the workers once, forwarded by _stop.
+        children[name] = subprocess.Popen(PROFILES[name].command(name), env=env, start_new_session=True)
+    stopping = False
+
+    def _stop(signum: int, frame: object) -> None:  # noqa: ARG001
+        nonlocal stopping
+        stopping = True
+        for proc in children.values():
+            if proc.poll() is None:
+                proc.send_signal(signum)
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    ready = False
+    try:
+        while True:
+            exited = {name: proc.returncode for name, proc in children.items() if proc.poll() is not None}
+            if exited:
+                name, code = next(iter(exited.items()))
+                if not stopping:
+                    logger.error("Worker %s exited with %s; stopping the others", name, code)
+                    _stop(signal.SIGTERM, None)
+                for proc in children.values():
+                    proc.wait()
+                return code if stopping or code else 1
+            if not ready and all(ready_file(base, name).exists() for name in names):
+                state = {
+                    "pid": os.getpid(),
+                    "profiles": {name: json.loads(ready_file(base, name).read_text()) for name in names},
+                }
+                base.write_text(json.dumps(state))
+                ready = True
+                logger.info("All worker profiles ready: %s", ", ".join(names))
+            time.sleep(_POLL_SECONDS)
+    finally:
+        base.unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("profiles", nargs="+", help=f"one or more of: {', '.join(PROFILES)}")
+    parser.add_argument("--print", action="store_true", help="print the celery command(s) and exit")
+    args = parser.parse_args()
+    names = list(dict.fromkeys(p for arg in args.profiles for p in arg.split() if p))
+    unknown = [n for n in names if n not in PROFILES]
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(unknown)}")
+    if args.print:
+        for name in names:
+            print(shlex.join(PROFILES[name].command(name)))
+        return
+    if len(names) == 1:
+        command = PROFILES[names[0]].command(names[0])
+        os.execvp(command[0], command)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s: %(levelname)s/supervisor] %(message)s")
+    sys.exit(supervise(names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Per-process async runtime for Celery tasks: one event loop and one DB engine.
+
+Tasks are sync; they used to wrap every DB touch in asyncio.run() with a freshly
+built engine, i.e. a new loop and new Postgres connections per statement. Instead
+each worker process (thread, for the threads pool) keeps one loop and one engine,
+created on worker_process_init and disposed on worker_process_shutdown:
+
+    from worker import runtime
+
+    job = runtime.run(_load_job(job_id))
+
+    async with runtime.get_session_factory()() as session:
+        ...
+
+The engine's asyncpg connections belong to that loop, so coroutines using the
+session factory must be driven by runtime.run(), never asyncio.run().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Runtime(threading.local):
+    loop: asyncio.AbstractEventLoop | None = None
+    engine: AsyncEngine | None = None
+    session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+_state = _Runtime()
+
+
+def init_runtime() -> None:
+    """Create this process's loop and engine (idempotent)."""
+    if _state.loop is not None and not _state.loop.is_closed():
+        return
+    settings = get_settings()
+    _state.loop = asyncio.new_event_loop()
+    _state.engine = create_async_engine(
+        str(settings.database_url),
+        pool_pre_ping=True,
+        pool_size=settings.worker_db_pool_size,
+        max_overflow=settings.worker_db_max_overflow,
+        pool_recycle=1800,
+    )
+    _state.session_factory = async_sessionmaker(_state.engine, expire_on_commit=False, class_=AsyncSession)
+
+
+def shutdown_runtime() -> None:
+    """Dispose the engine and close the loop. Safe to call when never initialised."""
+    loop, engine = _state.loop, _state.engine
+    _state.loop = _state.engine = _state.session_factory = None
+    if loop is None or loop.is_closed():
+        return
+    try:
+        if engine is not None:
+            loop.run_until_complete(engine.dispose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    except Exception:
+        logger.exception("Failed to dispose worker DB engine")
+    finally:
+        loop.close()
+
+
+def run[T](coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on this process's persistent loop.
+
+    Initialises lazily so eager tasks, scripts and tests work without the Celery signal.
+    """
+    init_runtime()
+    assert _state.loop is not None
+    return _state.loop.run_until_complete(coro)
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory bound to the shared engine; use inside coroutines passed to run()."""
+    init_runtime()
+    assert _state.session_factory is not None
+    return _state.session_factory
+
+
+def _reset_after_fork() -> None:
+    # A forked child must not touch the parent's loop or pooled sockets; it builds its own.
+    _state.loop = _state.engine = _state.session_factory = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -4,10 +4,8 @@ from __future__ import annotations
 
 from io import BytesIO
 
-import boto3
-from minio import Minio
-
 from app.core.settings import get_settings
+from app.modules.media.storage import get_minio_client, get_s3_client
 
 
 def _use_s3() -> bool:
@@ -27,16 +25,9 @@ def get_media_bucket() -> str:
 
 def get_object_bytes(bucket: str, object_key: str) -> bytes:
     if _use_s3():
-        client = boto3.client("s3", region_name=get_settings().aws_region or "us-east-1")
-        resp = client.get_object(Bucket=bucket, Key=object_key)
+        resp = get_s3_client().get_object(Bucket=bucket, Key=object_key)
         return resp["Body"].read()
-    client = Minio(
-        get_settings().minio_endpoint,
-        access_key=get_settings().minio_access_key,
-        secret_key=get_settings().minio_secret_key,
-        secure=get_settings().minio_secure,
-    )
-    resp = client.get_object(bucket, object_key)
+    resp = get_minio_client().get_object(bucket, object_key)
     try:
         return resp.read()
     finally:
@@ -45,18 +36,11 @@ def get_object_bytes(bucket: str, object_key: str) -> bytes:
 
 def put_object_bytes(bucket: str, object_key: str, data: bytes, content_type: str) -> None:
     if _use_s3():
-        client = boto3.client("s3", region_name=get_settings().aws_region or "us-east-1")
-        client.put_object(
+        get_s3_client().put_object(
             Bucket=bucket,
             Key=object_key,
             Body=data,
             ContentType=content_type,
         )
         return
-    client = Minio(
-        get_settings().minio_endpoint,
-        access_key=get_settings().minio_access_key,
-        secret_key=get_settings().minio_secret_key,
-        secure=get_settings().minio_secure,
-    )
-    client.put_object(bucket, object_key, BytesIO(data), len(data), content_type=content_type)
+    get_minio_client().put_object(bucket, object_key, BytesIO(data), len(data), content_type=content_type)
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
 import uuid
@@ -11,10 +10,10 @@ from io import BytesIO
 from PIL import Image
 from celery import shared_task
 from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.core.settings import get_settings
 from app.modules.ai.models import AiImageJob
+from worker import runtime
 from worker.storage_io import get_media_bucket, put_object_bytes
 
 logger = logging.getLogger(__name__)
@@ -93,17 +92,6 @@ def _replicate_generate_images(
     return images
 
 
-def _make_session_factory() -> async_sessionmaker[AsyncSession]:
-    """Create a fresh async session factory per task invocation.
-
-    Avoids the 'Future attached to a different loop' error that occurs when
-    a module-level engine is reused across separate asyncio.run() calls in
-    Celery forked worker processes.
-    """
-    engine = create_async_engine(str(get_settings().database_url), pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-
-
 async def _update_job_status(
     session_factory: async_sessionmaker[AsyncSession],
     job_id: uuid.UUID,
@@ -133,7 +121,7 @@ def generate_images(job_id: str) -> dict[str, str | list[str]]:
         return {"status": "FAILED", "error": "invalid_job_id"}
 
     async def _run() -> dict[str, str | list[str]]:
-        sf = _make_session_factory()
+        sf = runtime.get_session_factory()
         async with sf() as session:
             result = await session.execute(
                 select(AiImageJob).where(AiImageJob.id == job_uuid).limit(1)
@@ -180,4 +168,4 @@ def generate_images(job_id: str) -> dict[str, str | list[str]]:
         logger.info("AI images ready", extra={"job_id": job_id, "count": len(result_keys)})
         return {"status": "READY", "result_object_keys": result_keys}
 
-    return asyncio.run(_run())
+    return runtime.run(_run())
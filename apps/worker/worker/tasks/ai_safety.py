@@ -4,7 +4,7 @@ Task chain:
   scan_image → (if ALLOW) → generate_caption + generate_tags
 
 All tasks are idempotent — they skip processing if a result row already exists.
-DB access uses _make_session_factory() per invocation (same pattern as worker/tasks/media.py).
+DB access goes through worker.runtime's per-process engine (same pattern as worker/tasks/media.py).
 
 IMPORTANT: The age-range classifier (vit-age-classifier) is a PROXY signal only.
 It does NOT determine actual age. All flagged content MUST be reviewed by a human
@@ -13,20 +13,22 @@ moderator before any enforcement action is taken.
 
 from __future__ import annotations
 
-import asyncio
+import json
 import logging
 import uuid
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from io import BytesIO
 
 import sqlalchemy as sa
 from celery import shared_task
 from PIL import Image
 from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.settings import get_settings
 from app.modules.ai_safety.models import ImageCaption, ImageSafetyScan, ImageTag
+from app.modules.ai_safety.query_embedding import REPLY_KEY_PREFIX, REPLY_TTL_SECONDS
 from app.modules.media.models import MediaObject
+from worker import runtime
 from worker.storage_io import get_media_bucket, get_object_bytes
 
 logger = logging.getLogger(__name__)
@@ -36,6 +38,11 @@ logger = logging.getLogger(__name__)
 # NOT a reliable age determination. False positives are expected.
 UNDERAGE_AGE_LABELS = {"0-2", "3-9", "10-19"}
 
+# JPEG decode target (draft mode) and how long a scan waits for its batch result,
+# including the first model load.
+_SCAN_DECODE_SIZE = 448
+_SCAN_INFERENCE_TIMEOUT_SECONDS = 300
+
 # Stopwords for tag extraction
 _STOPWORDS = frozenset({
     "a", "an", "the", "is", "are", "was", "were", "be", "been", "being",
@@ -59,14 +66,8 @@ _STOPWORDS = frozenset({
 # ---------------------------------------------------------------------------
 
 
-def _make_session_factory() -> async_sessionmaker[AsyncSession]:
-    """Create a fresh async session factory per task invocation."""
-    engine = create_async_engine(str(get_settings().database_url), pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-
-
 async def _scan_exists(media_asset_id: uuid.UUID) -> bool:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(ImageSafetyScan.id)
             .where(ImageSafetyScan.media_asset_id == media_asset_id)
@@ -76,7 +77,7 @@ async def _scan_exists(media_asset_id: uuid.UUID) -> bool:
 
 
 async def _caption_exists(media_asset_id: uuid.UUID) -> bool:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(ImageCaption.id)
             .where(ImageCaption.media_asset_id == media_asset_id)
@@ -86,7 +87,7 @@ async def _caption_exists(media_asset_id: uuid.UUID) -> bool:
 
 
 async def _tags_exist(media_asset_id: uuid.UUID) -> bool:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(ImageTag.id)
             .where(ImageTag.media_asset_id == media_asset_id)
@@ -96,7 +97,7 @@ async def _tags_exist(media_asset_id: uuid.UUID) -> bool:
 
 
 async def _get_caption_text(media_asset_id: uuid.UUID) -> str | None:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(ImageCaption.raw_caption)
             .where(ImageCaption.media_asset_id == media_asset_id)
@@ -106,7 +107,7 @@ async def _get_caption_text(media_asset_id: uuid.UUID) -> str | None:
 
 
 async def _update_safety_status(media_asset_id: uuid.UUID, status: str) -> None:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         await session.execute(
             update(MediaObject)
             .where(MediaObject.id == media_asset_id)
@@ -181,39 +182,39 @@ def scan_image(self, asset_id: str, object_key: str, content_type: str) -> dict:
         return {"status": "FAILED", "error": "invalid_asset_id"}
 
     # Idempotent check
-    if asyncio.run(_scan_exists(media_uuid)):
+    if runtime.run(_scan_exists(media_uuid)):
         logger.info("Scan already exists, skipping", extra={"asset_id": asset_id})
         return {"status": "SKIPPED"}
 
-    # Download image
+    # Download image; decode JPEGs at reduced scale, the classifiers only see 224x224.
     try:
         bucket = get_media_bucket()
         raw = get_object_bytes(bucket, object_key)
-        img = Image.open(BytesIO(raw)).convert("RGB")
+        img = Image.open(BytesIO(raw))
+        img.draft("RGB", (_SCAN_DECODE_SIZE, _SCAN_DECODE_SIZE))
+        img = img.convert("RGB")
     except Exception as exc:
         logger.exception("Failed to download image", extra={"asset_id": asset_id})
         raise self.retry(exc=exc)
 
-    # --- NSFW classification ---
-    from worker.ml.model_loader import NSFW_MODEL, get_nsfw_pipeline
+    # --- NSFW + age-range classification, batched with concurrent scans ---
+    from worker.ml.model_loader import AGE_MODEL, NSFW_MODEL, model_version
+    from worker.ml.safety_batch import get_safety_batcher
 
-    nsfw_pipe = get_nsfw_pipeline()
-    nsfw_results = nsfw_pipe(img)
-    # Results: [{"label": "nsfw", "score": 0.95}, {"label": "normal", "score": 0.05}]
-    nsfw_map = {r["label"]: r["score"] for r in nsfw_results}
-    nsfw_score = nsfw_map.get("nsfw", 0.0)
+    try:
+        scores = get_safety_batcher().submit(img).result(timeout=_SCAN_INFERENCE_TIMEOUT_SECONDS)
+    except FuturesTimeoutError as exc:
+        logger.warning("AI safety inference timed out", extra={"asset_id": asset_id})
+        raise self.retry(exc=exc)
+    # Probabilities per label, e.g. {"nsfw": 0.95, "normal": 0.05}
+    nsfw_score = scores.nsfw.get("nsfw", 0.0)
     nsfw_label = "nsfw" if nsfw_score >= 0.5 else "normal"
 
-    # --- Age-range classification (PROXY signal only) ---
-    from worker.ml.model_loader import AGE_MODEL, get_age_pipeline
-
-    age_pipe = get_age_pipeline()
-    age_results = age_pipe(img)
-    # Results: [{"label": "20-29", "score": 0.45}, {"label": "10-19", "score": 0.3}, ...]
-    age_map = {r["label"]: r["score"] for r in age_results}
+    # Age ranges (PROXY signal only), e.g. {"20-29": 0.45, "10-19": 0.3, ...}
+    age_map = scores.age
     # Sum probabilities for age ranges under 20 as a proxy for underage likelihood
     underage_proxy = sum(age_map.get(label, 0.0) for label in UNDERAGE_AGE_LABELS)
-    age_range_prediction = max(age_results, key=lambda r: r["score"])["label"]
+    age_range_prediction = max(age_map, key=age_map.__getitem__)
 
     # --- Policy decision ---
     settings = get_settings()
@@ -240,7 +241,7 @@ def scan_image(self, asset_id: str, object_key: str, content_type: str) -> dict:
 
     # --- Write scan row ---
     async def _write_scan() -> None:
-        async with _make_session_factory()() as session:
+        async with runtime.get_session_factory()() as session:
             session.add(
                 ImageSafetyScan(
                     id=uuid.uuid4(),
@@ -251,16 +252,16 @@ def scan_image(self, asset_id: str, object_key: str, content_type: str) -> dict:
                     underage_likelihood_proxy=underage_proxy,
                     risk_level=risk_level,
                     decision=decision,
-                    model_versions={"nsfw": NSFW_MODEL, "age": AGE_MODEL},
+                    model_versions={"nsfw": model_version(NSFW_MODEL), "age": model_version(AGE_MODEL)},
                 )
             )
             await session.commit()
 
-    asyncio.run(_write_scan())
+    runtime.run(_write_scan())
 
     # --- Update safety_status ---
     status_map = {"ALLOW": "allowed", "REQUIRE_REVIEW": "review", "BLOCK": "blocked"}
-    asyncio.run(_update_safety_status(media_uuid, status_map[decision]))
+    runtime.run(_update_safety_status(media_uuid, status_map[decision]))
 
     # --- Chain downstream tasks for allowed images ---
     if decision == "ALLOW":
@@ -318,7 +319,7 @@ def generate_caption(self, asset_id: str, object_key: str, content_type: str) ->
         return {"status": "FAILED"}
 
     # Idempotent
-    if asyncio.run(_caption_exists(media_uuid)):
+    if runtime.run(_caption_exists(media_uuid)):
         logger.info("Caption already exists, skipping", extra={"asset_id": asset_id})
         return {"status": "SKIPPED"}
 
@@ -354,7 +355,7 @@ def generate_caption(self, asset_id: str, object_key: str, content_type: str) ->
 
     # Write to DB
     async def _write_caption() -> None:
-        async with _make_session_factory()() as session:
+        async with runtime.get_session_factory()() as session:
             session.add(
                 ImageCaption(
                     id=uuid.uuid4(),
@@ -368,7 +369,7 @@ def generate_caption(self, asset_id: str, object_key: str, content_type: str) ->
             )
             await session.commit()
 
-    asyncio.run(_write_caption())
+    runtime.run(_write_caption())
 
     return {"status": "OK", "raw_caption": raw_caption[:200]}
 
@@ -408,12 +409,12 @@ def generate_tags(self, asset_id: str) -> dict:
         return {"status": "FAILED"}
 
     # Idempotent
-    if asyncio.run(_tags_exist(media_uuid)):
+    if runtime.run(_tags_exist(media_uuid)):
         logger.info("Tags already exist, skipping", extra={"asset_id": asset_id})
         return {"status": "SKIPPED"}
 
     # Get caption text
-    raw_caption = asyncio.run(_get_caption_text(media_uuid))
+    raw_caption = runtime.run(_get_caption_text(media_uuid))
     if not raw_caption:
         logger.warning("No caption found for tag generation", extra={"asset_id": asset_id})
         return {"status": "NO_CAPTION"}
@@ -422,7 +423,7 @@ def generate_tags(self, asset_id: str) -> dict:
     tags = _extract_tags(raw_caption)
 
     # Generate embedding
-    from worker.ml.model_loader import SENTENCE_MODEL, get_sentence_model
+    from worker.ml.model_loader import SENTENCE_MODEL, get_sentence_model, model_version
 
     sentence_model = get_sentence_model()
     embedding = sentence_model.encode(raw_caption).tolist()
@@ -434,13 +435,13 @@ def generate_tags(self, asset_id: str) -> dict:
 
     # Write to DB
     async def _write_tags() -> None:
-        async with _make_session_factory()() as session:
+        async with runtime.get_session_factory()() as session:
             tag_row = ImageTag(
                 id=uuid.uuid4(),
                 media_asset_id=media_uuid,
                 tags=tags,
                 embedding_json=embedding,
-                model_version=SENTENCE_MODEL,
+                model_version=model_version(SENTENCE_MODEL),
             )
             session.add(tag_row)
             await session.commit()
@@ -450,7 +451,7 @@ def generate_tags(self, asset_id: str) -> dict:
                 embedding_str = "[" + ",".join(str(v) for v in embedding) + "]"
                 await session.execute(
                     sa.text(
-                        "UPDATE image_tags SET embedding = :emb::vector "
+                        "UPDATE image_tags SET embedding = CAST(:emb AS vector) "
                         "WHERE id = :tag_id"
                     ),
                     {"emb": embedding_str, "tag_id": str(tag_row.id)},
@@ -461,27 +462,48 @@ def generate_tags(self, asset_id: str) -> dict:
                 logger.debug("pgvector column update skipped (extension not available)")
                 await session.rollback()
 
-    asyncio.run(_write_tags())
+    runtime.run(_write_tags())
 
     return {"status": "OK", "tags": tags, "embedding_dim": len(embedding)}
 
 
 # ---------------------------------------------------------------------------
-# Task 4: embed_query (called synchronously by API for vector search)
+# Task 4: embed_query (awaited by the API search endpoint for vector search)
 # ---------------------------------------------------------------------------
 
 
-@shared_task(name="ai_safety.embed_query")
-def embed_query(query_text: str) -> list[float]:
+_reply_redis = None
+
+
+def _send_reply(reply_to: str, embedding: list[float]) -> None:
+    """RPUSH the vector to the API's reply key (see app.modules.ai_safety.query_embedding)."""
+    global _reply_redis
+    if not reply_to.startswith(REPLY_KEY_PREFIX):
+        logger.warning("embed_query: ignoring reply key %r", reply_to)
+        return
+    if _reply_redis is None:
+        import redis
+
+        _reply_redis = redis.Redis.from_url(str(get_settings().redis_url))
+    pipe = _reply_redis.pipeline(transaction=False)
+    pipe.rpush(reply_to, json.dumps(embedding))
+    pipe.expire(reply_to, REPLY_TTL_SECONDS)
+    pipe.execute()
+
+
+@shared_task(name="ai_safety.embed_query", ignore_result=True)
+def embed_query(query_text: str, reply_to: str | None = None) -> list[float]:
     """Encode a search query into a 384-dim embedding using sentence-transformers.
 
-    This runs on the worker so the API doesn't need to load the model.
-    Called synchronously with a short timeout from the search endpoint.
+    This runs on the worker so the API doesn't need to load the model. The API
+    awaits the vector on the Redis list reply_to (there is no result backend).
     """
     from worker.ml.model_loader import get_sentence_model
 
     model = get_sentence_model()
     embedding = model.encode(query_text).tolist()
+    if reply_to:
+        _send_reply(reply_to, embedding)
     return embedding
 
 
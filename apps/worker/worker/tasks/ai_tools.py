@@ -1,7 +1,7 @@
 """AI tool worker tasks — remove background, cartoonize, animate image, virtual try-on.
 
 Pattern follows worker/tasks/media.py:
-- _make_session_factory() for per-task DB sessions
+- worker.runtime for DB sessions on the per-process engine
 - get_object_bytes / put_object_bytes for S3 I/O
 - Idempotent: check job status before processing
 - Try/except → update status="failed" with error_message
@@ -9,17 +9,18 @@ Pattern follows worker/tasks/media.py:
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 from celery import shared_task
-from PIL import Image
-from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from PIL import Image, ImageOps
+from sqlalchemy import and_, or_, select, update
 
 from app.core.settings import get_settings
+from worker import runtime
+from worker.ml.background_removal import StageTimings, cut_out
 from worker.storage_io import get_media_bucket, get_object_bytes, put_object_bytes
 
 logger = logging.getLogger(__name__)
@@ -27,11 +28,6 @@ logger = logging.getLogger(__name__)
 MAX_DIMENSION = 4096
 
 
-def _make_session_factory() -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(str(get_settings().database_url), pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-
-
 def _strip_exif(img: Image.Image) -> Image.Image:
     out = img.copy()
     out.info.clear()
@@ -46,7 +42,7 @@ async def _load_job(job_id: str) -> dict | None:
     """Load job row as dict. Returns None if not found."""
     from app.modules.ai_tools.tool_models import AiToolJob
 
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(AiToolJob).where(AiToolJob.id == uuid.UUID(job_id))
         )
@@ -68,6 +64,7 @@ async def _update_job(
     result_object_key: str | None = None,
     error_message: str | None = None,
     params: dict | None = None,
+    timings: dict | None = None,
 ) -> None:
     from datetime import datetime, timezone
 
@@ -81,8 +78,10 @@ async def _update_job(
     }
     if params is not None:
         values["params"] = params
+    if timings is not None:
+        values["timings"] = timings
 
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         await session.execute(
             update(AiToolJob)
             .where(AiToolJob.id == uuid.UUID(job_id))
@@ -91,66 +90,148 @@ async def _update_job(
         await session.commit()
 
 
-@shared_task(name="ai_tools.remove_background")
-def remove_background(job_id: str) -> str | None:
-    """Remove background from an image using rembg (ONNX CPU).
+async def _claim_remove_bg_jobs(job_id: str, limit: int, stale_after_seconds: int) -> list[dict]:
+    """Mark ``job_id`` and up to ``limit - 1`` other claimable remove_bg jobs processing.
 
-    1. Load job from DB, check idempotency
-    2. Download input image from S3
-    3. Validate dimensions (max 4096x4096)
-    4. Run rembg.remove()
-    5. Strip EXIF, upload PNG result to S3
-    6. Update job status
+    A job processing with no update for ``stale_after_seconds`` is claimable too: the
+    claim of a worker that died mid-batch, whose batch mates' own messages were
+    already skipped. Returns the claimed jobs, ``job_id`` first; empty if another
+    worker holds it. Rows locked by a concurrent claim are skipped.
     """
-    logger.info("remove_background START", extra={"job_id": job_id})
+    from datetime import datetime, timedelta, timezone
 
-    # Load job
-    job = asyncio.run(_load_job(job_id))
-    if not job:
-        logger.warning("Job not found", extra={"job_id": job_id})
-        return None
+    from app.modules.ai_tools.tool_models import AiToolJob
 
-    # Idempotent: skip if already processed
-    if job["status"] in ("ready", "processing"):
-        logger.info("Job already %s, skipping", job["status"], extra={"job_id": job_id})
-        return None
+    own_id = uuid.UUID(job_id)
+    now = datetime.now(timezone.utc)
+    stale = and_(
+        AiToolJob.status == "processing",
+        AiToolJob.updated_at < now - timedelta(seconds=stale_after_seconds),
+    )
+    async with runtime.get_session_factory()() as session:
+        own = (
+            await session.execute(
+                select(AiToolJob.id, AiToolJob.input_object_key)
+                .where(
+                    AiToolJob.id == own_id,
+                    or_(AiToolJob.status.not_in(("ready", "processing")), stale),
+                )
+                .with_for_update()
+            )
+        ).one_or_none()
+        if own is None:
+            return []
+        others = (
+            await session.execute(
+                select(AiToolJob.id, AiToolJob.input_object_key)
+                .where(
+                    AiToolJob.tool == "remove_bg",
+                    or_(AiToolJob.status == "pending", stale),
+                    AiToolJob.id != own_id,
+                )
+                .order_by(AiToolJob.created_at)
+                .limit(limit - 1)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        jobs = [{"id": str(row.id), "input_object_key": row.input_object_key} for row in (own, *others)]
+        await session.execute(
+            update(AiToolJob)
+            .where(AiToolJob.id.in_([uuid.UUID(j["id"]) for j in jobs]))
+            .values(status="processing", updated_at=now)
+        )
+        await session.commit()
+    return jobs
 
-    # Mark as processing
-    asyncio.run(_update_job(job_id, "processing"))
 
-    try:
-        bucket = get_media_bucket()
+def _remove_background_one(bucket: str, job: dict, timings: StageTimings) -> str:
+    """Download, cut out and upload one job's image; returns the result object key."""
+    with timings.stage("download"):
         raw = get_object_bytes(bucket, job["input_object_key"])
-        img = Image.open(BytesIO(raw)).convert("RGBA")
-
-        # Validate dimensions
+    with timings.stage("decode"):
+        img = Image.open(BytesIO(raw))
         w, h = img.size
         if w > MAX_DIMENSION or h > MAX_DIMENSION:
             raise ValueError(f"Image too large: {w}x{h} (max {MAX_DIMENSION}x{MAX_DIMENSION})")
+        img = ImageOps.exif_transpose(img).convert("RGBA")
 
-        # Run background removal
-        from rembg import remove
+    result_img = _strip_exif(cut_out(img, timings=timings))
 
-        result_img = remove(img)
-        result_img = _strip_exif(result_img)
-
-        # Encode as PNG (preserves alpha)
+    # Encode as PNG (preserves alpha)
+    with timings.stage("encode"):
         buf = BytesIO()
         result_img.save(buf, format="PNG")
-        buf.seek(0)
-
-        result_key = _result_object_key(job_id)
+    result_key = _result_object_key(job["id"])
+    with timings.stage("upload"):
         put_object_bytes(bucket, result_key, buf.getvalue(), "image/png")
+    return result_key
 
-        asyncio.run(_update_job(job_id, "ready", result_object_key=result_key))
-        logger.info("remove_background DONE", extra={"job_id": job_id, "result_key": result_key})
-        return result_key
 
-    except Exception as e:
-        logger.exception("remove_background FAILED", extra={"job_id": job_id})
-        asyncio.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
+@shared_task(name="ai_tools.remove_background")
+def remove_background(job_id: str) -> str | None:
+    """Remove background from an image using rembg (ONNX CPU).
+
+    1. Load job from DB, check idempotency
+    2. Claim it plus up to AI_TOOL_RMBG_BATCH_SIZE - 1 other pending remove_bg jobs
+       (their own messages then find them processing and skip); jobs processing for
+       AI_TOOL_RMBG_CLAIM_TIMEOUT_SECONDS are claimed again
+    3. Per job, on a thread: download the input image from S3, validate dimensions
+       (max 4096x4096), cut out the background on this process's rembg session
+       (worker.ml.background_removal), strip EXIF, upload the PNG result
+    4. Update each job's status and per-stage timings
+
+    Returns the result key of ``job_id``.
+    """
+    logger.info("remove_background START", extra={"job_id": job_id})
+
+    # Load job
+    job = runtime.run(_load_job(job_id))
+    if not job:
+        logger.warning("Job not found", extra={"job_id": job_id})
         return None
 
+    # Idempotent: skip if already processed (a processing job may be a stale claim)
+    if job["status"] == "ready":
+        logger.info("Job already %s, skipping", job["status"], extra={"job_id": job_id})
+        return None
+
+    settings = get_settings()
+    jobs = runtime.run(
+        _claim_remove_bg_jobs(
+            job_id, settings.ai_tool_rmbg_batch_size, settings.ai_tool_rmbg_claim_timeout_seconds
+        )
+    )
+    if not jobs:
+        logger.info("Job claimed by another worker, skipping", extra={"job_id": job_id})
+        return None
+
+    bucket = get_media_bucket()
+    timings = {j["id"]: StageTimings() for j in jobs}
+
+    def _run(j: dict) -> str:
+        with timings[j["id"]].stage("total"):
+            return _remove_background_one(bucket, j, timings[j["id"]])
+
+    # Threads overlap S3 I/O and image codecs with inference, which the session serialises.
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="remove-bg") as pool:
+        futures = {j["id"]: pool.submit(_run, j) for j in jobs}
+
+    result_keys: dict[str, str] = {}
+    for jid, future in futures.items():
+        recorded = {**timings[jid], "batch_size": len(jobs), "model": settings.ai_tool_rmbg_model}
+        try:
+            result_keys[jid] = future.result()
+        except Exception as e:
+            logger.exception("remove_background FAILED", extra={"job_id": jid})
+            runtime.run(_update_job(jid, "failed", error_message=str(e)[:500], timings=recorded))
+            continue
+        runtime.run(_update_job(jid, "ready", result_object_key=result_keys[jid], timings=recorded))
+        logger.info(
+            "remove_background DONE",
+            extra={"job_id": jid, "result_key": result_keys[jid], "timings": recorded},
+        )
+    return result_keys.get(job_id)
+
 
 # ---------------------------------------------------------------------------
 # Cartoonize (OpenCV edge-preserving filter — CPU-only, no ML model)
@@ -220,7 +301,7 @@ def cartoonize(job_id: str) -> str | None:
     """
     logger.info("cartoonize START", extra={"job_id": job_id})
 
-    job = asyncio.run(_load_job(job_id))
+    job = runtime.run(_load_job(job_id))
     if not job:
         logger.warning("Job not found", extra={"job_id": job_id})
         return None
@@ -229,7 +310,7 @@ def cartoonize(job_id: str) -> str | None:
         logger.info("Job already %s, skipping", job["status"], extra={"job_id": job_id})
         return None
 
-    asyncio.run(_update_job(job_id, "processing"))
+    runtime.run(_update_job(job_id, "processing"))
 
     try:
         bucket = get_media_bucket()
@@ -250,13 +331,13 @@ def cartoonize(job_id: str) -> str | None:
         result_key = _result_object_key(job_id, ext="jpg")
         put_object_bytes(bucket, result_key, buf.getvalue(), "image/jpeg")
 
-        asyncio.run(_update_job(job_id, "ready", result_object_key=result_key))
+        runtime.run(_update_job(job_id, "ready", result_object_key=result_key))
         logger.info("cartoonize DONE", extra={"job_id": job_id, "result_key": result_key})
         return result_key
 
     except Exception as e:
         logger.exception("cartoonize FAILED", extra={"job_id": job_id})
-        asyncio.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
+        runtime.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
         return None
 
 
@@ -398,7 +479,7 @@ def animate_image(job_id: str) -> str | None:
 
     logger.info("animate_image START", extra={"job_id": job_id})
 
-    job = asyncio.run(_load_job(job_id))
+    job = runtime.run(_load_job(job_id))
     if not job:
         logger.warning("Job not found", extra={"job_id": job_id})
         return None
@@ -407,7 +488,7 @@ def animate_image(job_id: str) -> str | None:
         logger.info("Job already %s, skipping", job["status"], extra={"job_id": job_id})
         return None
 
-    asyncio.run(_update_job(job_id, "processing"))
+    runtime.run(_update_job(job_id, "processing"))
 
     try:
         params = job.get("params") or {}
@@ -453,13 +534,13 @@ def animate_image(job_id: str) -> str | None:
         result_key = _result_object_key(job_id, ext=ext)
         put_object_bytes(bucket, result_key, result_bytes, content_type)
 
-        asyncio.run(_update_job(job_id, "ready", result_object_key=result_key))
+        runtime.run(_update_job(job_id, "ready", result_object_key=result_key))
         logger.info("animate_image DONE", extra={"job_id": job_id, "result_key": result_key})
         return result_key
 
     except Exception as e:
         logger.exception("animate_image FAILED", extra={"job_id": job_id})
-        asyncio.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
+        runtime.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
         return None
 
 
@@ -484,7 +565,7 @@ def auto_caption(self, job_id: str) -> dict | None:
     """
     logger.info("auto_caption START", extra={"job_id": job_id})
 
-    job = asyncio.run(_load_job(job_id))
+    job = runtime.run(_load_job(job_id))
     if not job:
         logger.warning("Job not found", extra={"job_id": job_id})
         return None
@@ -493,7 +574,7 @@ def auto_caption(self, job_id: str) -> dict | None:
         logger.info("Job already %s, skipping", job["status"], extra={"job_id": job_id})
         return None
 
-    asyncio.run(_update_job(job_id, "processing"))
+    runtime.run(_update_job(job_id, "processing"))
 
     try:
         params = job.get("params") or {}
@@ -526,7 +607,7 @@ def auto_caption(self, job_id: str) -> dict | None:
 
         # Store result in params
         updated_params = {**params, "result": result}
-        asyncio.run(_update_job(job_id, "ready", params=updated_params))
+        runtime.run(_update_job(job_id, "ready", params=updated_params))
         logger.info(
             "auto_caption DONE",
             extra={
@@ -539,7 +620,7 @@ def auto_caption(self, job_id: str) -> dict | None:
 
     except Exception as e:
         logger.exception("auto_caption FAILED", extra={"job_id": job_id})
-        asyncio.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
+        runtime.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
         return None
 
 
@@ -572,7 +653,7 @@ def virtual_tryon(self, job_id: str) -> str | None:
     """
     logger.info("virtual_tryon START", extra={"job_id": job_id})
 
-    job = asyncio.run(_load_job(job_id))
+    job = runtime.run(_load_job(job_id))
     if not job:
         logger.warning("Job not found", extra={"job_id": job_id})
         return None
@@ -581,7 +662,7 @@ def virtual_tryon(self, job_id: str) -> str | None:
         logger.info("Job already %s, skipping", job["status"], extra={"job_id": job_id})
         return None
 
-    asyncio.run(_update_job(job_id, "processing"))
+    runtime.run(_update_job(job_id, "processing"))
 
     try:
         params = job.get("params") or {}
@@ -621,7 +702,7 @@ def virtual_tryon(self, job_id: str) -> str | None:
         result_key = _result_object_key(job_id, ext="jpg")
         put_object_bytes(bucket, result_key, result["result_bytes"], result["content_type"])
 
-        asyncio.run(_update_job(job_id, "ready", result_object_key=result_key))
+        runtime.run(_update_job(job_id, "ready", result_object_key=result_key))
         logger.info(
             "virtual_tryon DONE",
             extra={
@@ -635,5 +716,5 @@ def virtual_tryon(self, job_id: str) -> str | None:
 
     except Exception as e:
         logger.exception("virtual_tryon FAILED", extra={"job_id": job_id})
-        asyncio.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
+        runtime.run(_update_job(job_id, "failed", error_message=str(e)[:500]))
         return None
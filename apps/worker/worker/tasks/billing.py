@@ -1,14 +1,14 @@
-"""Billing worker tasks: Worldline subscription renewals."""
+"""Billing worker tasks: Worldline subscription renewals, payment webhook inbox."""
 
 from __future__ import annotations
 
-import asyncio
 import logging
 
 from celery import shared_task
 
-from app.db.session import async_session_factory
+from app.modules.billing.inbox import process_payment_events
 from app.modules.billing.service import renew_worldline_subscriptions
+from worker import runtime
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +18,23 @@ def renew_worldline_subscriptions_task() -> int:
     """Charge Worldline subscriptions that are due for renewal."""
 
     async def _run() -> int:
-        async with async_session_factory() as session:
+        async with runtime.get_session_factory()() as session:
             return await renew_worldline_subscriptions(session)
 
-    renewed = asyncio.run(_run())
+    renewed = runtime.run(_run())
     logger.info("worldline_renewals_processed count=%s", renewed)
     return renewed
+
+
+@shared_task(name="billing.process_payment_events")
+def process_payment_events_task() -> int:
+    """Apply stored payment webhooks (woken per webhook, and swept every minute for retries)."""
+
+    async def _run() -> int:
+        async with runtime.get_session_factory()() as session:
+            return await process_payment_events(session)
+
+    processed = runtime.run(_run())
+    if processed:
+        logger.info("payment_events_processed count=%s", processed)
+    return processed
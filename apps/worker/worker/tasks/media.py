@@ -9,9 +9,11 @@ Enhanced features:
 
 from __future__ import annotations
 
-import asyncio
 import logging
+import math
 import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import blurhash as blurhash_lib
@@ -22,10 +24,9 @@ from celery import shared_task
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-
 from app.core.settings import get_settings
 from app.modules.media.models import MediaDerivedAsset, MediaObject
+from worker import runtime
 from worker.storage_io import get_media_bucket, get_object_bytes, put_object_bytes
 from worker.watermark import apply_centered_watermark, apply_footer_watermark, should_watermark_variant
 
@@ -38,6 +39,11 @@ VARIANT_SPECS: dict[str, int] = {
     "full": 1200,
 }
 
+# Working image floor for the short side: aspect crops and grid/teaser are ≤ 600px.
+WORKING_MIN_SHORT_SIDE = 600
+# Parallel PUTs per task (shares the process-wide pooled storage client).
+UPLOAD_CONCURRENCY = 4
+
 TEASER_BLUR_RADIUS = 30
 SMART_CROP_GRID = 4  # NxN grid for saliency fallback
 
@@ -112,16 +118,13 @@ def _get_face_cascade() -> cv2.CascadeClassifier:
     return _FACE_CASCADE
 
 
-def _compute_smart_crop(img: Image.Image, target_w: int, target_h: int) -> Image.Image:
-    """Crop img to target_w×target_h using attention-aware strategy.
+def _attention_point(img: Image.Image) -> tuple[float, float]:
+    """Attention center as fractions of width/height: face center → saliency hotspot → geometric center.
 
-    Priority: face center → saliency hotspot → geometric center.
+    Returned in relative coordinates so it can be computed once and reused for every
+    crop, at any level of the resize pyramid.
     """
     w, h = img.size
-    if w <= target_w and h <= target_h:
-        return img.copy()
-
-    # Determine the crop region center
     cx, cy = w / 2, h / 2
 
     # Try face detection
@@ -152,6 +155,18 @@ def _compute_smart_crop(img: Image.Image, target_w: int, target_h: int) -> Image
                         cx = x0 + cell_w / 2
                         cy = y0 + cell_h / 2
 
+    return cx / w, cy / h
+
+
+def _crop_at_point(
+    img: Image.Image, point: tuple[float, float], target_w: int, target_h: int
+) -> Image.Image:
+    """Crop img to target_w×target_h centered on a relative attention point, clamped to bounds."""
+    w, h = img.size
+    if w <= target_w and h <= target_h:
+        return img.copy()
+    cx, cy = point[0] * w, point[1] * h
+
     # Compute crop box centered on (cx, cy), clamped to image bounds
     left = max(0, int(cx - target_w / 2))
     top = max(0, int(cy - target_h / 2))
@@ -165,18 +180,34 @@ def _compute_smart_crop(img: Image.Image, target_w: int, target_h: int) -> Image
     return img.crop((left, top, left + target_w, top + target_h))
 
 
+def _compute_smart_crop(img: Image.Image, target_w: int, target_h: int) -> Image.Image:
+    """Crop img to target_w×target_h using attention-aware strategy.
+
+    Priority: face center → saliency hotspot → geometric center.
+    """
+    w, h = img.size
+    if w <= target_w and h <= target_h:
+        return img.copy()
+    return _crop_at_point(img, _attention_point(img), target_w, target_h)
+
+
 # ---------------------------------------------------------------------------
 # Teaser variant (heavy Gaussian blur for locked posts)
 # ---------------------------------------------------------------------------
 
 
 def _generate_aspect_crop(
-    img: Image.Image, ratio_w: int, ratio_h: int, max_dim: int
+    img: Image.Image,
+    ratio_w: int,
+    ratio_h: int,
+    max_dim: int,
+    point: tuple[float, float] | None = None,
 ) -> Image.Image:
     """Crop image to a specific aspect ratio using smart crop, then resize.
 
     The crop region is the largest rectangle with the given aspect ratio that
-    fits within the image, centered on the smart-crop attention point.
+    fits within the image, centered on the smart-crop attention point (pass a
+    precomputed point to skip detection).
     """
     w, h = img.size
     target_ratio = ratio_w / ratio_h
@@ -195,7 +226,10 @@ def _generate_aspect_crop(
     crop_h = min(crop_h, h)
 
     # Use existing smart crop (face detection → saliency → center)
-    cropped = _compute_smart_crop(img, crop_w, crop_h)
+    if point is None:
+        cropped = _compute_smart_crop(img, crop_w, crop_h)
+    else:
+        cropped = _crop_at_point(img, point, crop_w, crop_h)
 
     # Resize to fit within max_dim
     return _resize_no_upscale(cropped, max_dim)
@@ -215,32 +249,8 @@ def _generate_teaser_image(img: Image.Image) -> Image.Image:
 # ---------------------------------------------------------------------------
 
 
-def _make_session_factory() -> async_sessionmaker[AsyncSession]:
-    """Create a fresh async session factory per task invocation.
-
-    Avoids the 'Future attached to a different loop' error that occurs when
-    a module-level engine is reused across separate asyncio.run() calls in
-    Celery forked worker processes.
-    """
-    engine = create_async_engine(str(get_settings().database_url), pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-
-
-async def _update_asset_placeholders(
-    parent_asset_id: uuid.UUID, bh: str, color: str
-) -> None:
-    """Store computed blurhash + dominant_color on the media_assets row."""
-    async with _make_session_factory()() as session:
-        await session.execute(
-            update(MediaObject)
-            .where(MediaObject.id == parent_asset_id)
-            .values(blurhash=bh, dominant_color=color)
-        )
-        await session.commit()
-
-
 async def _insert_derived(parent_asset_id: uuid.UUID, variant: str, object_key: str) -> None:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         session.add(
             MediaDerivedAsset(
                 id=uuid.uuid4(),
@@ -263,45 +273,97 @@ async def _derived_exists(session: AsyncSession, parent_asset_id: uuid.UUID, var
 
 
 async def _get_derived_exists(parent_asset_id: uuid.UUID, variant: str) -> bool:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         return await _derived_exists(session, parent_asset_id, variant)
 
 
-def _generate_one_variant(
+async def _get_existing_variants(parent_asset_id: uuid.UUID) -> set[str]:
+    """All variants already derived for an asset, in one query."""
+    async with runtime.get_session_factory()() as session:
+        r = await session.execute(
+            select(MediaDerivedAsset.variant).where(MediaDerivedAsset.parent_asset_id == parent_asset_id)
+        )
+        return set(r.scalars().all())
+
+
+async def _record_derived(
     parent_asset_id: uuid.UUID,
-    parent_object_key: str,
-    content_type: str,
-    variant: str,
-    owner_handle: str | None,
-) -> str | None:
-    """Generate a single variant; upload and return object_key. Returns None if skipped (e.g. idempotent)."""
-    settings = get_settings()
-    bucket = get_media_bucket()
-    max_dim = VARIANT_SPECS.get(variant)
-    if not max_dim:
-        return None
+    derived: dict[str, str],
+    placeholders: tuple[str, str] | None,
+) -> None:
+    """Insert every uploaded variant and store blurhash/dominant color in one transaction."""
+    async with runtime.get_session_factory()() as session:
+        for variant, object_key in derived.items():
+            session.add(
+                MediaDerivedAsset(
+                    id=uuid.uuid4(),
+                    parent_asset_id=parent_asset_id,
+                    variant=variant,
+                    object_key=object_key,
+                )
+            )
+        if placeholders is not None:
+            bh, color = placeholders
+            await session.execute(
+                update(MediaObject)
+                .where(MediaObject.id == parent_asset_id)
+                .values(blurhash=bh, dominant_color=color)
+            )
+        await session.commit()
 
-    # Idempotent: skip if already exists
-    if asyncio.run(_get_derived_exists(parent_asset_id, variant)):
-        logger.info("Derived already exists, skipping", extra={"parent_asset_id": str(parent_asset_id), "variant": variant})
-        return None
 
-    raw = get_object_bytes(bucket, parent_object_key)
+# ---------------------------------------------------------------------------
+# Decode-once variant pipeline
+# ---------------------------------------------------------------------------
+
+
+def _decode_working_image(raw: bytes) -> Image.Image:
+    """Decode the original once, no larger than the biggest variant needs.
+
+    Every output is ≤ VARIANT_SPECS["full"] on its long side (wm_preview max_dim is capped
+    at the same value) and the aspect crops / grid need ≤ WORKING_MIN_SHORT_SIDE on the
+    short side, so the working image keeps at least that. JPEGs use draft mode to let the
+    decoder downscale by 1/2–1/8 in the DCT domain instead of decoding full resolution.
+    """
     img = Image.open(BytesIO(raw))
+    w, h = img.size
+    long_side, short_side = max(w, h), min(w, h)
+    scale = min(1.0, max(VARIANT_SPECS["full"] / long_side, WORKING_MIN_SHORT_SIDE / short_side))
+    target = (max(1, math.ceil(w * scale)), max(1, math.ceil(h * scale)))
+    if scale < 1.0:
+        img.draft("RGB", target)
     img = img.convert("RGB")
+    if img.size[0] > target[0] or img.size[1] > target[1]:
+        img = img.resize(target, Image.Resampling.LANCZOS)
+    return img
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    buf = BytesIO()
+    _strip_exif(img).save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
 
-    # Smart crop for thumb variant: attention-aware square crop before resize
+
+def _render_core_variant(
+    variant: str,
+    work: Image.Image,
+    pyramid: dict[int, Image.Image],
+    focus: Callable[[], tuple[float, float]],
+    owner_handle: str | None,
+) -> Image.Image:
+    """thumb / grid / full from the shared pyramid, with the optional footer watermark."""
+    settings = get_settings()
+    max_dim = VARIANT_SPECS[variant]
     if variant == "thumb":
+        # Smart crop for thumb variant: attention-aware square crop before resize
+        img = work
         w, h = img.size
         crop_dim = min(w, h)
         if w != h and crop_dim >= max_dim:
-            try:
-                img = _compute_smart_crop(img, crop_dim, crop_dim)
-            except Exception:
-                logger.warning("Smart crop failed, falling back to center crop", extra={"variant": variant})
-
-    img = _resize_no_upscale(img, max_dim)
-    img = _strip_exif(img)
+            img = _crop_at_point(img, focus(), crop_dim, crop_dim)
+        img = _resize_no_upscale(img, max_dim)
+    else:
+        img = pyramid[max_dim]
 
     watermark_list = settings.media_watermark_variant_list()
     if should_watermark_variant(variant, settings.media_watermark_enabled, watermark_list):
@@ -317,15 +379,35 @@ def _generate_one_variant(
             padding_pct=settings.media_watermark_padding_pct,
             align=settings.media_watermark_text_align,
         )
-
-    buf = BytesIO()
-    img.save(buf, format="JPEG", quality=85)
-    buf.seek(0)
-    derived_key = _derived_object_key(parent_object_key, variant)
-    put_object_bytes(bucket, derived_key, buf.getvalue(), "image/jpeg")
-
-    asyncio.run(_insert_derived(parent_asset_id, variant, derived_key))
-    return derived_key
+    return img
+
+
+def _upload_outputs(
+    bucket: str, parent_object_key: str, outputs: dict[str, bytes]
+) -> tuple[dict[str, str], dict[str, Exception]]:
+    """Upload encoded variants concurrently: (variant → object_key uploaded, variant → error)."""
+    uploaded: dict[str, str] = {}
+    failed: dict[str, Exception] = {}
+    if not outputs:
+        return uploaded, failed
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_CONCURRENCY, len(outputs))) as pool:
+        futures = {
+            pool.submit(
+                put_object_bytes,
+                bucket,
+                _derived_object_key(parent_object_key, variant),
+                data,
+                "image/jpeg",
+            ): variant
+            for variant, data in outputs.items()
+        }
+        for future, variant in futures.items():
+            try:
+                future.result()
+                uploaded[variant] = _derived_object_key(parent_object_key, variant)
+            except Exception as e:
+                failed[variant] = e
+    return uploaded, failed
 
 
 @shared_task(name="media.generate_thumbnail")
@@ -350,6 +432,10 @@ def generate_derived_variants(
     Optionally apply footer watermark. Uses attention-aware smart crops.
     Idempotent: skips variant if media_derived_assets already has (asset_id, variant).
     Original object_key is never modified.
+
+    The original is fetched and decoded once; every output is derived from one working
+    image and its resize pyramid, the attention point is detected once, uploads run
+    concurrently and all rows are written in a single transaction.
     """
     try:
         parent_id = uuid.UUID(asset_id)
@@ -361,99 +447,79 @@ def generate_derived_variants(
         logger.info("Skip non-image", extra={"asset_id": asset_id})
         return {}
 
-    result: dict[str, str] = {}
+    settings = get_settings()
+    bucket = get_media_bucket()
+    existing = runtime.run(_get_existing_variants(parent_id))
+    try:
+        work = _decode_working_image(get_object_bytes(bucket, object_key))
+    except Exception:
+        logger.exception("Failed to load original", extra={"asset_id": asset_id})
+        raise
+
+    # Clean (unwatermarked) pyramid shared by full/grid, teaser, wm_preview and placeholders.
+    pyramid: dict[int, Image.Image] = {VARIANT_SPECS["full"]: _resize_no_upscale(work, VARIANT_SPECS["full"])}
+    pyramid[VARIANT_SPECS["grid"]] = _resize_no_upscale(pyramid[VARIANT_SPECS["full"]], VARIANT_SPECS["grid"])
+    grid_clean = pyramid[VARIANT_SPECS["grid"]]
+
+    focus_cache: list[tuple[float, float]] = []
+
+    def focus() -> tuple[float, float]:
+        if not focus_cache:
+            try:
+                focus_cache.append(_attention_point(work))
+            except Exception:
+                logger.warning("Attention detection failed, using center", extra={"asset_id": asset_id})
+                focus_cache.append((0.5, 0.5))
+        return focus_cache[0]
+
+    outputs: dict[str, bytes] = {}
     for variant in VARIANT_SPECS:
+        if variant in existing:
+            logger.info("Derived already exists, skipping", extra={"parent_asset_id": asset_id, "variant": variant})
+            continue
         try:
-            derived_key = _generate_one_variant(
-                parent_id,
-                object_key,
-                content_type,
-                variant,
-                owner_handle,
-            )
-            if derived_key:
-                result[variant] = derived_key
+            img = _render_core_variant(variant, work, pyramid, focus, owner_handle)
+            outputs[variant] = _encode_jpeg(img, 85)
         except Exception as e:
             logger.exception("Failed to generate variant", extra={"asset_id": asset_id, "variant": variant})
             raise e
 
     # --- Blurhash + dominant color ---
+    placeholders: tuple[str, str] | None = None
     try:
-        bucket = get_media_bucket()
-        raw = get_object_bytes(bucket, object_key)
-        img = Image.open(BytesIO(raw)).convert("RGB")
-
-        bh = _compute_blurhash(img)
-        color = _compute_dominant_color(img)
-        asyncio.run(_update_asset_placeholders(parent_id, bh, color))
-        result["blurhash"] = bh
-        result["dominant_color"] = color
+        bh = _compute_blurhash(grid_clean)
+        color = _compute_dominant_color(grid_clean)
+        placeholders = (bh, color)
         logger.info("Blurhash + color computed", extra={"asset_id": asset_id, "blurhash": bh, "color": color})
     except Exception:
         logger.exception("Failed to compute blurhash/color", extra={"asset_id": asset_id})
 
     # --- Aspect-ratio crops (feature-gated) ---
-    settings = get_settings()
     if settings.enable_smart_previews:
-        try:
-            bucket = get_media_bucket()
-            raw = get_object_bytes(bucket, object_key)
-            img = Image.open(BytesIO(raw)).convert("RGB")
-
-            for crop_variant, (rw, rh, max_dim) in ASPECT_RATIO_SPECS.items():
-                try:
-                    if asyncio.run(_get_derived_exists(parent_id, crop_variant)):
-                        logger.info("Aspect crop exists, skipping", extra={"asset_id": asset_id, "variant": crop_variant})
-                        continue
-
-                    cropped = _generate_aspect_crop(img, rw, rh, max_dim)
-                    cropped = _strip_exif(cropped)
-                    buf = BytesIO()
-                    cropped.save(buf, format="JPEG", quality=85)
-                    buf.seek(0)
-                    crop_key = _derived_object_key(object_key, crop_variant)
-                    put_object_bytes(bucket, crop_key, buf.getvalue(), "image/jpeg")
-                    asyncio.run(_insert_derived(parent_id, crop_variant, crop_key))
-                    result[crop_variant] = crop_key
-                    logger.info("Aspect crop generated", extra={"asset_id": asset_id, "variant": crop_variant})
-                except Exception:
-                    logger.exception("Failed aspect crop", extra={"asset_id": asset_id, "variant": crop_variant})
-        except Exception:
-            logger.exception("Failed to load image for aspect crops", extra={"asset_id": asset_id})
+        for crop_variant, (rw, rh, max_dim) in ASPECT_RATIO_SPECS.items():
+            if crop_variant in existing:
+                logger.info("Aspect crop exists, skipping", extra={"asset_id": asset_id, "variant": crop_variant})
+                continue
+            try:
+                cropped = _generate_aspect_crop(work, rw, rh, max_dim, focus())
+                outputs[crop_variant] = _encode_jpeg(cropped, 85)
+            except Exception:
+                logger.exception("Failed aspect crop", extra={"asset_id": asset_id, "variant": crop_variant})
 
     # --- Teaser variant (blurred preview for locked posts) ---
-    try:
-        if not asyncio.run(_get_derived_exists(parent_id, "teaser")):
-            bucket = get_media_bucket()
-            raw = get_object_bytes(bucket, object_key)
-            img = Image.open(BytesIO(raw)).convert("RGB")
-            teaser_img = _resize_no_upscale(img, VARIANT_SPECS["grid"])
-            teaser_img = _generate_teaser_image(teaser_img)
-            teaser_img = _strip_exif(teaser_img)
-
-            buf = BytesIO()
-            teaser_img.save(buf, format="JPEG", quality=60)
-            buf.seek(0)
-            teaser_key = _derived_object_key(object_key, "teaser")
-            put_object_bytes(bucket, teaser_key, buf.getvalue(), "image/jpeg")
-            asyncio.run(_insert_derived(parent_id, "teaser", teaser_key))
-            result["teaser"] = teaser_key
-            logger.info("Teaser generated", extra={"asset_id": asset_id, "key": teaser_key})
-        else:
-            logger.info("Teaser already exists, skipping", extra={"asset_id": asset_id})
-    except Exception:
-        logger.exception("Failed to generate teaser", extra={"asset_id": asset_id})
+    if "teaser" not in existing:
+        try:
+            outputs["teaser"] = _encode_jpeg(_generate_teaser_image(grid_clean), 60)
+        except Exception:
+            logger.exception("Failed to generate teaser", extra={"asset_id": asset_id})
+    else:
+        logger.info("Teaser already exists, skipping", extra={"asset_id": asset_id})
 
     # --- Watermarked preview variant (for non-entitled users) ---
     if settings.media_wm_preview_enabled:
-        try:
-            if not asyncio.run(_get_derived_exists(parent_id, "wm_preview")):
-                bucket = get_media_bucket()
-                raw = get_object_bytes(bucket, object_key)
-                img = Image.open(BytesIO(raw)).convert("RGB")
-                wm_img = _resize_no_upscale(img, settings.media_wm_preview_max_dim)
-                wm_img = _strip_exif(wm_img)
-
+        if "wm_preview" not in existing:
+            try:
+                wm_img = _resize_no_upscale(pyramid[VARIANT_SPECS["full"]], settings.media_wm_preview_max_dim)
                 wm_text = settings.media_wm_preview_text
                 if settings.media_wm_preview_include_handle and owner_handle:
                     wm_text = f"{wm_text} @{owner_handle}"
@@ -467,20 +533,31 @@ def generate_derived_variants(
                     stroke_px=settings.media_wm_preview_stroke_px,
                     bg_rect=settings.media_wm_preview_bg_rect,
                 )
-
-                buf = BytesIO()
-                wm_img.save(buf, format="JPEG", quality=75)
-                buf.seek(0)
-                wm_key = _derived_object_key(object_key, "wm_preview")
-                put_object_bytes(bucket, wm_key, buf.getvalue(), "image/jpeg")
-                asyncio.run(_insert_derived(parent_id, "wm_preview", wm_key))
-                result["wm_preview"] = wm_key
-                logger.info("wm_preview generated", extra={"asset_id": asset_id, "key": wm_key})
-            else:
-                logger.info("wm_preview already exists, skipping", extra={"asset_id": asset_id})
-        except Exception:
-            logger.exception("Failed to generate wm_preview", extra={"asset_id": asset_id})
-
+                outputs["wm_preview"] = _encode_jpeg(wm_img, 75)
+            except Exception:
+                logger.exception("Failed to generate wm_preview", extra={"asset_id": asset_id})
+        else:
+            logger.info("wm_preview already exists, skipping", extra={"asset_id": asset_id})
+
+    uploaded, failed = _upload_outputs(bucket, object_key, outputs)
+    for variant, err in failed.items():
+        logger.error(
+            "Failed to upload variant",
+            exc_info=err,
+            extra={"asset_id": asset_id, "variant": variant},
+        )
+    runtime.run(_record_derived(parent_id, uploaded, placeholders))
+
+    # Core variants are required: surface their failure to Celery after recording the rest.
+    core_failures = [v for v in VARIANT_SPECS if v in failed]
+    if core_failures:
+        raise failed[core_failures[0]]
+
+    result: dict[str, str] = {v: uploaded[v] for v in VARIANT_SPECS if v in uploaded}
+    if placeholders is not None:
+        result["blurhash"], result["dominant_color"] = placeholders
+    result.update({v: k for v, k in uploaded.items() if v not in VARIANT_SPECS})
+    logger.info("Derived variants generated", extra={"asset_id": asset_id, "variants": sorted(uploaded)})
     return result
 
 
@@ -538,7 +615,7 @@ def generate_video_poster(asset_id: str) -> str | None:
         logger.warning("Invalid asset_id", extra={"asset_id": asset_id})
         return None
 
-    if asyncio.run(_get_derived_exists(parent_id, POSTER_VARIANT)):
+    if runtime.run(_get_derived_exists(parent_id, POSTER_VARIANT)):
         logger.info("Poster already exists", extra={"asset_id": asset_id})
         return None
 
@@ -575,7 +652,7 @@ def generate_video_poster(asset_id: str) -> str | None:
 
     object_key = _poster_object_key(parent_id)
     put_object_bytes(bucket, object_key, poster_bytes, POSTER_CONTENT_TYPE)
-    asyncio.run(_insert_derived(parent_id, POSTER_VARIANT, object_key))
+    runtime.run(_insert_derived(parent_id, POSTER_VARIANT, object_key))
     logger.info("Poster generated", extra={"asset_id": asset_id, "object_key": object_key})
     return object_key
 
@@ -583,7 +660,7 @@ def generate_video_poster(asset_id: str) -> str | None:
 def _get_video_object_key(parent_asset_id: uuid.UUID) -> str:
     """Fetch original object_key for the video asset from DB."""
     async def _fetch() -> str:
-        async with _make_session_factory()() as session:
+        async with runtime.get_session_factory()() as session:
             r = await session.execute(
                 select(MediaObject.object_key).where(MediaObject.id == parent_asset_id).limit(1)
             )
@@ -591,4 +668,4 @@ def _get_video_object_key(parent_asset_id: uuid.UUID) -> str:
             if not row:
                 raise ValueError(f"Media asset not found: {parent_asset_id}")
             return row
-    return asyncio.run(_fetch())
+    return runtime.run(_fetch())
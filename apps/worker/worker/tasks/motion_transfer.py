@@ -11,7 +11,6 @@ frontend can show granular progress to the user.
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
 import subprocess
@@ -23,9 +22,8 @@ from io import BytesIO
 from celery import shared_task
 from PIL import Image
 from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.settings import get_settings
+from worker import runtime
 from worker.storage_io import get_media_bucket, get_object_bytes, put_object_bytes
 
 logger = logging.getLogger(__name__)
@@ -34,11 +32,6 @@ MAX_SOURCE_VIDEO_BYTES = 200_000_000  # 200 MB
 MAX_SOURCE_DURATION_SEC = 30.0
 
 
-def _make_session_factory() -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(str(get_settings().database_url), pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-
-
 def _result_object_key(job_id: str, ext: str = "mp4") -> str:
     return f"ai-tools/{job_id}/result.{ext}"
 
@@ -50,7 +43,7 @@ def _preview_object_key(job_id: str) -> str:
 async def _load_job(job_id: str) -> dict | None:
     from app.modules.ai_tools.tool_models import AiToolJob
 
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(AiToolJob).where(AiToolJob.id == uuid.UUID(job_id))
         )
@@ -88,7 +81,7 @@ async def _update_job(
     if params is not None:
         values["params"] = params
 
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         await session.execute(
             update(AiToolJob)
             .where(AiToolJob.id == uuid.UUID(job_id))
@@ -151,7 +144,7 @@ def _remux_audio(source_video_bytes: bytes, generated_video_bytes: bytes) -> byt
 def _update_stage(job_id: str, params: dict, stage: str, progress: float) -> dict:
     """Update stage/progress in params and persist to DB."""
     updated = {**params, "stage": stage, "progress": round(progress, 2)}
-    asyncio.run(_update_job(job_id, "processing", params=updated))
+    runtime.run(_update_job(job_id, "processing", params=updated))
     return updated
 
 
@@ -176,7 +169,7 @@ def motion_transfer(self, job_id: str) -> str | None:
     logger.info("motion_transfer START", extra={"job_id": job_id})
 
     # --- Load and check idempotency ---
-    job = asyncio.run(_load_job(job_id))
+    job = runtime.run(_load_job(job_id))
     if not job:
         logger.warning("Job not found", extra={"job_id": job_id})
         return None
@@ -191,7 +184,7 @@ def motion_transfer(self, job_id: str) -> str | None:
         logger.info("Job was canceled, skipping", extra={"job_id": job_id})
         return None
 
-    asyncio.run(_update_job(job_id, "processing"))
+    runtime.run(_update_job(job_id, "processing"))
 
     try:
         # =============================================
@@ -390,7 +383,7 @@ def motion_transfer(self, job_id: str) -> str | None:
 
         params = _update_stage(job_id, final_params, "completed", 1.0)
 
-        asyncio.run(
+        runtime.run(
             _update_job(job_id, "ready", result_object_key=result_key, params=final_params)
         )
 
@@ -408,7 +401,7 @@ def motion_transfer(self, job_id: str) -> str | None:
     except Exception as e:
         logger.exception("motion_transfer FAILED", extra={"job_id": job_id})
         error_params = {**params, "stage": "failed", "progress": 0.0}
-        asyncio.run(
+        runtime.run(
             _update_job(
                 job_id, "failed",
                 error_message=str(e)[:500],
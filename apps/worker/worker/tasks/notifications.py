@@ -1,14 +1,14 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import uuid
 from datetime import datetime, timezone
 
 from celery import shared_task
 
-from app.db.session import async_session_factory
+from app.modules.notifications.broadcast import run_broadcast_job, run_pending_broadcasts
 from app.modules.notifications.models import Notification
+from worker import runtime
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 @shared_task(name="notify.create_notification")
 def create_notification(user_id: str, notification_type: str, payload: dict) -> str:
     async def _run() -> str:
-        async with async_session_factory() as session:
+        async with runtime.get_session_factory()() as session:
             notification = Notification(
                 id=uuid.uuid4(),
                 user_id=uuid.UUID(user_id),
@@ -35,5 +35,31 @@ def create_notification(user_id: str, notification_type: str, payload: dict) ->
             )
             return str(notification.id)
 
-    return asyncio.run(_run())
+    return runtime.run(_run())
 
+
+@shared_task(name="notify.run_broadcast")
+def run_broadcast(job_id: str) -> str | None:
+    """Run an admin broadcast job (enqueued by the admin endpoint)."""
+
+    async def _run() -> str | None:
+        async with runtime.get_session_factory()() as session:
+            return await run_broadcast_job(session, uuid.UUID(job_id))
+
+    status = runtime.run(_run())
+    logger.info("broadcast_job_run job_id=%s status=%s", job_id, status)
+    return status
+
+
+@shared_task(name="notify.resume_broadcasts")
+def resume_broadcasts() -> int:
+    """Run broadcast jobs that were never picked up or whose worker died (every minute)."""
+
+    async def _run() -> int:
+        async with runtime.get_session_factory()() as session:
+            return await run_pending_broadcasts(session)
+
+    resumed = runtime.run(_run())
+    if resumed:
+        logger.info("broadcast_jobs_resumed count=%s", resumed)
+    return resumed
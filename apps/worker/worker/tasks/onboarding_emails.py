@@ -10,17 +10,17 @@ Runs daily via Celery Beat.
 
 from __future__ import annotations
 
-import asyncio
 import logging
 from collections.abc import Callable
 from datetime import datetime, timedelta, timezone
 
 from celery import shared_task
-from sqlalchemy import select
+from sqlalchemy import Row, select
 
-from app.db.session import async_session_factory
 from app.modules.auth.models import User
-from app.modules.onboarding.mail import _wrap_html, get_mail_provider
+from app.modules.notifications.broadcast import send_emails_to_rows
+from app.modules.onboarding.mail import GenericEmail, _wrap_html
+from worker import runtime
 
 logger = logging.getLogger(__name__)
 
@@ -225,43 +225,29 @@ async def _send_onboarding_batch(
     target_time = now - timedelta(days=delay_days)
     window_start = target_time - timedelta(hours=WINDOW_HOURS)
 
-    provider = get_mail_provider()
-    sent = 0
-    failed = 0
+    emails = {"creator": get_email_fn_creator(), "fan": get_email_fn_fan()}
 
-    async with async_session_factory() as session:
+    def _build(row: Row) -> GenericEmail:
+        subject, text_body, html_body = emails["creator" if row.role == "creator" else "fan"]
+        return GenericEmail(
+            recipient=row.email, subject=subject, text_body=text_body, html_body=html_body
+        )
+
+    async with runtime.get_session_factory()() as session:
         # Find users who transitioned to EMAIL_VERIFIED within the time window.
         # We use updated_at as a proxy for verification time since the state
         # transition updates it.
-        result = await session.execute(
-            select(User.email, User.role, User.updated_at)
+        sent, failed, total = await send_emails_to_rows(
+            session,
+            select(User.email, User.role)
             .where(User.is_active == True)  # noqa: E712
             .where(User.onboarding_state != "CREATED")  # must be verified
             .where(User.updated_at >= window_start)
-            .where(User.updated_at < target_time)
+            .where(User.updated_at < target_time),
+            _build,
         )
-        users = result.all()
-        logger.info("[%s] Found %d users verified ~%d days ago", label, len(users), delay_days)
-
-        for email, role, _updated_at in users:
-            try:
-                if role == "creator":
-                    subject, text_body, html_body = get_email_fn_creator()
-                else:
-                    subject, text_body, html_body = get_email_fn_fan()
-
-                await provider.send_generic_email(
-                    recipient=email,
-                    subject=subject,
-                    text_body=text_body,
-                    html_body=html_body,
-                )
-                sent += 1
-            except Exception:
-                failed += 1
-                logger.exception("[%s] Failed to send to %s", label, email)
-
-    result_msg = f"[{label}] {sent} sent, {failed} failed, {len(users)} eligible"
+
+    result_msg = f"[{label}] {sent} sent, {failed} failed, {total} eligible"
     logger.info(result_msg)
     return result_msg
 
@@ -302,4 +288,4 @@ def send_sequence_emails() -> str:
 
         return " | ".join(results)
 
-    return asyncio.run(_run())
+    return runtime.run(_run())
@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 
 from celery import shared_task
 
-from app.db.session import async_session_factory
 from app.modules.posts.service import publish_due_scheduled_posts
+from app.modules.posts.timeline import refresh_pull_creators
+from worker import runtime
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +14,22 @@ logger = logging.getLogger(__name__)
 @shared_task(name="posts.publish_due_scheduled")
 def publish_due_scheduled() -> int:
     async def _run() -> int:
-        async with async_session_factory() as session:
+        async with runtime.get_session_factory()() as session:
             return await publish_due_scheduled_posts(session)
 
-    published = asyncio.run(_run())
+    published = runtime.run(_run())
     logger.info("published_due_scheduled_posts count=%s", published)
     return published
 
+
+
+@shared_task(name="posts.refresh_feed_pull_creators")
+def refresh_feed_pull_creators() -> dict[str, int]:
+    async def _run() -> dict[str, int]:
+        async with runtime.get_session_factory()() as session:
+            refresh = await refresh_pull_creators(session)
+            return {"pulled": refresh.pulled, "pushed": refresh.pushed}
+
+    result = runtime.run(_run())
+    logger.info("refreshed_feed_pull_creators pulled=%s pushed=%s", result["pulled"], result["pushed"])
+    return result
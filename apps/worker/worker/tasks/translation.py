@@ -2,16 +2,14 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import uuid
 
 from celery import shared_task
 from sqlalchemy import update
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.settings import get_settings
 from app.modules.ai_tools.translation_models import PostTranslation
+from worker import runtime
 
 logger = logging.getLogger(__name__)
 
@@ -63,15 +61,10 @@ def _translate_text(text: str, source_lang: str, target_lang: str) -> str:
     return argostranslate.translate.translate(text, source_lang, target_lang)
 
 
-def _make_session_factory() -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(str(get_settings().database_url), pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-
-
 async def _update_translation(
     translation_id: uuid.UUID, translated_text: str | None, status: str
 ) -> None:
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         await session.execute(
             update(PostTranslation)
             .where(PostTranslation.id == translation_id)
@@ -83,7 +76,7 @@ async def _update_translation(
 async def _get_translation_status(translation_id: uuid.UUID) -> str | None:
     from sqlalchemy import select
 
-    async with _make_session_factory()() as session:
+    async with runtime.get_session_factory()() as session:
         r = await session.execute(
             select(PostTranslation.status)
             .where(PostTranslation.id == translation_id)
@@ -117,11 +110,11 @@ def translate_caption(
         return {"status": "error", "detail": "invalid_id"}
 
     if target_lang not in SUPPORTED_PAIRS:
-        asyncio.run(_update_translation(tid, None, "failed"))
+        runtime.run(_update_translation(tid, None, "failed"))
         return {"status": "error", "detail": f"unsupported_language: {target_lang}"}
 
     # Idempotent check
-    current_status = asyncio.run(_get_translation_status(tid))
+    current_status = runtime.run(_get_translation_status(tid))
     if current_status == "completed":
         logger.info("Translation already completed, skipping: %s", translation_id)
         return {"status": "skipped"}
@@ -130,7 +123,7 @@ def translate_caption(
         # Limit input to prevent excessive CPU usage
         truncated = source_text[:2000]
         translated = _translate_text(truncated, source_lang, target_lang)
-        asyncio.run(_update_translation(tid, translated, "completed"))
+        runtime.run(_update_translation(tid, translated, "completed"))
         logger.info(
             "Translation completed: %s (%s→%s)",
             translation_id, source_lang, target_lang,
@@ -138,5 +131,5 @@ def translate_caption(
         return {"status": "completed", "target_lang": target_lang}
     except Exception as exc:
         logger.exception("Translation failed: %s", translation_id)
-        asyncio.run(_update_translation(tid, None, "failed"))
+        runtime.run(_update_translation(tid, None, "failed"))
         raise self.retry(exc=exc)
@@ -1614,7 +1614,11 @@ resource "aws_ecs_task_definition" "worker" {
       { name = "S3_BUCKET", value = module.s3_media.bucket_id },
       { name = "AWS_REGION", value = var.aws_region },
       { name = "REDIS_URL", value = local.redis_url },
-      { name = "CELERY_CONCURRENCY", value = "1" },
+      # One worker per queue class (worker.profiles): heavy AI jobs never block media,
+      # notifications or billing
+      { name = "WORKER_PROFILES", value = "fast ml-light ml-heavy" },
+      # Load the AI safety models in the ml-light worker before its pool starts
+      { name = "WORKER_WARMUP_MODELS", value = var.enable_ai_safety ? "ml-light=nsfw,age,sentence" : "" },
       { name = "ENABLE_NOTIFICATIONS", value = tostring(var.enable_notifications) },
       { name = "ENABLE_SCHEDULED_POSTS", value = tostring(var.enable_scheduled_posts) },
       { name = "AI_PROVIDER", value = var.ai_provider },
@@ -1642,6 +1646,14 @@ resource "aws_ecs_task_definition" "worker" {
       { name = "HF_TOKEN", valueFrom = "arn:aws:secretsmanager:us-east-1:208030346312:secret:zinovia-fans-prod-hf-token-Hospv2" },
       { name = "RESEND_API_KEY", valueFrom = module.secrets.resend_api_key_arn }
     ]
+    # worker.ml.warmup writes the file after model warm-up, once the pool is consuming
+    healthCheck = {
+      command     = ["CMD-SHELL", "test -f /tmp/worker-ready || exit 1"]
+      interval    = 30
+      timeout     = 5
+      retries     = 3
+      startPeriod = 300
+    }
   }])
 }
 